@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark da codificação de audit_logs - Invictus Poker Team
+Compara o formato legado (JSON em texto + IP/User-Agent por extenso) com o
+formato compacto (payload com diffs comprimidos + dimensões internadas):
+tamanho do arquivo SQLite e vazão da exportação CSV.
+
+Uso: python benchmarks/audit_encoding_benchmark.py [--rows 50000]
+"""
+
+import os
+import sys
+import csv
+import io
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.audit_codec import encode_payload, decode_payload, to_legacy_text
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Mobile Safari/537.36',
+    'System',
+]
+ACTIONS = ['balance_updated', 'reload_approved', 'withdrawal_approved', 'user_updated', 'transaction_created']
+
+LEGACY_SCHEMA = """
+CREATE TABLE audit_logs (
+    id INTEGER PRIMARY KEY, user_id INTEGER, action TEXT, entity_type TEXT, entity_id INTEGER,
+    old_values TEXT, new_values TEXT, ip_address TEXT, user_agent TEXT, created_at TEXT
+);
+"""
+COMPACT_SCHEMA = """
+CREATE TABLE audit_ip_addresses (id INTEGER PRIMARY KEY, value TEXT UNIQUE);
+CREATE TABLE audit_user_agents (id INTEGER PRIMARY KEY, value TEXT UNIQUE);
+CREATE TABLE audit_logs (
+    id INTEGER PRIMARY KEY, user_id INTEGER, action TEXT, entity_type TEXT, entity_id INTEGER,
+    payload BLOB, ip_address_id INTEGER, user_agent_id INTEGER, created_at TEXT
+);
+"""
+
+
+def generate_rows(count, seed=42):
+    """Registros sintéticos com o perfil das rotas auditadas."""
+    rng = random.Random(seed)
+    ips = [f"177.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(40)]
+    for i in range(count):
+        account = {
+            'id': rng.randint(1, 500), 'user_id': rng.randint(1, 60), 'platform_id': rng.randint(1, 8),
+            'account_name': f"player_{rng.randint(1, 60)}", 'has_account': True,
+            'current_balance': round(rng.uniform(0, 5000), 2), 'total_reloads': round(rng.uniform(0, 2000), 2),
+            'total_withdrawals': round(rng.uniform(0, 2000), 2), 'notes': 'Atualização via planilha',
+        }
+        updated = dict(account, current_balance=round(account['current_balance'] + rng.uniform(-200, 200), 2))
+        yield {
+            'user_id': rng.randint(1, 60),
+            'action': rng.choice(ACTIONS),
+            'entity_type': 'Account',
+            'entity_id': account['id'],
+            'old_values': account,
+            'new_values': updated,
+            'ip_address': rng.choice(ips),
+            'user_agent': rng.choice(USER_AGENTS),
+            'created_at': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00",
+        }
+
+
+def build_legacy(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany(
+        "INSERT INTO audit_logs (user_id, action, entity_type, entity_id, old_values, new_values, "
+        "ip_address, user_agent, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(r['user_id'], r['action'], r['entity_type'], r['entity_id'], json.dumps(r['old_values']),
+          json.dumps(r['new_values']), r['ip_address'], r['user_agent'], r['created_at']) for r in rows]
+    )
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def build_compact(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript(COMPACT_SCHEMA)
+    ip_ids, agent_ids = {}, {}
+
+    def intern(table, cache, value):
+        if value not in cache:
+            cache[value] = conn.execute(f"INSERT INTO {table} (value) VALUES (?)", (value,)).lastrowid
+        return cache[value]
+
+    conn.executemany(
+        "INSERT INTO audit_logs (user_id, action, entity_type, entity_id, payload, ip_address_id, "
+        "user_agent_id, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [(r['user_id'], r['action'], r['entity_type'], r['entity_id'],
+          encode_payload(r['old_values'], r['new_values']),
+          intern('audit_ip_addresses', ip_ids, r['ip_address']),
+          intern('audit_user_agents', agent_ids, r['user_agent']), r['created_at']) for r in rows]
+    )
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def export_legacy(path):
+    conn = sqlite3.connect(path)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for row in conn.execute("SELECT id, created_at, action, entity_type, entity_id, old_values, new_values, "
+                            "ip_address, user_agent FROM audit_logs ORDER BY id"):
+        writer.writerow(row)
+    conn.close()
+    return out.tell()
+
+
+def export_compact(path):
+    conn = sqlite3.connect(path)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    query = (
+        "SELECT l.id, l.created_at, l.action, l.entity_type, l.entity_id, l.payload, i.value, u.value "
+        "FROM audit_logs l LEFT JOIN audit_ip_addresses i ON i.id = l.ip_address_id "
+        "LEFT JOIN audit_user_agents u ON u.id = l.user_agent_id ORDER BY l.id"
+    )
+    for log_id, created_at, action, entity_type, entity_id, payload, ip_address, user_agent in conn.execute(query):
+        old_values, new_values = decode_payload(payload)
+        writer.writerow([log_id, created_at, action, entity_type, entity_id,
+                         to_legacy_text(old_values), to_legacy_text(new_values), ip_address, user_agent])
+    conn.close()
+    return out.tell()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    rows = list(generate_rows(args.rows))
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        compact_path = os.path.join(tmp, 'compact.db')
+
+        legacy_insert = timed(build_legacy, legacy_path, rows)
+        compact_insert = timed(build_compact, compact_path, rows)
+        legacy_export = timed(export_legacy, legacy_path)
+        compact_export = timed(export_compact, compact_path)
+
+        legacy_size = os.path.getsize(legacy_path)
+        compact_size = os.path.getsize(compact_path)
+
+    print(f"Linhas: {args.rows}")
+    print(f"{'':<22}{'legado':>14}{'compacto':>14}")
+    print(f"{'Tamanho (MB)':<22}{legacy_size / 1e6:>14.2f}{compact_size / 1e6:>14.2f}"
+          f"   ({compact_size / legacy_size:.0%})")
+    print(f"{'Inserção (linhas/s)':<22}{args.rows / legacy_insert:>14,.0f}{args.rows / compact_insert:>14,.0f}")
+    print(f"{'Exportação (linhas/s)':<22}{args.rows / legacy_export:>14,.0f}{args.rows / compact_export:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
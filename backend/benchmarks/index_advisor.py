@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Consultor de índices - Invictus Poker Team
+Executa as rotas principais (gestor e jogador) pelo cliente de teste,
+captura cada SQL emitido com os parâmetros reais, pede o plano ao banco
+(EXPLAIN QUERY PLAN no SQLite; EXPLAIN (FORMAT JSON) no PostgreSQL, com
+--analyze para EXPLAIN ANALYZE nos SELECTs) e propõe índices compostos ou
+parciais para as tabelas varridas por completo, acessadas por um índice que
+cobre só parte dos filtros ou ordenadas em árvore temporária.
+
+Regras da proposta, por tabela de cada consulta:
+- colunas de igualdade (=, IN, IS) primeiro, depois a primeira coluna de
+  intervalo (>, <, BETWEEN) ou, sem intervalo, as colunas do ORDER BY
+- igualdade contra um valor de coluna com poucos valores distintos que
+  seleciona até 20% das linhas vira índice parcial (WHERE col = valor)
+- propostas já atendidas por um índice existente (mesmo prefixo e mesma
+  condição) são omitidas
+
+As propostas aceitas entram nos modelos (__table_args__) e chegam aos bancos
+existentes pela migration src/database/migrations/add_query_indexes.py.
+
+Uso:
+  python benchmarks/index_advisor.py                       # banco temporário simulado
+  python benchmarks/index_advisor.py --players 300 --days 365 --json advice.json
+  python benchmarks/index_advisor.py --database-url sqlite:////caminho/app.db
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Índice parcial: coluna com até N valores distintos e valor com até esta fração das linhas
+PARTIAL_MAX_DISTINCT = 8
+PARTIAL_MAX_SHARE = 0.2
+
+EQUALITY_OPS = {'=', 'IN', 'IS'}
+RANGE_OPS = {'>', '>=', '<', '<=', 'BETWEEN'}
+
+PREDICATE = re.compile(
+    r"\b(\w+)\.(\w+)\s*(>=|<=|!=|<>|=|>|<|\bIN\b|\bIS\b|\bBETWEEN\b|\bLIKE\b)\s*"
+    r"(\?|%\(\w+\)s|'[^']*'|-?\d+(?:\.\d+)?\b|\(|NULL\b|NOT NULL\b)?",
+    re.IGNORECASE
+)
+TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+AS\s+(\w+))?", re.IGNORECASE)
+ORDER_BY = re.compile(r"\bORDER BY\s+(.+?)(?:\s+LIMIT\b|\s+OFFSET\b|\)|$)", re.IGNORECASE | re.DOTALL)
+ORDER_COLUMN = re.compile(r"(\w+)\.(\w+)")
+SQLITE_ACCESS = re.compile(
+    r"^(SCAN|SEARCH) (\w+)(?: AS (\w+))?"
+    r"(?: USING (?:(?:COVERING )?INDEX (\w+)|INTEGER PRIMARY KEY|ROWID))?(?: \((.*)\))?"
+)
+CONDITION_COLUMN = re.compile(r"\(?(\w+)\s*(?:=|>|<|>=|<=)")
+
+# Rotas exercitadas: (papel, caminho); {player_id} é o primeiro jogador
+ROUTES = [
+    ('admin', '/api/dashboard/manager'),
+    ('admin', '/api/dashboard/team-financials'),
+    ('admin', '/api/dashboard/team-pnl-series?days=90'),
+    ('admin', '/api/dashboard/statistics'),
+    ('admin', '/api/dashboard/performance'),
+    ('admin', '/api/planilhas/user/{player_id}'),
+    ('admin', '/api/users/{player_id}/bankroll-history?days=90'),
+    ('admin', '/api/reload-requests/'),
+    ('admin', '/api/withdrawal-requests/'),
+    ('admin', '/api/audit/logs?cursor='),
+    ('admin', '/api/reports/monthly-detailed?month={month}&year={year}'),
+    ('player', '/api/dashboard/player'),
+    ('player', '/api/notifications/'),
+    ('player', '/api/notifications/stats'),
+    ('player', '/api/reload-requests/'),
+]
+
+
+@dataclass
+class CapturedQuery:
+    """SQL emitido pelas rotas (agrupado pelo texto)."""
+    statement: str
+    parameters: object
+    count: int = 0
+    endpoints: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class Access:
+    """Acesso a uma tabela no plano: varredura ou busca por índice."""
+    alias: str
+    table: Optional[str]
+    kind: str  # 'scan' | 'search' | 'rowid'
+    index: Optional[str] = None
+    columns: Tuple[str, ...] = ()
+
+
+@dataclass
+class IndexProposal:
+    table: str
+    columns: Tuple[str, ...]
+    where: Optional[str] = None
+    reasons: Set[str] = field(default_factory=set)
+    endpoints: Set[str] = field(default_factory=set)
+    statements: int = 0
+    executions: int = 0
+    sample: str = ''
+    plan: List[str] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        name = f"ix_{self.table}_{'_'.join(self.columns)}"
+        if self.where:
+            name += '_where_' + '_'.join(re.findall(r'\w+', self.where))
+        return name[:63]
+
+    def ddl(self) -> str:
+        sql = f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table} ({', '.join(self.columns)})"
+        return sql + (f" WHERE {self.where}" if self.where else '')
+
+    def model_line(self) -> str:
+        columns = ', '.join(repr(c) for c in self.columns)
+        if not self.where:
+            return f"db.Index({self.name!r}, {columns})"
+        return (f"db.Index({self.name!r}, {columns}, sqlite_where=db.text({self.where!r}), "
+                f"postgresql_where=db.text({self.where!r}))")
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name, 'table': self.table, 'columns': list(self.columns), 'where': self.where,
+            'reasons': sorted(self.reasons), 'endpoints': sorted(self.endpoints),
+            'statements': self.statements, 'executions': self.executions,
+            'ddl': self.ddl(), 'model': self.model_line(), 'sample': self.sample, 'plan': self.plan,
+        }
+
+
+class QueryCapture:
+    """Registra os SQL executados no engine, com o endpoint Flask de origem."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.queries: Dict[str, CapturedQuery] = {}
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        from flask import has_request_context, request
+        if executemany:
+            return
+        key = ' '.join(statement.split())
+        if not re.match(r'(SELECT|WITH|UPDATE|DELETE)\b', key, re.IGNORECASE):
+            return
+        query = self.queries.get(key)
+        if query is None:
+            query = self.queries[key] = CapturedQuery(statement=statement, parameters=parameters)
+        query.count += 1
+        if has_request_context() and request.endpoint:
+            query.endpoints.add(request.endpoint)
+
+
+# ----------------------------------------------------------------------
+# Planos
+# ----------------------------------------------------------------------
+
+def explain(connection, statement: str, parameters, analyze: bool = False) -> Tuple[List[Access], bool, List[str]]:
+    """Plano da consulta: (acessos por tabela, ordenação em árvore temporária, linhas do plano)."""
+    if connection.dialect.name == 'postgresql':
+        return _explain_postgresql(connection, statement, parameters, analyze)
+    rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    details = [row[-1] for row in rows]
+    accesses = []
+    for detail in details:
+        match = SQLITE_ACCESS.match(detail)
+        if not match:
+            continue
+        kind, table, alias, index, condition = match.groups()
+        if kind == 'SEARCH' and index is None:
+            kind = 'rowid'
+        columns = tuple(dict.fromkeys(CONDITION_COLUMN.findall(condition or '')))
+        accesses.append(Access(alias=alias or table, table=table, kind=kind.lower() if kind != 'rowid' else kind,
+                               index=index, columns=columns))
+    sorts = any('USE TEMP B-TREE FOR ORDER BY' in detail for detail in details)
+    return accesses, sorts, details
+
+
+def _explain_postgresql(connection, statement, parameters, analyze):
+    analyze = analyze and re.match(r'\s*(SELECT|WITH)\b', statement, re.IGNORECASE)
+    options = 'ANALYZE, FORMAT JSON' if analyze else 'FORMAT JSON'
+    plan = connection.exec_driver_sql(f'EXPLAIN ({options}) ' + statement, parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    accesses, details = [], []
+    sorts = False
+
+    def walk(node, depth=0):
+        nonlocal sorts
+        node_type = node.get('Node Type', '')
+        timing = f" ({node['Actual Total Time']:.2f} ms)" if 'Actual Total Time' in node else ''
+        details.append(f"{'  ' * depth}{node_type} {node.get('Relation Name', '')}{timing}".rstrip())
+        relation = node.get('Relation Name')
+        alias = node.get('Alias', relation)
+        if node_type == 'Seq Scan':
+            accesses.append(Access(alias=alias, table=relation, kind='scan'))
+        elif relation and node_type in ('Index Scan', 'Index Only Scan', 'Bitmap Heap Scan'):
+            condition = node.get('Index Cond') or node.get('Recheck Cond') or ''
+            accesses.append(Access(alias=alias, table=relation, kind='search', index=node.get('Index Name'),
+                                   columns=tuple(dict.fromkeys(CONDITION_COLUMN.findall(condition)))))
+        elif node_type in ('Sort', 'Incremental Sort'):
+            sorts = True
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    walk(plan[0]['Plan'])
+    return accesses, sorts, details
+
+
+# ----------------------------------------------------------------------
+# Predicados e propostas
+# ----------------------------------------------------------------------
+
+def _aliases(statement: str) -> Dict[str, str]:
+    aliases = {}
+    for table, alias in TABLE_ALIAS.findall(statement):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def _bound_value(statement: str, parameters, match) -> Tuple[bool, object]:
+    """Valor comparado no predicado (literal no SQL ou parâmetro); (False, None) se desconhecido."""
+    token = match.group(4)
+    if token is None or token in ('(',) or token.upper().startswith(('NULL', 'NOT')):
+        return False, None
+    if token == '?':
+        position = statement[:match.start(4)].count('?')
+        if isinstance(parameters, (list, tuple)) and position < len(parameters):
+            return True, parameters[position]
+        return False, None
+    if token.startswith('%('):
+        name = token[2:-2]
+        if isinstance(parameters, dict) and name in parameters:
+            return True, parameters[name]
+        return False, None
+    if token.startswith("'"):
+        return True, token[1:-1]
+    return True, float(token) if '.' in token else int(token)
+
+
+def predicates(statement: str, parameters) -> Dict[str, dict]:
+    """Colunas de igualdade, intervalo e ordenação por alias de tabela."""
+    by_alias = defaultdict(lambda: {'equality': [], 'range': [], 'order': [], 'values': {}})
+    # Só a partir do FROM: comparações na lista do SELECT (CASE) não filtram
+    start = max(statement.upper().find(' FROM '), 0)
+    for match in PREDICATE.finditer(statement, start):
+        alias, column, op, token = match.group(1), match.group(2), match.group(3).upper(), match.group(4)
+        if token is None:  # junção entre colunas (a.x = b.y)
+            continue
+        entry = by_alias[alias]
+        if op in EQUALITY_OPS and column not in entry['equality']:
+            entry['equality'].append(column)
+            if op == '=':
+                known, value = _bound_value(statement, parameters, match)
+                if known:
+                    entry['values'][column] = value
+        elif op in RANGE_OPS and column not in entry['range'] and column not in entry['equality']:
+            entry['range'].append(column)
+    order = ORDER_BY.search(statement)
+    if order:
+        for alias, column in ORDER_COLUMN.findall(order.group(1)):
+            if column not in by_alias[alias]['order']:
+                by_alias[alias]['order'].append(column)
+    return by_alias
+
+
+def _literal(value) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _distinct(connection, table: str, column: str, cache: dict) -> Tuple[int, int]:
+    """(valores distintos, linhas) da coluna."""
+    from sqlalchemy import text
+    key = (table, column)
+    if key not in cache:
+        cache[key] = tuple(connection.execute(
+            text(f'SELECT COUNT(DISTINCT {column}), COUNT(*) FROM {table}')
+        ).one())
+    return cache[key]
+
+
+def _partial_condition(connection, table: str, column: str, value, cache: dict) -> Optional[str]:
+    """'col = valor' se a coluna tem poucos valores e o valor é seletivo."""
+    from sqlalchemy import text
+    key = (table, column, repr(value))
+    if key not in cache:
+        condition = None
+        distinct, total = _distinct(connection, table, column, cache)
+        if total and distinct <= PARTIAL_MAX_DISTINCT:
+            matching = connection.execute(
+                text(f'SELECT COUNT(*) FROM {table} WHERE {column} = :value'), {'value': value}
+            ).scalar()
+            if matching and matching / total <= PARTIAL_MAX_SHARE:
+                condition = f'{column} = {_literal(value)}'
+        cache[key] = condition
+    return cache[key]
+
+
+def _normalize_where(where) -> Optional[str]:
+    if where is None:
+        return None
+    return re.sub(r'[\s()"]', '', str(where)).lower()
+
+
+def _existing_indexes(inspector, table: str) -> List[Tuple[Tuple[str, ...], Optional[str]]]:
+    """(colunas, condição normalizada) dos índices e da chave primária da tabela."""
+    indexes = []
+    for index in inspector.get_indexes(table):
+        options = index.get('dialect_options', {})
+        where = options.get('sqlite_where', options.get('postgresql_where'))
+        indexes.append((tuple(index['column_names']), _normalize_where(where)))
+    primary_key = inspector.get_pk_constraint(table).get('constrained_columns') or ()
+    indexes.append((tuple(primary_key), None))
+    return indexes
+
+
+def _covered(existing, columns: Tuple[str, ...], where: Optional[str]) -> bool:
+    where = _normalize_where(where)
+    return any(index[:len(columns)] == columns and index_where == where for index, index_where in existing)
+
+
+def advise(connection, queries: Dict[str, CapturedQuery], analyze: bool = False) -> List[IndexProposal]:
+    """Propostas de índice a partir dos planos das consultas capturadas."""
+    from sqlalchemy import inspect
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    existing = {table: _existing_indexes(inspector, table) for table in tables}
+    proposals: Dict[Tuple[str, Tuple[str, ...], Optional[str]], IndexProposal] = {}
+    stats_cache = {}
+
+    for query in queries.values():
+        try:
+            accesses, sorts, plan = explain(connection, query.statement, query.parameters, analyze)
+        except Exception:
+            continue
+        found = predicates(query.statement, query.parameters)
+        aliases = _aliases(query.statement)
+
+        for access in accesses:
+            table = access.table if access.table in tables else aliases.get(access.alias)
+            if table not in tables or access.kind == 'rowid':
+                continue
+            wanted = found.get(access.alias) or found.get(table)
+            if not wanted:
+                continue
+            # Igualdades da mais para a menos seletiva, depois intervalo ou ordenação
+            equality = sorted(wanted['equality'],
+                              key=lambda c: -_distinct(connection, table, c, stats_cache)[0])
+            order = [c for c in wanted['order'] if c not in equality] if sorts else []
+            columns = equality + (wanted['range'][:1] or order)
+            if not columns:
+                continue
+
+            if access.kind == 'scan':
+                reason = 'varredura completa'
+            elif set(columns) - set(access.columns):
+                reason = f"índice {access.index} cobre só {', '.join(access.columns) or 'parte'}"
+            else:
+                continue
+
+            where = None
+            for column, value in wanted['values'].items():
+                if len(columns) > 1 and column in columns:
+                    condition = _partial_condition(connection, table, column, value, stats_cache)
+                    if condition:
+                        where = condition
+                        columns.remove(column)
+                        break
+
+            columns = tuple(columns)
+            if _covered(existing.get(table, []), columns, where):
+                continue
+            if where is None and all(
+                _distinct(connection, table, c, stats_cache)[0] <= PARTIAL_MAX_DISTINCT for c in columns
+            ):
+                continue  # só colunas de poucos valores: índice pouco seletivo
+            key = (table, columns, where)
+            proposal = proposals.get(key)
+            if proposal is None:
+                proposal = proposals[key] = IndexProposal(table=table, columns=columns, where=where,
+                                                          sample=' '.join(query.statement.split())[:400], plan=plan)
+            proposal.reasons.add(reason)
+            proposal.endpoints.update(query.endpoints)
+            proposal.statements += 1
+            proposal.executions += query.count
+
+    return sorted(proposals.values(), key=lambda p: (-p.executions, p.table, p.columns))
+
+
+# ----------------------------------------------------------------------
+# Execução das rotas
+# ----------------------------------------------------------------------
+
+def _client(app, user_id, role):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+        sess['user_role'] = role.value
+    return client
+
+
+def replay_routes(app) -> Dict[str, CapturedQuery]:
+    """Executa ROUTES como admin e como o primeiro jogador, capturando o SQL."""
+    from src.models.models import db, User, UserRole
+    today = datetime.utcnow()
+    with app.app_context():
+        admin = User.query.filter_by(role=UserRole.ADMIN).order_by(User.id).first()
+        player = User.query.filter_by(role=UserRole.PLAYER, is_active=True).order_by(User.id).first()
+        if admin is None or player is None:
+            raise RuntimeError('O banco precisa de um admin e ao menos um jogador ativo')
+        clients = {
+            'admin': _client(app, admin.id, UserRole.ADMIN),
+            'player': _client(app, player.id, UserRole.PLAYER),
+        }
+        fields = {'player_id': player.id, 'month': today.month, 'year': today.year}
+        db.session.remove()
+
+        with QueryCapture(db.engine) as capture:
+            for role, path in ROUTES:
+                response = clients[role].get(path.format(**fields), base_url='https://localhost')
+                if response.status_code >= 400:
+                    print(f"⚠️  {path} -> {response.status_code}", file=sys.stderr)
+                db.session.remove()
+    return capture.queries
+
+
+def build_app(args):
+    from src.main import create_app
+    from src.models.models import db
+    config = {'TESTING': True, 'SECRET_KEY': 'index-advisor'}
+    if args.database_url:
+        config['SQLALCHEMY_DATABASE_URI'] = args.database_url
+        return create_app(config), None
+
+    from src.utils.init_data import create_initial_data
+    from src.utils.data_simulation import simulate_population, insert_population
+    db_fd, db_path = tempfile.mkstemp(suffix='.sqlite')
+    os.close(db_fd)
+    config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        create_initial_data()
+        insert_population(simulate_population(players=args.players, days=args.days, seed=args.seed),
+                          username_prefix='advisor')
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+        db.session.remove()
+    return app, db_path
+
+
+def print_report(proposals: List[IndexProposal], queries: Dict[str, CapturedQuery]):
+    executions = sum(q.count for q in queries.values())
+    print(f"Consultas distintas: {len(queries)}  execuções: {executions}  propostas: {len(proposals)}\n")
+    for proposal in proposals:
+        print(proposal.ddl())
+        print(f"  motivo: {'; '.join(sorted(proposal.reasons))}")
+        print(f"  consultas: {proposal.statements} ({proposal.executions} execuções) em "
+              f"{', '.join(sorted(proposal.endpoints)) or '-'}")
+        print(f"  modelo: {proposal.model_line()}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='Banco existente (padrão: SQLite temporário simulado)')
+    parser.add_argument('--players', type=int, default=100)
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE nos SELECTs (PostgreSQL)')
+    parser.add_argument('--json', metavar='ARQUIVO', help='Salva as propostas em JSON')
+    args = parser.parse_args()
+
+    from src.models.models import db
+    app, temp_path = build_app(args)
+    try:
+        queries = replay_routes(app)
+        with app.app_context():
+            with db.engine.connect() as connection:
+                proposals = advise(connection, queries, analyze=args.analyze)
+            db.engine.dispose()
+    finally:
+        if temp_path:
+            os.unlink(temp_path)
+
+    print_report(proposals, queries)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'generated_at': datetime.utcnow().isoformat(), 'queries': len(queries),
+                       'proposals': [p.to_dict() for p in proposals]}, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,698 @@
+#!/usr/bin/env python3
+"""
+Teste de carga por cenários - Invictus Poker Team
+Sessões autenticadas (cookie de sessão + CSRF) de gestor e jogadores
+executando um mix ponderado de ações reais: polling do dashboard do gestor,
+abertura de planilha, atualização de saldo, fechamento do dia, pedido e
+aprovação de reload e conexões SSE.
+
+- Carga em malha aberta (--rate: chegadas Poisson por segundo, latência
+  medida a partir do instante agendado, sem omissão coordenada) ou fechada
+  (--users: usuários virtuais com tempo de reflexão).
+- Latências em histogramas log-lineares (estilo HDR) por endpoint: memória
+  constante, percentis com ~0,1% de erro, mescláveis.
+- Resultado em JSON (com o commit do git) para comparar execuções:
+  python benchmarks/load_harness.py --compare antes.json depois.json
+
+Roda apenas contra instância local (localhost/127.0.0.1).
+
+Uso:
+  python src/main.py  # em outro terminal (porta 5000)
+  python benchmarks/load_harness.py --target http://127.0.0.1:5000 \\
+      --simulate-players 200 --simulate-days 365 --rate 40 --duration 60
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import subprocess
+import http.client
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlencode
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+TIMEOUT_SECONDS = 10
+SUB_BUCKET_BITS = 11  # 2048 sub-buckets por potência de 2 (~0,1% de erro relativo)
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+# Mix de ações por cenário (pesos relativos)
+SCENARIOS = {
+    'default': {
+        'manager_dashboard': 25,
+        'spreadsheet_open': 30,
+        'balance_update': 20,
+        'close_day': 5,
+        'reload_approval': 10,
+        'sse': 10,
+    },
+    'dashboard-heavy': {
+        'manager_dashboard': 60,
+        'spreadsheet_open': 30,
+        'sse': 10,
+    },
+    'writes': {
+        'balance_update': 50,
+        'close_day': 20,
+        'reload_approval': 30,
+    },
+}
+
+
+# ----------------------------------------------------------------------
+# Histograma
+# ----------------------------------------------------------------------
+
+class Histogram:
+    """
+    Histograma log-linear de latências em microssegundos: cada potência de 2
+    é dividida em 2^SUB_BUCKET_BITS faixas lineares. Contagens esparsas por
+    limite inferior da faixa, então o resultado cabe em JSON e pode ser somado.
+    """
+
+    def __init__(self, sub_bucket_bits: int = SUB_BUCKET_BITS):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts: Dict[int, int] = defaultdict(int)
+        self.total = 0
+        self.sum_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+        self._lock = threading.Lock()
+
+    def _bucket(self, value: int) -> int:
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return (value >> shift) << shift
+
+    def _width(self, bucket: int) -> int:
+        return 1 << max(0, bucket.bit_length() - self.sub_bucket_bits)
+
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1_000_000))
+        bucket = self._bucket(value)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += 1
+            self.sum_us += value
+            self.max_us = max(self.max_us, value)
+            self.min_us = value if self.min_us is None else min(self.min_us, value)
+
+    def merge(self, other: 'Histogram'):
+        with self._lock:
+            for bucket, count in other.counts.items():
+                self.counts[bucket] += count
+            self.total += other.total
+            self.sum_us += other.sum_us
+            self.max_us = max(self.max_us, other.max_us)
+            if other.min_us is not None:
+                self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+
+    def percentile(self, p: float) -> float:
+        """Percentil em ms (ponto médio da faixa)."""
+        with self._lock:
+            if not self.total:
+                return 0.0
+            target = max(1, int(round(self.total * p / 100.0)))
+            seen = 0
+            for bucket in sorted(self.counts):
+                seen += self.counts[bucket]
+                if seen >= target:
+                    value = min(bucket + self._width(bucket) / 2, self.max_us)
+                    return round(value / 1000.0, 3)
+        return round(self.max_us / 1000.0, 3)
+
+    def summary(self) -> Dict[str, float]:
+        summary = {f'p{p:g}': self.percentile(p) for p in PERCENTILES}
+        summary.update({
+            'min': round((self.min_us or 0) / 1000.0, 3),
+            'mean': round(self.sum_us / self.total / 1000.0, 3) if self.total else 0.0,
+            'max': round(self.max_us / 1000.0, 3),
+        })
+        return summary
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'unit': 'us',
+                'sub_bucket_bits': self.sub_bucket_bits,
+                'total': self.total,
+                'sum': self.sum_us,
+                'min': self.min_us,
+                'max': self.max_us,
+                'counts': {str(bucket): count for bucket, count in sorted(self.counts.items())},
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Histogram':
+        histogram = cls(data.get('sub_bucket_bits', SUB_BUCKET_BITS))
+        histogram.counts.update({int(bucket): count for bucket, count in data['counts'].items()})
+        histogram.total = data['total']
+        histogram.sum_us = data['sum']
+        histogram.min_us = data['min']
+        histogram.max_us = data['max']
+        return histogram
+
+
+class Results:
+    """Histogramas, status HTTP e erros por endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.service: Dict[str, Histogram] = defaultdict(Histogram)
+        self.response: Dict[str, Histogram] = defaultdict(Histogram)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.actions: Dict[str, int] = defaultdict(int)
+        self.dropped = 0
+
+    def record(self, endpoint: str, status, seconds: float, ok: bool):
+        with self._lock:
+            histogram = self.service[endpoint]
+            self.statuses[endpoint][str(status)] += 1
+            if not ok:
+                self.errors[endpoint] += 1
+        histogram.record(seconds)
+
+    def record_action(self, action: str, scheduled_delay: Optional[float]):
+        with self._lock:
+            self.actions[action] += 1
+            histogram = self.response[action] if scheduled_delay is not None else None
+        if histogram is not None:
+            histogram.record(scheduled_delay)
+
+    def to_dict(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for name in sorted(self.service):
+            histogram = self.service[name]
+            endpoints[name] = {
+                'count': histogram.total,
+                'errors': self.errors.get(name, 0),
+                'statuses': dict(self.statuses[name]),
+                'throughput_rps': round(histogram.total / elapsed, 2) if elapsed else 0.0,
+                'latency_ms': histogram.summary(),
+                'histogram': histogram.to_dict(),
+            }
+        actions = {}
+        for name in sorted(self.actions):
+            actions[name] = {'count': self.actions[name]}
+            if name in self.response:
+                # Malha aberta: do instante agendado até o fim da ação (inclui fila)
+                actions[name]['response_ms'] = self.response[name].summary()
+                actions[name]['histogram'] = self.response[name].to_dict()
+        return {'endpoints': endpoints, 'actions': actions, 'dropped': self.dropped}
+
+
+# ----------------------------------------------------------------------
+# Cliente HTTP
+# ----------------------------------------------------------------------
+
+class Session:
+    """Cookies e token CSRF de um usuário logado."""
+
+    def __init__(self, username: str):
+        self.username = username
+        self.cookies: Dict[str, str] = {}
+        self.csrf_token: Optional[str] = None
+        self.user: Dict = {}
+        self.accounts: List[Dict] = []
+        self.reload_platform_id: Optional[int] = None
+
+    def cookie_header(self) -> str:
+        return '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+
+    def store_cookies(self, headers):
+        # O cookie de sessão é Secure: o cookiejar não o reenviaria por HTTP
+        for header in headers.get_all('Set-Cookie') or []:
+            name, _, rest = header.partition('=')
+            self.cookies[name.strip()] = rest.split(';', 1)[0]
+
+
+class Client:
+    """Conexões keep-alive por thread contra a instância local."""
+
+    def __init__(self, target: str, results: Results, timeout: float = TIMEOUT_SECONDS):
+        parts = urlsplit(target)
+        if parts.hostname not in LOCAL_HOSTS:
+            raise ValueError(f"O teste de carga só roda contra instância local (recebido: {parts.hostname})")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.results = results
+        self._local = threading.local()
+
+    def _connection(self, fresh: bool = False) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def request(self, session: Optional[Session], method: str, path: str, endpoint: str,
+                body: Optional[Dict] = None, expect: Tuple[int, ...] = (200, 201)) -> Tuple[Optional[int], Dict]:
+        """Executa e registra uma requisição. Retorna (status, JSON da resposta)."""
+        headers = {'Accept': 'application/json'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if session is not None:
+            if session.cookies:
+                headers['Cookie'] = session.cookie_header()
+            if session.csrf_token and method not in ('GET', 'HEAD'):
+                headers['X-CSRF-Token'] = session.csrf_token
+
+        start = time.perf_counter()
+        status, data = None, b''
+        for attempt in range(2):
+            try:
+                conn = self._connection(fresh=attempt > 0)
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                status = response.status
+                if session is not None:
+                    session.store_cookies(response.headers)
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # Keep-alive fechado pelo servidor: reconectar uma vez
+                if attempt:
+                    status = 'disconnected'
+            except Exception as e:
+                status = type(e).__name__
+                self._connection(fresh=True)
+                break
+        elapsed = time.perf_counter() - start
+
+        ok = isinstance(status, int) and status in expect
+        self.results.record(endpoint, status, elapsed, ok)
+        try:
+            parsed = json.loads(data) if data else {}
+        except ValueError:
+            parsed = {}
+        return (status if isinstance(status, int) else None), parsed
+
+    def stream(self, session: Session, path: str, endpoint: str, hold_seconds: float) -> int:
+        """Conexão SSE: registra o tempo até o primeiro evento e mantém aberta."""
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=max(hold_seconds, 1) + self.timeout)
+        events = 0
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers={'Accept': 'text/event-stream', 'Cookie': session.cookie_header()})
+            response = conn.getresponse()
+            if response.status != 200:
+                response.read()
+                self.results.record(endpoint, response.status, time.perf_counter() - start, False)
+                return 0
+            deadline = time.monotonic() + hold_seconds
+            first = True
+            conn.sock.settimeout(1.0)
+            while time.monotonic() < deadline:
+                try:
+                    line = response.fp.readline()
+                except OSError:
+                    continue
+                if not line:
+                    break
+                if line.startswith(b'event:') or line.startswith(b'data:'):
+                    if first:
+                        self.results.record(endpoint, 200, time.perf_counter() - start, True)
+                        first = False
+                    if line.startswith(b'data:'):
+                        events += 1
+            if first:
+                self.results.record(endpoint, 'no-event', time.perf_counter() - start, False)
+        except Exception as e:
+            self.results.record(endpoint, type(e).__name__, time.perf_counter() - start, False)
+        finally:
+            conn.close()
+        return events
+
+
+# ----------------------------------------------------------------------
+# Ações
+# ----------------------------------------------------------------------
+
+class Context:
+    """Sessões preparadas e filas compartilhadas entre as ações."""
+
+    def __init__(self, client: Client, manager: Session, players: List[Session], sse_hold: float):
+        self.client = client
+        self.manager = manager
+        self.players = players
+        self.sse_hold = sse_hold
+        self.sse_open = 0
+        self._lock = threading.Lock()
+
+
+def action_manager_dashboard(ctx: Context, rng: random.Random):
+    ctx.client.request(ctx.manager, 'GET', '/api/dashboard/manager', 'GET /api/dashboard/manager')
+
+
+def action_spreadsheet_open(ctx: Context, rng: random.Random):
+    player = rng.choice(ctx.players)
+    ctx.client.request(player, 'GET', f"/api/planilhas/user/{player.user['id']}", 'GET /api/planilhas/user/:id')
+
+
+def action_balance_update(ctx: Context, rng: random.Random):
+    player = rng.choice(ctx.players)
+    if not player.accounts:
+        return
+    account = rng.choice(player.accounts)
+    new_balance = max(0.0, round(float(account.get('current_balance') or 0) * rng.uniform(0.9, 1.1)
+                                 + rng.uniform(-20, 20), 2))
+    status, _ = ctx.client.request(
+        player, 'PUT', f"/api/planilhas/account/{account['id']}/update-balance",
+        'PUT /api/planilhas/account/:id/update-balance',
+        body={'new_balance': f'{new_balance:.2f}', 'notes': 'load harness', 'change_reason': 'manual_update'}
+    )
+    if status == 200:
+        account['current_balance'] = new_balance
+
+
+def action_close_day(ctx: Context, rng: random.Random):
+    player = rng.choice(ctx.players)
+    ctx.client.request(player, 'POST', f"/api/planilhas/user/{player.user['id']}/close-day",
+                       'POST /api/planilhas/user/:id/close-day', body={})
+
+
+def action_reload_approval(ctx: Context, rng: random.Random):
+    player = rng.choice(ctx.players)
+    if not player.reload_platform_id:
+        return
+    status, data = ctx.client.request(
+        player, 'POST', '/api/reload-requests/', 'POST /api/reload-requests/',
+        body={'platform_id': player.reload_platform_id, 'amount': rng.randint(200, 800),
+              'player_notes': 'load harness'}
+    )
+    reload_id = (data.get('reload_request') or data).get('id') if status in (200, 201) else None
+    if reload_id:
+        ctx.client.request(ctx.manager, 'POST', f'/api/reload-requests/{reload_id}/approve',
+                           'POST /api/reload-requests/:id/approve', body={'manager_notes': 'load harness'})
+
+
+def action_sse(ctx: Context, rng: random.Random):
+    session = rng.choice(ctx.players + [ctx.manager])
+    with ctx._lock:
+        ctx.sse_open += 1
+    try:
+        ctx.client.stream(session, '/api/sse/events', 'GET /api/sse/events (first event)', ctx.sse_hold)
+    finally:
+        with ctx._lock:
+            ctx.sse_open -= 1
+
+
+ACTIONS: Dict[str, Callable[[Context, random.Random], None]] = {
+    'manager_dashboard': action_manager_dashboard,
+    'spreadsheet_open': action_spreadsheet_open,
+    'balance_update': action_balance_update,
+    'close_day': action_close_day,
+    'reload_approval': action_reload_approval,
+    'sse': action_sse,
+}
+
+
+# ----------------------------------------------------------------------
+# Preparação
+# ----------------------------------------------------------------------
+
+def login(client: Client, username: str, password: str) -> Session:
+    session = Session(username)
+    status, data = client.request(session, 'POST', '/api/auth/login', 'setup: POST /api/auth/login',
+                                  body={'username': username, 'password': password})
+    if status != 200:
+        raise RuntimeError(f"Login de {username} falhou ({status}): {data.get('error')}")
+    session.user = data.get('user') or {}
+    _, token = client.request(session, 'GET', '/api/auth/csrf-token', 'setup: GET /api/auth/csrf-token')
+    session.csrf_token = token.get('csrf_token')
+    return session
+
+
+def discover_players(client: Client, manager: Session, limit: int) -> List[Dict]:
+    """Jogadores ativos, via listagem paginada por cursor."""
+    players = []
+    cursor = ''
+    while len(players) < limit:
+        query = urlencode({'cursor': cursor, 'per_page': 200, 'include_total': 'false'})
+        status, data = client.request(manager, 'GET', f'/api/users/?{query}', 'setup: GET /api/users/')
+        if status != 200:
+            raise RuntimeError(f"Listagem de usuários falhou ({status}): {data.get('error')}")
+        players.extend(u for u in data.get('users', []) if u.get('role') == 'player')
+        cursor = (data.get('pagination') or {}).get('next_cursor')
+        if not cursor:
+            break
+    return players[:limit]
+
+
+def prepare(client: Client, args) -> Context:
+    manager = login(client, args.admin_user, args.admin_password)
+
+    if args.simulate_players:
+        print(f"Simulando {args.simulate_players} jogadores × {args.simulate_days} dias...")
+        status, data = client.request(
+            manager, 'POST', '/api/users/simulate-year-data', 'setup: POST /api/users/simulate-year-data',
+            body={'mode': 'vectorized', 'players': args.simulate_players, 'days': args.simulate_days,
+                  'seed': args.seed, 'history_every': args.simulate_history_every}
+        )
+        if status != 200:
+            raise RuntimeError(f"Simulação falhou ({status}): {data.get('error')}")
+        print(f"  {data['result']['rows']}")
+
+    players = []
+    for user in discover_players(client, manager, args.player_sessions):
+        try:
+            session = login(client, user['username'], args.player_password)
+        except RuntimeError as e:
+            print(f"  ignorando {user['username']}: {e}")
+            continue
+        _, sheet = client.request(session, 'GET', f"/api/planilhas/user/{session.user['id']}",
+                                  'setup: GET /api/planilhas/user/:id')
+        session.accounts = [a for a in sheet.get('accounts', []) if a.get('id') and a.get('has_account')]
+        luxon = [a for a in sheet.get('all_platform_accounts', []) if 'luxon' in (a.get('platform_name') or '').lower()]
+        platforms = luxon or sheet.get('all_platform_accounts', [])
+        session.reload_platform_id = platforms[0]['platform_id'] if platforms else None
+        players.append(session)
+
+    if not players:
+        raise RuntimeError("Nenhuma sessão de jogador (use --simulate-players ou ajuste --player-password)")
+    print(f"Sessões: gestor {manager.username} + {len(players)} jogadores")
+    return Context(client, manager, players, args.sse_hold)
+
+
+# ----------------------------------------------------------------------
+# Execução
+# ----------------------------------------------------------------------
+
+def weighted_picker(mix: Dict[str, float], rng: random.Random) -> Callable[[], str]:
+    unknown = set(mix) - set(ACTIONS)
+    if unknown:
+        raise ValueError(f"Ações desconhecidas no cenário: {', '.join(sorted(unknown))}")
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    return lambda: rng.choices(names, weights)[0]
+
+
+def run_action(ctx: Context, results: Results, name: str, rng: random.Random, scheduled: Optional[float] = None):
+    try:
+        ACTIONS[name](ctx, rng)
+    except Exception as e:
+        results.record(f'action error: {name}', type(e).__name__, 0.0, False)
+    results.record_action(name, time.perf_counter() - scheduled if scheduled is not None else None)
+
+
+def run_open_loop(ctx: Context, results: Results, mix: Dict[str, float], rate: float, duration: float,
+                  max_inflight: int, seed: Optional[int]):
+    """Chegadas Poisson a `rate`/s, independentes das respostas."""
+    rng = random.Random(seed)
+    pick = weighted_picker(mix, rng)
+    inflight = threading.Semaphore(max_inflight * 4)  # limite da fila local
+    executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix='load')
+
+    def task(name, scheduled, action_seed):
+        try:
+            run_action(ctx, results, name, random.Random(action_seed), scheduled)
+        finally:
+            inflight.release()
+
+    start = time.perf_counter()
+    next_at = start
+    while next_at - start < duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        if inflight.acquire(blocking=False):
+            executor.submit(task, pick(), next_at, rng.getrandbits(32))
+        else:
+            results.dropped += 1
+        next_at += rng.expovariate(rate)
+    executor.shutdown(wait=True)
+
+
+def run_closed_loop(ctx: Context, results: Results, mix: Dict[str, float], users: int, duration: float,
+                    think_time: float, seed: Optional[int]):
+    """Usuários virtuais: ação, tempo de reflexão, próxima ação."""
+    deadline = time.monotonic() + duration
+
+    def user_loop(index):
+        rng = random.Random(None if seed is None else seed + index)
+        pick = weighted_picker(mix, rng)
+        while time.monotonic() < deadline:
+            run_action(ctx, results, pick(), rng)
+            if think_time:
+                time.sleep(rng.expovariate(1.0 / think_time))
+
+    threads = [threading.Thread(target=user_loop, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def git_info() -> Dict[str, Optional[str]]:
+    root = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                                    capture_output=True, text=True, timeout=30).stdout.strip())
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.SubprocessError):
+        return {'commit': None, 'dirty': None}
+
+
+# ----------------------------------------------------------------------
+# Relatórios
+# ----------------------------------------------------------------------
+
+def print_report(report: Dict):
+    print(f"{'Endpoint':<52} {'Req':>7} {'Erros':>6} {'RPS':>8} {'p50':>9} {'p99':>9} {'p99.9':>9} {'max':>9}")
+    for name, data in report['endpoints'].items():
+        latency = data['latency_ms']
+        print(f"{name:<52} {data['count']:>7} {data['errors']:>6} {data['throughput_rps']:>8.1f} "
+              f"{latency['p50']:>9.1f} {latency['p99']:>9.1f} {latency['p99.9']:>9.1f} {latency['max']:>9.1f}")
+    if report.get('dropped'):
+        print(f"Chegadas descartadas (fila local cheia): {report['dropped']}")
+
+
+def compare_reports(base_path: str, new_path: str, threshold: float) -> int:
+    """Compara dois resultados por endpoint. Retorna 1 se algum p99 piorou além do limite (%)."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"Base: {base['meta'].get('commit')}  Novo: {new['meta'].get('commit')}")
+    print(f"{'Endpoint':<52} {'p50 base':>9} {'p50 novo':>9} {'p99 base':>9} {'p99 novo':>9} {'Δp99':>8} {'RPS Δ':>8}")
+    regressions = 0
+    for name in sorted(set(base['endpoints']) | set(new['endpoints'])):
+        before, after = base['endpoints'].get(name), new['endpoints'].get(name)
+        if not before or not after:
+            print(f"{name:<52} {'(só em ' + ('novo' if after else 'base') + ')':>9}")
+            continue
+        p99_before, p99_after = before['latency_ms']['p99'], after['latency_ms']['p99']
+        change = (p99_after - p99_before) / p99_before * 100 if p99_before else 0.0
+        rps_change = after['throughput_rps'] - before['throughput_rps']
+        flag = ''
+        if change > threshold and not name.startswith('setup:'):
+            regressions += 1
+            flag = '  ⚠'
+        print(f"{name:<52} {before['latency_ms']['p50']:>9.1f} {after['latency_ms']['p50']:>9.1f} "
+              f"{p99_before:>9.1f} {p99_after:>9.1f} {change:>7.1f}% {rps_change:>+8.1f}{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', default='http://127.0.0.1:5001')
+    parser.add_argument('--scenario', default='default', help=f"Cenário embutido ({', '.join(SCENARIOS)})")
+    parser.add_argument('--scenario-file', help='JSON {"ação": peso, ...} (substitui --scenario)')
+    parser.add_argument('--rate', type=float, help='Malha aberta: chegadas por segundo')
+    parser.add_argument('--users', type=int, default=10, help='Malha fechada: usuários virtuais (sem --rate)')
+    parser.add_argument('--think-time', type=float, default=1.0, help='Malha fechada: média em segundos')
+    parser.add_argument('--max-inflight', type=int, default=64, help='Malha aberta: ações simultâneas')
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--sse-hold', type=float, default=10, help='Segundos com cada conexão SSE aberta')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--admin-user', default='admin')
+    parser.add_argument('--admin-password', default='admin123')
+    parser.add_argument('--player-password', default='player123')
+    parser.add_argument('--player-sessions', type=int, default=20)
+    parser.add_argument('--simulate-players', type=int, default=0,
+                        help='Recriar os jogadores com a simulação vetorizada antes (apaga os existentes)')
+    parser.add_argument('--simulate-days', type=int, default=365)
+    parser.add_argument('--simulate-history-every', type=int, default=1)
+    parser.add_argument('--output', help='Arquivo JSON (padrão: load_results/<data>_<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NOVO'), help='Comparar dois resultados e sair')
+    parser.add_argument('--regression-threshold', type=float, default=20.0, help='%% de piora do p99 no --compare')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare_reports(args.compare[0], args.compare[1], args.regression_threshold)
+
+    if args.scenario_file:
+        with open(args.scenario_file) as f:
+            mix = json.load(f)
+        scenario_name = os.path.basename(args.scenario_file)
+    elif args.scenario in SCENARIOS:
+        mix = SCENARIOS[args.scenario]
+        scenario_name = args.scenario
+    else:
+        parser.error(f"Cenário desconhecido: {args.scenario}")
+
+    results = Results()
+    try:
+        weighted_picker(mix, random.Random())
+        client = Client(args.target, results)
+        ctx = prepare(client, args)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+
+    mode = 'open' if args.rate else 'closed'
+    print(f"Cenário {scenario_name} ({mode}): {args.rate or args.users} {'chegadas/s' if args.rate else 'usuários'} "
+          f"por {args.duration:.0f}s contra {args.target}")
+    started_at = datetime.now().isoformat(timespec='seconds')
+    start = time.perf_counter()
+    if args.rate:
+        run_open_loop(ctx, results, mix, args.rate, args.duration, args.max_inflight, args.seed)
+    else:
+        run_closed_loop(ctx, results, mix, args.users, args.duration, args.think_time, args.seed)
+    elapsed = time.perf_counter() - start
+
+    report = results.to_dict(elapsed)
+    report['meta'] = {
+        **git_info(),
+        'started_at': started_at,
+        'elapsed_seconds': round(elapsed, 2),
+        'target': args.target,
+        'scenario': scenario_name,
+        'mix': mix,
+        'mode': mode,
+        'rate': args.rate,
+        'users': None if args.rate else args.users,
+        'think_time': None if args.rate else args.think_time,
+        'player_sessions': len(ctx.players),
+        'seed': args.seed,
+        'python': sys.version.split()[0],
+    }
+
+    print_report(report)
+    output = args.output
+    if not output:
+        commit = (report['meta']['commit'] or 'nogit')[:10]
+        output = os.path.join('load_results', f"{datetime.now():%Y%m%d_%H%M%S}_{commit}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultado salvo em {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark da verificação de login - Invictus Poker Team
+Simula uma rajada de logins concorrentes (threads de um worker gthread)
+enquanto uma thread de "dashboard" faz trabalho leve de CPU, comparando a
+verificação no próprio processo (inline) com o pool de processos:
+vazão de logins, latência, rejeições e latência do dashboard.
+
+Uso: python benchmarks/login_benchmark.py [--threads 8] [--seconds 5] [--workers 2]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from src.utils.login_pool import LoginVerifier, LoginPoolSaturatedError
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def dashboard_work(rows):
+    """Trabalho típico de uma rota de dashboard: montar e serializar linhas."""
+    return json.dumps([{'id': i, 'balance': i * 1.5, 'platform': 'PokerStars'} for i in range(rows)])
+
+
+def run(mode, password_hash, threads, seconds, workers):
+    verifier = LoginVerifier(workers=workers)
+    verifier.set_mode(mode)
+    # Aquecer o pool (processos criados sob demanda)
+    verifier.verify(password_hash, 'senha-benchmark')
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    login_ms, dashboard_ms = [], []
+    rejected = [0]
+
+    def login_loop():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                verifier.verify(password_hash, 'senha-benchmark')
+            except LoginPoolSaturatedError:
+                with lock:
+                    rejected[0] += 1
+                time.sleep(0.01)
+                continue
+            with lock:
+                login_ms.append((time.perf_counter() - start) * 1000)
+
+    def dashboard_loop():
+        while not stop.is_set():
+            start = time.perf_counter()
+            dashboard_work(200)
+            dashboard_ms.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+    pool = [threading.Thread(target=login_loop) for _ in range(threads)]
+    pool.append(threading.Thread(target=dashboard_loop))
+    for thread in pool:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in pool:
+        thread.join()
+
+    stats = verifier.get_stats()
+    verifier.shutdown()
+    return {
+        'logins_per_s': len(login_ms) / seconds,
+        'login_p50': percentile(login_ms, 0.50),
+        'login_p95': percentile(login_ms, 0.95),
+        'rejected': rejected[0],
+        'dashboard_p95': percentile(dashboard_ms, 0.95),
+        'hash_p50': stats['hash_ms']['p50'] or 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    password_hash = generate_password_hash('senha-benchmark')
+    results = {mode: run(mode, password_hash, args.threads, args.seconds, args.workers)
+               for mode in ('inline', 'pool')}
+
+    print(f"Threads: {args.threads}  Processos no pool: {args.workers}  Duração: {args.seconds}s")
+    print(f"{'':<26}{'inline':>12}{'pool':>12}")
+    for label, key, fmt in [
+        ('Logins/s', 'logins_per_s', '.1f'),
+        ('Login p50 (ms)', 'login_p50', '.1f'),
+        ('Login p95 (ms)', 'login_p95', '.1f'),
+        ('Rejeitados (503)', 'rejected', 'd'),
+        ('Custo do hash p50 (ms)', 'hash_p50', '.1f'),
+        ('Dashboard p95 (ms)', 'dashboard_p95', '.2f'),
+    ]:
+        print(f"{label:<26}{results['inline'][key]:>12{fmt}}{results['pool'][key]:>12{fmt}}")
+
+
+if __name__ == '__main__':
+    main()
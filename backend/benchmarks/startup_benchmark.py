@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização da aplicação - Invictus Poker Team
+Mede, em processos novos, o tempo de cada fase de startup:
+importar src.main, criar o app (create_app) e o bootstrap opcional
+(migrations versionadas, dados iniciais e backup inicial) em um banco novo.
+
+Uso: python benchmarks/startup_benchmark.py [--runs 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ('import src.main', "import src.main"),
+    ('create_app() só modelos', "from src.main import create_app; create_app({URI}, blueprints=[])"),
+    ('create_app()', "from src.main import create_app; create_app({URI})"),
+    ('create_app(bootstrap=True)', "from src.main import create_app; create_app({URI}, bootstrap=True)"),
+]
+
+
+def run_scenario(code, runs):
+    """Executa o código em `runs` processos novos e retorna os tempos (s)."""
+    timings = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            uri = repr({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+            env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+            env.pop('APP_BOOTSTRAP', None)
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code.replace('{URI}', uri)], cwd=tmp, env=env,
+                           check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = run_scenario("pass", args.runs)
+    print(f"Execuções por cenário: {args.runs}  (interpretador vazio: {statistics.median(baseline):.3f}s)")
+    print(f"{'':<30}{'mediana (s)':>12}{'mín (s)':>10}")
+    for label, code in SCENARIOS:
+        timings = run_scenario(code, args.runs)
+        print(f"{label:<30}{statistics.median(timings):>12.3f}{min(timings):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
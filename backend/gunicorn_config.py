@@ -8,7 +8,10 @@ bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
 
 # Worker configuration for Render's resource limits
 workers = 2
-worker_class = "sync" 
+# Threads por worker: um login aguardando o pool de verificação de senha
+# (src/utils/login_pool.py) não bloqueia as demais requisições do worker
+worker_class = "gthread"
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
 worker_connections = 1000
 
 # Timeouts
@@ -18,6 +21,8 @@ keepalive = 60
 # Performance tuning
 max_requests = 1000
 max_requests_jitter = 100
+# O agendador (src/utils/scheduler.py) só inicia após o fork e elege um
+# único worker líder via file lock, então os jobs não duplicam entre workers
 preload_app = True
 
 # Logging
@@ -31,3 +36,10 @@ proc_name = "invictus-poker-backend"
 
 # Enable auto-restart on code changes in development
 reload = os.environ.get('FLASK_ENV') == 'development'
+
+def worker_exit(server, worker):
+    """Grava os logs de auditoria enfileirados e encerra o pool de login antes do worker sair."""
+    from src.utils.audit_sink import audit_sink
+    from src.utils.login_pool import login_verifier
+    audit_sink.shutdown()
+    login_verifier.shutdown()
@@ -12,7 +12,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from src.models.models import db
 from src.main import app
 import src.utils.init_data
-from sqlalchemy.exc import OperationalError
+from src.database.migrations.runner import get_migration_runner
 
 def init_database():
     """Inicializa o banco de dados com dados iniciais"""
@@ -21,21 +21,13 @@ def init_database():
     # Usar contexto da aplicação
     with app.app_context():
         try:
-            # Criar todas as tabelas
-            print("📊 Criando tabelas...")
-            db.create_all()
+            # Aplicar migrations pendentes (schema_migrations)
+            print("📊 Aplicando migrations...")
+            get_migration_runner().upgrade(db.engine)
 
             # Inserir dados iniciais
             print("💾 Inserindo dados iniciais...")
-            try:
-                src.utils.init_data.create_initial_data()
-            except OperationalError as op_err:
-                # Provável divergência de schema (ex.: colunas novas) em um DB existente
-                print(f"⚠️ Divergência de schema detectada: {op_err}")
-                print("🧹 Reinicializando banco (drop_all -> create_all) e tentando novamente...")
-                db.drop_all()
-                db.create_all()
-                src.utils.init_data.create_initial_data()
+            src.utils.init_data.create_initial_data()
 
             print("✅ Banco de dados inicializado com sucesso!")
             return True
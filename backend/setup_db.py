@@ -13,6 +13,7 @@ sys.path.insert(0, os.path.dirname(__file__))
 from src.main import app
 from src.models.models import db
 from src.utils.init_data import create_initial_data
+from src.database.migrations.runner import get_migration_runner
 
 def setup_database():
     """Configurar banco de dados e criar dados iniciais"""
@@ -21,9 +22,9 @@ def setup_database():
         print("=" * 50)
         
         with app.app_context():
-            print("📊 Criando tabelas do banco de dados...")
-            db.create_all()
-            print("✅ Tabelas criadas com sucesso!")
+            print("📊 Aplicando migrations do banco de dados...")
+            get_migration_runner().upgrade(db.engine)
+            print("✅ Banco na versão mais recente!")
             
             print("\n📝 Inicializando dados do sistema...")
             create_initial_data()
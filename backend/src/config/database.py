@@ -3,7 +3,7 @@ Configurações de banco de dados com suporte a SQLite (dev) e PostgreSQL (prod)
 """
 import os
 from sqlalchemy import create_engine
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool
 
 
 def get_database_config():
@@ -21,7 +21,13 @@ def get_database_config():
             'SQLALCHEMY_DATABASE_URI': 'sqlite:///invictus_poker.db',
             'SQLALCHEMY_TRACK_MODIFICATIONS': False,
             'SQLALCHEMY_ENGINE_OPTIONS': {
-                'poolclass': StaticPool,
+                # Uma conexão por sessão em uso: com workers gthread, cada
+                # thread de requisição tem a própria transação (StaticPool
+                # compartilhava uma conexão, e o commit/rollback de uma
+                # requisição levava junto as escritas pela metade de outra)
+                'poolclass': QueuePool,
+                'pool_size': int(os.environ.get('DB_POOL_SIZE', '5')),
+                'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '10')),
                 'pool_pre_ping': True,
                 'connect_args': {
                     'check_same_thread': False,
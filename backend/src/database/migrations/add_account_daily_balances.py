@@ -0,0 +1,66 @@
+"""
+Migration: Fechamentos diários por conta (account_daily_balances)
+A tabela é criada pelo db.create_all(); aqui ela é preenchida a partir do
+balance_history existente quando ainda estiver vazia (passo 005 do
+src/database/migrations/runner.py). Depois disso o índice
+é mantido a cada BalanceHistory inserido (src/utils/balance_index.py).
+
+Recalcular tudo (ex.: após inserções em massa fora do ORM):
+Executar: python -m src.database.migrations.add_account_daily_balances --rebuild
+"""
+
+import sys
+from sqlalchemy import delete, inspect, select
+
+# Contas por transação no backfill (locks curtos com a aplicação no ar)
+BACKFILL_BATCH = 500
+
+
+def add_account_daily_balances(engine, force: bool = False) -> bool:
+    """
+    Preenche account_daily_balances a partir do histórico (idempotente).
+
+    O backfill roda em lotes de BACKFILL_BATCH contas, com commit por lote.
+
+    Args:
+        force: Recalcula mesmo se a tabela já tiver linhas
+
+    Returns:
+        True se o índice foi (re)construído
+    """
+    from src.models.models import AccountDailyBalance, BalanceHistory
+    from src.utils.balance_index import balance_index
+
+    table_names = inspect(engine).get_table_names()
+    if 'balance_history' not in table_names:
+        return False
+
+    history = BalanceHistory.__table__
+    with engine.begin() as conn:
+        if 'account_daily_balances' not in table_names:
+            AccountDailyBalance.__table__.create(conn)
+        elif not force and conn.execute(select(AccountDailyBalance.__table__.c.day).limit(1)).first():
+            return False
+        elif force:
+            conn.execute(delete(AccountDailyBalance.__table__))
+
+        account_ids = list(conn.execute(
+            select(history.c.account_id).distinct().order_by(history.c.account_id)
+        ).scalars())
+    if not account_ids:
+        return False
+
+    days = 0
+    for start in range(0, len(account_ids), BACKFILL_BATCH):
+        with engine.begin() as conn:
+            days += balance_index.rebuild(conn, account_ids[start:start + BACKFILL_BATCH])
+    print(f"✅ account_daily_balances preenchida: {days} fechamentos de {len(account_ids)} contas")
+    return True
+
+
+if __name__ == '__main__':
+    from src.main import app
+    from src.models.models import db
+
+    with app.app_context():
+        add_account_daily_balances(db.engine, force='--rebuild' in sys.argv)
@@ -0,0 +1,107 @@
+"""
+Migration: Codificação compacta de audit_logs
+Adiciona payload (old/new comprimidos) e referências às dimensões de IP e
+User-Agent. As tabelas audit_ip_addresses/audit_user_agents são criadas
+pelo db.create_all(); aqui só entram as colunas novas de audit_logs.
+
+Opcionalmente converte as linhas antigas em lotes:
+Executar: python -m src.database.migrations.add_compact_audit_encoding --compact
+"""
+
+import sys
+from sqlalchemy import inspect, text, select, update
+
+NEW_COLUMNS = {
+    'payload': {'sqlite': 'BLOB', 'postgresql': 'BYTEA'},
+    'ip_address_id': {'sqlite': 'INTEGER REFERENCES audit_ip_addresses(id)',
+                      'postgresql': 'INTEGER REFERENCES audit_ip_addresses(id)'},
+    'user_agent_id': {'sqlite': 'INTEGER REFERENCES audit_user_agents(id)',
+                      'postgresql': 'INTEGER REFERENCES audit_user_agents(id)'},
+}
+
+
+def add_compact_audit_encoding(engine) -> bool:
+    """
+    Adiciona as colunas da codificação compacta (idempotente).
+
+    Returns:
+        True se alguma coluna foi adicionada
+    """
+    inspector = inspect(engine)
+    if 'audit_logs' not in inspector.get_table_names():
+        return False
+
+    existing = {column['name'] for column in inspector.get_columns('audit_logs')}
+    dialect = engine.dialect.name
+    changes_made = False
+
+    with engine.begin() as conn:
+        for name, types in NEW_COLUMNS.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE audit_logs ADD COLUMN {name} {types.get(dialect, types['sqlite'])}"))
+                print(f"✅ Campo audit_logs.{name} adicionado!")
+                changes_made = True
+
+    return changes_made
+
+
+def compact_existing_audit_logs(batch_size: int = 500) -> int:
+    """
+    Converte linhas no formato legado (texto JSON + IP/User-Agent por extenso)
+    para o formato compacto, em lotes com commit por lote.
+
+    Deve ser chamada dentro de um app context.
+
+    Returns:
+        Número de linhas convertidas
+    """
+    from src.models.models import db, AuditLog, AuditIpAddress, AuditUserAgent
+    from src.utils import audit_codec
+
+    table = AuditLog.__table__
+    legacy = (table.c.payload.is_(None)) & (
+        table.c.old_values.isnot(None) | table.c.new_values.isnot(None)
+        | table.c.ip_address.isnot(None) | table.c.user_agent.isnot(None)
+    )
+    converted = 0
+
+    while True:
+        rows = db.session.execute(
+            select(table.c.id, table.c.old_values, table.c.new_values, table.c.ip_address, table.c.user_agent)
+            .where(legacy).order_by(table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+
+        ips = audit_codec.intern_values(db.session, AuditIpAddress, (r['ip_address'] for r in rows))
+        agents = audit_codec.intern_values(db.session, AuditUserAgent, (r['user_agent'] for r in rows))
+
+        for row in rows:
+            db.session.execute(update(table).where(table.c.id == row['id']).values(
+                payload=audit_codec.encode_payload(
+                    audit_codec.parse_legacy_text(row['old_values']),
+                    audit_codec.parse_legacy_text(row['new_values'])
+                ),
+                ip_address_id=ips.get(row['ip_address']) if row['ip_address'] else None,
+                user_agent_id=agents.get(row['user_agent']) if row['user_agent'] else None,
+                old_values=None,
+                new_values=None,
+                ip_address=None,
+                user_agent=None,
+            ))
+        db.session.commit()
+        converted += len(rows)
+        print(f"🔧 {converted} logs convertidos...")
+
+    return converted
+
+
+if __name__ == '__main__':
+    from src.main import app
+    from src.models.models import db
+
+    with app.app_context():
+        add_compact_audit_encoding(db.engine)
+        if '--compact' in sys.argv:
+            total = compact_existing_audit_logs()
+            print(f"🎉 Migration concluída: {total} logs convertidos")
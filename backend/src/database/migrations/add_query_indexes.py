@@ -0,0 +1,82 @@
+"""
+Migration: Índices compostos e parciais para as consultas reais
+Os índices ficam declarados nos modelos (__table_args__), então bancos novos
+já nascem com eles pelo db.create_all(); aqui eles são criados nos bancos
+existentes (passo 006 do src/database/migrations/runner.py). Os formatos
+vieram do consultor de índices (benchmarks/index_advisor.py), a partir dos
+planos das rotas principais.
+
+Executar: python -m src.database.migrations.add_query_indexes
+"""
+
+from typing import List
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+QUERY_INDEXES = {
+    'balance_history': ('ix_balance_history_account_created', 'ix_balance_history_reason_created'),
+    'reload_requests': ('ix_reload_requests_user_status_approved', 'ix_reload_requests_status_approved',
+                        'ix_reload_requests_pending'),
+    'withdrawal_requests': ('ix_withdrawal_requests_user_status_approved', 'ix_withdrawal_requests_status_approved'),
+    'transactions': ('ix_transactions_user_created',),
+    'notifications': ('ix_notifications_user_read_expires',),
+    'audit_logs': ('ix_audit_logs_created_id',),
+}
+
+
+def add_query_indexes(engine) -> List[str]:
+    """
+    Cria os índices de QUERY_INDEXES que ainda não existem (idempotente).
+
+    Returns:
+        Nomes dos índices criados
+    """
+    from src.models.models import db
+    import src.models.notifications  # noqa: F401 (registra a tabela notifications)
+
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    created = []
+
+    for table_name, index_names in QUERY_INDEXES.items():
+        table = db.metadata.tables.get(table_name)
+        if table is None or table_name not in tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table_name)}
+        declared = {index.name: index for index in table.indexes}
+        for name in index_names:
+            if name in existing or name not in declared:
+                continue
+            _create_index(engine, declared[name])
+            print(f"✅ Índice {name} criado!")
+            created.append(name)
+
+    # Estatísticas para o planejador escolher os índices novos
+    if created:
+        with engine.begin() as conn:
+            for table_name in sorted({t for t, names in QUERY_INDEXES.items() if set(names) & set(created)}):
+                conn.execute(text(f"ANALYZE {table_name}"))
+
+    return created
+
+
+def _create_index(engine, index):
+    """Um índice por transação; no PostgreSQL sem bloquear escritas (CONCURRENTLY)."""
+    if engine.dialect.name == 'postgresql':
+        ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+        ddl = ddl.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS', 1)
+        # CONCURRENTLY não roda dentro de transação
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text(ddl))
+        return
+    with engine.begin() as conn:
+        index.create(conn)
+
+
+if __name__ == '__main__':
+    from src.main import app
+    from src.models.models import db
+
+    with app.app_context():
+        created = add_query_indexes(db.engine)
+        print(f"🎉 Migration concluída: {len(created)} índices criados")
@@ -0,0 +1,231 @@
+"""
+Migrations versionadas - Invictus Poker Team
+Cada alteração de schema é um passo numerado em MIGRATIONS; a tabela
+schema_migrations guarda os passos aplicados (versão, nome, data e duração).
+No startup só a versão é lida: com o banco atualizado não há create_all,
+inspeção de colunas nem drop_all.
+
+Regras dos passos:
+- idempotentes: um banco antigo sem schema_migrations executa todos e os que
+  já estiverem aplicados não alteram nada
+- online: backfills em lotes com commit por lote; índices no PostgreSQL com
+  CREATE INDEX CONCURRENTLY (sem bloquear escrita na tabela)
+- alteração nova = passo novo no fim da lista (nunca editar um já publicado)
+
+Executar:
+  flask --app src.main migrate            # aplica os pendentes
+  flask --app src.main migrate --status   # versão atual e passos aplicados
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+
+# Chave do pg_advisory_lock que serializa upgrades concorrentes
+ADVISORY_LOCK_KEY = 72_601_050
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Passo de migration: recebe o engine e controla as próprias transações."""
+    version: int
+    name: str
+    apply: Callable
+    description: str = ''
+
+
+@dataclass
+class MigrationResult:
+    version: int
+    name: str
+    duration_ms: int
+
+
+def add_columns(engine, table: str, columns: Dict[str, Dict[str, str]]) -> List[str]:
+    """
+    ALTER TABLE ADD COLUMN das colunas que ainda não existem.
+
+    Args:
+        columns: nome -> {dialeto: tipo SQL}; 'sqlite' é o padrão dos demais
+
+    Returns:
+        Colunas adicionadas
+    """
+    inspector = inspect(engine)
+    if table not in inspector.get_table_names():
+        return []
+    existing = {column['name'] for column in inspector.get_columns(table)}
+    dialect = engine.dialect.name
+    added = []
+    with engine.begin() as conn:
+        for name, types in columns.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {types.get(dialect, types['sqlite'])}"))
+                added.append(name)
+    return added
+
+
+# ----------------------------------------------------------------------
+# Passos
+# ----------------------------------------------------------------------
+
+def _initial_schema(engine):
+    """Tabelas que ainda não existem (CREATE TABLE só das ausentes)."""
+    from src.models.models import db
+    import src.models.notifications  # noqa: F401 (registra as tabelas de notificações)
+    db.metadata.create_all(bind=engine)
+
+
+def _team_withdrawal_credits(engine):
+    """Créditos de saque do time (divisão 50%/50%) em accounts."""
+    add_columns(engine, 'accounts', {
+        'team_withdrawal_credits': {'sqlite': 'DECIMAL(10, 2) DEFAULT 0.00', 'postgresql': 'NUMERIC(10, 2) DEFAULT 0.00'},
+    })
+
+
+def _reload_payback_fields(engine):
+    """Quitação de reload antes do saque em reload_requests."""
+    add_columns(engine, 'reload_requests', {
+        'paid_back': {'sqlite': 'BOOLEAN DEFAULT 0', 'postgresql': 'BOOLEAN DEFAULT FALSE'},
+        'paid_back_at': {'sqlite': 'DATETIME', 'postgresql': 'TIMESTAMP'},
+    })
+
+
+def _compact_audit_encoding(engine):
+    from src.database.migrations.add_compact_audit_encoding import add_compact_audit_encoding
+    add_compact_audit_encoding(engine)
+
+
+def _account_daily_balances(engine):
+    from src.database.migrations.add_account_daily_balances import add_account_daily_balances
+    add_account_daily_balances(engine)
+
+
+def _query_indexes(engine):
+    from src.database.migrations.add_query_indexes import add_query_indexes
+    add_query_indexes(engine)
+
+
+MIGRATIONS = [
+    Migration(1, 'initial_schema', _initial_schema, 'Tabelas ausentes a partir dos modelos'),
+    Migration(2, 'team_withdrawal_credits', _team_withdrawal_credits, 'accounts.team_withdrawal_credits'),
+    Migration(3, 'reload_payback_fields', _reload_payback_fields, 'reload_requests.paid_back/paid_back_at'),
+    Migration(4, 'compact_audit_encoding', _compact_audit_encoding, 'Colunas compactas de audit_logs'),
+    Migration(5, 'account_daily_balances', _account_daily_balances, 'Backfill dos fechamentos diários, em lotes'),
+    Migration(6, 'query_indexes', _query_indexes, 'Índices compostos/parciais das consultas principais'),
+]
+
+
+# ----------------------------------------------------------------------
+# Execução
+# ----------------------------------------------------------------------
+
+class MigrationRunner:
+    """Aplica os passos pendentes em ordem e registra versão e duração."""
+
+    def __init__(self, migrations: List[Migration]):
+        versions = [m.version for m in migrations]
+        if versions != sorted(set(versions)):
+            raise ValueError('Versões de migration devem ser únicas e crescentes')
+        self.migrations = list(migrations)
+
+    @property
+    def head(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def current_version(self, engine) -> int:
+        """Maior versão aplicada (0 em banco sem schema_migrations)."""
+        from src.models.models import SchemaMigration
+        table = SchemaMigration.__table__
+        try:
+            with engine.connect() as conn:
+                return conn.execute(select(func.max(table.c.version))).scalar() or 0
+        except DBAPIError:
+            # Banco anterior ao controle de versões
+            return 0
+
+    def pending(self, engine) -> List[Migration]:
+        current = self.current_version(engine)
+        return [m for m in self.migrations if m.version > current]
+
+    def upgrade(self, engine, target: Optional[int] = None, log: Callable[[str], None] = print) -> List[MigrationResult]:
+        """
+        Aplica os passos pendentes até `target` (padrão: o último).
+
+        Com o banco atualizado custa só a leitura da versão. Um passo que
+        falha interrompe o upgrade sem registrar a versão; por serem
+        idempotentes, ele é refeito na próxima execução.
+        """
+        target = self.head if target is None else target
+        if self.current_version(engine) >= target:
+            return []
+
+        from src.models.models import SchemaMigration
+        table = SchemaMigration.__table__
+        results = []
+        with self._lock(engine):
+            table.create(bind=engine, checkfirst=True)
+            # Outro processo pode ter aplicado enquanto esperávamos o lock
+            current = self.current_version(engine)
+            for migration in self.migrations:
+                if migration.version <= current or migration.version > target:
+                    continue
+                log(f"🔧 Migration {migration.version:03d} {migration.name}...")
+                start = time.perf_counter()
+                migration.apply(engine)
+                duration_ms = int((time.perf_counter() - start) * 1000)
+                with engine.begin() as conn:
+                    conn.execute(table.insert().values(
+                        version=migration.version, name=migration.name,
+                        applied_at=datetime.utcnow(), duration_ms=duration_ms
+                    ))
+                log(f"✅ Migration {migration.version:03d} {migration.name} aplicada em {duration_ms} ms")
+                results.append(MigrationResult(migration.version, migration.name, duration_ms))
+        return results
+
+    def status(self, engine) -> List[dict]:
+        """Passos conhecidos com data e duração de aplicação (None se pendente)."""
+        from src.models.models import SchemaMigration
+        table = SchemaMigration.__table__
+        applied = {}
+        try:
+            with engine.connect() as conn:
+                applied = {row.version: row for row in conn.execute(select(table))}
+        except DBAPIError:
+            pass
+        return [{
+            'version': m.version,
+            'name': m.name,
+            'description': m.description,
+            'applied_at': applied[m.version].applied_at.isoformat() if m.version in applied else None,
+            'duration_ms': applied[m.version].duration_ms if m.version in applied else None,
+        } for m in self.migrations]
+
+    @staticmethod
+    @contextmanager
+    def _lock(engine):
+        # PostgreSQL: um upgrade por vez entre processos. No SQLite o bootstrap
+        # roda uma vez antes do gunicorn (flask --app src.main bootstrap).
+        if engine.dialect.name != 'postgresql':
+            yield
+            return
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': ADVISORY_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': ADVISORY_LOCK_KEY})
+
+
+# Instância global com os passos do projeto
+migration_runner = MigrationRunner(MIGRATIONS)
+
+
+def get_migration_runner() -> MigrationRunner:
+    """Retorna a instância global do executor de migrations."""
+    return migration_runner
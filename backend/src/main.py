@@ -3,92 +3,304 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+import click
+from flask import Flask, current_app, jsonify, send_from_directory
 from flask_cors import CORS
 from sqlalchemy import event, Engine
+import importlib
+import threading
 import sqlite3
 from src.models.models import db
 from src.config.database import get_database_config
-from src.routes.auth import auth_bp
-from src.routes.users import users_bp
-from src.routes.platforms import platforms_bp
-from src.routes.accounts import accounts_bp
-from src.routes.reload_requests import reload_requests_bp
-from src.routes.transactions import transactions_bp
-from src.routes.dashboard import dashboard_bp
-from src.routes.retas import retas_bp
-from src.routes.planilhas import planilhas_bp
-from src.routes.withdrawal_requests import withdrawal_requests_bp
-from src.routes.documents import documents_bp
-from src.routes.audit import audit_bp
-from src.routes.registration import registration_bp
-from src.routes.backup import backup_bp
-from src.routes.reports import reports_bp
-from src.routes.notifications import notifications_bp
-from src.routes.messages import messages_bp
-from src.routes.sse import sse_bp
-from src.routes.reload_payback import reload_payback_bp
-from src.routes.team_investment import team_investment_bp
-from src.routes.team_snapshots import team_snapshots_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-
-# Configurações de segurança (SECRET_KEY via ambiente)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'invictus-poker-team-secret-key-2024')
-
-# Configurações de sessão segura
-app.config['SESSION_COOKIE_SECURE'] = True  # HTTPS apenas
-app.config['SESSION_COOKIE_HTTPONLY'] = True  # JavaScript não pode acessar
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Proteção CSRF básica
-
-# Configurações de banco de dados
-db_config = get_database_config()
-app.config.update(db_config)
-
-# Configurar CORS para desenvolvimento e produção
-allowed_origins = [
-    "http://localhost:3000", 
-    "http://localhost:5173", 
-    "http://127.0.0.1:3000", 
-    "http://127.0.0.1:5173",
+
+# Blueprints: (módulo, atributo, prefixo). Importados só ao registrar,
+# para que scripts e testes que usam apenas os modelos não paguem o custo.
+BLUEPRINTS = [
+    ('src.routes.auth', 'auth_bp', '/api/auth'),
+    ('src.routes.users', 'users_bp', '/api/users'),
+    ('src.routes.platforms', 'platforms_bp', '/api/platforms'),
+    ('src.routes.accounts', 'accounts_bp', '/api/accounts'),
+    ('src.routes.reload_requests', 'reload_requests_bp', '/api/reload-requests'),
+    ('src.routes.transactions', 'transactions_bp', '/api/transactions'),
+    ('src.routes.dashboard', 'dashboard_bp', '/api/dashboard'),
+    ('src.routes.retas', 'retas_bp', '/api/retas'),
+    ('src.routes.planilhas', 'planilhas_bp', '/api/planilhas'),
+    ('src.routes.withdrawal_requests', 'withdrawal_requests_bp', '/api/withdrawal-requests'),
+    ('src.routes.documents', 'documents_bp', '/api/documents'),
+    ('src.routes.audit', 'audit_bp', '/api/audit'),
+    ('src.routes.registration', 'registration_bp', '/api/registration'),
+    ('src.routes.backup', 'backup_bp', '/api/backup'),
+    ('src.routes.reports', 'reports_bp', '/api/reports'),
+    ('src.routes.notifications', 'notifications_bp', '/api/notifications'),
+    # Mensagens internas desativadas por diretriz (usar Discord externo)
+    # ('src.routes.messages', 'messages_bp', '/api/messages'),
+    ('src.routes.sse', 'sse_bp', '/api/sse'),
+    ('src.routes.reload_payback', 'reload_payback_bp', '/api/reload-payback'),
+    ('src.routes.team_investment', 'team_investment_bp', '/api/team-investment'),
+    ('src.routes.team_snapshots', 'team_snapshots_bp', '/api/team'),
+    ('src.routes.scheduler', 'scheduler_bp', '/api/scheduler'),
 ]
 
-# Adicionar origins de produção se definidos
-cors_origins = os.environ.get('CORS_ORIGINS', '')
-if cors_origins:
-    production_origins = [origin.strip() for origin in cors_origins.split(',') if origin.strip()]
-    allowed_origins.extend(production_origins)
-
-# Habilitar CORS para todas as rotas
-CORS(app, 
-     origins=allowed_origins,
-     supports_credentials=True,
-     allow_headers=["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
-     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"])
-
-# Registrar blueprints
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(users_bp, url_prefix='/api/users')
-app.register_blueprint(platforms_bp, url_prefix='/api/platforms')
-app.register_blueprint(accounts_bp, url_prefix='/api/accounts')
-app.register_blueprint(reload_requests_bp, url_prefix='/api/reload-requests')
-app.register_blueprint(transactions_bp, url_prefix='/api/transactions')
-app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
-app.register_blueprint(retas_bp, url_prefix='/api/retas')
-app.register_blueprint(planilhas_bp, url_prefix='/api/planilhas')
-app.register_blueprint(withdrawal_requests_bp, url_prefix='/api/withdrawal-requests')
-app.register_blueprint(documents_bp, url_prefix='/api/documents')
-app.register_blueprint(audit_bp, url_prefix='/api/audit')
-app.register_blueprint(registration_bp, url_prefix='/api/registration')
-app.register_blueprint(backup_bp, url_prefix='/api/backup')
-app.register_blueprint(reports_bp, url_prefix='/api/reports')
-app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
-# Mensagens internas desativadas por diretriz (usar Discord externo)
-# app.register_blueprint(messages_bp, url_prefix='/api/messages')
-app.register_blueprint(sse_bp, url_prefix='/api/sse')
-app.register_blueprint(reload_payback_bp, url_prefix='/api/reload-payback')
-app.register_blueprint(team_investment_bp, url_prefix='/api/team-investment')
-app.register_blueprint(team_snapshots_bp, url_prefix='/api/team')
+# App padrão (src.main:app), criado no primeiro acesso
+_app = None
+_app_lock = threading.Lock()
+
+
+def create_app(config=None, bootstrap=None, blueprints=None):
+    """
+    Cria e configura a aplicação Flask.
+    
+    Fases: configuração -> extensões -> blueprints -> serviços -> bootstrap.
+    Só o bootstrap altera o banco (migrations versionadas, dados iniciais e
+    backup inicial); ele é opcional e, em produção, roda uma vez antes do
+    gunicorn (`flask --app src.main bootstrap`). Sem bootstrap, o app só lê
+    a versão do schema e responde 503 se o banco estiver atrás das migrations.
+    
+    Args:
+        config: Configurações aplicadas antes de inicializar as extensões
+        bootstrap: Executar o bootstrap (padrão: variável APP_BOOTSTRAP)
+        blueprints: Módulos de rota a registrar (padrão: todos)
+    
+    Returns:
+        Flask app
+    """
+    global _app
+    
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    configure_app(app, config)
+    init_extensions(app)
+    register_blueprints(app, blueprints)
+    init_services(app)
+    
+    # Frontend estático (SPA)
+    app.add_url_rule('/', 'serve', serve, defaults={'path': ''})
+    app.add_url_rule('/<path:path>', 'serve', serve)
+    
+    @app.cli.command('bootstrap')
+    def bootstrap_command():
+        """Aplica migrations e cria dados iniciais."""
+        bootstrap_app(app)
+    
+    @app.cli.command('migrate')
+    @click.option('--status', is_flag=True, help='Só mostra a versão atual e os passos aplicados')
+    def migrate_command(status):
+        """Aplica as migrations pendentes (schema_migrations)."""
+        migrate_app(app, status)
+    
+    if bootstrap is None:
+        bootstrap = os.environ.get('APP_BOOTSTRAP', '').lower() in ('1', 'true', 'yes')
+    if bootstrap:
+        bootstrap_app(app)
+    elif not app.testing:
+        check_schema_version(app)
+    
+    with _app_lock:
+        if _app is None:
+            _app = app
+    return app
+
+
+def configure_app(app, config=None):
+    """Configurações de segurança, banco e CORS (sem I/O)."""
+    # Configurações de segurança (SECRET_KEY via ambiente)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'invictus-poker-team-secret-key-2024')
+    
+    # Configurações de sessão segura
+    app.config['SESSION_COOKIE_SECURE'] = True  # HTTPS apenas
+    app.config['SESSION_COOKIE_HTTPONLY'] = True  # JavaScript não pode acessar
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Proteção CSRF básica
+    
+    # Configurações de banco de dados
+    app.config.update(get_database_config())
+    if config:
+        app.config.update(config)
+    
+    # Configurar CORS para desenvolvimento e produção
+    allowed_origins = [
+        "http://localhost:3000", 
+        "http://localhost:5173", 
+        "http://127.0.0.1:3000", 
+        "http://127.0.0.1:5173",
+    ]
+    
+    # Adicionar origins de produção se definidos
+    cors_origins = os.environ.get('CORS_ORIGINS', '')
+    if cors_origins:
+        production_origins = [origin.strip() for origin in cors_origins.split(',') if origin.strip()]
+        allowed_origins.extend(production_origins)
+    
+    # Habilitar CORS para todas as rotas
+    CORS(app, 
+         origins=allowed_origins,
+         supports_credentials=True,
+         allow_headers=["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
+         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"])
+
+
+def init_extensions(app):
+    """Extensões e serviços globais ligados ao app (sem I/O)."""
+    from src.utils.scheduler import scheduler
+    from src.utils.retention import retention_service
+    from src.utils.audit_sink import audit_sink
+    from src.utils.login_pool import login_verifier
+    from src.middleware.rate_limiter import rate_limiter
+    from src.utils.document_storage import document_storage
+    from src.utils.dimension_cache import dimension_cache
+    from src.utils.balance_index import balance_index
+    
+    # Inicializar banco de dados
+    db.init_app(app)
+    
+    # Agendador unificado de tarefas periódicas (um único líder entre os workers)
+    scheduler.init_app(app)
+    
+    # Retenção/arquivamento de auditoria e notificações
+    retention_service.init_app(app)
+    
+    # Auditoria write-behind (AUDIT_WRITE_MODE=sync|async)
+    audit_sink.init_app(app)
+    
+    # Hash de senha/TOTP do login em pool de processos (LOGIN_VERIFY_MODE=inline|pool)
+    login_verifier.init_app(app)
+    
+    # Tentativas falhadas de login compartilhadas entre workers (bloqueio progressivo)
+    rate_limiter.init_attempt_store(app)
+    
+    # Documentos endereçados por conteúdo (DOCUMENT_SENDFILE=none|x-sendfile|x-accel)
+    document_storage.init_app(app)
+    
+    # Plataformas/retas em memória, versionadas em dimension_versions
+    dimension_cache.init_app(app)
+    
+    # Fechamentos diários por conta, mantidos a cada BalanceHistory inserido
+    balance_index.init_app(app)
+
+
+def register_blueprints(app, names=None):
+    """
+    Importa e registra os blueprints.
+    
+    Args:
+        names: Atributos dos blueprints a registrar (ex.: ['auth_bp']); None = todos
+    """
+    for module_name, attribute, url_prefix in BLUEPRINTS:
+        if names is not None and attribute not in names:
+            continue
+        blueprint = getattr(importlib.import_module(module_name), attribute)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+
+
+def init_services(app):
+    """Backup automático e jobs do agendador (só registro; executam após o fork)."""
+    from src.utils.scheduler import scheduler
+    from src.utils.retention import retention_service
+    from src.utils.notification_service import NotificationService
+    
+    if not app.testing:
+        # Inicializar sistema de backup automático (o backup inicial fica no bootstrap)
+        from src.utils.backup_manager import init_backup_manager
+        try:
+            database_path = sqlite_database_path(app)
+            if database_path:
+                backup_manager = init_backup_manager(database_path, auto_start=False)
+                backup_manager.start_automatic_backup(interval_hours=6)
+                print(f"INFO: Backups salvos em: {backup_manager.backup_dir}")
+            else:
+                print("INFO: Sistema de backup disponivel apenas para SQLite")
+        except Exception as e:
+            print(f"ATENCAO: Erro ao inicializar sistema de backup: {e}")
+            print("ATENCAO: Sistema funcionara sem backup automatico")
+    
+    # Verificação diária de dados incompletos (executada pelo líder do agendador)
+    scheduler.add_job('notify_incomplete_data', NotificationService.notify_incomplete_data,
+                      daily_at="09:00", jitter_seconds=600)
+    
+    # Arquivamento mensal comprimido de auditoria e notificações antigas
+    scheduler.add_job('retention', retention_service.run, daily_at="03:00", jitter_seconds=600)
+
+
+def bootstrap_app(app):
+    """Aplica migrations pendentes, dados iniciais e backup inicial."""
+    with app.app_context():
+        # Schema versionado: com o banco atualizado só lê a versão
+        from src.database.migrations.runner import get_migration_runner
+        get_migration_runner().upgrade(db.engine)
+        
+        # Criar dados iniciais se não existirem
+        from src.utils.init_data import create_initial_data
+        create_initial_data()
+        
+        from src.utils.backup_manager import get_backup_manager
+        backup_manager = get_backup_manager()
+        if backup_manager and not app.testing:
+            try:
+                backup_manager.create_backup("Backup inicial - Sistema iniciado")
+            except Exception as e:
+                print(f"ATENCAO: Erro ao criar backup inicial: {e}")
+    print("OK: Bootstrap concluido")
+
+
+def check_schema_version(app):
+    """
+    Compara a versão do banco com a última migration (uma leitura de schema_migrations).
+    
+    Banco desatualizado não derruba o processo (o próprio `flask bootstrap`
+    e os scripts de migration carregam este app), mas o app fica indisponível:
+    toda requisição recebe 503 até as migrations serem aplicadas.
+    
+    Returns:
+        True se o schema está na versão esperada
+    """
+    from src.database.migrations.runner import get_migration_runner
+    runner = get_migration_runner()
+    with app.app_context():
+        current = runner.current_version(db.engine)
+    if current >= runner.head:
+        return True
+    
+    message = (f"Schema do banco na versão {current}, aplicação exige {runner.head}; "
+               f"execute `flask --app src.main bootstrap`")
+    print(f"ERRO: {message}")
+    
+    @app.before_request
+    def schema_outdated():
+        return jsonify({'error': message}), 503
+    
+    return False
+
+
+def migrate_app(app, status=False):
+    """Aplica as migrations pendentes ou lista o estado de cada passo."""
+    from src.database.migrations.runner import get_migration_runner
+    runner = get_migration_runner()
+    with app.app_context():
+        if not status:
+            applied = runner.upgrade(db.engine)
+            print(f"OK: {len(applied)} migrations aplicadas")
+        print(f"Versão atual: {runner.current_version(db.engine)} (última: {runner.head})")
+        if status:
+            for step in runner.status(db.engine):
+                applied_at = step['applied_at'] or 'pendente'
+                duration = f" ({step['duration_ms']} ms)" if step['duration_ms'] is not None else ''
+                print(f"  {step['version']:03d} {step['name']}: {applied_at}{duration}")
+
+
+def sqlite_database_path(app):
+    """Caminho do arquivo SQLite configurado (None para outros bancos)."""
+    database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if database_uri.startswith('sqlite:///'):
+        return database_uri.replace('sqlite:///', '')
+    return None
+
+
+def __getattr__(name):
+    # `src.main:app` (gunicorn, scripts) cria o app padrão no primeiro acesso
+    if name == 'app':
+        with _app_lock:
+            existing = _app
+        return existing or create_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Configuração SQLite com WAL mode e otimizações
 @event.listens_for(Engine, "connect")
@@ -108,74 +320,9 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor.execute("PRAGMA busy_timeout=30000")  # 30 segundos
         cursor.close()
 
-# Inicializar banco de dados
-db.init_app(app)
-
-# Inicializar banco de dados e dados iniciais
-with app.app_context():
-    db.create_all()
-    
-    # Criar dados iniciais se não existirem, tolerando divergências de schema
-    from src.utils.init_data import create_initial_data
-    try:
-        create_initial_data()
-    except Exception as e:
-        from sqlalchemy.exc import OperationalError
-        if isinstance(e, OperationalError):
-            print(f"ATENCAO: Divergencia de schema detectada ao criar dados iniciais: {e}")
-            print("Reinicializando banco (drop_all -> create_all) e tentando novamente...")
-            db.drop_all()
-            db.create_all()
-            create_initial_data()
-        else:
-            raise
-    
-    # Inicializar sistema de backup automático
-    from src.utils.backup_manager import init_backup_manager
-    try:
-        # Obter o caminho do banco de dados da configuração
-        database_uri = app.config['SQLALCHEMY_DATABASE_URI']
-        if database_uri.startswith('sqlite:///'):
-            database_path = database_uri.replace('sqlite:///', '')
-        else:
-            database_path = None
-        
-        if database_path:
-            backup_manager = init_backup_manager(database_path, auto_start=True)
-            print("OK: Sistema de backup automatico inicializado")
-            print(f"INFO: Backups salvos em: {backup_manager.backup_dir}")
-            print("INFO: Backup automatico configurado para cada 6 horas")
-        else:
-            print("INFO: Sistema de backup disponivel apenas para SQLite")
-    except Exception as e:
-        print(f"ATENCAO: Erro ao inicializar sistema de backup: {e}")
-        print("ATENCAO: Sistema funcionara sem backup automatico")
-    
-    # Inicializar verificação periódica de dados incompletos
-    import threading
-    import time
-    from src.utils.notification_service import get_notification_service
-    
-    def check_incomplete_data_periodically():
-        """Verificar dados incompletos a cada 24 horas"""
-        while True:
-            time.sleep(86400)  # 24 horas
-            try:
-                notification_service = get_notification_service()
-                notification_service.notify_incomplete_data()
-                print("OK: Verificacao de dados incompletos executada")
-            except Exception as e:
-                print(f"ERRO: Verificacao de dados incompletos falhou: {e}")
-    
-    # Iniciar thread de verificação
-    check_thread = threading.Thread(target=check_incomplete_data_periodically, daemon=True)
-    check_thread.start()
-    print("OK: Sistema de notificacoes de pendencias ativado")
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
+    static_folder_path = current_app.static_folder
     if static_folder_path is None:
             return "Static folder not configured", 404
 
@@ -190,7 +337,10 @@ def serve(path):
 
 
 if __name__ == '__main__':
-    # Configuração para produção (Render) e desenvolvimento
+    # Configuração para produção (Render) e desenvolvimento.
+    # Criado via src.main (não __main__) para que `src.main.app` seja este app.
+    import src.main
+    app = src.main.create_app(bootstrap=True)
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV', 'development') == 'development'
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,167 @@
+"""
+Armazenamento de tentativas falhadas para o bloqueio progressivo.
+
+Contadores em janela deslizante (buckets de tamanho fixo) com expiração:
+- MemoryAttemptStore: por processo, limitado em número de chaves;
+- SQLiteAttemptStore: arquivo SQLite compartilhado entre os workers do
+  gunicorn, para que o bloqueio valha independente do worker que atende.
+"""
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from typing import Optional
+
+# Janela de contagem e granularidade dos buckets
+WINDOW_SECONDS = 3600
+BUCKET_SECONDS = 60
+MAX_KEYS = 10000
+CLEANUP_EVERY = 200  # gravações entre limpezas de buckets expirados (SQLite)
+
+
+class _Window:
+    """Buckets (bucket, contagem) em ordem crescente e o total da janela."""
+
+    __slots__ = ('buckets', 'total')
+
+    def __init__(self):
+        self.buckets = deque()
+        self.total = 0
+
+    def expire(self, cutoff: int):
+        while self.buckets and self.buckets[0][0] <= cutoff:
+            self.total -= self.buckets.popleft()[1]
+
+    def add(self, bucket: int):
+        if self.buckets and self.buckets[-1][0] == bucket:
+            self.buckets[-1][1] += 1
+        else:
+            self.buckets.append([bucket, 1])
+        self.total += 1
+
+    @property
+    def last_bucket(self) -> int:
+        return self.buckets[-1][0] if self.buckets else -1
+
+
+class MemoryAttemptStore:
+    """Contadores em memória do processo, com expiração e limite de chaves."""
+
+    def __init__(self, window_seconds: int = WINDOW_SECONDS, bucket_seconds: int = BUCKET_SECONDS,
+                 max_keys: int = MAX_KEYS):
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = max(1, window_seconds // bucket_seconds)
+        self.max_keys = max_keys
+        # Ordem = última gravação (mais antigas primeiro), para expirar pelo início
+        self._windows: 'OrderedDict[str, _Window]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cutoff(self, now: Optional[float]) -> tuple:
+        bucket = int((time.time() if now is None else now) // self.bucket_seconds)
+        return bucket, bucket - self.window_buckets
+
+    def record(self, key: str, now: float = None) -> int:
+        """Registra uma tentativa e retorna o total na janela."""
+        bucket, cutoff = self._cutoff(now)
+        with self._lock:
+            self._evict(cutoff)
+            window = self._windows.pop(key, None) or _Window()
+            window.expire(cutoff)
+            window.add(bucket)
+            self._windows[key] = window
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+            return window.total
+
+    def count(self, key: str, now: float = None) -> int:
+        """Total de tentativas da chave na janela."""
+        _, cutoff = self._cutoff(now)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                return 0
+            window.expire(cutoff)
+            if not window.total:
+                del self._windows[key]
+            return window.total
+
+    def clear(self, key: str):
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def _evict(self, cutoff: int):
+        while self._windows:
+            key, window = next(iter(self._windows.items()))
+            if window.last_bucket > cutoff:
+                break
+            del self._windows[key]
+
+    def __len__(self):
+        return len(self._windows)
+
+
+class SQLiteAttemptStore:
+    """Contadores em um arquivo SQLite compartilhado entre processos."""
+
+    def __init__(self, path: str, window_seconds: int = WINDOW_SECONDS, bucket_seconds: int = BUCKET_SECONDS,
+                 cleanup_every: int = CLEANUP_EVERY):
+        self.path = path
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = max(1, window_seconds // bucket_seconds)
+        self.cleanup_every = cleanup_every
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Uma conexão por thread e por processo (reabre após o fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_attempts ("
+                "key TEXT NOT NULL, bucket INTEGER NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (key, bucket)) WITHOUT ROWID"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _cutoff(self, now: Optional[float]) -> tuple:
+        bucket = int((time.time() if now is None else now) // self.bucket_seconds)
+        return bucket, bucket - self.window_buckets
+
+    def record(self, key: str, now: float = None) -> int:
+        """Registra uma tentativa e retorna o total na janela."""
+        bucket, cutoff = self._cutoff(now)
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO rate_limit_attempts (key, bucket, count) VALUES (?, ?, 1) "
+            "ON CONFLICT (key, bucket) DO UPDATE SET count = count + 1",
+            (key, bucket)
+        )
+        self._writes += 1
+        if self._writes % self.cleanup_every == 0:
+            conn.execute("DELETE FROM rate_limit_attempts WHERE bucket <= ?", (cutoff,))
+        return self._sum(conn, key, cutoff)
+
+    def count(self, key: str, now: float = None) -> int:
+        """Total de tentativas da chave na janela."""
+        _, cutoff = self._cutoff(now)
+        return self._sum(self._connection(), key, cutoff)
+
+    def clear(self, key: str):
+        self._connection().execute("DELETE FROM rate_limit_attempts WHERE key = ?", (key,))
+
+    @staticmethod
+    def _sum(conn: sqlite3.Connection, key: str, cutoff: int) -> int:
+        row = conn.execute(
+            "SELECT COALESCE(SUM(count), 0) FROM rate_limit_attempts WHERE key = ? AND bucket > ?",
+            (key, cutoff)
+        ).fetchone()
+        return row[0]
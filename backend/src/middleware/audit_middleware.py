@@ -6,7 +6,8 @@ Fase 3 - Sistema de Auditoria Completo
 from functools import wraps
 from flask import request, session, g
 from src.models.models import db, AuditLog, User
-from src.routes.audit import log_action
+from src.routes.audit import log_action, audit_log_fields
+from src.utils.audit_sink import get_audit_sink
 import json
 
 def audit_action(action_name, entity_type=None, include_body=False):
@@ -47,8 +48,9 @@ def audit_action(action_name, entity_type=None, include_body=False):
                         if 'password' in new_values:
                             new_values['password'] = '[REDACTED]'
                         
-                        # Criar log de auditoria
-                        log_action(
+                        # Enfileirar log de auditoria (gravado em lote fora do request
+                        # no modo async; no modo sync, commit imediato como antes)
+                        get_audit_sink().submit(audit_log_fields(
                             user_id=user_id,
                             action=action_name,
                             entity_type=entity_type or 'Unknown',
@@ -56,14 +58,7 @@ def audit_action(action_name, entity_type=None, include_body=False):
                             old_values=None,
                             new_values=new_values if new_values else None,
                             request_obj=request
-                        )
-                        
-                        # Commit do log (não falhar a operação principal)
-                        try:
-                            db.session.commit()
-                        except Exception as e:
-                            print(f"Erro ao salvar log de auditoria: {e}")
-                            db.session.rollback()
+                        ))
                             
                 except Exception as e:
                     print(f"Erro no middleware de auditoria: {e}")
@@ -182,7 +177,7 @@ def create_security_log(event_type, details, severity='INFO'):
         user = get_current_user_for_audit()
         user_id = user.id if user else 1  # Sistema
         
-        log_action(
+        get_audit_sink().submit(audit_log_fields(
             user_id=user_id,
             action=f"security_{event_type}",
             entity_type='Security',
@@ -195,9 +190,7 @@ def create_security_log(event_type, details, severity='INFO'):
                 'timestamp': str(db.func.now())
             },
             request_obj=request if request else None
-        )
-        
-        db.session.commit()
+        ))
         
     except Exception as e:
         print(f"Erro ao criar log de segurança: {e}")
@@ -4,10 +4,14 @@ Rate Limiting middleware para proteger endpoints críticos.
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask import request, jsonify
-import time
-from typing import Dict, List
-from datetime import datetime, timedelta
-import redis
+import os
+import sqlite3
+import logging
+from src.middleware.attempt_store import MemoryAttemptStore, SQLiteAttemptStore
+
+logger = logging.getLogger(__name__)
+
+ATTEMPT_STORES = ('memory', 'sqlite')
 
 
 class RateLimiter:
@@ -15,27 +19,46 @@ class RateLimiter:
     
     def __init__(self, app=None):
         self.limiter = None
-        self.failed_attempts: Dict[str, List[datetime]] = {}
+        # Tentativas falhadas por IP (janela deslizante de 1 hora)
+        self.attempt_store = MemoryAttemptStore()
+        self._fallback_store = self.attempt_store
         
         if app:
             self.init_app(app)
     
+    def init_attempt_store(self, app):
+        """
+        Configurar o armazenamento das tentativas falhadas.
+        
+        RATE_LIMIT_ATTEMPT_STORE: 'sqlite' (compartilhado entre workers,
+        padrão) ou 'memory' (por processo, padrão em testes).
+        RATE_LIMIT_DB_PATH: arquivo do store SQLite.
+        """
+        kind = app.config.get('RATE_LIMIT_ATTEMPT_STORE') or os.environ.get('RATE_LIMIT_ATTEMPT_STORE')
+        if kind not in ATTEMPT_STORES:
+            kind = 'memory' if app.testing else 'sqlite'
+        
+        if kind == 'sqlite':
+            path = (app.config.get('RATE_LIMIT_DB_PATH') or os.environ.get('RATE_LIMIT_DB_PATH')
+                    or os.path.join(app.instance_path, 'rate_limit.sqlite'))
+            self.attempt_store = SQLiteAttemptStore(path)
+        else:
+            self.attempt_store = MemoryAttemptStore()
+    
     def init_app(self, app):
         """Inicializar rate limiter com a app Flask"""
-        try:
-            # Tentar usar Redis se disponível
-            from redis import Redis
-            redis_client = Redis(host='localhost', port=6379, db=0, decode_responses=True)
-            redis_client.ping()
-            storage_uri = "redis://localhost:6379"
-        except:
-            # Fallback para in-memory storage
-            storage_uri = "memory://"
+        self.init_attempt_store(app)
+        
+        # Redis só quando configurado; sem ping bloqueante no startup.
+        # Se o Redis cair, o Flask-Limiter usa memória até ele voltar.
+        storage_uri = (app.config.get('RATELIMIT_STORAGE_URI') or os.environ.get('RATELIMIT_STORAGE_URI')
+                       or os.environ.get('REDIS_URL') or "memory://")
         
         self.limiter = Limiter(
             app=app,
             key_func=get_remote_address,
             storage_uri=storage_uri,
+            in_memory_fallback_enabled=not storage_uri.startswith('memory://'),
             default_limits=["200 per day", "50 per hour"],
             headers_enabled=True
         )
@@ -62,19 +85,17 @@ class RateLimiter:
                 'retry_after': e.retry_after
             }), 429
     
+    def _store_call(self, method: str, ip: str) -> int:
+        """Chama o store; se o SQLite falhar, usa o store em memória do processo."""
+        try:
+            return getattr(self.attempt_store, method)(ip)
+        except sqlite3.Error as e:
+            logger.warning(f"Store de tentativas indisponível ({e}), usando memória do processo")
+            return getattr(self._fallback_store, method)(ip)
+    
     def get_delay_for_ip(self, ip: str) -> int:
         """Calcular delay progressivo baseado em tentativas falhadas"""
-        if ip not in self.failed_attempts:
-            return 0
-        
-        # Limpar tentativas antigas (> 1 hora)
-        cutoff = datetime.now() - timedelta(hours=1)
-        self.failed_attempts[ip] = [
-            attempt for attempt in self.failed_attempts[ip] 
-            if attempt > cutoff
-        ]
-        
-        failed_count = len(self.failed_attempts[ip])
+        failed_count = self._store_call('count', ip)
         
         if failed_count == 0:
             return 0
@@ -89,19 +110,11 @@ class RateLimiter:
     
     def record_failed_attempt(self, ip: str):
         """Registrar tentativa falhada"""
-        if ip not in self.failed_attempts:
-            self.failed_attempts[ip] = []
-        
-        self.failed_attempts[ip].append(datetime.now())
-        
-        # Manter apenas últimas 20 tentativas
-        if len(self.failed_attempts[ip]) > 20:
-            self.failed_attempts[ip] = self.failed_attempts[ip][-20:]
+        self._store_call('record', ip)
     
     def clear_failed_attempts(self, ip: str):
         """Limpar tentativas falhadas após sucesso"""
-        if ip in self.failed_attempts:
-            del self.failed_attempts[ip]
+        self._store_call('clear', ip)
 
 
 # Instância global
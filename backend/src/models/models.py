@@ -2,6 +2,7 @@ from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import Numeric
+from src.utils import audit_codec
 import enum
 
 db = SQLAlchemy()
@@ -185,6 +186,23 @@ class Platform(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class DimensionVersion(db.Model):
+    """Versão das tabelas de dimensão (plataformas, retas) para invalidar caches entre processos"""
+    __tablename__ = 'dimension_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class SchemaMigration(db.Model):
+    """Passos de migration aplicados ao banco (src/database/migrations/runner.py)"""
+    __tablename__ = 'schema_migrations'
+    
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    duration_ms = db.Column(db.Integer)
+
 class Account(db.Model):
     __tablename__ = 'accounts'
     
@@ -232,8 +250,8 @@ class Account(db.Model):
         Após jogo: GG $100, PS $25
         P&L = (100-50) + (25-30) = +$45 (Luxon NÃO entra)
         """
-        if self.platform and self.platform.name.lower() == 'luxon':
-            return 0.00  # Luxon NÃO entra no P&L
+        if self.platform and 'luxon' in self.platform.name.lower():
+            return 0.00  # Luxon (luxon, LuxonPay...) NÃO entra no P&L - mesma regra de src.services.pnl
         
         if not self.has_account:
             return 0.00
@@ -299,6 +317,14 @@ class ReloadRequest(db.Model):
     # Relacionamento para o usuário que aprovou
     approver = db.relationship('User', foreign_keys=[approved_by])
     
+    __table_args__ = (
+        # Reloads aprovados por jogador/período (P&L, relatórios) e fila de pendentes
+        db.Index('ix_reload_requests_user_status_approved', 'user_id', 'status', 'approved_at'),
+        db.Index('ix_reload_requests_status_approved', 'status', 'approved_at'),
+        db.Index('ix_reload_requests_pending', 'created_at',
+                 sqlite_where=db.text("status = 'PENDING'"), postgresql_where=db.text("status = 'PENDING'")),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -337,6 +363,10 @@ class Transaction(db.Model):
     reload_request = db.relationship('ReloadRequest', backref='transactions')
     creator = db.relationship('User', foreign_keys=[created_by])
     
+    __table_args__ = (
+        db.Index('ix_transactions_user_created', 'user_id', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -466,6 +496,11 @@ class WithdrawalRequest(db.Model):
     platform = db.relationship('Platform')
     approver = db.relationship('User', foreign_keys=[approved_by])
     
+    __table_args__ = (
+        db.Index('ix_withdrawal_requests_user_status_approved', 'user_id', 'status', 'approved_at'),
+        db.Index('ix_withdrawal_requests_status_approved', 'status', 'approved_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -559,6 +594,12 @@ class BalanceHistory(db.Model):
     changer = db.relationship('User', foreign_keys=[changed_by])
     document = db.relationship('Document')
     
+    __table_args__ = (
+        # Histórico por conta no tempo e somas de 'close_day' por período
+        db.Index('ix_balance_history_account_created', 'account_id', 'created_at'),
+        db.Index('ix_balance_history_reason_created', 'change_reason', 'created_at'),
+    )
+    
     @property
     def change_amount(self):
         return float(self.new_balance - self.old_balance)
@@ -579,6 +620,34 @@ class BalanceHistory(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class AccountDailyBalance(db.Model):
+    """Saldo de fechamento diário por conta, mantido a cada BalanceHistory inserido (src/utils/balance_index.py)"""
+    __tablename__ = 'account_daily_balances'
+
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    closing_balance = db.Column(Numeric(10, 2), nullable=False)  # new_balance da última alteração do dia
+    net_change = db.Column(Numeric(12, 2), nullable=False, default=0)  # soma de new - old no dia
+    last_change_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_account_daily_balances_day', 'day'),
+    )
+
+class AuditIpAddress(db.Model):
+    """Dimensão de IPs dos logs de auditoria (valor internado)"""
+    __tablename__ = 'audit_ip_addresses'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.String(45), unique=True, nullable=False)
+
+class AuditUserAgent(db.Model):
+    """Dimensão de User-Agents dos logs de auditoria (valor internado)"""
+    __tablename__ = 'audit_user_agents'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.String(500), unique=True, nullable=False)
+
 class AuditLog(db.Model):
     """Log de auditoria para ações críticas"""
     __tablename__ = 'audit_logs'
@@ -588,14 +657,138 @@ class AuditLog(db.Model):
     action = db.Column(db.String(100), nullable=False, index=True)  # 'user_created', 'balance_updated', etc.
     entity_type = db.Column(db.String(50), nullable=False, index=True)  # 'User', 'Account', 'ReloadRequest', etc.
     entity_id = db.Column(db.Integer, nullable=False)  # ID da entidade afetada
-    old_values = db.Column(db.Text)  # JSON com valores antigos
-    new_values = db.Column(db.Text)  # JSON com valores novos
-    ip_address = db.Column(db.String(45))  # IP do usuário
-    user_agent = db.Column(db.String(500))  # User agent do browser
+    # Formato compacto: old/new com apenas as chaves alteradas (ver utils/audit_codec)
+    payload = db.Column(db.LargeBinary)
+    ip_address_id = db.Column(db.Integer, db.ForeignKey('audit_ip_addresses.id'))
+    user_agent_id = db.Column(db.Integer, db.ForeignKey('audit_user_agents.id'))
+    # Formato legado (linhas anteriores à codificação compacta)
+    old_values_text = db.Column('old_values', db.Text)  # JSON com valores antigos
+    new_values_text = db.Column('new_values', db.Text)  # JSON com valores novos
+    ip_address_text = db.Column('ip_address', db.String(45))  # IP do usuário
+    user_agent_text = db.Column('user_agent', db.String(500))  # User agent do browser
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
-    # Relacionamento
+    # Relacionamentos
     user = db.relationship('User')
+    ip_address_ref = db.relationship('AuditIpAddress', lazy='joined')
+    user_agent_ref = db.relationship('AuditUserAgent', lazy='joined')
+    
+    # Paginação por cursor: ORDER BY created_at DESC, id DESC
+    __table_args__ = (
+        db.Index('ix_audit_logs_created_id', 'created_at', 'id'),
+    )
+    
+    # old_values/new_values/ip_address/user_agent continuam sendo a interface
+    # pública: aceitam e devolvem os mesmos valores do formato antigo.
+    @property
+    def old_values(self):
+        return audit_codec.to_legacy_text(self._decoded_values()[0])
+    
+    @old_values.setter
+    def old_values(self, value):
+        self._set_values(old_values=value)
+    
+    @property
+    def new_values(self):
+        return audit_codec.to_legacy_text(self._decoded_values()[1])
+    
+    @new_values.setter
+    def new_values(self, value):
+        self._set_values(new_values=value)
+    
+    @property
+    def ip_address(self):
+        if self.ip_address_ref is not None:
+            return self.ip_address_ref.value
+        return getattr(self, '_pending_ip_address', None) or self.ip_address_text
+    
+    @ip_address.setter
+    def ip_address(self, value):
+        self._pending_ip_address = value
+        self.ip_address_id = audit_codec.intern_value(db.session, AuditIpAddress, value)
+    
+    @property
+    def user_agent(self):
+        if self.user_agent_ref is not None:
+            return self.user_agent_ref.value
+        return getattr(self, '_pending_user_agent', None) or self.user_agent_text
+    
+    @user_agent.setter
+    def user_agent(self, value):
+        self._pending_user_agent = value
+        self.user_agent_id = audit_codec.intern_value(db.session, AuditUserAgent, value)
+    
+    def _decoded_values(self):
+        if self.payload:
+            return audit_codec.decode_payload(self.payload)
+        return (audit_codec.parse_legacy_text(self.old_values_text),
+                audit_codec.parse_legacy_text(self.new_values_text))
+    
+    def _set_values(self, **changes):
+        """Recebe texto JSON (formato antigo) ou objetos e regrava o payload."""
+        old_values, new_values = self._decoded_values()
+        if 'old_values' in changes:
+            old_values = audit_codec.parse_legacy_text(changes['old_values'])
+        if 'new_values' in changes:
+            new_values = audit_codec.parse_legacy_text(changes['new_values'])
+        self.payload = audit_codec.encode_payload(old_values, new_values)
+        self.old_values_text = None
+        self.new_values_text = None
+    
+    @staticmethod
+    def prepare_bulk_rows(rows, session=None):
+        """
+        Converte registros de audit_log_fields em linhas para insert em lote,
+        resolvendo IPs e User-Agents com uma consulta por dimensão.
+        
+        Args:
+            session: Sessão da transação do insert (padrão: db.session)
+        """
+        session = session or db.session
+        ips = audit_codec.intern_values(session, AuditIpAddress, (r.get('ip_address') for r in rows))
+        agents = audit_codec.intern_values(session, AuditUserAgent, (r.get('user_agent') for r in rows))
+        ip_length = AuditIpAddress.__table__.c.value.type.length
+        agent_length = AuditUserAgent.__table__.c.value.type.length
+        
+        prepared = []
+        for row in rows:
+            row = dict(row)
+            ip_address = row.pop('ip_address', None)
+            user_agent = row.pop('user_agent', None)
+            row['ip_address_id'] = ips.get(ip_address[:ip_length]) if ip_address else None
+            row['user_agent_id'] = agents.get(user_agent[:agent_length]) if user_agent else None
+            prepared.append(row)
+        return prepared
+    
+    @staticmethod
+    def expand_rows(rows):
+        """
+        Converte linhas cruas da tabela (dicts) para o formato legado
+        autocontido: old_values/new_values em JSON e IP/User-Agent por extenso.
+        """
+        ip_ids = {r['ip_address_id'] for r in rows if r.get('ip_address_id')}
+        agent_ids = {r['user_agent_id'] for r in rows if r.get('user_agent_id')}
+        ips = dict(db.session.query(AuditIpAddress.id, AuditIpAddress.value).filter(
+            AuditIpAddress.id.in_(ip_ids)).all()) if ip_ids else {}
+        agents = dict(db.session.query(AuditUserAgent.id, AuditUserAgent.value).filter(
+            AuditUserAgent.id.in_(agent_ids)).all()) if agent_ids else {}
+        
+        expanded = []
+        for row in rows:
+            row = dict(row)
+            payload = row.pop('payload', None)
+            if payload:
+                old_values, new_values = audit_codec.decode_payload(payload)
+                row['old_values'] = audit_codec.to_legacy_text(old_values)
+                row['new_values'] = audit_codec.to_legacy_text(new_values)
+            ip_address_id = row.pop('ip_address_id', None)
+            user_agent_id = row.pop('user_agent_id', None)
+            if ip_address_id:
+                row['ip_address'] = ips.get(ip_address_id)
+            if user_agent_id:
+                row['user_agent'] = agents.get(user_agent_id)
+            expanded.append(row)
+        return expanded
     
     def to_dict(self):
         return {
@@ -1,5 +1,5 @@
 from src.models.models import db
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -50,6 +50,11 @@ class Notification(db.Model):
     # Relacionamentos
     user = relationship("User", backref="notifications")
     
+    # Listagem/contadores por usuário: não lidas e ainda válidas
+    __table_args__ = (
+        Index('ix_notifications_user_read_expires', 'user_id', 'is_read', 'expires_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -130,3 +135,32 @@ class UserNotificationSettings(db.Model):
             'urgent_only': self.urgent_only
         }
 
+
+class UserNotificationCounter(db.Model):
+    """Contadores desnormalizados de notificações por usuário (total, não lidas, urgentes)"""
+    __tablename__ = 'user_notification_counters'
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    total = Column(Integer, default=0, nullable=False)
+    unread = Column(Integer, default=0, nullable=False)
+    urgent = Column(Integer, default=0, nullable=False)
+    
+    # Menor expires_at entre as notificações contadas: ao passar, os contadores são recalculados
+    next_expires_at = Column(DateTime, nullable=True)
+    # Marcado quando uma escrita não pôde ajustar os contadores incrementalmente
+    is_stale = Column(Boolean, default=False, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def is_fresh(self, now: datetime) -> bool:
+        """Se os contadores ainda refletem as notificações válidas"""
+        if self.is_stale:
+            return False
+        return self.next_expires_at is None or self.next_expires_at > now
+    
+    def to_stats(self):
+        return {
+            'total': self.total,
+            'unread': self.unread,
+            'urgent': self.urgent
+        }
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, session
 from src.models.models import db, Account, User, Platform, UserRole
 from src.routes.auth import login_required, admin_required
 from src.utils.pagination import paginate_query
+from src.utils.dimension_cache import get_dimension_cache
 
 accounts_bp = Blueprint('accounts', __name__)
 
@@ -55,7 +56,7 @@ def create_account():
             user_id = current_user.id
         
         # Verificar se a plataforma existe
-        platform = Platform.query.get(data['platform_id'])
+        platform = get_dimension_cache().platform(data['platform_id'])
         if not platform or not platform.is_active:
             return jsonify({'error': 'Platform not found or inactive'}), 404
         
@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify, session, make_response
 from src.models.models import db, AuditLog, User, UserRole
 from src.routes.auth import login_required, admin_required
+from src.utils.retention import get_retention_service
+from src.utils.audit_codec import encode_payload
+from src.utils.pagination import (
+    paginate_query, paginate_keyset, count_query, encode_cursor, decode_cursor, InvalidCursorError
+)
 from datetime import datetime, timedelta
+from itertools import islice
 import json
 
 audit_bp = Blueprint('audit', __name__)
@@ -11,7 +17,7 @@ audit_bp = Blueprint('audit', __name__)
 def get_audit_logs():
     """Obter logs de auditoria com filtros"""
     try:
-        page = request.args.get('page', 1, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
         per_page = request.args.get('per_page', 50, type=int)
         
         # Filtros opcionais
@@ -33,34 +39,152 @@ def get_audit_logs():
         if user_id_filter:
             query = query.filter(AuditLog.user_id == user_id_filter)
         
-        # Filtro de data
-        if days_back > 0:
-            start_date = datetime.utcnow() - timedelta(days=days_back)
+        # Filtro de data (days_back=0: todo o histórico)
+        start_date = datetime.utcnow() - timedelta(days=days_back) if days_back > 0 else None
+        if start_date:
             query = query.filter(AuditLog.created_at >= start_date)
         
         # Ordenar por mais recente
         query = query.order_by(AuditLog.created_at.desc())
         
-        # Paginação
-        paginated_logs = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        retention = get_retention_service()
+        predicate = _archive_predicate(action_filter, entity_type_filter, user_id_filter)
+        
+        # Paginação por cursor (?cursor=, vazio na primeira página)
+        if 'cursor' in request.args:
+            count = 'none' if request.args.get('include_total', 'true').lower() == 'false' else 'cached'
+            return jsonify(_paginate_with_cursor(
+                query, retention, start_date, request.args.get('cursor'), per_page, predicate, count
+            )), 200
+        
+        if retention.has_archive_since('audit_logs', start_date):
+            return jsonify(_paginate_with_archive(
+                query, retention, start_date, page, per_page, predicate
+            )), 200
+        
+        # Paginação (total reaproveitado por alguns segundos entre páginas)
+        result = paginate_query(query, page=page, per_page=per_page, max_per_page=500, count='cached')
         
         return jsonify({
-            'logs': [log.to_dict() for log in paginated_logs.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': paginated_logs.total,
-                'pages': paginated_logs.pages,
-                'has_next': paginated_logs.has_next,
-                'has_prev': paginated_logs.has_prev
-            }
+            'logs': [log.to_dict() for log in result['items']],
+            'pagination': result['pagination']
         }), 200
         
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _archive_predicate(action_filter=None, entity_type_filter=None, user_id_filter=None):
+    """Mesmos filtros da consulta SQL, aplicados às linhas arquivadas"""
+    def matches(row):
+        if action_filter and action_filter.lower() not in (row['action'] or '').lower():
+            return False
+        if entity_type_filter and row['entity_type'] != entity_type_filter:
+            return False
+        if user_id_filter and row['user_id'] != user_id_filter:
+            return False
+        return True
+    # Identifica o filtro para o cache de contagens do arquivo
+    matches.cache_key = (action_filter, entity_type_filter, user_id_filter)
+    return matches
+
+def _paginate_with_archive(query, retention, start_date, page, per_page, predicate=None):
+    """
+    Pagina logs quentes e arquivados como uma única lista.
+    
+    As linhas arquivadas são sempre mais antigas que as da tabela, então a
+    página é preenchida primeiro pela consulta SQL e depois pelo arquivo.
+    """
+    hot_total = count_query(query, 'cached')
+    total = hot_total + retention.count_archive('audit_logs', start_date, predicate=predicate)
+    offset = (page - 1) * per_page
+    
+    logs = [log.to_dict() for log in query.offset(offset).limit(per_page).all()] if offset < hot_total else []
+    remaining = per_page - len(logs)
+    if remaining > 0:
+        # Só os meses necessários para a página são descomprimidos
+        archived = retention.iter_archive('audit_logs', start_date, predicate=predicate,
+                                          offset=max(0, offset - hot_total))
+        logs.extend(_archived_log_dicts(list(islice(archived, remaining))))
+    
+    pages = (total + per_page - 1) // per_page if per_page else 0
+    return {
+        'logs': logs,
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': pages,
+            'has_next': page < pages,
+            'has_prev': page > 1
+        },
+        'includes_archive': True
+    }
+
+def _paginate_with_cursor(query, retention, start_date, cursor, per_page, predicate=None, count='cached'):
+    """
+    Paginação por cursor em (created_at, id) que continua no arquivo
+    quando a tabela quente se esgota.
+    """
+    per_page = max(1, min(per_page, 500))
+    result = paginate_keyset(query, (AuditLog.created_at, AuditLog.id), cursor, per_page, count=count)
+    items = result['items']
+    pagination = result['pagination']
+    logs = [log.to_dict() for log in items]
+    
+    includes_archive = retention.has_archive_since('audit_logs', start_date)
+    if includes_archive and (count != 'none' or not pagination['has_next']):
+        if pagination['total'] is not None:
+            pagination['total'] += retention.count_archive('audit_logs', start_date, predicate=predicate)
+        
+        if not pagination['has_next']:
+            # Posição atual: último item quente da página ou o cursor recebido
+            if items:
+                position = (items[-1].created_at, items[-1].id)
+            elif cursor:
+                position = decode_cursor(cursor)
+            else:
+                position = None
+            
+            # Busca a partir do cursor: meses posteriores não são abertos
+            remaining = per_page - len(logs)
+            archived = retention.iter_archive('audit_logs', start_date, predicate=predicate, before=position)
+            page_rows = list(islice(archived, remaining + 1))
+            pagination['has_next'] = len(page_rows) > remaining
+            page_rows = page_rows[:remaining]
+            logs.extend(_archived_log_dicts(page_rows))
+            if pagination['has_next']:
+                last = page_rows[-1] if page_rows else {'created_at': position[0], 'id': position[1]}
+                pagination['next_cursor'] = encode_cursor(last['created_at'], last['id'])
+    
+    response = {'logs': logs, 'pagination': pagination}
+    if includes_archive:
+        response['includes_archive'] = True
+    return response
+
+def _archived_log_dicts(rows):
+    """Formata linhas arquivadas como AuditLog.to_dict (nomes em uma consulta)"""
+    user_ids = {row['user_id'] for row in rows}
+    names = dict(db.session.query(User.id, User.full_name).filter(User.id.in_(user_ids)).all()) if user_ids else {}
+    return [
+        {
+            'id': row['id'],
+            'user_id': row['user_id'],
+            'user_name': names.get(row['user_id']),
+            'action': row['action'],
+            'entity_type': row['entity_type'],
+            'entity_id': row['entity_id'],
+            'old_values': row['old_values'],
+            'new_values': row['new_values'],
+            'ip_address': row['ip_address'],
+            'user_agent': row['user_agent'],
+            'created_at': row['created_at'].isoformat(),
+            'archived': True
+        }
+        for row in rows
+    ]
+
 @audit_bp.route('/logs/<int:log_id>', methods=['GET'])
 @admin_required
 def get_audit_log_detail(log_id):
@@ -142,6 +266,16 @@ def get_audit_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@audit_bp.route('/sink', methods=['GET'])
+@admin_required
+def get_audit_sink_status():
+    """Modo de gravação, fila e métricas do sink de auditoria (por worker)"""
+    try:
+        from src.utils.audit_sink import get_audit_sink
+        return jsonify(get_audit_sink().get_stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @audit_bp.route('/create', methods=['POST'])
 @login_required
 def create_audit_log():
@@ -201,23 +335,9 @@ def log_action(user_id, action, entity_type, entity_id, old_values=None, new_val
         request_obj: Objeto request do Flask para obter IP e User-Agent
     """
     try:
-        ip_address = '127.0.0.1'
-        user_agent = 'System'
-        
-        if request_obj:
-            ip_address = request_obj.headers.get('X-Forwarded-For', request_obj.remote_addr)
-            user_agent = request_obj.headers.get('User-Agent', 'Unknown')
-        
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            old_values=json.dumps(old_values) if old_values else None,
-            new_values=json.dumps(new_values) if new_values else None,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
+        audit_log = AuditLog(**audit_log_fields(
+            user_id, action, entity_type, entity_id, old_values, new_values, request_obj
+        ))
         
         db.session.add(audit_log)
         # Não fazer commit aqui - deixar para a função que chama
@@ -226,6 +346,35 @@ def log_action(user_id, action, entity_type, entity_id, old_values=None, new_val
         print(f"Erro ao criar log de auditoria: {e}")
         # Não falhar a operação principal por causa do log
 
+def audit_log_fields(user_id, action, entity_type, entity_id, old_values=None, new_values=None, request_obj=None):
+    """
+    Colunas de um AuditLog (usado por log_action e pelo audit_sink).
+    
+    old/new são codificados no payload compacto; IP e User-Agent seguem por
+    extenso e são internados na gravação (AuditLog.ip_address/user_agent ou
+    AuditLog.prepare_bulk_rows).
+    
+    created_at é preenchido aqui para registrar o momento da ação, mesmo
+    quando a gravação acontece depois (modo assíncrono).
+    """
+    ip_address = '127.0.0.1'
+    user_agent = 'System'
+    
+    if request_obj:
+        ip_address = request_obj.headers.get('X-Forwarded-For', request_obj.remote_addr)
+        user_agent = request_obj.headers.get('User-Agent', 'Unknown')
+    
+    return {
+        'user_id': user_id,
+        'action': action,
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'payload': encode_payload(old_values, new_values),
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'created_at': datetime.utcnow()
+    }
+
 @audit_bp.route('/export', methods=['GET'])
 @admin_required
 def export_audit_logs():
@@ -3,6 +3,7 @@ from src.models.models import db, User, UserRole
 from functools import wraps
 from src.middleware.rate_limiter import login_rate_limit, sensitive_rate_limit, rate_limiter
 from src.middleware.csrf_protection import get_csrf_token
+from src.utils.login_pool import get_login_verifier, LoginPoolSaturatedError
 from flask_limiter.util import get_remote_address
 from datetime import datetime, timedelta
 import os
@@ -54,7 +55,21 @@ def login():
         user = User.query.filter_by(username=username).first()
         ip = get_remote_address()
         
-        if user and user.check_password(password) and user.is_active:
+        password_ok = totp_ok = False
+        if user and user.is_active:
+            # Hash e TOTP verificados no pool de processos (fila limitada)
+            try:
+                password_ok, totp_ok = get_login_verifier().verify(
+                    user.password_hash, password,
+                    user.totp_secret if user.two_factor_enabled else None,
+                    totp_code if user.two_factor_enabled else None
+                )
+            except LoginPoolSaturatedError as e:
+                response = jsonify({'error': str(e)})
+                response.headers['Retry-After'] = '1'
+                return response, 503
+        
+        if password_ok:
             # Verificação 2FA (se habilitado)
             if user.two_factor_enabled:
                 # Exigir TOTP se 2FA ativo
@@ -62,9 +77,7 @@ def login():
                     return jsonify({'error': 'TOTP required', 'two_factor_required': True}), 401
                 if not pyotp:
                     return jsonify({'error': '2FA not available on server'}), 500
-                totp = pyotp.TOTP(user.totp_secret)
-                valid = totp.verify(str(totp_code), valid_window=1)
-                if not valid:
+                if not totp_ok:
                     # permitir uso de recovery code
                     recovery = str(totp_code).strip()
                     try:
@@ -97,6 +110,15 @@ def login():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@auth_bp.route('/login-pool', methods=['GET'])
+@admin_required
+def get_login_pool_status():
+    """Modo, fila e custo do hash na verificação de login (por worker)"""
+    try:
+        return jsonify(get_login_verifier().get_stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @auth_bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
@@ -1,6 +1,6 @@
-from flask import Blueprint, request, jsonify, session, send_file
+from flask import Blueprint, request, jsonify, session, send_file, Response, stream_with_context
 from datetime import datetime
-from src.models.models import User, UserRole
+from src.models.models import db, User, UserRole
 from src.routes.auth import login_required, admin_required
 from src.utils.backup_manager import get_backup_manager
 import os
@@ -17,12 +17,12 @@ def get_backup_status():
             return jsonify({'error': 'Sistema de backup não inicializado'}), 500
         
         db_info = backup_manager.get_database_info()
-        recent_backups = backup_manager.list_backups()[:5]  # 5 mais recentes
+        recent_backups = backup_manager.list_backups(limit=5)  # 5 mais recentes
         
         status = {
             'database_info': db_info,
             'recent_backups': recent_backups,
-            'total_backups': len(backup_manager.list_backups()),
+            'total_backups': db_info.get('total_backups', 0),
             'backup_directory': backup_manager.backup_dir,
             'automatic_backup_running': backup_manager.running,
             'max_backups_retained': backup_manager.max_backups
@@ -70,13 +70,17 @@ def list_backups():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        all_backups = backup_manager.list_backups()
-        total = len(all_backups)
+        if page < 1:
+            page = 1
+        if per_page < 1:
+            per_page = 20
         
-        # Paginação manual
+        total = backup_manager.count_backups()
+        
+        # Paginação no catálogo
         start = (page - 1) * per_page
         end = start + per_page
-        backups = all_backups[start:end]
+        backups = backup_manager.list_backups(limit=per_page, offset=start)
         
         return jsonify({
             'backups': backups,
@@ -102,22 +106,30 @@ def download_backup(filename):
         if not backup_manager:
             return jsonify({'error': 'Sistema de backup não inicializado'}), 500
         
-        backup_path = os.path.join(backup_manager.backup_dir, filename)
-        
-        if not os.path.exists(backup_path):
+        if not backup_manager.backup_exists(filename):
             return jsonify({'error': 'Arquivo de backup não encontrado'}), 404
         
         # Verificar se o arquivo está na lista de backups válidos
-        backups = backup_manager.list_backups()
-        valid_files = [b['filename'] for b in backups]
+        backup = backup_manager.get_backup(filename)
         
-        if filename not in valid_files:
+        if not backup:
             return jsonify({'error': 'Arquivo não autorizado para download'}), 403
         
-        return send_file(
-            backup_path,
-            as_attachment=True,
-            download_name=filename
+        if backup.get('format') != 'chunked':
+            return send_file(
+                os.path.join(backup_manager.backup_dir, filename),
+                as_attachment=True,
+                download_name=filename
+            )
+        
+        # Backups em blocos são reconstruídos sob demanda durante o download
+        return Response(
+            stream_with_context(backup_manager.iter_backup(filename)),
+            mimetype='application/octet-stream',
+            headers={
+                'Content-Disposition': f'attachment; filename={filename}',
+                'Content-Length': str(backup['logical_size'])
+            }
         )
         
     except Exception as e:
@@ -162,12 +174,32 @@ def restore_backup():
         success = backup_manager.restore_backup(filename)
         
         if success:
+            # Descartar conexões do pool para que nenhuma reutilize estado anterior ao restore
+            db.session.remove()
+            db.engine.dispose()
             return jsonify({
                 'message': 'Backup restaurado com sucesso',
-                'warning': 'Sistema deve ser reiniciado para aplicar mudanças completamente'
+                'restore': backup_manager.restore_progress
             }), 200
         else:
-            return jsonify({'error': 'Falha ao restaurar backup'}), 500
+            return jsonify({
+                'error': 'Falha ao restaurar backup',
+                'restore': backup_manager.restore_progress
+            }), 500
+            
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@backup_bp.route('/restore/status', methods=['GET'])
+@admin_required
+def get_restore_status():
+    """Progresso do restore em andamento (ou do último executado)"""
+    try:
+        backup_manager = get_backup_manager()
+        if not backup_manager:
+            return jsonify({'error': 'Sistema de backup não inicializado'}), 500
+        
+        return jsonify(backup_manager.restore_progress), 200
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -279,12 +311,10 @@ def verify_backup(filename):
         if not backup_manager:
             return jsonify({'error': 'Sistema de backup não inicializado'}), 500
         
-        backup_path = os.path.join(backup_manager.backup_dir, filename)
-        
-        if not os.path.exists(backup_path):
+        if not backup_manager.backup_exists(filename):
             return jsonify({'error': 'Arquivo de backup não encontrado'}), 404
         
-        is_valid = backup_manager._verify_backup_integrity(backup_path)
+        is_valid = backup_manager.verify_backup(filename)
         
         return jsonify({
             'filename': filename,
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify, session
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_, desc
 from src.models.models import db, User, Account, ReloadRequest, Transaction, PlayerData, UserRole, ReloadStatus, TransactionType, BalanceHistory
+from src.utils.serializers import serialize
+from src.utils.balance_index import get_balance_index
 from src.routes.auth import login_required
 
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -134,8 +136,8 @@ def get_manager_dashboard():
                 'players_with_issues': len([p for p in players_with_pending_data if p['status'] != 'complete'])
             },
             'players': players_with_pending_data,
-            'recent_requests': [req.to_dict() for req in recent_requests],
-            'recent_transactions': [trans.to_dict() for trans in recent_transactions],
+            'recent_requests': serialize(recent_requests),
+            'recent_transactions': serialize(recent_transactions),
             'financial_summary': financial_summary
         }), 200
     except Exception as e:
@@ -223,9 +225,9 @@ def get_player_dashboard():
             'status': player_status,
             'accounts': [account.to_dict() for account in accounts],
             'incomplete_data': [data.to_dict() for data in incomplete_data],
-            'pending_requests': [req.to_dict() for req in pending_requests],
-            'recent_requests': [req.to_dict() for req in reload_requests],
-            'recent_transactions': [trans.to_dict() for trans in recent_transactions],
+            'pending_requests': serialize(pending_requests),
+            'recent_requests': serialize(reload_requests),
+            'recent_transactions': serialize(recent_transactions),
             'financial_summary': personal_summary
         }), 200
     except Exception as e:
@@ -496,31 +498,20 @@ def get_team_pnl_series():
         end_date = datetime.utcnow().replace(hour=23, minute=59, second=59, microsecond=999999)
         start_date = end_date - timedelta(days=days - 1)
 
-        # ✅ CORRIGIDO: Buscar TODAS as mudanças de saldo, não só 'close_day'
-        # Isso incluirá todas as atualizações de planilha em tempo real
-        rows = db.session.query(
-            func.date(BalanceHistory.created_at).label('d'),
-            func.sum(BalanceHistory.new_balance - BalanceHistory.old_balance).label('delta')
-        ).filter(
-            BalanceHistory.created_at >= start_date,
-            BalanceHistory.created_at <= end_date
-            # ❌ Removido: BalanceHistory.change_reason == 'close_day'
-        ).group_by(func.date(BalanceHistory.created_at)).all()
-
-        delta_by_day = {str(r.d): float(r.delta or 0.0) for r in rows}
+        # ✅ CORRIGIDO: Considera TODAS as mudanças de saldo, não só 'close_day'
+        # Variação por dia e acumulado anterior vêm dos fechamentos diários
+        # por conta (account_daily_balances), sem agregar o BalanceHistory
+        index = get_balance_index()
+        delta_by_day = {
+            day.isoformat(): delta
+            for day, delta in index.net_change_by_day(start_date.date(), end_date.date()).items()
+        }
 
         series = []
         cursor = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        cumulative = 0.0
-        
-        # Calcular saldo inicial (antes do período)
-        initial_balance = db.session.query(
-            func.sum(BalanceHistory.new_balance - BalanceHistory.old_balance)
-        ).filter(
-            BalanceHistory.created_at < start_date
-        ).scalar() or 0.0
         
-        cumulative = float(initial_balance)
+        # Saldo inicial (antes do período)
+        cumulative = index.net_change_before(start_date.date())
         
         while cursor <= end_date:
             key = cursor.date().isoformat()
@@ -1,29 +1,33 @@
 import os
-import uuid
+from datetime import datetime
 from werkzeug.utils import secure_filename
-from flask import Blueprint, request, jsonify, session, send_from_directory
+from flask import Blueprint, request, jsonify, session
 from src.models.models import (
     db, Document, User, Account, ReloadRequest, WithdrawalRequest,
     UserRole, DocumentStatus
 )
 from src.routes.auth import login_required, admin_required
+from src.utils.document_storage import get_document_storage, DocumentTooLargeError
 
 documents_bp = Blueprint('documents', __name__)
 
 # Configurações de upload
-UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'uploads')
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+MULTIPART_OVERHEAD = 64 * 1024  # campos do formulário e cabeçalhos multipart
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def get_file_size(file):
-    file.seek(0, 2)  # Seek to end of file
-    size = file.tell()
-    file.seek(0)  # Reset to beginning
-    return size
+def release_file(file_path):
+    """Remove o arquivo do disco se nenhum documento o referencia mais"""
+    def is_referenced():
+        # Contagem feita dentro do lock, em transação nova (vê uploads já gravados)
+        db.session.commit()
+        return Document.query.filter_by(file_path=file_path).count() > 0
+    
+    get_document_storage().release(file_path, is_referenced)
 
 @documents_bp.route('/', methods=['POST'])
 @login_required
@@ -32,6 +36,10 @@ def upload_document():
     try:
         current_user = User.query.get(session['user_id'])
         
+        # Rejeitar corpo grande antes de processar o multipart
+        if request.content_length and request.content_length > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+            return jsonify({'error': 'File size exceeds maximum limit (16MB)'}), 400
+        
         # Verificar se arquivo foi enviado
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
@@ -44,10 +52,6 @@ def upload_document():
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not allowed'}), 400
         
-        file_size = get_file_size(file)
-        if file_size > MAX_FILE_SIZE:
-            return jsonify({'error': 'File size exceeds maximum limit (16MB)'}), 400
-        
         # Obter dados do formulário
         document_type = request.form.get('document_type', 'general')
         account_id = request.form.get('account_id', type=int)
@@ -79,48 +83,42 @@ def upload_document():
             if not withdrawal_req or (current_user.role not in [UserRole.ADMIN, UserRole.MANAGER] and withdrawal_req.user_id != user_id):
                 return jsonify({'error': 'Invalid withdrawal request or access denied'}), 403
         
-        # Gerar nome único para o arquivo
         original_filename = secure_filename(file.filename)
         file_extension = original_filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        
-        # Criar diretório se não existir
-        user_upload_dir = os.path.join(UPLOAD_FOLDER, str(user_id))
-        os.makedirs(user_upload_dir, exist_ok=True)
-        
-        # Salvar arquivo
-        file_path = os.path.join(user_upload_dir, unique_filename)
-        file.save(file_path)
-        
-        # Criar registro no banco
-        document = Document(
-            user_id=user_id,
-            filename=unique_filename,
-            original_filename=original_filename,
-            file_path=file_path,
-            file_size=file_size,
-            mime_type=file.content_type,
-            document_type=document_type,
-            account_id=account_id,
-            reload_request_id=reload_request_id,
-            withdrawal_request_id=withdrawal_request_id
-        )
         
-        db.session.add(document)
-        db.session.commit()
+        # Gravar em blocos calculando o SHA-256; conteúdo repetido reaproveita o arquivo.
+        # O documento é gravado dentro do lock do armazenamento, antes que um
+        # release concorrente possa apagar o arquivo deduplicado
+        def save_document(blob):
+            document = Document(
+                user_id=user_id,
+                filename=f"{blob.sha256}.{file_extension}",
+                original_filename=original_filename,
+                file_path=blob.path,
+                file_size=blob.size,
+                mime_type=file.content_type,
+                document_type=document_type,
+                account_id=account_id,
+                reload_request_id=reload_request_id,
+                withdrawal_request_id=withdrawal_request_id
+            )
+            db.session.add(document)
+            db.session.commit()
+            documents.append(document)
+        
+        documents = []
+        try:
+            get_document_storage().store(file.stream, MAX_FILE_SIZE, reference=save_document)
+        except DocumentTooLargeError:
+            return jsonify({'error': 'File size exceeds maximum limit (16MB)'}), 400
         
         return jsonify({
             'message': 'Document uploaded successfully',
-            'document': document.to_dict()
+            'document': documents[0].to_dict()
         }), 201
     except Exception as e:
+        # Arquivo recém-criado sem documento já foi removido pelo armazenamento
         db.session.rollback()
-        # Tentar remover arquivo se foi criado
-        try:
-            if 'file_path' in locals():
-                os.remove(file_path)
-        except:
-            pass
         return jsonify({'error': str(e)}), 500
 
 @documents_bp.route('/', methods=['GET'])
@@ -202,17 +200,14 @@ def download_document(document_id):
             return jsonify({'error': 'Access denied'}), 403
         
         # Verificar se arquivo existe
-        if not os.path.exists(document.file_path):
+        if not os.path.isfile(document.file_path):
             return jsonify({'error': 'File not found on disk'}), 404
         
-        directory = os.path.dirname(document.file_path)
-        filename = os.path.basename(document.file_path)
-        
-        return send_from_directory(
-            directory, 
-            filename, 
-            as_attachment=True, 
-            download_name=document.original_filename
+        # Range/ETag/If-None-Match; bytes enviados em blocos ou pelo servidor front
+        return get_document_storage().send(
+            document.file_path,
+            document.original_filename,
+            document.mime_type
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -273,17 +268,17 @@ def delete_document(document_id):
         if document.status == DocumentStatus.VERIFIED and current_user.role != UserRole.ADMIN:
             return jsonify({'error': 'Cannot delete verified documents'}), 403
         
-        # Remover arquivo do disco
-        try:
-            if os.path.exists(document.file_path):
-                os.remove(document.file_path)
-        except Exception as e:
-            print(f"Error removing file: {e}")
-        
         # Remover registro do banco
+        file_path = document.file_path
         db.session.delete(document)
         db.session.commit()
         
+        # Remover arquivo do disco (se nenhum outro documento tem o mesmo conteúdo)
+        try:
+            release_file(file_path)
+        except Exception as e:
+            print(f"Error removing file: {e}")
+        
         return jsonify({'message': 'Document deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
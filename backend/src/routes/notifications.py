@@ -21,15 +21,13 @@ def get_notifications():
         limit = min(int(request.args.get('limit', 50)), 100)  # Max 100
         
         notification_service = get_notification_service()
-        notifications = notification_service.get_user_notifications(
+        # Lista e estatísticas (contadores desnormalizados) na mesma consulta
+        notifications, stats = notification_service.get_user_notifications_with_stats(
             user_id=user_id,
             unread_only=unread_only,
             limit=limit
         )
         
-        # Obter estatísticas
-        stats = notification_service.get_notification_stats(user_id)
-        
         return jsonify({
             'notifications': [notif.to_dict() for notif in notifications],
             'stats': stats
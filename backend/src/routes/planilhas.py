@@ -6,10 +6,14 @@ from src.models.models import (
     AccountStatus, ReloadRequest, WithdrawalRequest, PlayerData,
     RequiredField, PlayerFieldValue, ReloadStatus, WithdrawalStatus
 )
+from src.utils.serializers import serialize
+from src.utils.dimension_cache import get_dimension_cache
+from src.utils.balance_index import get_balance_index
 from src.routes.auth import login_required, admin_required
 from src.middleware.audit_middleware import audit_balance_update
 from src.middleware.csrf_protection import csrf_protect
 from src.services.accounts import AccountService, UpdateBalanceDTO
+from src.services.pnl import PnLService
 from src.schemas.accounts import UpdateBalanceSchema
 import bleach
 import json
@@ -34,26 +38,9 @@ def get_user_spreadsheet(user_id):
         # Buscar todas as contas do usuário
         accounts = Account.query.filter_by(user_id=user_id, is_active=True).all()
         
-        # Buscar todas as plataformas disponíveis (apenas ativas)
-        # e remover duplicidades de Luxon, garantindo apenas 'LuxonPay'
-        all_platforms = Platform.query.filter_by(is_active=True).all()
-        # Normalizar Luxon: se houver alguma plataforma cujo nome contenha 'luxon'
-        # manter somente aquela cujo name == 'luxonpay'
-        luxon_main = None
-        normalized_platforms = []
-        for plat in all_platforms:
-            name_lower = (plat.name or '').lower()
-            if 'luxon' in name_lower:
-                if name_lower == 'luxonpay' and not luxon_main:
-                    luxon_main = plat
-                # Demais variantes de luxon são ignoradas
-                continue
-            normalized_platforms.append(plat)
-        if luxon_main:
-            normalized_platforms.append(luxon_main)
-        else:
-            # Se por algum motivo não houver 'luxonpay', usa lista original
-            normalized_platforms = normalized_platforms or all_platforms
+        # Plataformas ativas, sem duplicidades de Luxon (apenas 'LuxonPay'),
+        # vindas do cache de dimensões; também evita a consulta de account.platform
+        normalized_platforms = get_dimension_cache().spreadsheet_platforms()
         
         # Criar lista de todas as plataformas com contas (existentes ou não)
         all_platform_accounts = []
@@ -82,85 +69,14 @@ def get_user_spreadsheet(user_id):
             
             all_platform_accounts.append(platform_account)
         
-        # Calcular totais seguindo a regra CORRETA do time conforme ABA Administrador_.md:
-        # - INVESTIMENTO TOTAL = Luxon initial_balance + TODOS os reloads aprovados
-        # - P&L TOTAL = Saldo total atual - Investimento total
-        # - Saldo total = soma de TODAS as contas (incluindo Luxon)
-        
-        # 🚨 NOVA LÓGICA: Investimento pode ser manual ou automático
-        total_investment = 0.0  # Investimento TOTAL do time
-        total_current = 0.0     # Saldo atual total (todas as contas)
-        is_manual_investment = False
-        
-        # 1. ✅ VERIFICAR SE HÁ INVESTIMENTO MANUAL DEFINIDO
-        manual_investment_account = None
-        manual_investment_notes = None
-        
-        for acc in accounts:
-            # ✅ Verificação mais robusta para investimento manual
-            manual_value = acc.manual_team_investment
-            if manual_value is not None and float(manual_value) > 0:
-                manual_investment_account = acc
-                manual_investment_notes = acc.investment_notes
-                is_manual_investment = True
-                total_investment = float(manual_value)
-                break
-        
-        # 2. CÁLCULO AUTOMÁTICO: valor depositado pelo time (normalmente Luxon initial_balance)
-        if not is_manual_investment:
-            luxon_initial = 0.0
-            for acc in accounts:
-                if acc.has_account and acc.platform and 'luxon' in acc.platform.name.lower():
-                    luxon_initial += float(acc.initial_balance or 0)
-                    break  # Luxon é única, parar aqui
-            
-            # Se não há Luxon, usar soma de todos os initial_balance (fallback)
-            if luxon_initial == 0:
-                for acc in accounts:
-                    if acc.has_account:
-                        luxon_initial += float(acc.initial_balance or 0)
-            
-            total_investment = luxon_initial
-        
-        # 3. SOMAR RELOADS APROVADOS
-        all_approved_reloads = db.session.query(func.sum(ReloadRequest.amount)).filter_by(
-            user_id=user_id,
-            status=ReloadStatus.APPROVED
-        ).scalar() or 0
-        
-        # ✅ SOMAR RELOADS (AUTOMÁTICOS OU MANUAIS)
-        # 1. Se há reload manual definido, usar esse valor
-        manual_reload_total = 0.0
-        has_manual_reload = False
-        manual_reload_notes = None
+        # Totais pela regra do time (ABA Administrador_.md), no motor de P&L único:
+        # - INVESTIMENTO TOTAL = manual, ou Luxon initial_balance + reloads (manuais ou aprovados)
+        # - P&L TOTAL = Saldo total atual (todas as contas, incluindo Luxon) - Investimento total
+        pnl = PnLService.for_player(user_id, accounts=accounts)
         
-        for acc in accounts:
-            if acc.manual_reload_amount is not None:
-                manual_reload_total += float(acc.manual_reload_amount)
-                has_manual_reload = True
-                if acc.reload_notes:
-                    manual_reload_notes = acc.reload_notes
-        
-        # 2. Se não há reload manual, usar reloads aprovados automáticos
-        if has_manual_reload:
-            total_investment += manual_reload_total
-        else:
-            # Somar reloads automáticos apenas se não há investimento manual
-            if not is_manual_investment:
-                total_investment += float(all_approved_reloads)
-        
-        # 4. CRÉDITOS DE SAQUE (temporariamente desabilitado)
+        # CRÉDITOS DE SAQUE (temporariamente desabilitado)
         team_withdrawal_credits = 0.0  # Será implementado após migrations
         
-        # 5. SALDO ATUAL: soma de todas as contas
-        for acc in accounts:
-            if acc.has_account:
-                current = float(acc.current_balance or 0)
-                total_current += current
-        
-        # 6. P&L TOTAL = Saldo total atual - Investimento total (manual ou automático)
-        total_pnl = total_current - total_investment
-        
         # Buscar solicitações pendentes
         pending_reloads = ReloadRequest.query.filter_by(
             user_id=user_id, 
@@ -200,33 +116,17 @@ def get_user_spreadsheet(user_id):
         if incomplete_data:
             deep_links['first_pending_field'] = f"/dashboard?tab=planilha#field-{incomplete_data[0].field_name}"
 
-        # ✅ CORREÇÃO ROBUSTA: Buscar saldo anterior com múltiplas estratégias
+        # ✅ CORREÇÃO ROBUSTA: Saldo anterior pelos fechamentos diários (uma consulta):
+        # 1. fechamento do último dia antes de hoje
+        # 2. histórico só de hoje: saldo antes da primeira alteração do dia
+        # 3. fallback final: initial_balance
+        opening = get_balance_index().opening_balances([acc.id for acc in accounts], datetime.utcnow().date())
         previous_balances = {}
         for acc in accounts:
-            start_today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            # 1. Buscar último registro ANTES de hoje (dia anterior ou mais antigo)
-            hist_yesterday = BalanceHistory.query \
-                .filter(BalanceHistory.account_id == acc.id, BalanceHistory.created_at < start_today) \
-                .order_by(BalanceHistory.created_at.desc()) \
-                .first()
-            
-            if hist_yesterday:
-                # Encontrou histórico de dia anterior
-                previous_balances[acc.id] = float(hist_yesterday.new_balance)
+            if acc.id in opening:
+                previous_balances[acc.id] = opening[acc.id]
             else:
-                # 2. Se não há histórico anterior, verificar se há registro de hoje
-                hist_today = BalanceHistory.query \
-                    .filter(BalanceHistory.account_id == acc.id, BalanceHistory.created_at >= start_today) \
-                    .order_by(BalanceHistory.created_at.asc()) \
-                    .first()
-                
-                if hist_today:
-                    # Há registro hoje - usar o old_balance do primeiro registro de hoje
-                    previous_balances[acc.id] = float(hist_today.old_balance)
-                else:
-                    # 3. Fallback final: usar initial_balance
-                    previous_balances[acc.id] = float(acc.initial_balance) if acc.initial_balance else 0.0
+                previous_balances[acc.id] = float(acc.initial_balance) if acc.initial_balance else 0.0
 
         return jsonify({
             'user': user.to_dict(),
@@ -237,27 +137,27 @@ def get_user_spreadsheet(user_id):
             ],
             'all_platform_accounts': all_platform_accounts,  # Todas as plataformas, com ou sem conta
             'summary': {
-                'total_investment': total_investment,      # 💰 Investimento total (manual ou automático)
-                'is_manual_investment': is_manual_investment,  # ✅ Agora funcional
-                'manual_investment_notes': manual_investment_notes,  # ✅ Notas do investimento manual
-                'total_initial_balance': total_investment, # Compatibilidade com frontend
-                'total_current_balance': total_current,
-                'total_pnl': total_pnl,                   # P&L baseado em investimento total
-                'approved_reload_amount': manual_reload_total if has_manual_reload else float(all_approved_reloads),  # ✅ Usar reload manual se existe
-                'total_approved_reloads': manual_reload_total if has_manual_reload else float(all_approved_reloads),  # ✅ Same value para compatibilidade
-                'has_manual_reload': has_manual_reload,  # ✅ NOVO: Indicar se tem reload manual
-                'manual_reload_notes': manual_reload_notes,  # ✅ Notas do reload manual
+                'total_investment': pnl.total_investment,      # 💰 Investimento total (manual ou automático)
+                'is_manual_investment': pnl.is_manual_investment,
+                'manual_investment_notes': pnl.manual_investment_notes,
+                'total_initial_balance': pnl.total_investment, # Compatibilidade com frontend
+                'total_current_balance': pnl.total_current,
+                'total_pnl': pnl.total_pnl,                   # P&L baseado em investimento total
+                'approved_reload_amount': pnl.reload_total,   # Reload manual, se existe
+                'total_approved_reloads': pnl.reload_total,   # Mesmo valor, compatibilidade
+                'has_manual_reload': pnl.has_manual_reload,
+                'manual_reload_notes': pnl.manual_reload_notes,
                 'team_withdrawal_credits': team_withdrawal_credits,  # Créditos de saque (futuro)
                 'accounts_count': len(accounts),
-                'active_accounts': len([acc for acc in accounts if acc.has_account])
+                'active_accounts': pnl.active_accounts
             },
             'pending_requests': {
-                'reloads': [req.to_dict() for req in pending_reloads],
-                'withdrawals': [req.to_dict() for req in pending_withdrawals]
+                'reloads': serialize(pending_reloads),
+                'withdrawals': serialize(pending_withdrawals)
             },
             'deep_links': deep_links,
             'incomplete_data': [data.to_dict() for data in incomplete_data],
-            'recent_changes': [change.to_dict() for change in recent_changes]
+            'recent_changes': serialize(recent_changes)
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -282,7 +182,7 @@ def upsert_account_by_platform(user_id, platform_id):
         if not user or user.role != UserRole.PLAYER:
             return jsonify({'error': 'Player not found'}), 404
 
-        platform = Platform.query.get(platform_id)
+        platform = get_dimension_cache().platform(platform_id)
         if not platform or not platform.is_active:
             return jsonify({'error': 'Platform not found or inactive'}), 404
 
@@ -612,7 +512,7 @@ def get_account_history(account_id):
         
         return jsonify({
             'account': account.to_dict(),
-            'history': [item.to_dict() for item in history_paginated.items],
+            'history': serialize(history_paginated.items),
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from src.models.models import db, Platform
 from src.routes.auth import login_required, admin_required
+from src.utils.dimension_cache import get_dimension_cache
 
 platforms_bp = Blueprint('platforms', __name__)
 
@@ -8,7 +9,7 @@ platforms_bp = Blueprint('platforms', __name__)
 @login_required
 def get_platforms():
     try:
-        platforms = Platform.query.filter_by(is_active=True).all()
+        platforms = get_dimension_cache().platforms()
         return jsonify({'platforms': [platform.to_dict() for platform in platforms]}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
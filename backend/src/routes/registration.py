@@ -176,6 +176,9 @@ def register_player():
             )
             db.session.add(notification)
         
+        from src.utils.notification_service import NotificationService
+        NotificationService.invalidate_counters([admin.id for admin in admins])
+        
         db.session.commit()
         
         # Broadcast via SSE
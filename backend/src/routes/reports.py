@@ -1,9 +1,10 @@
 from flask import Blueprint, request, jsonify, session, make_response
 from datetime import datetime, timedelta
-from sqlalchemy import func, extract
-from src.models.models import User, UserRole, Reta, db, Account, ReloadRequest, ReloadStatus, WithdrawalRequest, WithdrawalStatus
+from sqlalchemy import func, extract, select
+from src.models.models import User, UserRole, Reta, db, ReloadRequest, ReloadStatus, WithdrawalRequest, WithdrawalStatus
 from src.routes.auth import login_required, admin_required
-from src.utils.report_generator import get_report_generator
+from src.utils.dimension_cache import get_dimension_cache
+from src.services.pnl import PnLService
 import logging
 
 reports_bp = Blueprint('reports', __name__)
@@ -58,6 +59,7 @@ def generate_player_report(user_id):
             return jsonify({'error': 'Period cannot exceed 365 days'}), 400
         
         # Gerar relatório
+        from src.utils.report_generator import get_report_generator
         report_generator = get_report_generator()
         report_data, filename = report_generator.generate_player_report(
             user_id=user_id,
@@ -117,7 +119,7 @@ def generate_team_report():
         
         # Verificar se reta existe (se especificada)
         if reta_id:
-            reta = Reta.query.get(reta_id)
+            reta = get_dimension_cache().reta(reta_id)
             if not reta:
                 return jsonify({'error': 'Reta not found'}), 404
         
@@ -146,6 +148,7 @@ def generate_team_report():
             return jsonify({'error': 'Period cannot exceed 365 days'}), 400
         
         # Gerar relatório
+        from src.utils.report_generator import get_report_generator
         report_generator = get_report_generator()
         report_data, filename = report_generator.generate_team_report(
             start_date=start_date,
@@ -195,7 +198,7 @@ def generate_reta_report(reta_id):
             return jsonify({'error': 'Access denied'}), 403
         
         # Verificar se reta existe
-        reta = Reta.query.get(reta_id)
+        reta = get_dimension_cache().reta(reta_id)
         if not reta:
             return jsonify({'error': 'Reta not found'}), 404
         
@@ -233,6 +236,7 @@ def generate_reta_report(reta_id):
             return jsonify({'error': 'Period cannot exceed 365 days'}), 400
         
         # Gerar relatório
+        from src.utils.report_generator import get_report_generator
         report_generator = get_report_generator()
         report_data, filename = report_generator.generate_reta_report(
             reta_id=reta_id,
@@ -307,7 +311,7 @@ def get_available_reports():
             ])
         
         # Listar retas disponíveis
-        retas = Reta.query.filter_by(is_active=True).all()
+        retas = get_dimension_cache().retas(active_only=True)
         
         return jsonify({
             'available_reports': available_reports,
@@ -346,6 +350,8 @@ def preview_report_data(report_type):
             end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
             end_date = end_date.replace(hour=23, minute=59, second=59)
         
+        from src.utils.report_generator import get_report_generator
+        
         report_generator = get_report_generator()
         
         if report_type == 'player':
@@ -402,7 +408,7 @@ def preview_report_data(report_type):
             if not reta_id:
                 return jsonify({'error': 'reta_id is required'}), 400
             
-            reta = Reta.query.get(reta_id)
+            reta = get_dimension_cache().reta(reta_id)
             if not reta:
                 return jsonify({'error': 'Reta not found'}), 404
             
@@ -475,80 +481,50 @@ def generate_monthly_detailed_report():
         platform_balances = {}
         profitable_players = []
         
+        # Contas, reloads e saques do mês de todos os jogadores em lote (mesmo P&L da planilha)
+        player_pnls = PnLService.load(
+            [player.id for player in players], start_date, end_date,
+            scope=select(User.id).where(User.role == UserRole.PLAYER, User.is_active == True)
+        )
+        
         for player in players:
-            # Contas do jogador
-            player_accounts = Account.query.filter_by(user_id=player.id, is_active=True).all()
+            pnl = player_pnls[player.id]
+            player_balances = pnl.platform_balances()
             
-            # Saldos por plataforma para este jogador
-            player_balances = {}
-            total_player_balance = 0.0
-            total_player_investment = 0.0
-            
-            for account in player_accounts:
-                platform_name = account.platform.name if account.platform else "Unknown"
-                balance = float(account.current_balance or 0)
-                investment = float(account.manual_team_investment or account.initial_balance or 0)
-                
-                player_balances[platform_name] = {
-                    'current_balance': balance,
-                    'investment': investment,
-                    'pnl': balance - investment
-                }
-                
-                total_player_balance += balance
-                total_player_investment += investment
-                
-                # Acumular saldos por plataforma global
+            # Acumular saldos por plataforma global
+            for platform_name, values in player_balances.items():
                 if platform_name not in platform_balances:
                     platform_balances[platform_name] = {'balance': 0, 'investment': 0, 'pnl': 0}
-                platform_balances[platform_name]['balance'] += balance
-                platform_balances[platform_name]['investment'] += investment
-                platform_balances[platform_name]['pnl'] += (balance - investment)
-            
-            # Reloads do jogador no mês
-            player_monthly_reloads = db.session.query(func.sum(ReloadRequest.amount)).filter(
-                ReloadRequest.user_id == player.id,
-                ReloadRequest.status == ReloadStatus.APPROVED,
-                ReloadRequest.approved_at >= start_date,
-                ReloadRequest.approved_at < end_date
-            ).scalar() or 0
-            
-            # Saques do jogador no mês
-            player_monthly_withdrawals = db.session.query(func.sum(WithdrawalRequest.amount)).filter(
-                WithdrawalRequest.user_id == player.id,
-                WithdrawalRequest.status == WithdrawalStatus.COMPLETED,
-                WithdrawalRequest.approved_at >= start_date,
-                WithdrawalRequest.approved_at < end_date
-            ).scalar() or 0
-            
-            player_pnl = total_player_balance - total_player_investment
+                platform_balances[platform_name]['balance'] += values['current_balance']
+                platform_balances[platform_name]['investment'] += values['investment']
+                platform_balances[platform_name]['pnl'] += values['pnl']
             
             # Dados do jogador para o relatório
             player_data = {
                 'id': player.id,
                 'name': player.full_name,
                 'username': player.username,
-                'total_balance': total_player_balance,
-                'total_investment': total_player_investment,
-                'pnl': player_pnl,
-                'monthly_reloads': float(player_monthly_reloads),
-                'monthly_withdrawals': float(player_monthly_withdrawals),
+                'total_balance': pnl.total_current,
+                'total_investment': pnl.total_investment,
+                'pnl': pnl.total_pnl,
+                'monthly_reloads': pnl.period_reloads,
+                'monthly_withdrawals': pnl.period_withdrawals,
                 'platform_balances': player_balances,
-                'is_profitable': player_pnl > 0
+                'is_profitable': pnl.is_profitable
             }
             
             players_summary.append(player_data)
             
             # Acumular totais
-            total_team_investment += total_player_investment
-            total_team_withdrawals += float(player_monthly_reloads)  # Reloads = investimento do time
-            total_player_withdrawals += float(player_monthly_withdrawals)  # Saques = retirada dos jogadores
+            total_team_investment += pnl.total_investment
+            total_team_withdrawals += pnl.period_reloads  # Reloads = investimento do time
+            total_player_withdrawals += pnl.period_withdrawals  # Saques = retirada dos jogadores
             
             # Jogadores lucrativos
-            if player_pnl > 0:
+            if pnl.is_profitable:
                 profitable_players.append({
                     'name': player.full_name,
-                    'pnl': player_pnl
+                    'pnl': pnl.total_pnl
                 })
         
         # Ordenar por lucratividade
@@ -589,6 +565,7 @@ def generate_monthly_detailed_report():
         if output_format == 'pdf':
             # ✅ GERAR PDF (mesmo padrão dos outros relatórios)
             try:
+                from src.utils.report_generator import get_report_generator
                 report_generator = get_report_generator()
                 pdf_content = report_generator.generate_monthly_detailed_pdf(report_data)
                 
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.models import db, Reta, User, UserRole, RetaPermission, Platform
 from src.routes.auth import login_required, admin_required
+from src.utils.dimension_cache import get_dimension_cache
 
 retas_bp = Blueprint('retas', __name__)
 
@@ -15,7 +16,7 @@ def get_retas():
         if current_user.role not in [UserRole.ADMIN, UserRole.MANAGER]:
             return jsonify({'error': 'Access denied'}), 403
         
-        retas = Reta.query.filter_by(is_active=True).order_by(Reta.name).all()
+        retas = sorted(get_dimension_cache().retas(active_only=True), key=lambda reta: reta.name)
         return jsonify({'retas': [reta.to_dict() for reta in retas]}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -173,7 +174,7 @@ def create_or_update_permission():
         if not user or user.role != UserRole.PLAYER:
             return jsonify({'error': 'Player not found'}), 404
         
-        platform = Platform.query.get(data['platform_id'])
+        platform = get_dimension_cache().platform(data['platform_id'])
         if not platform:
             return jsonify({'error': 'Platform not found'}), 404
         
@@ -256,7 +257,7 @@ def get_reta_dashboard_stats():
         start_date = datetime.utcnow() - timedelta(days=days_back)
         
         # Buscar todas as retas
-        retas = Reta.query.filter_by(is_active=True).all()
+        retas = get_dimension_cache().retas(active_only=True)
         
         reta_stats = []
         for reta in retas:
@@ -0,0 +1,81 @@
+from flask import Blueprint, request, jsonify, session
+from src.models.models import db, User
+from src.routes.auth import admin_required
+from src.utils.scheduler import get_scheduler
+
+scheduler_bp = Blueprint('scheduler', __name__)
+
+@scheduler_bp.route('/status', methods=['GET'])
+@admin_required
+def get_scheduler_status():
+    """Jobs agendados, líder atual e métricas de execução"""
+    try:
+        return jsonify(get_scheduler().get_status()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@scheduler_bp.route('/jobs/<name>/history', methods=['GET'])
+@admin_required
+def get_job_history(name):
+    """Histórico de execuções de um job"""
+    try:
+        scheduler = get_scheduler()
+        if name not in scheduler.jobs:
+            return jsonify({'error': 'Job não encontrado'}), 404
+
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        return jsonify({'job': name, 'runs': scheduler.get_history(name, limit=limit)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@scheduler_bp.route('/jobs/<name>/run', methods=['POST'])
+@admin_required
+def run_job_now(name):
+    """Solicitar execução imediata (executada pelo processo líder)"""
+    try:
+        scheduler = get_scheduler()
+        if not scheduler.request_run(name):
+            return jsonify({'error': 'Job não encontrado'}), 404
+
+        _log_scheduler_action('scheduler_job_run_requested', name)
+        return jsonify({'message': f"Execução de '{name}' solicitada"}), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@scheduler_bp.route('/jobs/<name>/pause', methods=['POST'])
+@admin_required
+def pause_job(name):
+    """Pausar um job em todos os workers"""
+    return _set_job_enabled(name, False)
+
+@scheduler_bp.route('/jobs/<name>/resume', methods=['POST'])
+@admin_required
+def resume_job(name):
+    """Retomar um job pausado"""
+    return _set_job_enabled(name, True)
+
+def _set_job_enabled(name, enabled):
+    try:
+        scheduler = get_scheduler()
+        if name not in scheduler.jobs:
+            return jsonify({'error': 'Job não encontrado'}), 404
+
+        scheduler.set_enabled(name, enabled)
+        _log_scheduler_action('scheduler_job_resumed' if enabled else 'scheduler_job_paused', name)
+        return jsonify({'message': f"Job '{name}' {'retomado' if enabled else 'pausado'}"}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _log_scheduler_action(action, name):
+    current_user = User.query.get(session['user_id'])
+    from src.routes.audit import log_action
+    log_action(
+        user_id=current_user.id,
+        action=action,
+        entity_type='System',
+        entity_id=0,
+        old_values=None,
+        new_values=f"Job: {name}",
+        request_obj=request
+    )
+    db.session.commit()
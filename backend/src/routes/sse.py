@@ -103,6 +103,22 @@ def broadcast_to_user(user_id: int, event_type: str, data: dict):
             for conn in connections_to_remove:
                 active_connections[user_id].discard(conn)
 
+def broadcast_to_users(events):
+    """
+    Envia um lote de eventos adquirindo o lock de conexões uma única vez.
+    
+    Args:
+        events: Iterável de (user_id, event_type, data)
+    """
+    with connection_lock:
+        for user_id, event_type, data in events:
+            for connection in list(active_connections.get(user_id, ())):
+                try:
+                    connection.enqueue(event_type, data)
+                except Exception as e:
+                    logger.error(f"Erro ao enviar evento SSE: {e}")
+                    active_connections[user_id].discard(connection)
+
 def broadcast_to_role(role: UserRole, event_type: str, data: dict):
     """Envia evento para todos os usuários de uma role"""
     try:
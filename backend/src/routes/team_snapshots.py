@@ -1,11 +1,12 @@
 from flask import Blueprint, request, jsonify, session
 from datetime import datetime, date
-from sqlalchemy import func, and_, or_
+from sqlalchemy import and_, or_, select
 from ..models.models import (
-    db, User, UserRole, Account, ReloadRequest, WithdrawalRequest,
-    TeamMonthlySnapshot, Transaction, ReloadStatus
+    db, User, UserRole, WithdrawalRequest,
+    TeamMonthlySnapshot, Transaction
 )
 from .auth import login_required
+from ..services.pnl import PnLService
 
 team_snapshots_bp = Blueprint('team_snapshots', __name__)
 
@@ -193,67 +194,12 @@ def update_monthly_snapshot(snapshot_id):
         return jsonify({'error': str(e)}), 500
 
 def calculate_team_data():
-    """Calcular dados atuais do time para snapshot"""
+    """Calcular dados atuais do time para snapshot (mesmo P&L da planilha)"""
     
-    # Buscar todos os jogadores ativos
-    players = User.query.filter_by(role=UserRole.PLAYER, is_active=True).all()
+    # Jogadores ativos; contas e reloads carregados em lote pelo motor de P&L
+    scope = select(User.id).where(User.role == UserRole.PLAYER, User.is_active == True)
+    player_ids = list(db.session.execute(scope).scalars())
+    players = PnLService.load(player_ids, scope=scope)
     
-    total_balance = 0
-    total_pnl = 0
-    total_investment = 0
-    active_players = 0
-    total_accounts = 0
-    profitable_players = 0
-    players_in_makeup = 0
-    
-    for player in players:
-        # Buscar contas ativas do jogador
-        accounts = Account.query.filter_by(user_id=player.id, is_active=True).all()
-        
-        if not accounts:
-            continue
-            
-        active_players += 1
-        total_accounts += len(accounts)
-        
-        # Somar saldos atuais
-        player_balance = sum(float(acc.current_balance or 0) for acc in accounts)
-        total_balance += player_balance
-        
-        # Somar P&L (excluindo Luxon) - com verificação de segurança
-        player_pnl = 0
-        for acc in accounts:
-            if acc.platform and acc.platform.name.lower() not in ['luxonpay', 'luxon']:
-                player_pnl += float(acc.pnl or 0)
-        total_pnl += player_pnl
-        
-        # Calcular investimento total (inicial + reloads aprovados)
-        initial_investment = sum(float(acc.initial_balance or 0) for acc in accounts)
-        
-        approved_reloads = db.session.query(
-            func.sum(ReloadRequest.amount)
-        ).filter_by(
-            user_id=player.id,
-            status=ReloadStatus.APPROVED
-        ).scalar() or 0
-        
-        player_investment = initial_investment + float(approved_reloads)
-        total_investment += player_investment
-        
-        # Verificar se está em lucro
-        if player_pnl > 0:
-            profitable_players += 1
-            
-        # Verificar se está em makeup (simplificado: P&L negativo)
-        if player_pnl < 0:
-            players_in_makeup += 1
-    
-    return {
-        'total_balance': total_balance,
-        'total_pnl': total_pnl,
-        'total_investment': total_investment,
-        'active_players': active_players,
-        'total_accounts': total_accounts,
-        'profitable_players': profitable_players,
-        'players_in_makeup': players_in_makeup
-    }
+    # Em makeup: P&L negativo (simplificado)
+    return PnLService.summarize(players.values())
@@ -3,7 +3,9 @@ from datetime import datetime, timedelta
 from src.models.models import db, Transaction, User, Platform, Account, UserRole, TransactionType
 from src.schemas.transactions import CreateTransactionSchema
 from src.services.transactions import TransactionService, CreateTransactionDTO
-from src.utils.pagination import paginate_query
+from src.utils.pagination import paginate_query, InvalidCursorError
+from src.utils.serializers import with_relationships
+from src.utils.dimension_cache import get_dimension_cache
 from src.middleware.rate_limiter import sensitive_rate_limit
 import bleach
 from src.routes.auth import login_required, admin_required
@@ -65,13 +67,17 @@ def get_transactions():
                 return jsonify({'error': 'Invalid end_date format'}), 400
         
         # Aplicar paginação
-        query = query.order_by(Transaction.created_at.desc())
-        result = paginate_query(query, max_per_page=500)
+        query = with_relationships(query.order_by(Transaction.created_at.desc()))
+        # Tabela grande: total reaproveitado por alguns segundos entre páginas
+        result = paginate_query(query, max_per_page=500, count='cached',
+                                keyset=(Transaction.created_at, Transaction.id))
         
         return jsonify({
             'transactions': [transaction.to_dict() for transaction in result['items']],
             'pagination': result['pagination']
         }), 200
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -98,7 +104,7 @@ def create_transaction():
         if not user or not user.is_active:
             return jsonify({'error': 'User not found or inactive'}), 404
 
-        platform = Platform.query.get(payload['platform_id'])
+        platform = get_dimension_cache().platform(payload['platform_id'])
         if not platform or not platform.is_active:
             return jsonify({'error': 'Platform not found or inactive'}), 404
 
@@ -4,7 +4,9 @@ from src.routes.auth import login_required, admin_required
 from src.middleware.audit_middleware import audit_user_creation, audit_action
 from src.middleware.csrf_protection import csrf_protect
 from src.schemas.users import CreateUserSchema, UpdateUserSchema
-from src.utils.pagination import paginate_query
+from src.utils.pagination import paginate_query, InvalidCursorError
+from src.utils.dimension_cache import get_dimension_cache
+from src.utils.balance_index import get_balance_index
 from src.services.users import UserService, CreateUserDTO, UpdateUserDTO
 import bleach
 from sqlalchemy import func
@@ -28,10 +30,30 @@ def cleanup_tests():
 @users_bp.route('/simulate-year-data', methods=['POST'])
 @admin_required
 def simulate_year_data():
-    """Endpoint administrativo para simular 1 ano completo de dados."""
+    """
+    Endpoint administrativo para simular 1 ano completo de dados.
+    Body opcional: {"mode": "vectorized", "players": 500, "days": 730, "seed": 42, "history_every": 1}
+    players até MAX_SIMULATED_PLAYERS e days até MAX_SIMULATED_DAYS (400 acima disso).
+    """
     try:
         from src.utils.data_simulation import simulate_full_year_operation
-        result = simulate_full_year_operation()
+        data = request.get_json(silent=True) or {}
+        mode = data.get('mode', 'profiles')
+        options = {}
+        if mode == 'vectorized':
+            try:
+                options = {
+                    'players': int(data.get('players', 500)),
+                    'days': int(data.get('days', 365)),
+                    'seed': int(data['seed']) if data.get('seed') is not None else None,
+                    'history_every': int(data.get('history_every', 1)),
+                }
+            except (TypeError, ValueError):
+                return jsonify({"error": "players, days, seed e history_every devem ser inteiros"}), 400
+        try:
+            result = simulate_full_year_operation(mode=mode, **options)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         return jsonify({"message": "Year simulation completed", "result": result}), 200
     except Exception as e:
         db.session.rollback()
@@ -92,11 +114,13 @@ def get_users():
             return jsonify({'error': 'Access denied'}), 403
         
         query = User.query.filter_by(is_active=True).order_by(User.created_at.desc())
-        result = paginate_query(query, max_per_page=200)
+        result = paginate_query(query, max_per_page=200, keyset=(User.created_at, User.id))
         return jsonify({
             'users': [user.to_dict() for user in result['items']],
             'pagination': result['pagination']
         }), 200
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -405,7 +429,7 @@ def get_performance_ranking():
             roi = ((total_balance - initial_balance) / initial_balance * 100) if initial_balance > 0 else 0
             
             # Buscar nome da reta
-            reta = Reta.query.get(player.reta_id) if player.reta_id else None
+            reta = get_dimension_cache().reta(player.reta_id)
             
             player_perf = {
                 'id': player.id,
@@ -454,10 +478,15 @@ def get_bankroll_history(user_id):
             return jsonify({'history': [], 'period_days': days_back}), 200
         
         # ✅ CORRIGIDO: Sempre usar dados reais, nunca fictícios
-        # Se não há histórico, retornar dados vazios ou saldo atual apenas
-        balance_history_exists = BalanceHistory.query.filter(BalanceHistory.account_id.in_(account_ids)).first()
+        # Fechamentos diários (account_daily_balances): saldo no início do
+        # período e um fechamento por conta/dia, sem varrer o BalanceHistory
+        index = get_balance_index()
+        start_day = start_date.date()
+        initial_balances = index.opening_balances(account_ids, start_day)
+        daily_closings = index.daily_closings(account_ids, start_day)
         
-        if not balance_history_exists:
+        # Se não há histórico, retornar dados vazios ou saldo atual apenas
+        if not initial_balances and not daily_closings:
             # ✅ MELHORADO: Criar histórico baseado no saldo atual + pontos dos últimos 7 dias
             current_balance = sum(float(acc.current_balance or 0) for acc in user_accounts)
             
@@ -494,41 +523,22 @@ def get_bankroll_history(user_id):
                 db.session.rollback()
             
         else:
-            # ✅ CORRIGIDO: Buscar TODAS as alterações de saldo, não só 'close_day'
-            # Isso mostrará a evolução real baseada em todas as atualizações
-            balance_history = BalanceHistory.query.filter(
-                BalanceHistory.account_id.in_(account_ids),
-                BalanceHistory.created_at >= start_date
-            ).order_by(BalanceHistory.created_at).all()
-            
-            # Calcular saldo total acumulativo por data
-            daily_balances = {}
-            running_total = 0
-            
-            # Pegar saldo inicial (antes do período)
-            initial_balances = {}
+            # Contas cujo histórico começa dentro do período partem do saldo
+            # anterior à primeira alteração; sem histórico algum, do saldo atual
+            balances = {}
+            for acc_id, _, closing, net_change in daily_closings:
+                if acc_id not in initial_balances and acc_id not in balances:
+                    balances[acc_id] = closing - net_change
             for acc in user_accounts:
-                last_balance_before = BalanceHistory.query.filter(
-                    BalanceHistory.account_id == acc.id,
-                    BalanceHistory.created_at < start_date
-                ).order_by(BalanceHistory.created_at.desc()).first()
-                
-                if last_balance_before:
-                    initial_balances[acc.id] = float(last_balance_before.new_balance)
-                else:
-                    initial_balances[acc.id] = float(acc.current_balance or 0)
-            
-            running_total = sum(initial_balances.values())
+                balances.setdefault(acc.id, initial_balances.get(acc.id, float(acc.current_balance or 0)))
             
-            for bh in balance_history:
-                date_key = bh.created_at.date().isoformat()
-                if date_key not in daily_balances:
-                    daily_balances[date_key] = running_total
-                
-                # Atualizar o saldo com a mudança
-                change = float(bh.new_balance) - float(bh.old_balance)
-                daily_balances[date_key] += change
-                running_total += change
+            # Saldo total ao fim de cada dia com alteração
+            daily_balances = {}
+            running_total = sum(balances.values())
+            for acc_id, day, closing, _ in daily_closings:
+                running_total += closing - balances[acc_id]
+                balances[acc_id] = closing
+                daily_balances[day.isoformat()] = running_total
             
             # Converter para lista ordenada
             history = []
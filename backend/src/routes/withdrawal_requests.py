@@ -8,7 +8,9 @@ from src.routes.auth import login_required, admin_required
 from src.utils.notification_service import get_notification_service
 from src.middleware.audit_middleware import audit_action
 from src.middleware.csrf_protection import csrf_protect
-from src.utils.pagination import paginate_query
+from src.utils.pagination import paginate_query, InvalidCursorError
+from src.utils.serializers import with_relationships
+from src.utils.dimension_cache import get_dimension_cache
 from src.routes.sse import broadcast_to_user
 from src.schemas.withdrawals import ApproveWithdrawalSchema, RejectWithdrawalSchema, CompleteWithdrawalSchema
 from src.services.withdrawals import WithdrawalService, ApproveWithdrawalDTO, RejectWithdrawalDTO, CompleteWithdrawalDTO
@@ -49,12 +51,15 @@ def get_withdrawal_requests():
                 return jsonify({'error': 'Invalid status'}), 400
         
         # Paginação
-        query = query.order_by(WithdrawalRequest.created_at.desc())
-        result = paginate_query(query, max_per_page=200)
+        query = with_relationships(query.order_by(WithdrawalRequest.created_at.desc()))
+        result = paginate_query(query, max_per_page=200,
+                                keyset=(WithdrawalRequest.created_at, WithdrawalRequest.id))
         return jsonify({
             'withdrawal_requests': [req.to_dict() for req in result['items']],
             'pagination': result['pagination']
         }), 200
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -82,7 +87,7 @@ def create_withdrawal_request():
             user_id = current_user.id
         
         # Verificar se a plataforma existe
-        platform = Platform.query.get(data['platform_id'])
+        platform = get_dimension_cache().platform(data['platform_id'])
         if not platform or not platform.is_active:
             return jsonify({'error': 'Platform not found or inactive'}), 404
         
@@ -3,6 +3,7 @@ from .reloads import ReloadService
 from .withdrawals import WithdrawalService
 from .accounts import AccountService
 from .users import UserService
+from .pnl import PnLService
 
 __all__ = [
 	"TransactionService",
@@ -10,6 +11,7 @@ __all__ = [
 	"WithdrawalService",
 	"AccountService",
 	"UserService",
+	"PnLService",
 ]
 
 
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import func, select
+
+from src.models.models import db, Account, ReloadRequest, ReloadStatus, WithdrawalRequest, WithdrawalStatus
+from src.utils.dimension_cache import get_dimension_cache
+
+# Limite de parâmetros por IN (SQLite antigo aceita 999)
+IN_CHUNK = 900
+
+# Saques que saíram das contas no período
+PERIOD_WITHDRAWAL_STATUSES = (WithdrawalStatus.APPROVED, WithdrawalStatus.COMPLETED)
+
+
+def is_luxon(platform_name: Optional[str]) -> bool:
+	"""Luxon é carteira de transferência do time: entra no saldo, nunca no P&L."""
+	return bool(platform_name) and 'luxon' in platform_name.lower()
+
+
+@dataclass
+class AccountFigures:
+	"""Valores de uma conta ativa, em float."""
+	id: int
+	user_id: int
+	platform_id: int
+	platform_name: Optional[str]
+	has_account: bool
+	initial_balance: float
+	current_balance: float
+	manual_team_investment: Optional[float] = None
+	investment_notes: Optional[str] = None
+	manual_reload_amount: Optional[float] = None
+	reload_notes: Optional[str] = None
+
+	@property
+	def is_luxon(self) -> bool:
+		return is_luxon(self.platform_name)
+
+	@property
+	def pnl(self) -> float:
+		"""P&L da conta: atual - inicial nos sites de poker; Luxon e contas inexistentes ficam em 0."""
+		if self.is_luxon or not self.has_account:
+			return 0.0
+		return self.current_balance - self.initial_balance
+
+
+@dataclass
+class PlayerPnL:
+	"""P&L de um jogador pela regra do time (ABA Administrador)."""
+	user_id: int
+	accounts: List[AccountFigures] = field(default_factory=list)
+	approved_reloads: float = 0.0
+	period_reloads: float = 0.0
+	period_withdrawals: float = 0.0
+
+	total_current: float = 0.0
+	total_investment: float = 0.0
+	total_pnl: float = 0.0
+	accounts_pnl: float = 0.0
+	is_manual_investment: bool = False
+	manual_investment_notes: Optional[str] = None
+	has_manual_reload: bool = False
+	manual_reload_total: float = 0.0
+	manual_reload_notes: Optional[str] = None
+
+	@property
+	def reload_total(self) -> float:
+		"""Reloads considerados no investimento (manual, se definido)."""
+		return self.manual_reload_total if self.has_manual_reload else self.approved_reloads
+
+	@property
+	def active_accounts(self) -> int:
+		return sum(1 for acc in self.accounts if acc.has_account)
+
+	@property
+	def is_profitable(self) -> bool:
+		return self.total_pnl > 0
+
+	def platform_balances(self) -> Dict[str, Dict[str, float]]:
+		"""Saldo, base (inicial) e P&L por plataforma."""
+		balances = {}
+		for acc in self.accounts:
+			name = acc.platform_name or 'Unknown'
+			balances[name] = {
+				'current_balance': acc.current_balance,
+				'investment': acc.initial_balance,
+				'pnl': acc.pnl
+			}
+		return balances
+
+	def compute(self) -> 'PlayerPnL':
+		"""
+		Calcula todos os valores em uma passada pelas contas.
+
+		- Saldo total: soma das contas existentes (Luxon incluída)
+		- Investimento: manual_team_investment da primeira conta que o define;
+		  senão o inicial da Luxon; sem Luxon, a soma dos iniciais
+		- Reloads: manual_reload_amount (soma) se algum definido; senão os
+		  aprovados, exceto quando o investimento é manual
+		- P&L: saldo total - investimento
+		"""
+		luxon_initial = None
+		initial_sum = 0.0
+		total_current = 0.0
+		accounts_pnl = 0.0
+		manual_investment = None
+		manual_investment_notes = None
+		manual_reloads = []
+		manual_reload_notes = None
+
+		for acc in self.accounts:
+			if manual_investment is None and acc.manual_team_investment is not None and acc.manual_team_investment > 0:
+				manual_investment = acc.manual_team_investment
+				manual_investment_notes = acc.investment_notes
+			if acc.manual_reload_amount is not None:
+				manual_reloads.append(acc.manual_reload_amount)
+				if acc.reload_notes:
+					manual_reload_notes = acc.reload_notes
+			if acc.has_account:
+				total_current += acc.current_balance
+				initial_sum += acc.initial_balance
+				if acc.is_luxon and luxon_initial is None:
+					luxon_initial = acc.initial_balance
+			accounts_pnl += acc.pnl
+
+		if manual_investment is not None:
+			investment = manual_investment
+		else:
+			investment = luxon_initial or initial_sum
+
+		if manual_reloads:
+			investment += sum(manual_reloads)
+		elif manual_investment is None:
+			investment += self.approved_reloads
+
+		self.is_manual_investment = manual_investment is not None
+		self.manual_investment_notes = manual_investment_notes
+		self.has_manual_reload = bool(manual_reloads)
+		self.manual_reload_total = sum(manual_reloads)
+		self.manual_reload_notes = manual_reload_notes
+		self.total_current = total_current
+		self.total_investment = investment
+		self.total_pnl = total_current - investment
+		self.accounts_pnl = accounts_pnl
+		return self
+
+
+def _chunks(values: Sequence[int]) -> Iterable[Sequence[int]]:
+	for start in range(0, len(values), IN_CHUNK):
+		yield values[start:start + IN_CHUNK]
+
+
+def _user_conditions(column, user_ids: Sequence[int], scope=None) -> list:
+	"""Um filtro por subconsulta (scope) ou um IN por bloco de IN_CHUNK ids."""
+	if scope is not None:
+		return [column.in_(scope)]
+	return [column.in_(chunk) for chunk in _chunks(user_ids)]
+
+
+def _as_float(value) -> Optional[float]:
+	return float(value) if value is not None else None
+
+
+class PnLService:
+	"""Motor de P&L único para planilha, snapshots e relatórios."""
+
+	@staticmethod
+	def load(user_ids: Iterable[int], start: Optional[datetime] = None, end: Optional[datetime] = None,
+			 accounts: Optional[List[Account]] = None, scope=None) -> Dict[int, PlayerPnL]:
+		"""
+		Carrega contas, reloads e valores manuais dos jogadores de uma vez e calcula o P&L.
+
+		Args:
+			user_ids: Jogadores (a ordem é mantida no resultado)
+			start, end: Período [start, end) para reloads aprovados e saques no período (opcional)
+			accounts: Contas ativas já carregadas (evita a consulta de contas)
+			scope: select() dos mesmos user_ids; o time inteiro é filtrado por
+				subconsulta em vez de listas IN, com número fixo de consultas
+
+		Returns:
+			dict user_id -> PlayerPnL
+		"""
+		user_ids = list(dict.fromkeys(user_ids))
+		players = {user_id: PlayerPnL(user_id=user_id) for user_id in user_ids}
+		if not user_ids:
+			return players
+
+		if accounts is None:
+			accounts = PnLService._load_account_rows(user_ids, scope)
+		cache = get_dimension_cache()
+		for acc in accounts:
+			if acc.user_id not in players:
+				continue
+			platform = cache.platform(acc.platform_id)
+			players[acc.user_id].accounts.append(AccountFigures(
+				id=acc.id,
+				user_id=acc.user_id,
+				platform_id=acc.platform_id,
+				platform_name=platform.name if platform else None,
+				has_account=bool(acc.has_account),
+				initial_balance=float(acc.initial_balance or 0),
+				current_balance=float(acc.current_balance or 0),
+				manual_team_investment=_as_float(acc.manual_team_investment),
+				investment_notes=acc.investment_notes,
+				manual_reload_amount=_as_float(acc.manual_reload_amount),
+				reload_notes=acc.reload_notes
+			))
+
+		approved = PnLService._sum_by_user(ReloadRequest, user_ids, scope, ReloadRequest.status == ReloadStatus.APPROVED)
+		for user_id, total in approved.items():
+			players[user_id].approved_reloads = total
+
+		if start is not None and end is not None:
+			reloads = PnLService._sum_by_user(
+				ReloadRequest, user_ids, scope, ReloadRequest.status == ReloadStatus.APPROVED,
+				ReloadRequest.approved_at >= start, ReloadRequest.approved_at < end
+			)
+			withdrawals = PnLService._sum_by_user(
+				WithdrawalRequest, user_ids, scope, WithdrawalRequest.status.in_(PERIOD_WITHDRAWAL_STATUSES),
+				WithdrawalRequest.approved_at >= start, WithdrawalRequest.approved_at < end
+			)
+			for user_id, total in reloads.items():
+				players[user_id].period_reloads = total
+			for user_id, total in withdrawals.items():
+				players[user_id].period_withdrawals = total
+
+		for player in players.values():
+			player.compute()
+		return players
+
+	@staticmethod
+	def for_player(user_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None,
+				   accounts: Optional[List[Account]] = None) -> PlayerPnL:
+		return PnLService.load([user_id], start, end, accounts)[user_id]
+
+	@staticmethod
+	def summarize(players: Iterable[PlayerPnL]) -> Dict[str, float]:
+		"""Totais do time (jogadores sem contas ativas ficam de fora)."""
+		summary = {
+			'total_balance': 0.0,
+			'total_pnl': 0.0,
+			'total_investment': 0.0,
+			'active_players': 0,
+			'total_accounts': 0,
+			'profitable_players': 0,
+			'players_in_makeup': 0
+		}
+		for player in players:
+			if not player.accounts:
+				continue
+			summary['active_players'] += 1
+			summary['total_accounts'] += len(player.accounts)
+			summary['total_balance'] += player.total_current
+			summary['total_pnl'] += player.total_pnl
+			summary['total_investment'] += player.total_investment
+			if player.total_pnl > 0:
+				summary['profitable_players'] += 1
+			elif player.total_pnl < 0:
+				summary['players_in_makeup'] += 1
+		return summary
+
+	@staticmethod
+	def _load_account_rows(user_ids: List[int], scope=None) -> list:
+		columns = (
+			Account.id, Account.user_id, Account.platform_id, Account.has_account,
+			Account.initial_balance, Account.current_balance,
+			Account.manual_team_investment, Account.investment_notes,
+			Account.manual_reload_amount, Account.reload_notes
+		)
+		rows = []
+		for condition in _user_conditions(Account.user_id, user_ids, scope):
+			rows.extend(db.session.execute(
+				select(*columns).where(condition, Account.is_active == True).order_by(Account.id)
+			))
+		return rows
+
+	@staticmethod
+	def _sum_by_user(model, user_ids: List[int], scope, *conditions) -> Dict[int, float]:
+		totals = {}
+		for condition in _user_conditions(model.user_id, user_ids, scope):
+			rows = db.session.execute(
+				select(model.user_id, func.sum(model.amount))
+				.where(condition, *conditions)
+				.group_by(model.user_id)
+			)
+			totals.update({user_id: float(total or 0) for user_id, total in rows})
+		return totals
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Codificação compacta dos logs de auditoria - Invictus Poker Team
+old_values/new_values viram um único payload binário com apenas as chaves
+alteradas (JSON compacto, comprimido com zlib quando compensa). IP e
+User-Agent são internados em tabelas de dimensão e referenciados por id.
+"""
+
+import json
+import zlib
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, select, insert
+from sqlalchemy.orm import Session
+
+# Primeiro byte do payload
+FORMAT_JSON = 0x00
+FORMAT_ZLIB = 0x01
+
+# Abaixo disso o cabeçalho do zlib não compensa
+COMPRESS_MIN_BYTES = 96
+
+# Ids de dimensão já confirmados (valor -> id), por processo
+CACHE_LIMIT = 4096
+_PENDING_KEY = 'audit_dimension_pending'
+_cache: Dict[Tuple[str, str], int] = {}
+_cache_lock = threading.Lock()
+
+
+# ----------------------------------------------------------------------
+# Payload old/new
+# ----------------------------------------------------------------------
+
+def diff_values(old_values: Any, new_values: Any) -> Tuple[Any, Any]:
+    """Com dois dicts, mantém apenas as chaves que mudaram (ou só existem de um lado)."""
+    if not (isinstance(old_values, dict) and isinstance(new_values, dict)):
+        return old_values, new_values
+
+    old_changed = {k: v for k, v in old_values.items() if k not in new_values or new_values[k] != v}
+    new_changed = {k: v for k, v in new_values.items() if k not in old_values or old_values[k] != v}
+    return old_changed, new_changed
+
+
+def encode_payload(old_values: Any, new_values: Any) -> Optional[bytes]:
+    """
+    Codifica o par (antigos, novos) de um log.
+
+    Valores vazios são tratados como ausentes, como no log_action original.
+
+    Returns:
+        bytes do payload ou None quando não há valores
+    """
+    old_values = old_values or None
+    new_values = new_values or None
+    if old_values is None and new_values is None:
+        return None
+
+    old_values, new_values = diff_values(old_values, new_values)
+    body = json.dumps([old_values, new_values], separators=(',', ':'),
+                      ensure_ascii=False, default=str).encode('utf-8')
+
+    if len(body) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(body, 6)
+        if len(compressed) < len(body):
+            return bytes([FORMAT_ZLIB]) + compressed
+    return bytes([FORMAT_JSON]) + body
+
+
+def decode_payload(payload: Optional[bytes]) -> Tuple[Any, Any]:
+    """Inverso de encode_payload: retorna (antigos, novos)."""
+    if not payload:
+        return None, None
+
+    payload = bytes(payload)
+    body = payload[1:]
+    if payload[0] == FORMAT_ZLIB:
+        body = zlib.decompress(body)
+    old_values, new_values = json.loads(body.decode('utf-8'))
+    return old_values, new_values
+
+
+def parse_legacy_text(text: Optional[str]) -> Any:
+    """Texto JSON gravado pelo formato antigo (ou texto livre) -> objeto."""
+    if text is None or not isinstance(text, str):
+        return text
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def to_legacy_text(value: Any) -> Optional[str]:
+    """Objeto -> texto JSON, como o log_action gravava antes."""
+    return json.dumps(value, default=str) if value is not None else None
+
+
+# ----------------------------------------------------------------------
+# Dimensões (IP / User-Agent)
+# ----------------------------------------------------------------------
+
+def intern_values(session, model, values: Iterable[Optional[str]]) -> Dict[str, int]:
+    """
+    Resolve (inserindo se preciso) os ids de valores de uma tabela de dimensão.
+
+    A inserção acontece na transação corrente e tolera concorrência
+    (INSERT ... ON CONFLICT DO NOTHING). Ids só entram no cache do processo
+    depois do commit da sessão.
+
+    Args:
+        session: Sessão SQLAlchemy
+        model: AuditIpAddress ou AuditUserAgent
+        values: Valores a resolver (vazios são ignorados)
+
+    Returns:
+        dict valor -> id
+    """
+    table = model.__table__
+    max_length = table.c.value.type.length
+    wanted = {value[:max_length] for value in values if value}
+    resolved: Dict[str, int] = {}
+
+    with _cache_lock:
+        for value in wanted:
+            cached = _cache.get((table.name, value))
+            if cached is not None:
+                resolved[value] = cached
+
+    missing = wanted - resolved.keys()
+    if missing:
+        found = dict(session.execute(
+            select(table.c.value, table.c.id).where(table.c.value.in_(missing))
+        ).all())
+        to_insert = missing - found.keys()
+        if to_insert:
+            session.execute(_insert_ignore(session, table), [{'value': value} for value in to_insert])
+            found.update(session.execute(
+                select(table.c.value, table.c.id).where(table.c.value.in_(to_insert))
+            ).all())
+
+        session.info.setdefault(_PENDING_KEY, {}).update(
+            {(table.name, value): id_ for value, id_ in found.items()}
+        )
+        resolved.update(found)
+
+    return resolved
+
+
+def intern_value(session, model, value: Optional[str]) -> Optional[int]:
+    """Id de um único valor de dimensão (None para vazio)."""
+    if not value:
+        return None
+    max_length = model.__table__.c.value.type.length
+    return intern_values(session, model, [value]).get(value[:max_length])
+
+
+def _insert_ignore(session, table):
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(table)
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=['value'])
+
+
+@event.listens_for(Session, 'after_commit')
+def _promote_pending_dimensions(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    with _cache_lock:
+        if len(_cache) + len(pending) > CACHE_LIMIT:
+            _cache.clear()
+        _cache.update(pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_dimensions(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
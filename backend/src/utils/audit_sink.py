@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Gravação assíncrona (write-behind) de logs de auditoria - Invictus Poker Team
+As rotas auditadas enfileiram o registro em memória e respondem sem um
+segundo commit; uma thread por processo grava os registros em lotes.
+O modo 'sync' mantém a gravação no próprio request (durabilidade imediata).
+
+O escritor usa um engine próprio (uma conexão), nunca a sessão das
+requisições. Lote que falha é repetido; depois disso cada registro é
+gravado sozinho e os que ainda falharem voltam para a fila de repetição.
+"""
+
+import os
+import time
+import queue
+import atexit
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Limite da fila: acima disso o request grava de forma síncrona (sem perda)
+MAX_QUEUE_SIZE = 10000
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 0.5  # segundos
+# Tentativas do lote inteiro antes de gravar registro a registro
+BATCH_RETRIES = 3
+RETRY_BACKOFF = 0.1  # segundos, dobra a cada tentativa
+# Tentativas por registro (um registro só é descartado, com log, depois disso)
+MAX_ATTEMPTS = 5
+
+MODES = ('sync', 'async')
+
+
+class AuditSink:
+    """Fila limitada de registros de auditoria com escritor em segundo plano."""
+
+    def __init__(self, max_queue_size: int = MAX_QUEUE_SIZE, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.app = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._mode: Optional[str] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        # (campos, tentativas) de registros que falharam e serão repetidos
+        self._retry: deque = deque()
+        self._engine = None
+        self._engine_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'sync_writes': 0,
+            'overflow_writes': 0,
+            'retried': 0,
+            'failed': 0,
+            'last_error': None,
+            'last_flush_at': None,
+        }
+
+    def init_app(self, app):
+        """Registra o app (contexto da thread) e o flush no encerramento."""
+        self.app = app
+        atexit.register(self.shutdown)
+
+    @property
+    def mode(self) -> str:
+        """'sync' ou 'async' (AUDIT_WRITE_MODE; padrão 'sync' em testes)."""
+        if self._mode:
+            return self._mode
+        configured = None
+        if self.app is not None:
+            configured = self.app.config.get('AUDIT_WRITE_MODE')
+        configured = configured or os.environ.get('AUDIT_WRITE_MODE')
+        if configured in MODES:
+            return configured
+        return 'sync' if self.app is None or self.app.testing else 'async'
+
+    def set_mode(self, mode: Optional[str]):
+        """Força um modo (None volta para a configuração)."""
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Modo de auditoria inválido: {mode}")
+        self._mode = mode
+        if mode == 'sync':
+            self.flush()
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def submit(self, fields: Dict[str, any]) -> bool:
+        """
+        Registra um log de auditoria.
+
+        Args:
+            fields: Colunas do AuditLog (ver routes.audit.audit_log_fields)
+
+        Returns:
+            True se o registro foi gravado ou enfileirado
+        """
+        if self.mode == 'sync':
+            self._stats['sync_writes'] += 1
+            return self._write_in_request(fields)
+
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(fields)
+            self._stats['enqueued'] += 1
+            return True
+        except queue.Full:
+            # Fila cheia: contrapressão no próprio request em vez de descartar
+            self._stats['overflow_writes'] += 1
+            return self._write_in_request(fields)
+
+    def _write_in_request(self, fields: Dict[str, any]) -> bool:
+        from src.models.models import db, AuditLog
+        try:
+            db.session.add(AuditLog(**fields))
+            db.session.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao salvar log de auditoria: {e}")
+            db.session.rollback()
+            self._stats['failed'] += 1
+            self._stats['last_error'] = str(e)
+            return False
+
+    def _writer_engine(self):
+        """Engine do escritor: conexão própria, fora do pool das requisições."""
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    from src.models.models import db
+                    with self.app.app_context():
+                        url = db.engine.url
+                    options = self.app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+                    self._engine = create_engine(
+                        url, poolclass=QueuePool, pool_size=1, max_overflow=0, pool_pre_ping=True,
+                        connect_args=dict(options.get('connect_args') or {})
+                    )
+        return self._engine
+
+    def _insert(self, rows: List[Dict[str, any]]):
+        """Um insert em lote e um commit na conexão do escritor."""
+        from src.models.models import AuditLog
+        with Session(self._writer_engine()) as session:
+            session.execute(insert(AuditLog), AuditLog.prepare_bulk_rows(rows, session))
+            session.commit()
+
+    def _write_batch(self, batch: List[Tuple[Dict[str, any], int]]):
+        """Grava um lote; se falhar, repete e depois grava registro a registro."""
+        rows = [fields for fields, _ in batch]
+        for attempt in range(BATCH_RETRIES):
+            try:
+                self._insert(rows)
+                self._stats['written'] += len(rows)
+                self._stats['batches'] += 1
+                self._stats['last_flush_at'] = time.time()
+                return
+            except Exception as e:
+                logger.warning(f"Erro ao gravar lote de auditoria ({len(rows)} registros, "
+                               f"tentativa {attempt + 1}): {e}")
+                self._stats['last_error'] = str(e)
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+        # Um registro inválido não derruba o lote: os demais são gravados
+        for fields, attempts in batch:
+            try:
+                self._insert([fields])
+                self._stats['written'] += 1
+            except Exception as e:
+                self._stats['last_error'] = str(e)
+                if attempts + 1 < MAX_ATTEMPTS:
+                    self._retry.append((fields, attempts + 1))
+                    self._stats['retried'] += 1
+                else:
+                    logger.critical(f"Log de auditoria não gravado após {MAX_ATTEMPTS} tentativas: {fields} ({e})")
+                    self._stats['failed'] += 1
+
+    # ------------------------------------------------------------------
+    # Escritor em segundo plano
+    # ------------------------------------------------------------------
+
+    def _ensure_writer(self):
+        """Inicia a thread sob demanda (depois do fork dos workers)."""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='audit-sink', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._drain(wait=self.flush_interval)
+
+    def _drain(self, wait: float = 0) -> int:
+        """Retira até batch_size registros (repetições primeiro) e os grava."""
+        batch = []
+        while self._retry and len(batch) < self.batch_size:
+            batch.append(self._retry.popleft())
+
+        taken = 0
+        while len(batch) < self.batch_size:
+            try:
+                if not batch and wait:
+                    fields = self._queue.get(timeout=wait)
+                else:
+                    fields = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append((fields, 0))
+            taken += 1
+        if not batch:
+            return 0
+
+        try:
+            self._write_batch(batch)
+        finally:
+            for _ in range(taken):
+                self._queue.task_done()
+        return len(batch)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Aguarda a gravação de tudo que já foi enfileirado.
+
+        Sem escritor ativo, esvazia a fila na thread atual.
+
+        Returns:
+            True se a fila foi esvaziada dentro do prazo
+        """
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks or self._retry:
+            if time.monotonic() > deadline:
+                return False
+            if not (self._thread and self._thread.is_alive()):
+                self._drain()
+            else:
+                time.sleep(0.01)
+        return True
+
+    def shutdown(self, timeout: float = 10.0):
+        """Para o escritor e grava o que restou na fila."""
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        if self.app is not None:
+            self.flush(timeout=timeout)
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+    def get_stats(self) -> Dict[str, any]:
+        return {
+            **self._stats,
+            'mode': self.mode,
+            'queued': self._queue.qsize(),
+            'max_queue_size': self._queue.maxsize,
+            'writer_alive': bool(self._thread and self._thread.is_alive()),
+        }
+
+
+# Instância global do sink
+audit_sink = AuditSink()
+
+
+def get_audit_sink() -> AuditSink:
+    """Retorna a instância global do sink de auditoria."""
+    return audit_sink
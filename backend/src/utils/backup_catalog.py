@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Catálogo de backups em SQLite - Invictus Poker Team
+Substitui a reescrita completa do backup_metadata.json por um índice
+transacional, seguro para o agendador e requisições manuais concorrentes.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKUP_COLUMNS = (
+    'filename', 'path', 'timestamp', 'datetime', 'description', 'format',
+    'size', 'logical_size', 'physical_size', 'chunks', 'sha256', 'verified'
+)
+
+# Estados de um restore em andamento (progresso gravado em catalog_meta)
+RESTORE_RUNNING_STATUSES = ('preparing', 'copying')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    filename TEXT PRIMARY KEY,
+    path TEXT,
+    timestamp TEXT,
+    datetime TEXT NOT NULL,
+    description TEXT,
+    format TEXT NOT NULL DEFAULT 'file',
+    size INTEGER NOT NULL DEFAULT 0,
+    logical_size INTEGER NOT NULL DEFAULT 0,
+    physical_size INTEGER NOT NULL DEFAULT 0,
+    chunks INTEGER,
+    sha256 TEXT,
+    verified INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_backups_datetime ON backups (datetime);
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class BackupCatalog:
+    """Índice de backups com escrita transacional e consultas paginadas."""
+
+    def __init__(self, catalog_path: str, legacy_metadata_file: str = None):
+        """
+        Inicializa o catálogo.
+
+        Args:
+            catalog_path: Arquivo SQLite do catálogo
+            legacy_metadata_file: backup_metadata.json a importar na primeira abertura
+        """
+        self.catalog_path = catalog_path
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+        if legacy_metadata_file:
+            self._import_legacy_metadata(legacy_metadata_file)
+
+    @contextmanager
+    def _connect(self):
+        """Conexão curta; o lock do SQLite protege contra outros processos."""
+        with self._lock:
+            conn = sqlite3.connect(self.catalog_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def add(self, backup_info: Dict[str, any]):
+        """Registra (ou substitui) um backup e atualiza o último backup."""
+        row = self._to_row(backup_info)
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO backups ({', '.join(BACKUP_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in BACKUP_COLUMNS)})",
+                [row[c] for c in BACKUP_COLUMNS]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('last_backup', ?)",
+                (row['datetime'],)
+            )
+
+    def set_restore_progress(self, progress: Dict[str, any]):
+        """Grava o progresso do restore (visível para todos os workers)."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('restore_progress', ?)",
+                (json.dumps(progress),)
+            )
+
+    def claim_restore(self, progress: Dict[str, any], stale_after: float) -> bool:
+        """
+        Marca um restore como iniciado se nenhum outro processo estiver restaurando.
+
+        Args:
+            progress: Estado inicial do restore
+            stale_after: Segundos sem atualização para considerar um restore abandonado
+
+        Returns:
+            True se este processo pode restaurar
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            current = self._read_restore_progress(conn)
+            if current.get('status') in RESTORE_RUNNING_STATUSES:
+                updated_at = current.get('updated_at')
+                if updated_at and (datetime.now() - datetime.fromisoformat(updated_at)).total_seconds() < stale_after:
+                    return False
+            conn.execute(
+                "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('restore_progress', ?)",
+                (json.dumps(progress),)
+            )
+            return True
+
+    def remove(self, filename: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM backups WHERE filename = ?", (filename,))
+            return cursor.rowcount > 0
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def list(self, limit: int = None, offset: int = 0) -> List[Dict[str, any]]:
+        """Backups do mais recente para o mais antigo, paginados no SQL."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM backups ORDER BY datetime DESC LIMIT ? OFFSET ?",
+                (limit if limit is not None else -1, offset)
+            ).fetchall()
+        return [self._from_row(r) for r in rows]
+
+    def get(self, filename: str) -> Optional[Dict[str, any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM backups WHERE filename = ?", (filename,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM backups").fetchone()[0]
+
+    def totals(self) -> Dict[str, int]:
+        """Somatórios para o status: quantidade, tamanho lógico e bytes de arquivos legados."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(logical_size), 0), "
+                "COALESCE(SUM(CASE WHEN format != 'chunked' THEN size ELSE 0 END), 0) "
+                "FROM backups"
+            ).fetchone()
+            last_backup = conn.execute(
+                "SELECT value FROM catalog_meta WHERE key = 'last_backup'"
+            ).fetchone()
+        return {
+            'count': row[0],
+            'logical_size': row[1],
+            'legacy_size': row[2],
+            'last_backup': last_backup[0] if last_backup else None,
+        }
+
+    def restore_progress(self) -> Dict[str, any]:
+        with self._connect() as conn:
+            return self._read_restore_progress(conn)
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _import_legacy_metadata(self, metadata_file: str):
+        """Importa backup_metadata.json uma única vez."""
+        if not os.path.exists(metadata_file):
+            return
+
+        with self._connect() as conn:
+            imported = conn.execute(
+                "SELECT value FROM catalog_meta WHERE key = 'legacy_imported'"
+            ).fetchone()
+            if imported:
+                return
+
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    backups = json.load(f).get('backups', [])
+            except Exception as e:
+                logger.error(f"Erro ao importar metadados legados de backup: {str(e)}")
+                backups = []
+
+            for backup in backups:
+                row = self._to_row(backup)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO backups ({', '.join(BACKUP_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in BACKUP_COLUMNS)})",
+                    [row[c] for c in BACKUP_COLUMNS]
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('legacy_imported', ?)",
+                (datetime.now().isoformat(),)
+            )
+
+        if backups:
+            logger.info(f"{len(backups)} registros de backup importados de {metadata_file}")
+
+    @staticmethod
+    def _read_restore_progress(conn) -> Dict[str, any]:
+        row = conn.execute("SELECT value FROM catalog_meta WHERE key = 'restore_progress'").fetchone()
+        return json.loads(row[0]) if row else {'status': 'idle'}
+
+    @staticmethod
+    def _to_row(backup_info: Dict[str, any]) -> Dict[str, any]:
+        size = backup_info.get('size', 0)
+        return {
+            'filename': backup_info['filename'],
+            'path': backup_info.get('path'),
+            'timestamp': backup_info.get('timestamp'),
+            'datetime': backup_info.get('datetime') or datetime.now().isoformat(),
+            'description': backup_info.get('description'),
+            'format': backup_info.get('format', 'file'),
+            'size': size,
+            # Backups legados ocupam o arquivo inteiro em disco
+            'logical_size': backup_info.get('logical_size', size),
+            'physical_size': backup_info.get('physical_size', size),
+            'chunks': backup_info.get('chunks'),
+            'sha256': backup_info.get('sha256'),
+            'verified': 1 if backup_info.get('verified') else 0,
+        }
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Dict[str, any]:
+        backup = {c: row[c] for c in BACKUP_COLUMNS}
+        backup['verified'] = bool(backup['verified'])
+        return backup
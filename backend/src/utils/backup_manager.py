@@ -6,20 +6,26 @@ Implementa backup automático, restore e manutenção do banco de dados.
 
 import os
 import shutil
+import hashlib
 import sqlite3
-import schedule
-import time
 import threading
-from datetime import datetime, timedelta
-from importlib import import_module
-from typing import Optional, List, Dict
-import json
+from datetime import datetime
+from typing import Optional, List, Dict, Callable
 import logging
 
+from src.utils.backup_storage import ChunkStore
+from src.utils.backup_catalog import BackupCatalog
+from src.utils.scheduler import get_scheduler
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Páginas copiadas por passo no restore (libera leitores entre os passos)
+RESTORE_PAGES_PER_STEP = 1024
+# Restore sem atualização de progresso por mais tempo que isso é considerado abandonado
+RESTORE_STALE_SECONDS = 600
+
 class BackupManager:
     """Gerenciador de backup automático para SQLite"""
     
@@ -42,12 +48,21 @@ class BackupManager:
         # Criar diretório de backup se não existir
         os.makedirs(self.backup_dir, exist_ok=True)
         
-        # Arquivo de metadados dos backups
+        # Catálogo de metadados (importa o backup_metadata.json legado na primeira abertura)
         self.metadata_file = os.path.join(self.backup_dir, 'backup_metadata.json')
+        self.catalog = BackupCatalog(
+            os.path.join(self.backup_dir, 'backup_catalog.sqlite'),
+            legacy_metadata_file=self.metadata_file
+        )
+        
+        # Repositório de blocos comprimidos e deduplicados
+        self.store = ChunkStore(self.backup_dir)
         
-        # Thread para execução de backups automáticos
-        self.backup_thread = None
-        self.running = False
+        # Serializa criação de backups (manual x agendado) dentro do processo
+        self._backup_lock = threading.Lock()
+        
+        # Um restore por vez no processo; entre workers o catálogo decide
+        self._restore_lock = threading.Lock()
     
     def create_backup(self, description: str = None) -> Dict[str, str]:
         """
@@ -60,100 +75,268 @@ class BackupManager:
             Dicionário com informações do backup criado
         """
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_filename = f"invictus_backup_{timestamp}.db"
-            backup_path = os.path.join(self.backup_dir, backup_filename)
-            
-            # Criar backup usando SQLite .backup()
+            with self._backup_lock:
+                return self._create_backup_locked(description)
+        except Exception as e:
+            logger.error(f"Erro ao criar backup: {str(e)}")
+            raise
+    
+    def _create_backup_locked(self, description: str = None) -> Dict[str, str]:
+        """Cria o backup; deve ser chamado com _backup_lock adquirido."""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        backup_filename = f"invictus_backup_{timestamp}.db"
+        suffix = 1
+        while self.backup_exists(backup_filename) or self.catalog.get(backup_filename):
+            # Mais de um backup no mesmo segundo (ex.: manual + agendado)
+            backup_filename = f"invictus_backup_{timestamp}_{suffix}.db"
+            suffix += 1
+        snapshot_path = os.path.join(self.backup_dir, f".snapshot_{backup_filename}")
+        
+        try:
+            # Criar snapshot consistente usando SQLite .backup()
             with sqlite3.connect(self.database_path) as source_conn:
-                with sqlite3.connect(backup_path) as backup_conn:
+                with sqlite3.connect(snapshot_path) as backup_conn:
                     source_conn.backup(backup_conn)
             
-            # Verificar integridade do backup
-            if self._verify_backup_integrity(backup_path):
-                # Salvar metadados
-                backup_info = {
-                    'filename': backup_filename,
-                    'path': backup_path,
-                    'timestamp': timestamp,
-                    'datetime': datetime.now().isoformat(),
-                    'description': description or f"Backup automático - {timestamp}",
-                    'size': os.path.getsize(backup_path),
-                    'verified': True
-                }
-                
-                self._save_backup_metadata(backup_info)
-                self._cleanup_old_backups()
-                
-                logger.info(f"Backup criado com sucesso: {backup_filename}")
-                return backup_info
-            else:
-                # Remover backup corrompido
-                if os.path.exists(backup_path):
-                    os.remove(backup_path)
+            # Verificar integridade do snapshot
+            if not self._verify_backup_integrity(snapshot_path):
                 raise Exception("Backup falhou na verificação de integridade")
-                
-        except Exception as e:
-            logger.error(f"Erro ao criar backup: {str(e)}")
-            raise
+            
+            # Armazenar em blocos deduplicados e comprimidos
+            manifest = self.store.store_file(snapshot_path, backup_filename)
+        finally:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+        
+        # Salvar metadados
+        backup_info = {
+            'filename': backup_filename,
+            'path': self.store.manifest_path(backup_filename),
+            'timestamp': timestamp,
+            'datetime': datetime.now().isoformat(),
+            'description': description or f"Backup automático - {timestamp}",
+            'format': 'chunked',
+            'size': manifest['logical_size'],
+            'logical_size': manifest['logical_size'],
+            'physical_size': manifest['physical_size'],
+            'chunks': len(manifest['chunks']),
+            'sha256': manifest['sha256'],
+            'verified': True
+        }
+        
+        self.catalog.add(backup_info)
+        self._cleanup_old_backups()
+        
+        logger.info(
+            f"Backup criado com sucesso: {backup_filename} "
+            f"({manifest['logical_size']} bytes lógicos, {manifest['physical_size']} bytes novos)"
+        )
+        return backup_info
     
-    def restore_backup(self, backup_filename: str) -> bool:
+    def restore_backup(self, 
+                       backup_filename: str, 
+                       progress_callback: Callable[[Dict[str, any]], None] = None) -> bool:
         """
         Restaura um backup específico.
         
+        O conteúdo é copiado para o banco em uso pela API de backup do SQLite,
+        em passos de RESTORE_PAGES_PER_STEP páginas, sem substituir o arquivo
+        por baixo das conexões abertas (seguro em WAL mode).
+        
         Args:
             backup_filename: Nome do arquivo de backup
+            progress_callback: Função opcional chamada com o progresso a cada passo
             
         Returns:
             True se restaurado com sucesso, False caso contrário
         """
+        if not self._restore_lock.acquire(blocking=False):
+            logger.warning("Restore já está em andamento")
+            return False
+        
+        started = {'status': 'preparing', 'filename': backup_filename, 'updated_at': datetime.now().isoformat()}
+        if not self.catalog.claim_restore(started, stale_after=RESTORE_STALE_SECONDS):
+            self._restore_lock.release()
+            logger.warning("Restore já está em andamento em outro processo")
+            return False
+        
+        restored_path = f"{self.database_path}.restoring"
         try:
-            backup_path = os.path.join(self.backup_dir, backup_filename)
-            
-            if not os.path.exists(backup_path):
+            if not self.backup_exists(backup_filename):
                 raise FileNotFoundError(f"Arquivo de backup não encontrado: {backup_filename}")
             
+            self._update_restore_progress(progress_callback, status='preparing', filename=backup_filename)
+            
+            # Reconstruir o backup em arquivo temporário (checksums validados na leitura)
+            self.export_backup(backup_filename, restored_path)
+            
             # Verificar integridade antes do restore
-            if not self._verify_backup_integrity(backup_path):
+            if not self._verify_restore_source(backup_filename, restored_path):
                 raise Exception("Backup corrompido, não é possível restaurar")
             
-            # Criar backup do estado atual antes do restore
+            # Criar backup do estado atual antes do restore (barato: blocos deduplicados)
             current_backup = self.create_backup("Backup antes do restore")
             
-            # Fazer backup do arquivo atual
-            current_backup_path = f"{self.database_path}.before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            shutil.copy2(self.database_path, current_backup_path)
-            
-            # Restaurar backup
-            shutil.copy2(backup_path, self.database_path)
+            # Restaurar backup no banco em uso
+            self._copy_into_database(restored_path, backup_filename, progress_callback)
             
+            self._update_restore_progress(progress_callback, status='completed', filename=backup_filename,
+                                          percent=100, finished_at=datetime.now().isoformat())
             logger.info(f"Backup restaurado com sucesso: {backup_filename}")
-            logger.info(f"Backup do estado anterior salvo em: {current_backup_path}")
+            logger.info(f"Backup do estado anterior salvo como: {current_backup['filename']}")
             
             return True
             
         except Exception as e:
+            self._update_restore_progress(progress_callback, status='failed', filename=backup_filename,
+                                          error=str(e), finished_at=datetime.now().isoformat())
             logger.error(f"Erro ao restaurar backup: {str(e)}")
             return False
+        finally:
+            if os.path.exists(restored_path):
+                os.remove(restored_path)
+            self._restore_lock.release()
+    
+    def _copy_into_database(self, 
+                            source_path: str, 
+                            backup_filename: str, 
+                            progress_callback: Callable[[Dict[str, any]], None] = None):
+        """Copia o banco restaurado para o banco em uso via API de backup do SQLite."""
+        def _progress(status, remaining, total):
+            percent = round((total - remaining) * 100 / total, 1) if total else 100
+            self._update_restore_progress(progress_callback, status='copying', filename=backup_filename,
+                                          pages_total=total, pages_remaining=remaining, percent=percent)
+        
+        source_conn = sqlite3.connect(source_path)
+        dest_conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            source_conn.backup(dest_conn, pages=RESTORE_PAGES_PER_STEP, progress=_progress)
+        finally:
+            dest_conn.close()
+            source_conn.close()
+    
+    def _verify_restore_source(self, backup_filename: str, restored_path: str) -> bool:
+        """
+        Valida o arquivo a ser restaurado.
+        
+        Backups em blocos já tiveram o SHA-256 conferido durante a reconstrução;
+        apenas backups legados sem checksum exigem PRAGMA integrity_check.
+        """
+        if self.store.has_manifest(backup_filename):
+            return True
+        
+        backup = self.catalog.get(backup_filename)
+        if backup and backup.get('sha256'):
+            return self._file_sha256(restored_path) == backup['sha256']
+        
+        return self._verify_backup_integrity(restored_path)
+    
+    @property
+    def restore_progress(self) -> Dict[str, any]:
+        """Estado do restore em andamento (ou do último), compartilhado entre workers."""
+        return self.catalog.restore_progress()
+    
+    def _update_restore_progress(self, progress_callback, **progress):
+        """Grava o estado do restore no catálogo e notifica o callback, se houver."""
+        progress['updated_at'] = datetime.now().isoformat()
+        self.catalog.set_restore_progress(progress)
+        if progress_callback:
+            try:
+                progress_callback(progress)
+            except Exception as e:
+                logger.warning(f"Erro no callback de progresso do restore: {e}")
+    
+    @staticmethod
+    def _file_sha256(path: str) -> str:
+        file_hash = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for data in iter(lambda: f.read(1024 * 1024), b''):
+                file_hash.update(data)
+        return file_hash.hexdigest()
+    
+    def backup_exists(self, backup_filename: str) -> bool:
+        """Verifica se o backup existe (em blocos ou arquivo legado)."""
+        return (self.store.has_manifest(backup_filename)
+                or os.path.exists(self._legacy_backup_path(backup_filename)))
+    
+    def iter_backup(self, backup_filename: str):
+        """
+        Lê o conteúdo de um backup em blocos, sem carregá-lo inteiro em memória.
+        
+        Args:
+            backup_filename: Nome do arquivo de backup
+            
+        Yields:
+            Blocos de bytes do arquivo SQLite original
+        """
+        if self.store.has_manifest(backup_filename):
+            yield from self.store.iter_chunks(backup_filename)
+            return
+        
+        # Backups legados (arquivo .db completo)
+        with open(self._legacy_backup_path(backup_filename), 'rb') as f:
+            while True:
+                data = f.read(self.store.chunk_size)
+                if not data:
+                    break
+                yield data
+    
+    def export_backup(self, backup_filename: str, dest_path: str) -> int:
+        """
+        Reconstrói um backup como arquivo SQLite completo.
+        
+        Args:
+            backup_filename: Nome do arquivo de backup
+            dest_path: Caminho do arquivo de destino
+            
+        Returns:
+            Número de bytes escritos
+        """
+        if self.store.has_manifest(backup_filename):
+            return self.store.restore_to(backup_filename, dest_path)
+        
+        shutil.copy2(self._legacy_backup_path(backup_filename), dest_path)
+        return os.path.getsize(dest_path)
+    
+    def verify_backup(self, backup_filename: str) -> bool:
+        """Verifica integridade de um backup (checksums dos blocos + PRAGMA integrity_check)."""
+        verify_path = os.path.join(self.backup_dir, f".verify_{os.path.basename(backup_filename)}")
+        try:
+            self.export_backup(backup_filename, verify_path)
+            return self._verify_backup_integrity(verify_path)
+        except Exception as e:
+            logger.error(f"Erro ao verificar backup {backup_filename}: {str(e)}")
+            return False
+        finally:
+            if os.path.exists(verify_path):
+                os.remove(verify_path)
     
-    def list_backups(self) -> List[Dict[str, str]]:
+    def list_backups(self, limit: int = None, offset: int = 0) -> List[Dict[str, str]]:
         """
-        Lista todos os backups disponíveis.
+        Lista os backups disponíveis, do mais recente para o mais antigo.
         
+        Args:
+            limit: Quantidade máxima de registros (None = todos)
+            offset: Registros a pular (paginação)
+            
         Returns:
-            Lista de dicionários com informações dos backups
+            Lista de dicionários com informações dos backups, incluindo
+            tamanho lógico (arquivo SQLite) e físico (bytes novos em disco)
         """
         try:
-            if os.path.exists(self.metadata_file):
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                    return sorted(metadata.get('backups', []), 
-                                key=lambda x: x['datetime'], reverse=True)
-            return []
+            return self.catalog.list(limit=limit, offset=offset)
         except Exception as e:
             logger.error(f"Erro ao listar backups: {str(e)}")
             return []
     
+    def get_backup(self, backup_filename: str) -> Optional[Dict[str, str]]:
+        """Retorna os metadados de um backup específico."""
+        return self.catalog.get(backup_filename)
+    
+    def count_backups(self) -> int:
+        """Quantidade de backups registrados."""
+        return self.catalog.count()
+    
     def delete_backup(self, backup_filename: str) -> bool:
         """
         Remove um backup específico.
@@ -165,16 +348,19 @@ class BackupManager:
             True se removido com sucesso, False caso contrário
         """
         try:
-            backup_path = os.path.join(self.backup_dir, backup_filename)
+            legacy_path = self._legacy_backup_path(backup_filename)
+            removed = self.store.delete_manifest(backup_filename)
             
-            if os.path.exists(backup_path):
-                os.remove(backup_path)
-                
-                # Atualizar metadados
-                metadata = self._load_backup_metadata()
-                metadata['backups'] = [b for b in metadata['backups'] 
-                                     if b['filename'] != backup_filename]
-                self._save_backup_metadata_full(metadata)
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+                removed = True
+            
+            # Atualizar metadados (inclui registros órfãos, sem arquivo em disco)
+            removed = self.catalog.remove(backup_filename) or removed
+            
+            if removed:
+                # Remover blocos que não são mais referenciados
+                self.store.collect_garbage()
                 
                 logger.info(f"Backup removido: {backup_filename}")
                 return True
@@ -184,50 +370,38 @@ class BackupManager:
             logger.error(f"Erro ao remover backup: {str(e)}")
             return False
     
+    @property
+    def running(self) -> bool:
+        """Se o backup automático está ativo no agendador (vale para todos os workers)."""
+        return get_scheduler().is_job_enabled('backup')
+    
     def start_automatic_backup(self, interval_hours: int = 6):
         """
-        Inicia sistema de backup automático.
+        Registra o backup automático no agendador unificado.
         
         Args:
             interval_hours: Intervalo entre backups em horas
         """
-        if self.running:
-            logger.warning("Sistema de backup automático já está em execução")
-            return
-        
-        self.running = True
+        scheduler = get_scheduler()
         
-        # Agendar backup automático
-        schedule.every(interval_hours).hours.do(
-            lambda: self.create_backup(f"Backup automático - {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+        # Agendar backup automático (jitter evita coincidir com outros jobs)
+        scheduler.add_job(
+            'backup',
+            lambda: self.create_backup(f"Backup automático - {datetime.now().strftime('%Y-%m-%d %H:%M')}"),
+            interval_seconds=interval_hours * 3600,
+            jitter_seconds=300
         )
+        scheduler.set_interval('backup', interval_hours * 3600)
+        scheduler.set_enabled('backup', True)
         
         # Agendar limpeza diária
-        schedule.every().day.at("02:00").do(self._cleanup_old_backups)
-
-        # Agendar verificação diária de dados incompletos às 09:00
-        def _notify_incomplete():
-            try:
-                notif_module = import_module('src.utils.notification_service')
-                notif_module.NotificationService.notify_incomplete_data()
-            except Exception as e:
-                logger.error(f"Erro ao executar verificação diária de pendências: {e}")
-        schedule.every().day.at("09:00").do(_notify_incomplete)
-        
-        # Thread para executar agendamentos
-        def run_scheduler():
-            logger.info(f"Sistema de backup automático iniciado (intervalo: {interval_hours}h)")
-            while self.running:
-                schedule.run_pending()
-                time.sleep(60)  # Verificar a cada minuto
-        
-        self.backup_thread = threading.Thread(target=run_scheduler, daemon=True)
-        self.backup_thread.start()
+        scheduler.add_job('backup_cleanup', self._cleanup_old_backups, daily_at="02:00", jitter_seconds=300)
+        
+        logger.info(f"Backup automático agendado (intervalo: {interval_hours}h)")
     
     def stop_automatic_backup(self):
-        """Para o sistema de backup automático."""
-        self.running = False
-        schedule.clear()
+        """Pausa o backup automático em todos os workers."""
+        get_scheduler().set_enabled('backup', False)
         logger.info("Sistema de backup automático parado")
     
     def get_database_info(self) -> Dict[str, any]:
@@ -238,13 +412,23 @@ class BackupManager:
             Dicionário com informações do banco
         """
         try:
+            totals = self.catalog.totals()
+            logical_size = totals['logical_size']
+            physical_size = self.store.physical_size() + totals['legacy_size']
+            
             info = {
                 'database_path': self.database_path,
                 'exists': os.path.exists(self.database_path),
                 'size': 0,
                 'wal_mode': False,
                 'backup_dir': self.backup_dir,
-                'total_backups': len(self.list_backups())
+                'total_backups': totals['count'],
+                'last_backup': totals['last_backup'],
+                'storage': {
+                    'logical_size': logical_size,
+                    'physical_size': physical_size,
+                    'compression_ratio': round(logical_size / physical_size, 2) if physical_size else None
+                }
             }
             
             if info['exists']:
@@ -277,44 +461,16 @@ class BackupManager:
         except Exception:
             return False
     
-    def _save_backup_metadata(self, backup_info: Dict[str, str]):
-        """Salva metadados de um backup."""
-        metadata = self._load_backup_metadata()
-        metadata['backups'].append(backup_info)
-        metadata['last_backup'] = backup_info['datetime']
-        self._save_backup_metadata_full(metadata)
-    
-    def _load_backup_metadata(self) -> Dict[str, any]:
-        """Carrega metadados dos backups."""
-        try:
-            if os.path.exists(self.metadata_file):
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception:
-            pass
-        
-        return {
-            'backups': [],
-            'created': datetime.now().isoformat(),
-            'last_backup': None
-        }
-    
-    def _save_backup_metadata_full(self, metadata: Dict[str, any]):
-        """Salva metadados completos."""
-        try:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Erro ao salvar metadados: {str(e)}")
+    def _legacy_backup_path(self, backup_filename: str) -> str:
+        """Caminho de backups antigos armazenados como arquivo .db completo."""
+        return os.path.join(self.backup_dir, os.path.basename(backup_filename))
     
     def _cleanup_old_backups(self):
         """Remove backups antigos baseado no limite configurado."""
         try:
-            backups = self.list_backups()
-            if len(backups) > self.max_backups:
-                # Manter apenas os backups mais recentes
-                backups_to_remove = backups[self.max_backups:]
-                
+            # Manter apenas os backups mais recentes
+            backups_to_remove = self.catalog.list(offset=self.max_backups)
+            if backups_to_remove:
                 for backup in backups_to_remove:
                     self.delete_backup(backup['filename'])
                 
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Armazenamento de backups por conteúdo - Invictus Poker Team
+Divide o arquivo SQLite em blocos, deduplica por hash entre backups
+e comprime cada bloco (zstd quando disponível, zlib caso contrário).
+"""
+
+import os
+import json
+import zlib
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Iterable, List, Set
+import logging
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional
+    zstandard = None
+
+from src.utils.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+# Múltiplo do page_size do SQLite (4096): páginas inalteradas geram blocos idênticos
+CHUNK_SIZE = 64 * 1024
+
+CODEC_EXTENSIONS = {
+    'zstd': '.zst',
+    'zlib': '.zz',
+}
+
+
+class ChunkIntegrityError(Exception):
+    """Bloco ou arquivo reconstruído não confere com o hash registrado."""
+
+
+class ChunkStore:
+    """Repositório de blocos comprimidos endereçados pelo SHA-256 do conteúdo."""
+
+    def __init__(self, root_dir: str, chunk_size: int = CHUNK_SIZE, codec: str = None):
+        """
+        Inicializa o repositório de blocos.
+
+        Args:
+            root_dir: Diretório raiz (manifests/ e chunks/ são criados dentro dele)
+            chunk_size: Tamanho dos blocos em bytes
+            codec: 'zstd' ou 'zlib' (default: zstd se instalado)
+        """
+        self.root_dir = root_dir
+        self.chunks_dir = os.path.join(root_dir, 'chunks')
+        self.manifests_dir = os.path.join(root_dir, 'manifests')
+        self.chunk_size = chunk_size
+        self.codec = codec or ('zstd' if zstandard else 'zlib')
+        if self.codec == 'zstd' and zstandard is None:
+            raise ValueError("Codec zstd solicitado mas o pacote 'zstandard' não está instalado")
+
+        # Serializa escrita de blocos e coleta de lixo: threads do processo
+        # (RLock) e outros processos (workers, líder do agendador) via flock
+        self._lock = threading.RLock()
+        self.lock_path = os.path.join(root_dir, 'chunks.lock')
+
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def store_file(self, source_path: str, name: str) -> Dict[str, any]:
+        """
+        Armazena um arquivo em blocos e grava seu manifesto.
+
+        Args:
+            source_path: Arquivo a ser armazenado
+            name: Nome lógico do backup (chave do manifesto)
+
+        Returns:
+            Manifesto com tamanhos lógico/físico, checksum e lista de blocos
+        """
+        file_hash = hashlib.sha256()
+        chunks: List[str] = []
+        logical_size = 0
+        physical_size = 0
+
+        with self._exclusive():
+            with open(source_path, 'rb') as f:
+                while True:
+                    data = f.read(self.chunk_size)
+                    if not data:
+                        break
+                    file_hash.update(data)
+                    logical_size += len(data)
+                    digest = hashlib.sha256(data).hexdigest()
+                    chunks.append(digest)
+                    physical_size += self._put_chunk(digest, data)
+
+            manifest = {
+                'version': 1,
+                'name': name,
+                'codec': self.codec,
+                'chunk_size': self.chunk_size,
+                'logical_size': logical_size,
+                'physical_size': physical_size,
+                'sha256': file_hash.hexdigest(),
+                'chunks': chunks,
+            }
+            self._write_manifest(name, manifest)
+
+        return manifest
+
+    def _put_chunk(self, digest: str, data: bytes) -> int:
+        """Grava um bloco se ainda não existir. Retorna os bytes físicos gravados."""
+        if self._find_chunk(digest):
+            return 0
+
+        path = self._chunk_path(digest, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = self._compress(data)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return len(payload)
+
+    def _write_manifest(self, name: str, manifest: Dict[str, any]):
+        path = self.manifest_path(name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def has_manifest(self, name: str) -> bool:
+        return os.path.exists(self.manifest_path(name))
+
+    def load_manifest(self, name: str) -> Dict[str, any]:
+        with open(self.manifest_path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def iter_chunks(self, name: str) -> Iterator[bytes]:
+        """
+        Reconstrói o arquivo bloco a bloco, validando o hash de cada um.
+
+        Args:
+            name: Nome lógico do backup
+
+        Yields:
+            Blocos descomprimidos na ordem original
+        """
+        manifest = self.load_manifest(name)
+        file_hash = hashlib.sha256()
+
+        for digest in manifest['chunks']:
+            data = self._read_chunk(digest)
+            file_hash.update(data)
+            yield data
+
+        if file_hash.hexdigest() != manifest['sha256']:
+            raise ChunkIntegrityError(f"Checksum do backup não confere: {name}")
+
+    def restore_to(self, name: str, dest_path: str) -> int:
+        """
+        Reconstrói um backup em disco sem carregá-lo inteiro em memória.
+
+        Args:
+            name: Nome lógico do backup
+            dest_path: Arquivo de destino
+
+        Returns:
+            Número de bytes escritos
+        """
+        written = 0
+        tmp_path = f"{dest_path}.partial"
+        try:
+            with open(tmp_path, 'wb') as f:
+                for data in self.iter_chunks(name):
+                    f.write(data)
+                    written += len(data)
+            os.replace(tmp_path, dest_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return written
+
+    def _read_chunk(self, digest: str) -> bytes:
+        found = self._find_chunk(digest)
+        if not found:
+            raise ChunkIntegrityError(f"Bloco ausente no repositório: {digest}")
+
+        path, codec = found
+        with open(path, 'rb') as f:
+            data = self._decompress(f.read(), codec)
+
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ChunkIntegrityError(f"Bloco corrompido: {digest}")
+        return data
+
+    # ------------------------------------------------------------------
+    # Manutenção
+    # ------------------------------------------------------------------
+
+    def delete_manifest(self, name: str) -> bool:
+        path = self.manifest_path(name)
+        with self._exclusive():
+            if os.path.exists(path):
+                os.remove(path)
+                return True
+        return False
+
+    def collect_garbage(self, live_names: Iterable[str] = None) -> int:
+        """
+        Remove blocos que não são referenciados por nenhum manifesto vivo.
+
+        Args:
+            live_names: Nomes dos backups que devem ser preservados
+                (default: todos os manifestos em disco, inclusive de backups
+                ainda não registrados no catálogo)
+
+        Returns:
+            Bytes liberados
+        """
+        with self._exclusive():
+            if live_names is None:
+                live_names = self.manifest_names()
+
+            live: Set[str] = set()
+            for name in live_names:
+                if self.has_manifest(name):
+                    live.update(self.load_manifest(name)['chunks'])
+
+            freed = 0
+            for path in self._iter_chunk_files():
+                digest = os.path.basename(path).split('.', 1)[0]
+                if digest not in live:
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+
+            if freed:
+                logger.info(f"Coleta de blocos: {freed} bytes liberados")
+            return freed
+
+    def manifest_names(self) -> List[str]:
+        """Nomes de todos os backups com manifesto em disco."""
+        return [
+            filename[:-len('.json')]
+            for filename in os.listdir(self.manifests_dir)
+            if filename.endswith('.json')
+        ]
+
+    def physical_size(self) -> int:
+        """Total de bytes ocupados pelos blocos em disco."""
+        return sum(os.path.getsize(path) for path in self._iter_chunk_files())
+
+    def manifest_path(self, name: str) -> str:
+        return os.path.join(self.manifests_dir, f"{os.path.basename(name)}.json")
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _exclusive(self):
+        """
+        Lock de escrita do repositório entre threads e processos.
+
+        Um bloco deduplicado só fica protegido da coleta de lixo quando o
+        manifesto que o referencia é gravado, então store_file e
+        collect_garbage nunca podem se intercalar.
+        """
+        with self._lock, file_lock(self.lock_path):
+            yield
+
+    def _chunk_path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.chunks_dir, digest[:2], f"{digest}{CODEC_EXTENSIONS[codec]}")
+
+    def _find_chunk(self, digest: str):
+        for codec in CODEC_EXTENSIONS:
+            path = self._chunk_path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None
+
+    def _iter_chunk_files(self) -> Iterator[str]:
+        for prefix in os.listdir(self.chunks_dir):
+            prefix_dir = os.path.join(self.chunks_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for filename in os.listdir(prefix_dir):
+                if not filename.endswith('.tmp'):
+                    yield os.path.join(prefix_dir, filename)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        return zlib.compress(data, 6)
+
+    @staticmethod
+    def _decompress(payload: bytes, codec: str) -> bytes:
+        if codec == 'zstd':
+            if zstandard is None:
+                raise ChunkIntegrityError("Bloco zstd encontrado mas o pacote 'zstandard' não está instalado")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return zlib.decompress(payload)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Índice de saldos diários por conta - Invictus Poker Team
+Cada BalanceHistory inserido pelo ORM atualiza, no mesmo flush, a linha
+(conta, dia) de `account_daily_balances`: saldo de fechamento (new_balance da
+última alteração do dia) e variação líquida do dia (soma de new - old).
+"Saldo no dia D" e "série de fechamentos" viram leituras indexadas pela
+chave (account_id, day), sem varrer o histórico.
+
+Inserções em massa via Core (simulação, migração) não passam pelo flush:
+chamar rebuild() com as contas afetadas. Exclusões em massa de histórico ou
+contas devem chamar forget() antes.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, delete, event, func, select
+from sqlalchemy.orm import Session
+
+from src.models.models import db, AccountDailyBalance, BalanceHistory
+
+# Limite de parâmetros por IN (SQLite antigo aceita 999)
+IN_CHUNK = 900
+
+
+def _chunks(values: Sequence[int]) -> Iterable[Sequence[int]]:
+    for start in range(0, len(values), IN_CHUNK):
+        yield values[start:start + IN_CHUNK]
+
+
+def _upsert(connection):
+    """
+    INSERT ... ON CONFLICT (account_id, day) DO UPDATE: duas transações no
+    mesmo (conta, dia) não disputam o INSERT da chave primária.
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+
+    table = AccountDailyBalance.__table__
+    stmt = dialect_insert(table)
+    excluded = stmt.excluded
+    newer = table.c.last_change_at <= excluded.last_change_at
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.account_id, table.c.day],
+        set_={
+            'net_change': table.c.net_change + excluded.net_change,
+            'closing_balance': case((newer, excluded.closing_balance), else_=table.c.closing_balance),
+            'last_change_at': case((newer, excluded.last_change_at), else_=table.c.last_change_at),
+        },
+    )
+
+
+class BalanceIndex:
+    """Fechamentos diários por conta, mantidos junto com o BalanceHistory."""
+
+    def __init__(self):
+        self._listeners_installed = False
+
+    def init_app(self, app):
+        """Registra o evento de sessão que mantém o índice."""
+        if self._listeners_installed:
+            return
+        event.listen(Session, 'after_flush', self._after_flush)
+        self._listeners_installed = True
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def closing_balances(self, account_ids: Iterable[int], day: date) -> Dict[int, float]:
+        """Saldo de cada conta ao fim de `day` (último fechamento até o dia). Contas sem histórico ficam de fora."""
+        return {account_id: closing for account_id, _, closing, _ in self._latest_rows(account_ids, day)}
+
+    def opening_balances(self, account_ids: Iterable[int], day: date) -> Dict[int, float]:
+        """
+        Saldo de cada conta no início de `day`: o fechamento do último dia
+        anterior; se o histórico começa em `day`, o fechamento menos a
+        variação do dia (old_balance da primeira alteração).
+        """
+        balances = {}
+        for account_id, row_day, closing, net_change in self._latest_rows(account_ids, day):
+            balances[account_id] = closing - net_change if row_day == day else closing
+        return balances
+
+    def daily_closings(self, account_ids: Iterable[int], start: date,
+                       end: Optional[date] = None) -> List[Tuple[int, date, float, float]]:
+        """(account_id, dia, fechamento, variação) das contas no intervalo [start, end], por dia."""
+        table = AccountDailyBalance.__table__
+        rows = []
+        for chunk in _chunks(list(dict.fromkeys(account_ids))):
+            conditions = [table.c.account_id.in_(chunk), table.c.day >= start]
+            if end is not None:
+                conditions.append(table.c.day <= end)
+            rows.extend(
+                (account_id, row_day, float(closing), float(net_change))
+                for account_id, row_day, closing, net_change in db.session.execute(
+                    select(table.c.account_id, table.c.day, table.c.closing_balance, table.c.net_change)
+                    .where(*conditions)
+                )
+            )
+        rows.sort(key=lambda row: (row[1], row[0]))
+        return rows
+
+    def net_change_by_day(self, start: date, end: date) -> Dict[date, float]:
+        """Variação líquida de todas as contas por dia em [start, end]."""
+        table = AccountDailyBalance.__table__
+        rows = db.session.execute(
+            select(table.c.day, func.sum(table.c.net_change))
+            .where(table.c.day >= start, table.c.day <= end)
+            .group_by(table.c.day)
+            .order_by(table.c.day)
+        )
+        return {row_day: float(total or 0) for row_day, total in rows}
+
+    def net_change_before(self, day: date) -> float:
+        """Variação líquida acumulada de todas as contas antes de `day`."""
+        table = AccountDailyBalance.__table__
+        total = db.session.execute(select(func.sum(table.c.net_change)).where(table.c.day < day)).scalar()
+        return float(total or 0)
+
+    def _latest_rows(self, account_ids: Iterable[int], day: date) -> List[Tuple[int, date, float, float]]:
+        # Último dia com alteração até `day`, por conta (busca na chave primária)
+        table = AccountDailyBalance.__table__
+        rows = []
+        for chunk in _chunks(list(dict.fromkeys(account_ids))):
+            latest = (
+                select(table.c.account_id, func.max(table.c.day).label('day'))
+                .where(table.c.account_id.in_(chunk), table.c.day <= day)
+                .group_by(table.c.account_id)
+                .subquery()
+            )
+            rows.extend(
+                (account_id, row_day, float(closing), float(net_change))
+                for account_id, row_day, closing, net_change in db.session.execute(
+                    select(table.c.account_id, table.c.day, table.c.closing_balance, table.c.net_change)
+                    .join(latest, and_(table.c.account_id == latest.c.account_id, table.c.day == latest.c.day))
+                )
+            )
+        return rows
+
+    # ------------------------------------------------------------------
+    # Manutenção
+    # ------------------------------------------------------------------
+
+    def record(self, connection, changes: Iterable[Tuple[int, datetime, float, float]]):
+        """
+        Aplica alterações de saldo (account_id, created_at, old, new) ao índice.
+
+        Agrupa por (conta, dia): a variação soma; o fechamento só é trocado
+        se a alteração for a mais recente do dia.
+        """
+        days = defaultdict(lambda: [0.0, None, None])
+        for account_id, created_at, old_balance, new_balance in changes:
+            entry = days[(account_id, created_at.date())]
+            entry[0] += float(new_balance) - float(old_balance)
+            if entry[1] is None or created_at >= entry[1]:
+                entry[1] = created_at
+                entry[2] = float(new_balance)
+
+        rows = [
+            {'account_id': account_id, 'day': day, 'closing_balance': closing,
+             'net_change': round(net_change, 2), 'last_change_at': changed_at}
+            for (account_id, day), (net_change, changed_at, closing) in days.items()
+        ]
+        if rows:
+            upsert = _upsert(connection)
+            if upsert is not None:
+                connection.execute(upsert, rows)
+            else:
+                self._update_or_insert(connection, rows)
+
+    @staticmethod
+    def _update_or_insert(connection, rows: List[Dict]):
+        """Dialetos sem ON CONFLICT: UPDATE e, se não houver linha, INSERT."""
+        table = AccountDailyBalance.__table__
+        for row in rows:
+            newer = table.c.last_change_at <= row['last_change_at']
+            result = connection.execute(
+                table.update()
+                .where(table.c.account_id == row['account_id'], table.c.day == row['day'])
+                .values(
+                    net_change=table.c.net_change + row['net_change'],
+                    closing_balance=case((newer, row['closing_balance']), else_=table.c.closing_balance),
+                    last_change_at=case((newer, row['last_change_at']), else_=table.c.last_change_at),
+                )
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(**row))
+
+    def rebuild(self, connection, account_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Recalcula o índice a partir do BalanceHistory (todas as contas ou só
+        as informadas) em um INSERT ... SELECT com funções de janela. O commit
+        fica com quem chamou.
+        """
+        if account_ids is None:
+            connection.execute(delete(AccountDailyBalance.__table__))
+            return self._insert_from_history(connection, None)
+
+        account_ids = list(dict.fromkeys(account_ids))
+        self.forget(connection, account_ids)
+        return sum(self._insert_from_history(connection, chunk) for chunk in _chunks(account_ids))
+
+    def forget(self, connection, account_ids: Iterable[int]):
+        """Remove os fechamentos das contas (antes de excluir histórico ou contas em massa)."""
+        table = AccountDailyBalance.__table__
+        for chunk in _chunks(list(dict.fromkeys(account_ids))):
+            connection.execute(delete(table).where(table.c.account_id.in_(chunk)))
+
+    @staticmethod
+    def _insert_from_history(connection, account_ids: Optional[Sequence[int]]) -> int:
+        history = BalanceHistory.__table__
+        table = AccountDailyBalance.__table__
+        day = func.date(history.c.created_at)
+        partition = (history.c.account_id, day)
+
+        ranked = select(
+            history.c.account_id,
+            day.label('day'),
+            history.c.new_balance,
+            history.c.created_at,
+            func.sum(history.c.new_balance - history.c.old_balance).over(partition_by=partition).label('net_change'),
+            func.row_number().over(
+                partition_by=partition, order_by=(history.c.created_at.desc(), history.c.id.desc())
+            ).label('position'),
+        ).where(history.c.created_at.isnot(None))
+        if account_ids is not None:
+            ranked = ranked.where(history.c.account_id.in_(account_ids))
+        ranked = ranked.subquery()
+
+        result = connection.execute(table.insert().from_select(
+            ['account_id', 'day', 'closing_balance', 'net_change', 'last_change_at'],
+            select(ranked.c.account_id, ranked.c.day, ranked.c.new_balance, ranked.c.net_change, ranked.c.created_at)
+            .where(ranked.c.position == 1)
+        ))
+        return max(result.rowcount or 0, 0)
+
+    def _after_flush(self, session, flush_context):
+        changes = [
+            (instance.account_id, instance.created_at, instance.old_balance, instance.new_balance)
+            for instance in session.new
+            if isinstance(instance, BalanceHistory) and instance.created_at is not None
+        ]
+        if changes:
+            self.record(session.connection(), changes)
+
+
+# Instância global do índice de saldos diários
+balance_index = BalanceIndex()
+
+
+def get_balance_index() -> BalanceIndex:
+    """Retorna a instância global do índice de saldos diários."""
+    return balance_index
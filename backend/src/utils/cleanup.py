@@ -1,6 +1,8 @@
 import os
 from flask import current_app
 from src.models.models import db, User, Account, Platform, ReloadRequest, WithdrawalRequest, Transaction, BalanceHistory, UserRole
+from src.utils.dimension_cache import get_dimension_cache
+from src.utils.balance_index import get_balance_index
 
 
 def is_test_username(username: str) -> bool:
@@ -52,6 +54,7 @@ def cleanup_test_data(commit: bool = True) -> dict:
 
     # Contas e histórico
     account_ids = [a.id for a in Account.query.filter(Account.user_id.in_(test_user_ids)).all()]
+    get_balance_index().forget(db.session.connection(), account_ids)
     removed["balance_history"] = BalanceHistory.query.filter(BalanceHistory.account_id.in_(account_ids)).delete(synchronize_session=False)
     removed["accounts"] = Account.query.filter(Account.id.in_(account_ids)).delete(synchronize_session=False)
 
@@ -89,6 +92,7 @@ def cleanup_test_platforms(commit: bool = True) -> dict:
 
     # Apagar dependências
     account_ids = [a.id for a in Account.query.filter(Account.platform_id.in_(test_platforms)).all()]
+    get_balance_index().forget(db.session.connection(), account_ids)
     BalanceHistory.query.filter(BalanceHistory.account_id.in_(account_ids)).delete(synchronize_session=False)
     Transaction.query.filter(Transaction.platform_id.in_(test_platforms)).delete(synchronize_session=False)
     ReloadRequest.query.filter(ReloadRequest.platform_id.in_(test_platforms)).delete(synchronize_session=False)
@@ -97,6 +101,8 @@ def cleanup_test_platforms(commit: bool = True) -> dict:
 
     # Remover plataformas
     platforms_removed = Platform.query.filter(Platform.id.in_(test_platforms)).delete(synchronize_session=False)
+    # DELETE em massa não passa pelo flush: invalidar o cache de dimensões
+    get_dimension_cache().invalidate('platforms')
 
     if commit:
         db.session.commit()
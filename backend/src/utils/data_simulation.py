@@ -1,16 +1,42 @@
 """
 Sistema de simulação de dados para 1 ano completo de operação
 Gera jogadores realistas com diferentes perfis e histórico temporal
+
+Dois modos:
+- 'profiles': os 9 perfis de PLAYER_PROFILES, criados via ORM;
+- 'vectorized': N jogadores × D dias gerados em arrays NumPy (RNG com
+  semente) e gravados com insert() do Core em lotes, para montar bases
+  grandes de teste de carga e benchmarks.
 """
 
+import uuid
 import random
+from dataclasses import dataclass
 from datetime import datetime, timedelta, date
 from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+from werkzeug.security import generate_password_hash
 from src.models.models import (
     db, User, Account, Platform, Reta, BalanceHistory, 
     ReloadRequest, WithdrawalRequest, Transaction, UserRole,
-    ReloadStatus, WithdrawalStatus, TransactionType
+    ReloadStatus, WithdrawalStatus, TransactionType, AccountStatus
 )
+from src.utils.balance_index import get_balance_index
+
+try:
+    import numpy as np
+except ImportError:  # modo vetorizado indisponível
+    np = None
+
+# Modo vetorizado
+SIMULATION_MODES = ('profiles', 'vectorized')
+CHUNK_SIZE = 5000  # linhas por insert() em lote
+POKER_SITES = ('pokerstars', 'ggpoker', 'partypoker')
+SEASONAL_MONTHS = (6, 7, 12)  # Jun, Jul, Dez
+PENDING_DAYS = 14  # solicitações mais recentes que isso ficam pendentes
+# Limites da simulação disparada pela API (arrays N x sites x D em memória no worker)
+MAX_SIMULATED_PLAYERS = 5000
+MAX_SIMULATED_DAYS = 5 * 365
 
 
 # Perfis de jogadores realistas
@@ -129,7 +155,8 @@ def clear_all_player_data():
         # Remover registros dependentes
         account_ids = [a.id for a in Account.query.filter(Account.user_id.in_(player_ids)).all()]
         
-        # Balance history
+        # Balance history (e fechamentos diários)
+        get_balance_index().forget(db.session.connection(), account_ids)
         BalanceHistory.query.filter(BalanceHistory.account_id.in_(account_ids)).delete(synchronize_session=False)
         
         # Transactions
@@ -373,8 +400,19 @@ def create_player_with_history(profile, start_date):
     return user
 
 
-def simulate_full_year_operation():
-    """Simula 1 ano completo de operação do time"""
+def simulate_full_year_operation(mode='profiles', **options):
+    """
+    Simula 1 ano completo de operação do time
+    
+    Args:
+        mode: 'profiles' (perfis fixos via ORM) ou 'vectorized'
+        options: parâmetros de simulate_population_operation no modo vetorizado
+            (players, days, seed, chunk_size, history_every)
+    """
+    if mode not in SIMULATION_MODES:
+        raise ValueError(f"Modo de simulação inválido: {mode}")
+    if mode == 'vectorized':
+        return simulate_population_operation(clear=True, **options)
     
     print("🧹 Limpando dados existentes...")
     clear_result = clear_all_player_data()
@@ -432,3 +470,409 @@ def simulate_full_year_operation():
         "start_date": start_date.isoformat(),
         "end_date": datetime.utcnow().isoformat()
     }
+
+
+# ----------------------------------------------------------------------
+# Simulação vetorizada (NumPy)
+# ----------------------------------------------------------------------
+
+@dataclass
+class SimulatedPopulation:
+    """Arrays da simulação: N jogadores × K sites de poker × D dias."""
+    seed: Optional[int]
+    start_date: datetime
+    profiles: Sequence[dict]
+    profile_index: 'np.ndarray'       # (N,) índice em profiles
+    first_day: 'np.ndarray'           # (N,) dia de entrada (jogadores novos)
+    luxon_balance: 'np.ndarray'       # (N,) saldo na carteira Luxon
+    makeup: 'np.ndarray'              # (N,) makeup atual
+    initial_balance: 'np.ndarray'     # (N, K) banca inicial por site
+    balances: 'np.ndarray'            # (N, K, D) saldo ao fim de cada dia
+    reload_amount: 'np.ndarray'       # (N, D) 0 = sem reload no dia
+    withdrawal_amount: 'np.ndarray'   # (N, D) 0 = sem saque no dia
+    withdrawal_account: 'np.ndarray'  # (N, D) site do saque
+
+    @property
+    def players(self) -> int:
+        return self.balances.shape[0]
+
+    @property
+    def accounts_per_player(self) -> int:
+        return self.balances.shape[1]
+
+    @property
+    def days(self) -> int:
+        return self.balances.shape[2]
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy não instalado: modo de simulação vetorizado indisponível")
+
+
+def simulate_population(players: int = 500, days: int = 365, seed: Optional[int] = None,
+                        start_date: Optional[datetime] = None, profiles: Sequence[dict] = None,
+                        accounts_per_player: int = len(POKER_SITES)) -> SimulatedPopulation:
+    """
+    Gera saldos diários, reloads e saques de N jogadores em D dias, sem banco.
+    
+    Mesma lógica dos perfis em base diária: retorno médio/variância mensais
+    convertidos para o dia, sazonalidade em Jun/Jul/Dez, começo mais difícil
+    para jogadores em makeup e jogadores novos só nos últimos 90 dias.
+    
+    Args:
+        players: Número de jogadores
+        days: Dias de histórico (terminando hoje, se start_date não for dado)
+        seed: Semente do gerador (mesma semente = mesmos dados)
+        profiles: Perfis sorteados entre os jogadores (padrão: PLAYER_PROFILES)
+        accounts_per_player: Sites de poker por jogador (até len(POKER_SITES))
+    
+    Returns:
+        SimulatedPopulation
+    """
+    _require_numpy()
+    if players < 1 or days < 1:
+        raise ValueError("players e days devem ser positivos")
+    if not 1 <= accounts_per_player <= len(POKER_SITES):
+        raise ValueError(f"accounts_per_player deve estar entre 1 e {len(POKER_SITES)}")
+
+    profiles = list(profiles or PLAYER_PROFILES)
+    rng = np.random.default_rng(seed)
+    if start_date is None:
+        start_date = (datetime.utcnow() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    n, k, d = players, accounts_per_player, days
+    day = np.arange(d)
+
+    # Perfil de cada jogador
+    profile_index = rng.integers(0, len(profiles), size=n)
+    kinds = np.array([p['type'] for p in profiles])[profile_index]
+
+    def param(key):
+        return np.array([p[key] for p in profiles], dtype=float)[profile_index]
+
+    daily_return = param('avg_monthly_return') / 30
+    daily_variance = param('monthly_variance') / np.sqrt(30)
+    investment = param('initial_investment')
+    makeup_tendency = param('makeup_tendency')
+
+    # Jogadores novos só têm os últimos 3 meses
+    first_day = np.where(kinds == 'new', max(0, d - 90), 0)
+    active = day[None, :] >= first_day[:, None]
+
+    # Sazonalidade (por mês do calendário) e começo difícil para quem está em makeup
+    months = (np.datetime64(start_date.date()) + day).astype('datetime64[M]').astype(int) % 12 + 1
+    seasonal = np.where(np.isin(months, SEASONAL_MONTHS), 0.7, 1.0)
+    difficulty = np.where((kinds == 'makeup')[:, None] & (day[None, :] < 180), 1.5, 1.0)
+
+    # Retornos diários por site: (N, K, D)
+    noise = rng.standard_normal((n, k, d))
+    returns = (daily_return[:, None, None] * seasonal[None, None, :]
+               + daily_variance[:, None, None] * noise) / difficulty[:, None, :]
+    returns = np.clip(returns, -0.5, 1.0) * active[:, None, :]
+
+    # Luxon sempre baixa; o resto do investimento distribuído entre os sites
+    luxon_balance = rng.integers(50, 201, size=n).astype(float)
+    weights = rng.dirichlet(np.ones(k), size=n)
+    initial_balance = np.maximum(investment - luxon_balance, 0)[:, None] * weights
+    balances = initial_balance[:, :, None] * np.cumprod(1 + returns, axis=2)
+
+    # Reloads: mais comuns quando a banca caiu pela metade ou há tendência a makeup
+    bankroll = balances.sum(axis=1)
+    reload_probability = np.where(makeup_tendency[:, None] > 0.5, 0.3, 0.1) / 30
+    reload_probability = np.where(bankroll < 0.5 * investment[:, None], 0.6 / 30, reload_probability)
+    wants_reload = active & (rng.random((n, d)) < reload_probability)
+    reload_amount = np.where(wants_reload, rng.integers(200, 801, size=(n, d)), 0)
+
+    # Saques: jogadores lucrativos com lucro de 20%+ nos últimos 30 dias
+    past = bankroll[:, np.maximum(day - 30, 0)]
+    profit_30d = bankroll - past
+    eligible = (kinds == 'profitable')[:, None] & active & (profit_30d > 0.2 * past)
+    wants_withdrawal = eligible & (rng.random((n, d)) < 0.4 / 30)
+    withdrawal_amount = np.where(wants_withdrawal, np.floor(profit_30d * rng.uniform(0.3, 0.7, size=(n, d))), 0)
+    withdrawal_account = rng.integers(0, k, size=(n, d))
+
+    makeup = np.where(kinds == 'makeup', rng.integers(100, 501, size=n), 0).astype(float)
+
+    return SimulatedPopulation(
+        seed=seed,
+        start_date=start_date,
+        profiles=profiles,
+        profile_index=profile_index,
+        first_day=first_day,
+        luxon_balance=luxon_balance,
+        makeup=makeup,
+        initial_balance=initial_balance,
+        balances=balances,
+        reload_amount=reload_amount,
+        withdrawal_amount=withdrawal_amount,
+        withdrawal_account=withdrawal_account,
+    )
+
+
+def _bulk_insert(connection, table, rows, chunk_size: int, returning: bool = False) -> List[int]:
+    """insert() do Core em lotes de chunk_size; com returning, ids na ordem das linhas."""
+    statement = table.insert()
+    if returning:
+        statement = statement.returning(table.c.id, sort_by_parameter_order=True)
+
+    ids = []
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        result = connection.execute(statement, batch)
+        if returning:
+            ids.extend(result.scalars().all())
+        batch.clear()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            flush()
+    flush()
+    return ids
+
+
+def _simulation_platforms() -> Dict[str, int]:
+    """Ids da Luxon e dos sites de poker, criando os que faltarem."""
+    platforms = {p.name: p for p in Platform.query.filter(Platform.name.in_(('luxonpay',) + POKER_SITES)).all()}
+    display_names = {'luxonpay': 'LuxonPay', 'pokerstars': 'PokerStars', 'ggpoker': 'GGPoker',
+                     'partypoker': 'PartyPoker'}
+    for name, display_name in display_names.items():
+        if name not in platforms:
+            platforms[name] = Platform(name=name, display_name=display_name, is_active=True)
+            db.session.add(platforms[name])
+    db.session.flush()
+    return {name: platform.id for name, platform in platforms.items()}
+
+
+def insert_population(population: SimulatedPopulation, chunk_size: int = CHUNK_SIZE, history_every: int = 1,
+                      username_prefix: Optional[str] = None, admin_id: Optional[int] = None,
+                      password: str = 'player123') -> Dict[str, int]:
+    """
+    Grava a população simulada com insert() do Core em lotes, na transação
+    da sessão atual (o commit fica com quem chamou).
+    
+    Args:
+        chunk_size: Linhas por insert()
+        history_every: Intervalo em dias entre registros de BalanceHistory
+            ('close_day'); o último dia sempre é registrado
+        username_prefix: Prefixo dos usernames (padrão: sim_<aleatório>)
+        admin_id: Aprovador dos reloads/saques (padrão: primeiro admin)
+    
+    Returns:
+        Contagem de linhas por tabela
+    """
+    from src.utils.dimension_cache import get_dimension_cache
+
+    connection = db.session.connection()
+    prefix = username_prefix or f'sim_{uuid.uuid4().hex[:6]}'
+    if admin_id is None:
+        admin = User.query.filter_by(role=UserRole.ADMIN).order_by(User.id).first()
+        if not admin:
+            raise ValueError("Nenhum administrador para aprovar as solicitações simuladas")
+        admin_id = admin.id
+
+    platform_ids = _simulation_platforms()
+    luxon_id = platform_ids['luxonpay']
+    site_ids = [platform_ids[name] for name in POKER_SITES[:population.accounts_per_player]]
+    reta_ids = {reta.id for reta in get_dimension_cache().retas()}
+
+    n, k, d = population.players, population.accounts_per_player, population.days
+    start = population.start_date
+    close_times = [start + timedelta(days=i, hours=23) for i in range(d)]
+    request_times = [start + timedelta(days=i, hours=14) for i in range(d)]
+    pending_from = d - PENDING_DAYS
+    password_hash = generate_password_hash(password)  # um hash para todos: gerar 500 é lento
+
+    # Usuários
+    def user_rows():
+        for i in range(n):
+            profile = population.profiles[population.profile_index[i]]
+            username = f'{prefix}_{i:05d}'
+            yield {
+                'username': username,
+                'email': f'{username}@sim.invictuspoker.com',
+                'password_hash': password_hash,
+                'full_name': f"{profile['name']} {i}",
+                'role': UserRole.PLAYER,
+                'is_active': True,
+                'reta_id': profile['reta_id'] if profile['reta_id'] in reta_ids else None,
+                'makeup': float(population.makeup[i]),
+                'created_at': start + timedelta(days=int(population.first_day[i])),
+            }
+
+    user_ids = _bulk_insert(connection, User.__table__, user_rows(), chunk_size, returning=True)
+
+    # Totais das contas (solicitações antigas = aprovadas/concluídas)
+    settled = np.arange(d) < pending_from
+    total_reloads = (population.reload_amount * settled).sum(axis=1)
+    withdrawn = np.zeros((n, k))
+    for account in range(k):
+        mask = settled & (population.withdrawal_account == account)
+        withdrawn[:, account] = (population.withdrawal_amount * mask).sum(axis=1)
+    initial = np.round(population.initial_balance, 2)
+    final = np.round(population.balances[:, :, -1], 2)
+
+    # Contas: Luxon + sites, nesta ordem por jogador
+    def account_rows():
+        for i, user_id in enumerate(user_ids):
+            username = f'{prefix}_{i:05d}'
+            yield {
+                'user_id': user_id, 'platform_id': luxon_id, 'account_name': f'luxon_{username}',
+                'initial_balance': float(population.profiles[population.profile_index[i]]['initial_investment']),
+                'current_balance': float(population.luxon_balance[i]),
+                'total_reloads': float(total_reloads[i]), 'total_withdrawals': 0.0,
+                'status': AccountStatus.ACTIVE, 'has_account': True, 'is_active': True,
+                'last_balance_update': close_times[-1],
+            }
+            for account, platform_id in enumerate(site_ids):
+                current = float(final[i, account])
+                status = (AccountStatus.ZEROED if current < 0.01 else
+                          AccountStatus.PROFIT if current >= initial[i, account] else AccountStatus.LOSS)
+                yield {
+                    'user_id': user_id, 'platform_id': platform_id,
+                    'account_name': f'{username}_{POKER_SITES[account]}',
+                    'initial_balance': float(initial[i, account]), 'current_balance': current,
+                    'total_reloads': 0.0, 'total_withdrawals': float(withdrawn[i, account]),
+                    'status': status, 'has_account': True, 'is_active': True,
+                    'last_balance_update': close_times[-1],
+                }
+
+    account_ids = np.array(_bulk_insert(connection, Account.__table__, account_rows(), chunk_size, returning=True))
+    account_ids = account_ids.reshape(n, k + 1)[:, 1:]
+
+    # Fechamentos diários dos sites de poker
+    recorded = np.arange((d - 1) % history_every, d, history_every)
+
+    def history_rows():
+        for i, user_id in enumerate(user_ids):
+            days_i = recorded[recorded >= population.first_day[i]]
+            times = [close_times[day] for day in days_i]
+            for account in range(k):
+                new = np.round(population.balances[i, account, days_i], 2)
+                old = np.concatenate(([initial[i, account]], new[:-1]))
+                account_id = int(account_ids[i, account])
+                for old_balance, new_balance, created_at in zip(old.tolist(), new.tolist(), times):
+                    yield {
+                        'account_id': account_id, 'old_balance': old_balance, 'new_balance': new_balance,
+                        'change_reason': 'close_day', 'changed_by': user_id, 'created_at': created_at,
+                    }
+
+    history_count = 0
+
+    def counted(rows):
+        nonlocal history_count
+        for row in rows:
+            history_count += 1
+            yield row
+
+    _bulk_insert(connection, BalanceHistory.__table__, counted(history_rows()), chunk_size)
+    # Inserção via Core não passa pelo flush: fechamentos diários em um INSERT ... SELECT
+    get_balance_index().rebuild(connection, account_ids.ravel().tolist())
+
+    # Reloads (Luxon) e saques; os já resolvidos geram a transação correspondente
+    reload_players, reload_days = np.nonzero(population.reload_amount)
+    reload_rows = []
+    for i, day in zip(reload_players.tolist(), reload_days.tolist()):
+        created_at = request_times[day]
+        approved = day < pending_from
+        reload_rows.append({
+            'user_id': user_ids[i], 'platform_id': luxon_id,
+            'amount': float(population.reload_amount[i, day]),
+            'status': ReloadStatus.APPROVED if approved else ReloadStatus.PENDING,
+            'player_notes': "Preciso de reload para continuar jogando",
+            'approved_by': admin_id if approved else None,
+            'approved_at': created_at + timedelta(hours=2) if approved else None,
+            'created_at': created_at,
+        })
+    reload_ids = _bulk_insert(connection, ReloadRequest.__table__, reload_rows, chunk_size, returning=True)
+
+    withdrawal_players, withdrawal_days = np.nonzero(population.withdrawal_amount)
+    withdrawal_rows = []
+    for i, day in zip(withdrawal_players.tolist(), withdrawal_days.tolist()):
+        created_at = request_times[day]
+        completed = day < pending_from
+        withdrawal_rows.append({
+            'user_id': user_ids[i],
+            'platform_id': site_ids[population.withdrawal_account[i, day]],
+            'amount': float(population.withdrawal_amount[i, day]),
+            'status': WithdrawalStatus.COMPLETED if completed else WithdrawalStatus.PENDING,
+            'player_notes': "Solicitação de saque dos lucros",
+            'approved_by': admin_id if completed else None,
+            'approved_at': created_at + timedelta(hours=2) if completed else None,
+            'completed_at': created_at + timedelta(hours=6) if completed else None,
+            'created_at': created_at,
+        })
+    _bulk_insert(connection, WithdrawalRequest.__table__, withdrawal_rows, chunk_size)
+
+    transaction_rows = [
+        {
+            'user_id': row['user_id'], 'platform_id': row['platform_id'],
+            'transaction_type': TransactionType.RELOAD, 'amount': row['amount'],
+            'description': 'Reload aprovado', 'reload_request_id': reload_id,
+            'created_by': admin_id, 'created_at': row['approved_at'],
+        }
+        for row, reload_id in zip(reload_rows, reload_ids) if row['status'] == ReloadStatus.APPROVED
+    ] + [
+        {
+            'user_id': row['user_id'], 'platform_id': row['platform_id'],
+            'transaction_type': TransactionType.WITHDRAWAL, 'amount': row['amount'],
+            'description': 'Saque concluído', 'reload_request_id': None,
+            'created_by': admin_id, 'created_at': row['completed_at'],
+        }
+        for row in withdrawal_rows if row['status'] == WithdrawalStatus.COMPLETED
+    ]
+    _bulk_insert(connection, Transaction.__table__, transaction_rows, chunk_size)
+
+    return {
+        'users': len(user_ids),
+        'accounts': len(user_ids) * (k + 1),
+        'balance_history': history_count,
+        'reload_requests': len(reload_rows),
+        'withdrawal_requests': len(withdrawal_rows),
+        'transactions': len(transaction_rows),
+    }
+
+
+def simulate_population_operation(players: int = 500, days: int = 365, seed: Optional[int] = None,
+                                  chunk_size: int = CHUNK_SIZE, history_every: int = 1,
+                                  username_prefix: Optional[str] = None, clear: bool = False) -> Dict:
+    """
+    Gera e grava uma população simulada (modo vetorizado) e faz o commit.
+    
+    Args:
+        clear: Remover os jogadores existentes antes de gravar (depois de
+            gerar os arrays, então parâmetros inválidos não apagam nada)
+    
+    Raises:
+        ValueError: players acima de MAX_SIMULATED_PLAYERS ou days acima de MAX_SIMULATED_DAYS
+    """
+    if players > MAX_SIMULATED_PLAYERS or days > MAX_SIMULATED_DAYS:
+        raise ValueError(f"Simulação limitada a {MAX_SIMULATED_PLAYERS} jogadores e {MAX_SIMULATED_DAYS} dias")
+    started = datetime.utcnow()
+    population = simulate_population(players=players, days=days, seed=seed)
+    generated = datetime.utcnow()
+    if clear:
+        print("🧹 Limpando dados existentes...")
+        print(f"   Removidos: {clear_all_player_data()}")
+    try:
+        counts = insert_population(population, chunk_size=chunk_size, history_every=max(1, history_every),
+                                   username_prefix=username_prefix)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    finished = datetime.utcnow()
+    print(f"✅ Simulação vetorizada: {counts['users']} jogadores, {counts['balance_history']} fechamentos")
+    return {
+        "mode": "vectorized",
+        "seed": seed,
+        "rows": counts,
+        "start_date": population.start_date.isoformat(),
+        "end_date": (population.start_date + timedelta(days=days)).isoformat(),
+        "generate_seconds": round((generated - started).total_seconds(), 3),
+        "insert_seconds": round((finished - generated).total_seconds(), 3),
+    }
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Cache em memória das dimensões (plataformas e retas) - Invictus Poker Team
+As tabelas são pequenas e quase nunca mudam, mas eram consultadas a cada
+planilha, ranking e account.platform. O processo guarda uma cópia destacada
+(detached) das linhas junto com a versão lida de `dimension_versions`; cada
+sessão confere a versão uma vez por transação (SELECT em uma tabela mínima) e recebe as
+instâncias via merge(load=False), sem SQL. Qualquer flush que altere uma
+Platform/Reta incrementa a versão na mesma transação, então todos os
+workers do gunicorn recarregam depois do commit.
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from src.models.models import db, Platform, Reta, DimensionVersion
+
+logger = logging.getLogger(__name__)
+
+# Dimensões em cache: nome da versão -> modelo
+DIMENSIONS = {
+    'platforms': Platform,
+    'retas': Reta,
+}
+MODEL_DIMENSIONS = {model: name for name, model in DIMENSIONS.items()}
+
+# Chaves em session.info
+_VERSIONS_KEY = 'dimension_versions'
+_ATTACHED_KEY = 'dimension_attached'
+
+
+def normalize_luxon(platforms: List[Platform]) -> List[Platform]:
+    """
+    Remove duplicidades de Luxon: das plataformas cujo nome contém 'luxon'
+    fica só a 'luxonpay' (no fim da lista). Sem 'luxonpay', a lista original.
+    """
+    luxon_main = None
+    normalized = []
+    for platform in platforms:
+        name_lower = (platform.name or '').lower()
+        if 'luxon' in name_lower:
+            if name_lower == 'luxonpay' and not luxon_main:
+                luxon_main = platform
+            # Demais variantes de luxon são ignoradas
+            continue
+        normalized.append(platform)
+    if luxon_main:
+        normalized.append(luxon_main)
+        return normalized
+    return normalized or list(platforms)
+
+
+class _Snapshot:
+    """Linhas destacadas de uma dimensão em uma versão."""
+
+    __slots__ = ('version', 'rows', 'spreadsheet_ids')
+
+    def __init__(self, version: int, rows: Dict[int, object], spreadsheet_ids: Tuple[int, ...] = ()):
+        self.version = version
+        self.rows = rows
+        self.spreadsheet_ids = spreadsheet_ids
+
+
+class DimensionCache:
+    """Plataformas e retas em memória, invalidadas pela versão no banco."""
+
+    def __init__(self):
+        self._snapshots: Dict[Tuple[str, str], _Snapshot] = {}
+        self._lock = threading.Lock()
+        self._listeners_installed = False
+        self._stats = {'hits': 0, 'loads': 0, 'invalidations': 0}
+
+    def init_app(self, app):
+        """Registra os eventos de sessão que incrementam as versões."""
+        if self._listeners_installed:
+            return
+        event.listen(Session, 'after_flush', self._after_flush)
+        event.listen(Session, 'after_commit', self._forget_session)
+        event.listen(Session, 'after_rollback', self._forget_session)
+        self._listeners_installed = True
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def platforms(self, active_only: bool = True) -> List[Platform]:
+        """Plataformas (ativas por padrão) ordenadas por id."""
+        rows = self.attach('platforms').values()
+        return [p for p in rows if p.is_active or not active_only]
+
+    def platform(self, platform_id: Optional[int]) -> Optional[Platform]:
+        if platform_id is None:
+            return None
+        return self.attach('platforms').get(platform_id)
+
+    def spreadsheet_platforms(self) -> List[Platform]:
+        """Plataformas ativas da planilha, com a normalização de Luxon já aplicada."""
+        attached = self.attach('platforms')
+        snapshot = self._snapshot('platforms')
+        return [attached[i] for i in snapshot.spreadsheet_ids if i in attached]
+
+    def retas(self, active_only: bool = False) -> List[Reta]:
+        rows = self.attach('retas').values()
+        return [r for r in rows if r.is_active or not active_only]
+
+    def reta(self, reta_id: Optional[int]) -> Optional[Reta]:
+        if reta_id is None:
+            return None
+        return self.attach('retas').get(reta_id)
+
+    def attach(self, name: str) -> Dict[int, object]:
+        """
+        Instâncias da dimensão ligadas à sessão atual (id -> objeto).
+
+        O merge(load=False) coloca as linhas no identity map sem SQL, então
+        account.platform e afins também deixam de consultar o banco. O dict
+        fica em session.info e mantém as instâncias vivas até o fim da
+        transação.
+        """
+        session = db.session()
+        attached = session.info.setdefault(_ATTACHED_KEY, {})
+        snapshot = self._snapshot(name)
+        current = attached.get(name)
+        if current is not None and current[0] == snapshot.version:
+            return current[1]
+
+        rows = {row_id: self._merge(session, row) for row_id, row in snapshot.rows.items()}
+        attached[name] = (snapshot.version, rows)
+        return rows
+
+    @staticmethod
+    def _merge(session, row):
+        # Instância já carregada (e possivelmente alterada) na sessão vale
+        # mais que a cópia do cache
+        state = inspect(row)
+        existing = session.identity_map.get(state.key)
+        if existing is not None and not inspect(existing).expired_attributes:
+            return existing
+        return session.merge(row, load=False)
+
+    # ------------------------------------------------------------------
+    # Versões e carga
+    # ------------------------------------------------------------------
+
+    def _snapshot(self, name: str) -> _Snapshot:
+        version = self._current_version(name)
+        key = (str(db.engine.url), name)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and snapshot.version == version:
+                self._stats['hits'] += 1
+                return snapshot
+
+        # A versão foi lida antes das linhas: se mudar no meio da carga, a
+        # próxima leitura vê a versão nova e recarrega
+        snapshot = self._load(name, version)
+        with self._lock:
+            self._snapshots[key] = snapshot
+            self._stats['loads'] += 1
+        return snapshot
+
+    def _current_version(self, name: str) -> int:
+        # Uma leitura por transação da sessão (limpo no commit/rollback)
+        session = db.session()
+        versions = session.info.get(_VERSIONS_KEY)
+        if versions is None:
+            table = DimensionVersion.__table__
+            versions = dict(session.execute(select(table.c.name, table.c.version)).all())
+            session.info[_VERSIONS_KEY] = versions
+        return versions.get(name, 0)
+
+    @staticmethod
+    def _load(name: str, version: int) -> _Snapshot:
+        model = DIMENSIONS[name]
+        table = model.__table__
+        result = db.session.execute(select(table).order_by(table.c.id))
+
+        rows = {}
+        for row in result.mappings():
+            # Cópia destacada, sem passar pelo identity map da sessão atual
+            instance = model(**{model.__mapper__.get_property_by_column(c).key: row[c.name]
+                                for c in table.columns})
+            make_transient_to_detached(instance)
+            rows[instance.id] = instance
+
+        spreadsheet_ids = ()
+        if model is Platform:
+            active = [p for p in rows.values() if p.is_active]
+            spreadsheet_ids = tuple(p.id for p in normalize_luxon(active))
+        return _Snapshot(version, rows, spreadsheet_ids)
+
+    # ------------------------------------------------------------------
+    # Invalidação
+    # ------------------------------------------------------------------
+
+    def invalidate(self, *names: str):
+        """
+        Incrementa a versão das dimensões na transação atual (o commit fica
+        com quem chamou). Alterações via ORM já fazem isso no flush; usar em
+        UPDATE/DELETE em massa (query.update()/delete()).
+        """
+        session = db.session()
+        self._bump(session.connection(), names or tuple(DIMENSIONS))
+        self._forget_session(session)
+
+    def _bump(self, connection, names):
+        table = DimensionVersion.__table__
+        now = datetime.utcnow()
+        for name in names:
+            result = connection.execute(
+                table.update().where(table.c.name == name)
+                .values(version=table.c.version + 1, updated_at=now)
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(name=name, version=1, updated_at=now))
+        with self._lock:
+            self._stats['invalidations'] += len(names)
+
+    def _after_flush(self, session, flush_context):
+        changed = set()
+        for instance in session.new:
+            name = MODEL_DIMENSIONS.get(type(instance))
+            if name:
+                changed.add(name)
+        for instance in session.deleted:
+            name = MODEL_DIMENSIONS.get(type(instance))
+            if name:
+                changed.add(name)
+        for instance in session.dirty:
+            name = MODEL_DIMENSIONS.get(type(instance))
+            if name and session.is_modified(instance, include_collections=False):
+                changed.add(name)
+
+        if changed:
+            self._bump(session.connection(), sorted(changed))
+            self._forget_session(session)
+
+    @staticmethod
+    def _forget_session(session):
+        session.info.pop(_VERSIONS_KEY, None)
+        session.info.pop(_ATTACHED_KEY, None)
+
+    def clear(self):
+        """Descarta as cópias do processo (a próxima leitura recarrega)."""
+        with self._lock:
+            self._snapshots.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, cached=len(self._snapshots))
+
+
+# Instância global do cache de dimensões
+dimension_cache = DimensionCache()
+
+
+def get_dimension_cache() -> DimensionCache:
+    """Retorna a instância global do cache de dimensões."""
+    return dimension_cache
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Armazenamento de documentos endereçado por conteúdo - Invictus Poker Team
+Uploads são copiados para o disco em blocos enquanto o SHA-256 é calculado;
+o arquivo final fica em objects/<2 primeiros>/<sha256>, então o mesmo
+comprovante enviado duas vezes ocupa espaço uma vez só. Downloads saem com
+Range, ETag (o próprio hash) e, se configurado, X-Sendfile/X-Accel-Redirect.
+
+Deduplicação e remoção acontecem sob o mesmo lock (threads e processos):
+um upload grava a referência ao arquivo antes de soltar o lock, e a
+remoção só apaga o arquivo se, dentro do lock, ninguém mais o referencia.
+"""
+
+import os
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional
+import logging
+
+from werkzeug.utils import send_file
+
+from src.utils.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_ROOT = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+
+# DOCUMENT_SENDFILE: quem envia os bytes do arquivo
+SENDFILE_MODES = ('none', 'x-sendfile', 'x-accel')
+
+
+class DocumentTooLargeError(ValueError):
+    """Upload excedeu o tamanho máximo."""
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+    path: str
+    deduplicated: bool
+
+
+class DocumentStorage:
+    """Grava e serve documentos pelo hash do conteúdo."""
+
+    def __init__(self, root: str = None):
+        self.root = os.path.abspath(root or DEFAULT_ROOT)
+        self.sendfile = 'none'
+        self.accel_prefix = '/protected-documents/'
+        self._lock = threading.Lock()
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.root, 'objects.lock')
+
+    def init_app(self, app):
+        """Lê diretório e modo de envio da configuração."""
+        self.root = os.path.abspath(
+            app.config.get('DOCUMENT_STORAGE_DIR') or os.environ.get('DOCUMENT_STORAGE_DIR') or self.root
+        )
+        mode = app.config.get('DOCUMENT_SENDFILE') or os.environ.get('DOCUMENT_SENDFILE')
+        if mode in SENDFILE_MODES:
+            self.sendfile = mode
+        self.accel_prefix = (app.config.get('DOCUMENT_ACCEL_PREFIX') or os.environ.get('DOCUMENT_ACCEL_PREFIX')
+                             or self.accel_prefix)
+
+    # ------------------------------------------------------------------
+    # Gravação
+    # ------------------------------------------------------------------
+
+    def store(self, stream: BinaryIO, max_size: int,
+              reference: Callable[[StoredBlob], None] = None) -> StoredBlob:
+        """
+        Copia o stream para o armazenamento em blocos, calculando o SHA-256.
+
+        A cópia acontece fora do lock; só a deduplicação e `reference` rodam
+        dentro dele, para que um release concorrente não apague o arquivo
+        entre a deduplicação e a gravação do documento que o referencia.
+
+        Args:
+            stream: Conteúdo do upload
+            max_size: Tamanho máximo em bytes
+            reference: Grava a referência ao arquivo (ex.: commit do Document);
+                se falhar, um arquivo recém-criado é removido
+
+        Raises:
+            DocumentTooLargeError: se o conteúdo passar de max_size bytes
+
+        Returns:
+            StoredBlob com hash, tamanho e caminho final
+        """
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_size:
+                        raise DocumentTooLargeError('File size exceeds maximum limit')
+                    digest.update(chunk)
+                    out.write(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+
+            sha256 = digest.hexdigest()
+            path = self.object_path(sha256)
+            with self.exclusive():
+                if os.path.exists(path):
+                    os.remove(tmp_path)
+                    blob = StoredBlob(sha256, size, path, deduplicated=True)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                    blob = StoredBlob(sha256, size, path, deduplicated=False)
+
+                if reference is not None:
+                    try:
+                        reference(blob)
+                    except BaseException:
+                        if not blob.deduplicated:
+                            self.delete(path)
+                        raise
+            return blob
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, 'objects', sha256[:2], sha256)
+
+    def content_hash(self, path: str) -> Optional[str]:
+        """Hash de um arquivo do armazenamento (None para arquivos legados)."""
+        name = os.path.basename(path)
+        if len(name) == 64 and os.path.abspath(path) == self.object_path(name):
+            return name
+        return None
+
+    def release(self, path: str, is_referenced: Callable[[], bool]) -> bool:
+        """
+        Remove o arquivo se `is_referenced` (avaliado dentro do lock) for falso.
+
+        Returns:
+            True se o arquivo foi removido
+        """
+        with self.exclusive():
+            if is_referenced():
+                return False
+            self.delete(path)
+            return True
+
+    @contextmanager
+    def exclusive(self):
+        """Lock dos objetos entre threads e processos (não reentrante)."""
+        with self._lock, file_lock(self.lock_path):
+            yield
+
+    def delete(self, path: str):
+        """Remove o arquivo (chamar só quando nenhum documento o referencia)."""
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Erro ao remover arquivo {path}: {e}")
+
+    # ------------------------------------------------------------------
+    # Download
+    # ------------------------------------------------------------------
+
+    def send(self, path: str, download_name: str, mime_type: str = None, environ=None):
+        """
+        Resposta de download com Range e requisições condicionais.
+
+        O ETag é o SHA-256 do conteúdo (arquivos legados usam mtime/tamanho).
+        Em modo 'x-accel' o nginx entrega o arquivo a partir de
+        DOCUMENT_ACCEL_PREFIX; em 'x-sendfile', o servidor front.
+        """
+        from flask import current_app, request
+
+        environ = environ or request.environ
+        etag = self.content_hash(path) or True
+
+        if self.sendfile == 'x-accel' and os.path.abspath(path).startswith(self.root + os.sep):
+            relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+            response = current_app.response_class(mimetype=mime_type or 'application/octet-stream')
+            response.headers['X-Accel-Redirect'] = self.accel_prefix.rstrip('/') + '/' + relative
+            response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+            if isinstance(etag, str):
+                response.set_etag(etag)
+            return response
+
+        return send_file(
+            path,
+            environ,
+            mimetype=mime_type,
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=etag,
+            use_x_sendfile=self.sendfile == 'x-sendfile',
+            response_class=current_app.response_class,
+            _root_path=current_app.root_path,
+        )
+
+
+# Instância global do armazenamento
+document_storage = DocumentStorage()
+
+
+def get_document_storage() -> DocumentStorage:
+    """Retorna a instância global do armazenamento de documentos."""
+    return document_storage
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Lock exclusivo entre processos - Invictus Poker Team
+Os workers do gunicorn e o líder do agendador compartilham diretórios
+(blocos de backup, documentos); threading.Lock só protege o próprio processo.
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Bloqueia até obter o lock exclusivo do arquivo (flock; msvcrt no Windows).
+
+    Não é reentrante: cada `with` abre o arquivo de novo, e um segundo lock
+    no mesmo processo espera o primeiro ser liberado.
+
+    Args:
+        path: Arquivo de lock (criado se não existir)
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a+') as lock_file:
+        fd = lock_file.fileno()
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Verificação de credenciais fora do worker web - Invictus Poker Team
+O hash de senha (lento por definição) e o TOTP do login rodam em um pool
+pequeno de processos com fila limitada. Quando o pool está saturado o
+login é recusado imediatamente (503) em vez de enfileirar requests.
+"""
+
+import os
+import time
+import atexit
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+import logging
+
+from werkzeug.security import check_password_hash
+
+try:
+    import pyotp
+except Exception:
+    pyotp = None
+
+logger = logging.getLogger(__name__)
+
+# Defaults (sobrescritos por app.config / variáveis de ambiente)
+POOL_WORKERS = 2
+PENDING_PER_WORKER = 4
+VERIFY_TIMEOUT = 10.0  # segundos
+SAMPLE_SIZE = 500
+
+MODES = ('inline', 'pool')
+
+
+class LoginPoolSaturatedError(RuntimeError):
+    """Fila de verificação cheia ou resposta fora do prazo."""
+
+
+def verify_credentials(password_hash: str, password: str, totp_secret: Optional[str] = None,
+                       totp_code: Optional[str] = None) -> Tuple[bool, Optional[bool], float]:
+    """
+    Verifica senha e, se informado, o código TOTP (executa no processo do pool).
+
+    Returns:
+        (senha válida, TOTP válido ou None se não verificado, custo do hash em ms)
+    """
+    start = time.perf_counter()
+    password_ok = check_password_hash(password_hash, password)
+    hash_ms = (time.perf_counter() - start) * 1000
+
+    totp_ok = None
+    if password_ok and totp_secret and totp_code and pyotp:
+        totp_ok = pyotp.TOTP(totp_secret).verify(str(totp_code), valid_window=1)
+    return password_ok, totp_ok, hash_ms
+
+
+class LoginVerifier:
+    """Pool de processos com fila limitada para a verificação do login."""
+
+    def __init__(self, workers: int = POOL_WORKERS, max_pending: int = None, timeout: float = VERIFY_TIMEOUT):
+        self.app = None
+        self._mode: Optional[str] = None
+        self.workers = workers
+        self.max_pending = max_pending or workers * PENDING_PER_WORKER
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._in_flight = 0
+        self._stats_lock = threading.Lock()
+        self._hash_ms = deque(maxlen=SAMPLE_SIZE)
+        self._wait_ms = deque(maxlen=SAMPLE_SIZE)
+        self._stats = {
+            'verified': 0,
+            'inline': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'pool_restarts': 0,
+        }
+
+    def init_app(self, app):
+        """Lê tamanho do pool, fila e prazo da configuração (se definidos)."""
+        def setting(name, default):
+            value = app.config.get(name)
+            if value is None:
+                value = os.environ.get(name)
+            return default if value is None else value
+
+        self.app = app
+        self.workers = max(1, int(setting('LOGIN_POOL_WORKERS', self.workers)))
+        self.max_pending = max(1, int(setting('LOGIN_POOL_MAX_PENDING', self.max_pending)))
+        self.timeout = float(setting('LOGIN_POOL_TIMEOUT', self.timeout))
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        atexit.register(self.shutdown)
+
+    @property
+    def mode(self) -> str:
+        """'inline' ou 'pool' (LOGIN_VERIFY_MODE; padrão 'inline' em testes)."""
+        if self._mode:
+            return self._mode
+        configured = None
+        if self.app is not None:
+            configured = self.app.config.get('LOGIN_VERIFY_MODE')
+        configured = configured or os.environ.get('LOGIN_VERIFY_MODE')
+        if configured in MODES:
+            return configured
+        return 'inline' if self.app is None or self.app.testing else 'pool'
+
+    def set_mode(self, mode: Optional[str]):
+        """Força um modo (None volta para a configuração)."""
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Modo de verificação inválido: {mode}")
+        self._mode = mode
+
+    # ------------------------------------------------------------------
+    # Verificação
+    # ------------------------------------------------------------------
+
+    def verify(self, password_hash: str, password: str, totp_secret: Optional[str] = None,
+               totp_code: Optional[str] = None) -> Tuple[bool, Optional[bool]]:
+        """
+        Verifica as credenciais no pool (ou no próprio processo em modo inline).
+
+        Raises:
+            LoginPoolSaturatedError: fila cheia ou verificação fora do prazo
+
+        Returns:
+            (senha válida, TOTP válido ou None se não verificado)
+        """
+        args = (password_hash, password, totp_secret, totp_code)
+        if self.mode == 'inline':
+            password_ok, totp_ok, hash_ms = verify_credentials(*args)
+            self._record(hash_ms, 0.0, inline=True)
+            return password_ok, totp_ok
+
+        # Rejeição antecipada: não acumular requests esperando o pool
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._stats['rejected'] += 1
+            raise LoginPoolSaturatedError('Servidor ocupado verificando logins, tente novamente')
+
+        start = time.perf_counter()
+        with self._stats_lock:
+            self._in_flight += 1
+        try:
+            future = self._submit(args)
+            try:
+                password_ok, totp_ok, hash_ms = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                with self._stats_lock:
+                    self._stats['timeouts'] += 1
+                raise LoginPoolSaturatedError('Verificação de login excedeu o tempo limite')
+            except BrokenProcessPool:
+                self._reset_executor()
+                with self._stats_lock:
+                    self._stats['pool_restarts'] += 1
+                raise LoginPoolSaturatedError('Pool de verificação reiniciado, tente novamente')
+        finally:
+            with self._stats_lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+        self._record(hash_ms, (time.perf_counter() - start) * 1000 - hash_ms)
+        return password_ok, totp_ok
+
+    def _submit(self, args):
+        try:
+            return self._ensure_executor().submit(verify_credentials, *args)
+        except BrokenProcessPool:
+            # Processo do pool morreu (ex.: OOM): recriar uma vez
+            logger.warning("Pool de verificação de login quebrado, recriando")
+            self._reset_executor()
+            with self._stats_lock:
+                self._stats['pool_restarts'] += 1
+            return self._ensure_executor().submit(verify_credentials, *args)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        # Criado no primeiro login de cada worker (após o fork do gunicorn);
+        # 'spawn' evita herdar threads e conexões do processo web
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _reset_executor(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Encerra os processos do pool."""
+        self._reset_executor()
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def _record(self, hash_ms: float, wait_ms: float, inline: bool = False):
+        with self._stats_lock:
+            self._stats['verified'] += 1
+            if inline:
+                self._stats['inline'] += 1
+            self._hash_ms.append(hash_ms)
+            self._wait_ms.append(max(wait_ms, 0.0))
+
+    @staticmethod
+    def _percentile(samples, fraction: float) -> Optional[float]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 2)
+
+    def get_stats(self) -> Dict[str, any]:
+        with self._stats_lock:
+            hash_ms = list(self._hash_ms)
+            wait_ms = list(self._wait_ms)
+            stats = dict(self._stats, in_flight=self._in_flight)
+        return {
+            **stats,
+            'mode': self.mode,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'pool_started': self._executor is not None,
+            'hash_ms': {
+                'p50': self._percentile(hash_ms, 0.50),
+                'p95': self._percentile(hash_ms, 0.95),
+                'max': round(max(hash_ms), 2) if hash_ms else None,
+            },
+            'wait_ms': {
+                'p50': self._percentile(wait_ms, 0.50),
+                'p95': self._percentile(wait_ms, 0.95),
+            },
+        }
+
+
+# Instância global do verificador
+login_verifier = LoginVerifier()
+
+
+def get_login_verifier() -> LoginVerifier:
+    """Retorna a instância global do verificador de login."""
+    return login_verifier
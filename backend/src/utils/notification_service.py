@@ -6,13 +6,19 @@ Gerencia criação, envio e limpeza de notificações in-app.
 
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from sqlalchemy import and_, or_, func
-from src.models.models import db, User, UserRole, Account, ReloadRequest, WithdrawalRequest
-from src.models.notifications import Notification, NotificationType, NotificationCategory, UserNotificationSettings
+from sqlalchemy import and_, or_, func, insert, case, bindparam, DateTime
+from sqlalchemy.exc import IntegrityError
+from src.models.models import db, User, UserRole, Account, ReloadRequest, ReloadStatus, WithdrawalRequest
+from src.models.notifications import (
+    Notification, NotificationType, NotificationCategory, UserNotificationSettings, UserNotificationCounter
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Título do aviso diário de pendências (usado também para deduplicação)
+INCOMPLETE_DATA_TITLE = "⚠️ Dados Incompletos"
+
 class NotificationService:
     """Serviço centralizado de notificações"""
     
@@ -85,6 +91,10 @@ class NotificationService:
             )
             
             db.session.add(notification)
+            NotificationService._adjust_counters([{
+                'user_id': user_id, 'total': 1, 'unread': 1,
+                'urgent': 1 if is_urgent else 0, 'expires_at': expires_at
+            }])
             db.session.commit()
             
             logger.info(f"Notificação criada: {title} para usuário {user_id}")
@@ -95,6 +105,99 @@ class NotificationService:
             db.session.rollback()
             return None
     
+    @staticmethod
+    def create_notifications_bulk(
+        user_ids: List[int],
+        title: str,
+        message: str,
+        notification_type: NotificationType = NotificationType.INFO,
+        category: NotificationCategory = NotificationCategory.SYSTEM_MESSAGE,
+        is_urgent: bool = False,
+        related_entity_type: str = None,
+        related_entity_id: int = None,
+        action_url: str = None,
+        expires_hours: int = None
+    ) -> int:
+        """
+        Cria a mesma notificação para vários usuários de uma vez.
+        
+        Usuários e configurações são carregados em uma única consulta, os
+        filtros de categoria/urgência são aplicados em memória e todas as
+        linhas entram com um executemany e um commit. Os eventos SSE são
+        enviados em lote depois do commit.
+        
+        Args:
+            user_ids: IDs dos destinatários
+            (demais argumentos iguais a create_notification)
+            
+        Returns:
+            int: Número de notificações criadas
+        """
+        try:
+            recipients = db.session.query(User.id, UserNotificationSettings).outerjoin(
+                UserNotificationSettings, UserNotificationSettings.user_id == User.id
+            ).filter(User.id.in_(set(user_ids))).all() if user_ids else []
+            
+            allowed = [
+                user_id for user_id, settings in recipients
+                if not settings or (
+                    (is_urgent or not settings.urgent_only)
+                    and NotificationService._is_category_enabled(settings, category)
+                )
+            ]
+            if not allowed:
+                return 0
+            
+            now = datetime.utcnow()
+            expires_at = now + timedelta(hours=expires_hours) if expires_hours else None
+            
+            db.session.execute(insert(Notification), [
+                {
+                    'user_id': user_id,
+                    'title': title,
+                    'message': message,
+                    'notification_type': notification_type,
+                    'category': category,
+                    'is_urgent': is_urgent,
+                    'related_entity_type': related_entity_type,
+                    'related_entity_id': related_entity_id,
+                    'action_url': action_url,
+                    'created_at': now,
+                    'expires_at': expires_at,
+                }
+                for user_id in allowed
+            ])
+            NotificationService._adjust_counters([
+                {'user_id': user_id, 'total': 1, 'unread': 1,
+                 'urgent': 1 if is_urgent else 0, 'expires_at': expires_at}
+                for user_id in allowed
+            ])
+            db.session.commit()
+            
+            logger.info(f"Notificação criada: {title} para {len(allowed)} usuário(s)")
+            
+        except Exception as e:
+            logger.error(f"Erro ao criar notificações em lote: {str(e)}")
+            db.session.rollback()
+            return 0
+        
+        try:
+            from src.routes.sse import broadcast_to_users
+            event = {
+                'title': title,
+                'message': message,
+                'type': notification_type.value,
+                'category': category.value,
+                'is_urgent': is_urgent,
+                'action_url': action_url,
+                'timestamp': now.timestamp()
+            }
+            broadcast_to_users((user_id, 'new_notification', event) for user_id in allowed)
+        except Exception as e:
+            logger.error(f"Erro ao enviar notificações via SSE: {str(e)}")
+        
+        return len(allowed)
+    
     @staticmethod
     def _is_category_enabled(settings: UserNotificationSettings, category: NotificationCategory) -> bool:
         """Verifica se uma categoria está habilitada para o usuário"""
@@ -119,24 +222,23 @@ class NotificationService:
             
             if action == "created":
                 # Notificar admins e managers
-                admins_managers = User.query.filter(
+                admin_ids = [user_id for (user_id,) in db.session.query(User.id).filter(
                     User.role.in_([UserRole.ADMIN, UserRole.MANAGER]),
                     User.is_active == True
-                ).all()
+                )]
                 
-                for admin in admins_managers:
-                    NotificationService.create_notification(
-                        user_id=admin.id,
-                        title="💰 Nova Solicitação de Reload",
-                        message=f"{player.full_name} solicitou reload de $ {float(reload_request.amount):,.2f} na {platform.display_name}",
-                        notification_type=NotificationType.WARNING,
-                        category=NotificationCategory.RELOAD_REQUEST,
-                        is_urgent=True,
-                        related_entity_type="reload_request",
-                        related_entity_id=reload_request.id,
-                        action_url=f"/dashboard?tab=gestao&subtab=reloads",
-                        expires_hours=72
-                    )
+                NotificationService.create_notifications_bulk(
+                    user_ids=admin_ids,
+                    title="💰 Nova Solicitação de Reload",
+                    message=f"{player.full_name} solicitou reload de $ {float(reload_request.amount):,.2f} na {platform.display_name}",
+                    notification_type=NotificationType.WARNING,
+                    category=NotificationCategory.RELOAD_REQUEST,
+                    is_urgent=True,
+                    related_entity_type="reload_request",
+                    related_entity_id=reload_request.id,
+                    action_url=f"/dashboard?tab=gestao&subtab=reloads",
+                    expires_hours=72
+                )
                 
                 # Notificar o próprio jogador
                 NotificationService.create_notification(
@@ -186,24 +288,23 @@ class NotificationService:
             
             if action == "created":
                 # Notificar admins
-                admins = User.query.filter(
+                admin_ids = [user_id for (user_id,) in db.session.query(User.id).filter(
                     User.role == UserRole.ADMIN,
                     User.is_active == True
-                ).all()
+                )]
                 
-                for admin in admins:
-                    NotificationService.create_notification(
-                        user_id=admin.id,
-                        title="💸 Nova Solicitação de Saque",
-                        message=f"{player.full_name} solicitou saque de $ {float(withdrawal_request.amount):,.2f}",
-                        notification_type=NotificationType.WARNING,
-                        category=NotificationCategory.WITHDRAWAL_REQUEST,
-                        is_urgent=True,
-                        related_entity_type="withdrawal_request",
-                        related_entity_id=withdrawal_request.id,
-                        action_url=f"/dashboard?tab=gestao&subtab=withdrawals",
-                        expires_hours=48
-                    )
+                NotificationService.create_notifications_bulk(
+                    user_ids=admin_ids,
+                    title="💸 Nova Solicitação de Saque",
+                    message=f"{player.full_name} solicitou saque de $ {float(withdrawal_request.amount):,.2f}",
+                    notification_type=NotificationType.WARNING,
+                    category=NotificationCategory.WITHDRAWAL_REQUEST,
+                    is_urgent=True,
+                    related_entity_type="withdrawal_request",
+                    related_entity_id=withdrawal_request.id,
+                    action_url=f"/dashboard?tab=gestao&subtab=withdrawals",
+                    expires_hours=48
+                )
                 
                 # Notificar o jogador
                 NotificationService.create_notification(
@@ -233,83 +334,138 @@ class NotificationService:
             logger.error(f"Erro ao notificar withdrawal request: {str(e)}")
     
     @staticmethod
-    def notify_incomplete_data():
-        """Notifica jogadores com dados incompletos"""
+    def notify_incomplete_data() -> int:
+        """
+        Notifica jogadores com dados incompletos.
+        
+        Varredura em lote: pendências de todos os jogadores são calculadas em
+        poucas consultas agrupadas, jogadores que já têm um aviso não lido são
+        ignorados e as novas notificações são inseridas em uma única transação.
+        
+        Returns:
+            int: Quantidade de notificações criadas
+        """
         try:
             # Importar aqui para evitar import circular
             from src.models.models import RequiredField, PlayerFieldValue
             
-            # Buscar jogadores ativos
-            players = User.query.filter(
+            now = datetime.utcnow()
+            
+            # Jogadores ativos (com configurações, em uma única consulta)
+            players = db.session.query(User.id, UserNotificationSettings).outerjoin(
+                UserNotificationSettings, UserNotificationSettings.user_id == User.id
+            ).filter(
                 User.role == UserRole.PLAYER,
                 User.is_active == True
             ).all()
             
-            for player in players:
-                issues = []
-                
-                # Verificar campos obrigatórios não preenchidos
-                required_fields = RequiredField.query.filter_by(
-                    is_required=True,
-                    is_active=True
+            # Respeitar configurações (alerta não urgente / categoria desabilitada)
+            settings_by_player = {player_id: settings for player_id, settings in players}
+            player_ids = [
+                player_id for player_id, settings in settings_by_player.items()
+                if not settings or (
+                    not settings.urgent_only
+                    and NotificationService._is_category_enabled(settings, NotificationCategory.PLAYER_ALERT)
+                )
+            ]
+            if not player_ids:
+                return 0
+            
+            # Jogadores que já têm um aviso de pendências não lido e válido
+            already_notified = {
+                user_id for (user_id,) in db.session.query(Notification.user_id).filter(
+                    Notification.user_id.in_(player_ids),
+                    Notification.category == NotificationCategory.PLAYER_ALERT,
+                    Notification.title == INCOMPLETE_DATA_TITLE,
+                    Notification.is_read == False,
+                    or_(Notification.expires_at.is_(None), Notification.expires_at > now)
+                ).distinct()
+            }
+            player_ids = [player_id for player_id in player_ids if player_id not in already_notified]
+            if not player_ids:
+                return 0
+            
+            # Campos obrigatórios não preenchidos
+            required_fields = RequiredField.query.filter_by(
+                is_required=True,
+                is_active=True
+            ).order_by(RequiredField.order, RequiredField.id).all()
+            
+            filled_by_player = {}
+            if required_fields:
+                filled_values = db.session.query(PlayerFieldValue.user_id, PlayerFieldValue.field_id).filter(
+                    PlayerFieldValue.user_id.in_(player_ids),
+                    PlayerFieldValue.field_id.in_([f.id for f in required_fields]),
+                    PlayerFieldValue.field_value != None,
+                    PlayerFieldValue.field_value != ''
                 ).all()
+                for user_id, field_id in filled_values:
+                    filled_by_player.setdefault(user_id, set()).add(field_id)
+            
+            # Contas sem saldo definido, por jogador
+            incomplete_accounts = dict(db.session.query(Account.user_id, func.count(Account.id)).filter(
+                Account.user_id.in_(player_ids),
+                Account.is_active == True,
+                or_(
+                    Account.current_balance == None,
+                    Account.current_balance == 0,
+                    Account.has_account == False
+                )
+            ).group_by(Account.user_id).all())
+            
+            # Reloads pendentes antigos, por jogador
+            old_pending_reloads = dict(db.session.query(ReloadRequest.user_id, func.count(ReloadRequest.id)).filter(
+                ReloadRequest.user_id.in_(player_ids),
+                ReloadRequest.status == ReloadStatus.PENDING,
+                ReloadRequest.created_at < now - timedelta(days=3)
+            ).group_by(ReloadRequest.user_id).all())
+            
+            rows = []
+            expires_at = now + timedelta(hours=168)  # 1 semana
+            for player_id in player_ids:
+                issues = []
                 
-                if required_fields:
-                    filled_values = PlayerFieldValue.query.filter(
-                        PlayerFieldValue.user_id == player.id,
-                        PlayerFieldValue.field_id.in_([f.id for f in required_fields]),
-                        PlayerFieldValue.field_value != None,
-                        PlayerFieldValue.field_value != ''
-                    ).all()
-                    
-                    filled_field_ids = {v.field_id for v in filled_values}
-                    missing_fields = []
-                    
-                    for field in required_fields:
-                        if field.id not in filled_field_ids:
-                            missing_fields.append(field.field_label)
-                    
-                    if missing_fields:
-                        issues.append(f"Campos pendentes: {', '.join(missing_fields)}")
-                
-                # Verificar contas sem saldo definido
-                incomplete_accounts = Account.query.filter(
-                    Account.user_id == player.id,
-                    Account.is_active == True,
-                    or_(
-                        Account.current_balance == None,
-                        Account.current_balance == 0,
-                        Account.has_account == False
-                    )
-                ).count()
-                
-                if incomplete_accounts > 0:
-                    issues.append(f"{incomplete_accounts} conta(s) com dados incompletos")
+                filled_field_ids = filled_by_player.get(player_id, set())
+                missing_fields = [f.field_label for f in required_fields if f.id not in filled_field_ids]
+                if missing_fields:
+                    issues.append(f"Campos pendentes: {', '.join(missing_fields)}")
                 
-                # Verificar reloads pendentes antigos
-                old_pending_reloads = ReloadRequest.query.filter(
-                    ReloadRequest.user_id == player.id,
-                    ReloadRequest.status == 'pending',
-                    ReloadRequest.created_at < datetime.utcnow() - timedelta(days=3)
-                ).count()
+                if incomplete_accounts.get(player_id):
+                    issues.append(f"{incomplete_accounts[player_id]} conta(s) com dados incompletos")
                 
-                if old_pending_reloads > 0:
-                    issues.append(f"{old_pending_reloads} reload(s) pendente(s) há mais de 3 dias")
+                if old_pending_reloads.get(player_id):
+                    issues.append(f"{old_pending_reloads[player_id]} reload(s) pendente(s) há mais de 3 dias")
                 
                 # Se há problemas, notificar
                 if issues:
-                    NotificationService.create_notification(
-                        user_id=player.id,
-                        title="⚠️ Dados Incompletos",
-                        message=f"Você tem: {', '.join(issues)}. Complete suas informações para melhor gestão.",
-                        notification_type=NotificationType.WARNING,
-                        category=NotificationCategory.PLAYER_ALERT,
-                        action_url="/dashboard?tab=planilha",
-                        expires_hours=168  # 1 semana
-                    )
+                    rows.append({
+                        'user_id': player_id,
+                        'title': INCOMPLETE_DATA_TITLE,
+                        'message': f"Você tem: {', '.join(issues)}. Complete suas informações para melhor gestão.",
+                        'notification_type': NotificationType.WARNING,
+                        'category': NotificationCategory.PLAYER_ALERT,
+                        'is_read': False,
+                        'is_urgent': False,
+                        'action_url': "/dashboard?tab=planilha",
+                        'created_at': now,
+                        'expires_at': expires_at
+                    })
+            
+            if rows:
+                db.session.execute(insert(Notification), rows)
+                NotificationService._adjust_counters([
+                    {'user_id': row['user_id'], 'total': 1, 'unread': 1, 'urgent': 0, 'expires_at': expires_at}
+                    for row in rows
+                ])
+                db.session.commit()
+            
+            logger.info(f"Verificação de dados incompletos: {len(rows)} notificações criadas")
+            return len(rows)
                 
         except Exception as e:
             logger.error(f"Erro ao verificar dados incompletos: {str(e)}")
+            db.session.rollback()
+            return 0
     
     @staticmethod
     def notify_performance_alert(user_id: int, alert_type: str, data: dict):
@@ -374,6 +530,51 @@ class NotificationService:
             logger.error(f"Erro ao buscar notificações: {str(e)}")
             return []
     
+    @staticmethod
+    def get_user_notifications_with_stats(user_id: int, unread_only: bool = False, limit: int = 50):
+        """
+        Busca notificações e estatísticas do usuário em uma única consulta.
+        
+        Os contadores desnormalizados vêm junto da listagem (outer join); só há
+        uma segunda consulta quando eles estão desatualizados ou não há itens.
+        
+        Returns:
+            tuple: (lista de Notification, dict de estatísticas)
+        """
+        try:
+            now = datetime.utcnow()
+            query = db.session.query(Notification, UserNotificationCounter).outerjoin(
+                UserNotificationCounter, UserNotificationCounter.user_id == Notification.user_id
+            ).filter(
+                Notification.user_id == user_id,
+                or_(
+                    Notification.expires_at.is_(None),
+                    Notification.expires_at > now
+                )
+            )
+            
+            if unread_only:
+                query = query.filter(Notification.is_read == False)
+            
+            rows = query.order_by(
+                Notification.is_urgent.desc(),
+                Notification.created_at.desc()
+            ).limit(limit).populate_existing().all()
+            
+            notifications = [notification for notification, _ in rows]
+            counter = rows[0][1] if rows else None
+            
+            if counter is not None and counter.is_fresh(now):
+                stats = counter.to_stats()
+            else:
+                stats = NotificationService.get_notification_stats(user_id)
+            
+            return notifications, stats
+            
+        except Exception as e:
+            logger.error(f"Erro ao buscar notificações: {str(e)}")
+            return [], {'total': 0, 'unread': 0, 'urgent': 0}
+    
     @staticmethod
     def mark_as_read(notification_id: int, user_id: int) -> bool:
         """Marca notificação como lida"""
@@ -386,6 +587,11 @@ class NotificationService:
             if notification and not notification.is_read:
                 notification.is_read = True
                 notification.read_at = datetime.utcnow()
+                if NotificationService._is_counted(notification):
+                    NotificationService._adjust_counters([{
+                        'user_id': user_id, 'unread': -1,
+                        'urgent': -1 if notification.is_urgent else 0
+                    }])
                 db.session.commit()
                 return True
             
@@ -408,6 +614,11 @@ class NotificationService:
                 'read_at': datetime.utcnow()
             })
             
+            # Nenhuma notificação válida permanece não lida
+            UserNotificationCounter.query.filter(
+                UserNotificationCounter.user_id == user_id
+            ).update({'unread': 0, 'urgent': 0}, synchronize_session=False)
+            
             db.session.commit()
             return count
             
@@ -428,6 +639,12 @@ class NotificationService:
             if not notification:
                 return False
             
+            if NotificationService._is_counted(notification):
+                unread = 0 if notification.is_read else -1
+                NotificationService._adjust_counters([{
+                    'user_id': user_id, 'total': -1, 'unread': unread,
+                    'urgent': unread if notification.is_urgent else 0
+                }])
             db.session.delete(notification)
             db.session.commit()
             return True
@@ -444,6 +661,7 @@ class NotificationService:
                 Notification.user_id == user_id,
                 Notification.is_read == True
             ).delete()
+            NotificationService.invalidate_counters([user_id])
             db.session.commit()
             return count
         except Exception as e:
@@ -453,16 +671,10 @@ class NotificationService:
     
     @staticmethod
     def clean_old_notifications(days: int = 30):
-        """Remove notificações antigas"""
+        """Arquiva e remove notificações antigas (lidas ou expiradas) em lotes"""
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
-            
-            count = Notification.query.filter(
-                Notification.created_at < cutoff_date,
-                Notification.is_read == True
-            ).delete()
-            
-            db.session.commit()
+            from src.utils.retention import get_retention_service
+            count = get_retention_service().archive_notifications(days=days)
             logger.info(f"Removidas {count} notificações antigas")
             
         except Exception as e:
@@ -471,30 +683,115 @@ class NotificationService:
     
     @staticmethod
     def get_notification_stats(user_id: int) -> dict:
-        """Estatísticas de notificações do usuário (apenas não expiradas)"""
+        """
+        Estatísticas de notificações do usuário (apenas não expiradas).
+        
+        Lidas dos contadores desnormalizados; recalculadas com uma única
+        consulta de agregação condicional quando ausentes, invalidadas ou
+        quando alguma notificação contada expirou.
+        """
         try:
             now = datetime.utcnow()
-            base = Notification.query.filter(
-                Notification.user_id == user_id,
-                or_(Notification.expires_at.is_(None), Notification.expires_at > now)
-            )
-
-            total = base.count()
-            unread = base.filter(Notification.is_read == False).count()
-            urgent = base.filter(
-                Notification.is_urgent == True,
-                Notification.is_read == False
-            ).count()
-
-            return {
-                'total': total,
-                'unread': unread,
-                'urgent': urgent
-            }
+            counter = db.session.get(UserNotificationCounter, user_id, populate_existing=True)
+            if counter and counter.is_fresh(now):
+                return counter.to_stats()
+            
+            return NotificationService._refresh_counters(user_id, counter, now)
 
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas: {str(e)}")
+            db.session.rollback()
             return {'total': 0, 'unread': 0, 'urgent': 0}
+    
+    @staticmethod
+    def invalidate_counters(user_ids: List[int] = None):
+        """
+        Marca contadores para recálculo (escritas que não ajustam incrementalmente).
+        
+        Args:
+            user_ids: Usuários afetados (None = todos)
+        """
+        query = UserNotificationCounter.query
+        if user_ids is not None:
+            query = query.filter(UserNotificationCounter.user_id.in_(user_ids))
+        query.update({'is_stale': True}, synchronize_session=False)
+    
+    @staticmethod
+    def _refresh_counters(user_id: int, counter: Optional[UserNotificationCounter], now: datetime) -> dict:
+        """Recalcula os contadores com uma única consulta e os persiste."""
+        unread_case = case((Notification.is_read == False, 1), else_=0)
+        urgent_case = case((and_(Notification.is_read == False, Notification.is_urgent == True), 1), else_=0)
+        
+        total, unread, urgent, next_expires_at = db.session.query(
+            func.count(Notification.id),
+            func.coalesce(func.sum(unread_case), 0),
+            func.coalesce(func.sum(urgent_case), 0),
+            func.min(Notification.expires_at)
+        ).filter(
+            Notification.user_id == user_id,
+            or_(Notification.expires_at.is_(None), Notification.expires_at > now)
+        ).one()
+        
+        stats = {'total': total, 'unread': int(unread), 'urgent': int(urgent)}
+        
+        try:
+            if counter is None:
+                counter = UserNotificationCounter(user_id=user_id)
+                db.session.add(counter)
+            counter.total = stats['total']
+            counter.unread = stats['unread']
+            counter.urgent = stats['urgent']
+            counter.next_expires_at = next_expires_at
+            counter.is_stale = False
+            db.session.commit()
+        except IntegrityError:
+            # Outro worker criou o contador ao mesmo tempo
+            db.session.rollback()
+        
+        return stats
+    
+    @staticmethod
+    def _adjust_counters(deltas: List[Dict[str, Any]]):
+        """
+        Ajusta contadores de forma atômica na transação corrente (executemany).
+        
+        Cada item: user_id e deltas opcionais total/unread/urgent, mais o
+        expires_at da notificação criada (mantém o menor próximo vencimento).
+        Usuários sem contador são ignorados: ele é criado na primeira leitura.
+        """
+        if not deltas:
+            return
+        
+        table = UserNotificationCounter.__table__
+        expires_at = bindparam('b_expires_at', type_=DateTime)
+        statement = table.update().where(
+            table.c.user_id == bindparam('b_user_id')
+        ).values(
+            total=table.c.total + bindparam('b_total'),
+            unread=table.c.unread + bindparam('b_unread'),
+            urgent=table.c.urgent + bindparam('b_urgent'),
+            next_expires_at=case(
+                (expires_at.is_(None), table.c.next_expires_at),
+                (table.c.next_expires_at.is_(None), expires_at),
+                (table.c.next_expires_at > expires_at, expires_at),
+                else_=table.c.next_expires_at
+            )
+        )
+        db.session.execute(statement, [
+            {
+                'b_user_id': delta['user_id'],
+                'b_total': delta.get('total', 0),
+                'b_unread': delta.get('unread', 0),
+                'b_urgent': delta.get('urgent', 0),
+                'b_expires_at': delta.get('expires_at'),
+            }
+            for delta in deltas
+        ])
+    
+    @staticmethod
+    def _is_counted(notification: Notification) -> bool:
+        """Se a notificação entra nos contadores (não expirada)"""
+        return notification.expires_at is None or notification.expires_at > datetime.utcnow()
 
 # Instância global do serviço
 notification_service = NotificationService()
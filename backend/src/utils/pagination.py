@@ -1,19 +1,48 @@
 """
 Utilitários de paginação para SQLAlchemy queries.
+
+Dois modos:
+- OFFSET (page/per_page), compatível com os clientes existentes;
+- keyset (cursor), habilitado pelo parâmetro `cursor` quando o endpoint
+  informa as colunas de ordenação: custo constante por página, sem OFFSET.
+
+O total pode ser exato (COUNT por página), em cache por alguns segundos
+(aproximado) ou omitido.
 """
+import json
+import time
+import base64
+import threading
+from datetime import datetime
 from flask import request
+from sqlalchemy import and_, or_
+
+# Cache de COUNT(*) por consulta (SQL + parâmetros)
+COUNT_CACHE_TTL = 30  # segundos
+COUNT_CACHE_MAX_ENTRIES = 512
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+COUNT_MODES = ('exact', 'cached', 'none')
 
 
-def paginate_query(query, page=None, per_page=None, max_per_page=100):
+class InvalidCursorError(ValueError):
+    """Cursor de paginação malformado."""
+
+
+def paginate_query(query, page=None, per_page=None, max_per_page=100, keyset=None, count='exact'):
     """
     Paginar uma query SQLAlchemy.
-    
+
     Args:
         query: SQLAlchemy query object
         page: Número da página (default: 1 ou request.args.get('page'))
         per_page: Itens por página (default: 20 ou request.args.get('per_page'))
         max_per_page: Máximo de itens por página permitido
-    
+        keyset: (coluna de ordenação, coluna id) para habilitar `?cursor=`
+            (ordem decrescente; cursor vazio = primeira página)
+        count: 'exact', 'cached' ou 'none' para o total
+
     Returns:
         dict: {
             'items': [lista de itens],
@@ -28,53 +57,173 @@ def paginate_query(query, page=None, per_page=None, max_per_page=100):
                 'next_num': 2
             }
         }
+        No modo cursor, 'pagination' traz per_page, has_next, next_cursor,
+        total e total_is_estimate.
     """
     # Obter parâmetros de paginação
-    if page is None:
-        page = request.args.get('page', 1, type=int)
     if per_page is None:
         per_page = request.args.get('per_page', 20, type=int)
-    
-    # Validar parâmetros
-    if page < 1:
-        page = 1
     if per_page < 1:
         per_page = 20
     if per_page > max_per_page:
         per_page = max_per_page
-    
+
+    if keyset is not None and 'cursor' in request.args:
+        if request.args.get('include_total', 'true').lower() == 'false':
+            count = 'none'
+        return paginate_keyset(query, keyset, request.args.get('cursor'), per_page, count=count)
+
+    if page is None:
+        page = request.args.get('page', 1, type=int)
+    if page < 1:
+        page = 1
+
     # Executar paginação
-    pagination = query.paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False
-    )
-    
+    items = query.limit(per_page).offset((page - 1) * per_page).all()
+    if page == 1 and len(items) < per_page:
+        total = len(items)
+    else:
+        total = count_query(query, count)
+
+    pages = (total + per_page - 1) // per_page if total is not None else None
+    has_next = page < pages if pages is not None else len(items) == per_page
+
+    return {
+        'items': items,
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': pages,
+            'has_prev': page > 1,
+            'has_next': has_next,
+            'prev_num': page - 1 if page > 1 else None,
+            'next_num': page + 1 if has_next else None
+        }
+    }
+
+
+def paginate_keyset(query, keyset, cursor=None, per_page=20, count='cached'):
+    """
+    Paginação por cursor em ordem decrescente de (coluna de ordenação, id).
+
+    Args:
+        query: Query já filtrada (a ordenação é substituída)
+        keyset: (coluna de ordenação, coluna id)
+        cursor: Cursor opaco da página anterior (None/'' = início)
+        per_page: Itens por página
+        count: 'exact', 'cached' ou 'none' para o total
+
+    Returns:
+        dict com 'items' e 'pagination' (next_cursor é None na última página)
+    """
+    order_column, id_column = keyset
+    base_query = query
+    query = query.order_by(None).order_by(order_column.desc(), id_column.desc())
+
+    if cursor:
+        order_value, id_value = decode_cursor(cursor)
+        query = query.filter(or_(
+            order_column < order_value,
+            and_(order_column == order_value, id_column < id_value)
+        ))
+
+    # Um item a mais indica se há próxima página, sem COUNT
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, order_column.key), getattr(last, id_column.key))
+
     return {
-        'items': pagination.items,
+        'items': items,
         'pagination': {
-            'page': pagination.page,
-            'per_page': pagination.per_page,
-            'total': pagination.total,
-            'pages': pagination.pages,
-            'has_prev': pagination.has_prev,
-            'has_next': pagination.has_next,
-            'prev_num': pagination.prev_num,
-            'next_num': pagination.next_num
+            'per_page': per_page,
+            'cursor': cursor or None,
+            'next_cursor': next_cursor,
+            'has_next': has_next,
+            'total': count_query(base_query, count),
+            'total_is_estimate': count == 'cached'
         }
     }
 
 
+def encode_cursor(order_value, id_value):
+    """Cursor opaco (base64 de JSON) para a posição (ordem, id)."""
+    if isinstance(order_value, datetime):
+        order_value = {'dt': order_value.isoformat()}
+    raw = json.dumps([order_value, id_value], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverso de encode_cursor. Levanta InvalidCursorError se malformado."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        order_value, id_value = json.loads(raw)
+        if isinstance(order_value, dict):
+            order_value = datetime.fromisoformat(order_value['dt'])
+        return order_value, int(id_value)
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError('Cursor de paginação inválido') from e
+
+
+def count_query(query, mode='exact'):
+    """
+    Total de linhas da query.
+
+    Args:
+        mode: 'exact' (COUNT sempre), 'cached' (COUNT reaproveitado por
+            COUNT_CACHE_TTL segundos para a mesma consulta) ou 'none'
+
+    Returns:
+        int ou None (modo 'none')
+    """
+    if mode == 'none':
+        return None
+
+    query = query.order_by(None)
+    if mode != 'cached':
+        return query.count()
+
+    key = _count_cache_key(query)
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    total = query.count()
+    with _count_cache_lock:
+        if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.clear()
+        _count_cache[key] = (total, now + COUNT_CACHE_TTL)
+    return total
+
+
+def _count_cache_key(query):
+    compiled = query.statement.compile(dialect=query.session.get_bind().dialect)
+    return str(compiled), repr(sorted(compiled.params.items()))
+
+
+def clear_count_cache():
+    with _count_cache_lock:
+        _count_cache.clear()
+
+
 def get_pagination_params(default_per_page=20, max_per_page=100):
     """
     Extrair parâmetros de paginação da request.
-    
+
     Returns:
         tuple: (page, per_page)
     """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', default_per_page, type=int)
-    
+
     # Validar
     if page < 1:
         page = 1
@@ -82,6 +231,5 @@ def get_pagination_params(default_per_page=20, max_per_page=100):
         per_page = default_per_page
     if per_page > max_per_page:
         per_page = max_per_page
-        
-    return page, per_page
 
+    return page, per_page
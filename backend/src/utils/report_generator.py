@@ -22,6 +22,8 @@ from src.models.models import (
     db, User, Account, Platform, Transaction, ReloadRequest, 
     WithdrawalRequest, BalanceHistory, UserRole, Reta
 )
+from src.utils.dimension_cache import get_dimension_cache
+from src.services.pnl import PnLService, PlayerPnL
 import logging
 
 logger = logging.getLogger(__name__)
@@ -154,7 +156,7 @@ class ReportGenerator:
         Returns:
             Tuple com (dados_binarios, nome_arquivo)
         """
-        reta = Reta.query.get(reta_id)
+        reta = get_dimension_cache().reta(reta_id)
         if not reta:
             raise ValueError("Reta não encontrada")
         
@@ -207,13 +209,8 @@ class ReportGenerator:
             )
         ).order_by(WithdrawalRequest.created_at.desc()).all()
         
-        # Calcular totais
-        total_current_balance = sum(float(acc.current_balance) for acc in accounts)
-        total_initial_balance = sum(float(acc.initial_balance) for acc in accounts if acc.has_account)
-        total_pnl = total_current_balance - total_initial_balance
-        
-        total_reloads = sum(float(req.amount) for req in reload_requests if req.status == 'approved')
-        total_withdrawals = sum(float(req.amount) for req in withdrawal_requests if req.status == 'completed')
+        # Totais pelo motor de P&L (mesmas regras da planilha)
+        pnl = PnLService.for_player(user.id, start_date, end_date, accounts=accounts)
         
         return {
             'user': user,
@@ -222,14 +219,20 @@ class ReportGenerator:
             'balance_history': balance_history,
             'reload_requests': reload_requests,
             'withdrawal_requests': withdrawal_requests,
-            'totals': {
-                'current_balance': total_current_balance,
-                'initial_balance': total_initial_balance,
-                'pnl': total_pnl,
-                'reloads': total_reloads,
-                'withdrawals': total_withdrawals,
-                'net_result': total_pnl - total_reloads + total_withdrawals
-            }
+            'totals': self._player_totals(pnl)
+        }
+    
+    @staticmethod
+    def _player_totals(pnl: PlayerPnL) -> Dict:
+        """Totais do relatório a partir do P&L do jogador"""
+        return {
+            'current_balance': pnl.total_current,
+            'initial_balance': pnl.total_investment,
+            'pnl': pnl.total_pnl,
+            'reloads': pnl.period_reloads,
+            'withdrawals': pnl.period_withdrawals,
+            # P&L já desconta os reloads (investimento); saques voltam ao resultado
+            'net_result': pnl.total_pnl + pnl.period_withdrawals
         }
     
     def _collect_team_data(self, start_date: datetime, end_date: datetime, reta_id: int = None) -> Dict:
@@ -256,8 +259,17 @@ class ReportGenerator:
             }
         }
         
+        # Contas e reloads/saques do período de todos os jogadores em lote
+        player_pnls = PnLService.load([player.id for player in players], start_date, end_date,
+                                      scope=players_query.with_entities(User.id).statement)
+        
         for player in players:
-            player_data = self._collect_player_data(player, start_date, end_date)
+            pnl = player_pnls[player.id]
+            player_data = {
+                'user': player,
+                'accounts': pnl.accounts,
+                'totals': self._player_totals(pnl)
+            }
             team_data['players'].append(player_data)
             
             # Somar totais
@@ -266,10 +278,10 @@ class ReportGenerator:
             team_data['totals']['total_reloads'] += player_data['totals']['reloads']
             team_data['totals']['total_withdrawals'] += player_data['totals']['withdrawals']
             
-            if player_data['totals']['pnl'] > 0:
+            if pnl.is_profitable:
                 team_data['totals']['profitable_players'] += 1
             
-            team_data['totals']['active_accounts'] += len([acc for acc in player_data['accounts'] if acc.has_account])
+            team_data['totals']['active_accounts'] += pnl.active_accounts
         
         return team_data
     
@@ -469,7 +481,7 @@ class ReportGenerator:
         story.append(Paragraph("INVICTUS POKER TEAM", self.styles['InvictusTitle']))
         title = "Relatório Consolidado do Time"
         if reta_id:
-            reta = Reta.query.get(reta_id)
+            reta = get_dimension_cache().reta(reta_id)
             title += f" - {reta.name}"
         story.append(Paragraph(title, self.styles['InvictusSubtitle']))
         story.append(Spacer(1, 12))
@@ -565,7 +577,7 @@ class ReportGenerator:
         # Cabeçalho
         title = "RELATÓRIO CONSOLIDADO DO TIME - INVICTUS POKER TEAM"
         if reta_id:
-            reta = Reta.query.get(reta_id)
+            reta = get_dimension_cache().reta(reta_id)
             title += f" - {reta.name}"
         writer.writerow([title])
         writer.writerow([f"Período: {start_date.strftime('%d/%m/%Y')} a {end_date.strftime('%d/%m/%Y')}"])
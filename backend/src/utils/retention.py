@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Retenção e arquivamento de tabelas de histórico - Invictus Poker Team
+Move linhas antigas de audit_logs e notifications para arquivos mensais
+comprimidos (JSON Lines + gzip) e as remove em lotes pequenos, mantendo
+as tabelas quentes enxutas sem transações longas no SQLite.
+"""
+
+import os
+import json
+import gzip
+import enum
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from sqlalchemy import select, delete, or_
+
+from src.models.models import db, AuditLog
+from src.models.notifications import Notification
+
+logger = logging.getLogger(__name__)
+
+# Defaults (sobrescritos por app.config / variáveis de ambiente)
+AUDIT_RETENTION_DAYS = 180
+NOTIFICATION_RETENTION_DAYS = 30
+BATCH_SIZE = 500
+# Contagens de linhas por mês/filtro guardadas (invalidadas quando o arquivo muda)
+COUNT_CACHE_SIZE = 1024
+
+
+class RetentionService:
+    """Arquiva e remove em lotes as linhas antigas das tabelas de histórico."""
+
+    def __init__(self):
+        self.archive_dir: Optional[str] = None
+        self.audit_retention_days = AUDIT_RETENTION_DAYS
+        self.notification_retention_days = NOTIFICATION_RETENTION_DAYS
+        self.batch_size = BATCH_SIZE
+        self._lock = threading.Lock()
+        # (tabela, mês, início, filtros) -> ((mtime_ns, tamanho), linhas)
+        self._month_counts: 'OrderedDict[Tuple, Tuple[Tuple[int, int], int]]' = OrderedDict()
+        self._counts_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Lê diretório de arquivo e prazos de retenção da configuração."""
+        def setting(name, default):
+            return app.config.get(name) or os.environ.get(name) or default
+
+        self.archive_dir = setting('RETENTION_ARCHIVE_DIR', os.path.join(app.instance_path, 'archive'))
+        self.audit_retention_days = int(setting('AUDIT_RETENTION_DAYS', AUDIT_RETENTION_DAYS))
+        self.notification_retention_days = int(setting('NOTIFICATION_RETENTION_DAYS', NOTIFICATION_RETENTION_DAYS))
+        self.batch_size = int(setting('RETENTION_BATCH_SIZE', BATCH_SIZE))
+
+    # ------------------------------------------------------------------
+    # Arquivamento
+    # ------------------------------------------------------------------
+
+    def run(self) -> Dict[str, int]:
+        """Job diário: aplica a retenção de auditoria e notificações."""
+        return {
+            'audit_logs': self.archive_audit_logs(),
+            'notifications': self.archive_notifications(),
+        }
+
+    def archive_audit_logs(self, days: int = None, batch_size: int = None) -> int:
+        """
+        Arquiva logs de auditoria mais antigos que `days` dias.
+
+        Returns:
+            Número de linhas arquivadas
+        """
+        cutoff = datetime.utcnow() - timedelta(days=days or self.audit_retention_days)
+        # Arquivo autocontido: payload decodificado e IP/User-Agent por extenso
+        return self._archive_table(AuditLog, AuditLog.created_at < cutoff, batch_size,
+                                   expand=AuditLog.expand_rows)
+
+    def archive_notifications(self, days: int = None, batch_size: int = None) -> int:
+        """
+        Arquiva notificações antigas já lidas ou expiradas.
+
+        Notificações não lidas e ainda válidas permanecem na tabela.
+        Os contadores dos usuários afetados são marcados para recálculo.
+
+        Returns:
+            Número de linhas arquivadas
+        """
+        from src.utils.notification_service import NotificationService
+
+        now = datetime.utcnow()
+        cutoff = now - timedelta(days=days or self.notification_retention_days)
+        condition = (Notification.created_at < cutoff) & or_(
+            Notification.is_read == True,
+            Notification.expires_at < now
+        )
+        return self._archive_table(Notification, condition, batch_size,
+                                   on_batch=lambda rows: NotificationService.invalidate_counters(
+                                       list({row['user_id'] for row in rows})))
+
+    def _archive_table(self, model, condition, batch_size: int = None,
+                       on_batch: Callable[[List[Dict]], None] = None,
+                       expand: Callable[[List[Dict]], List[Dict]] = None) -> int:
+        """
+        Copia lotes de linhas para os arquivos mensais e então os remove.
+
+        Cada lote é gravado (com fsync) antes do DELETE e confirmado em sua
+        própria transação; se o processo cair entre as duas etapas, o lote é
+        arquivado de novo na próxima execução e duplicatas são descartadas
+        na leitura pelo id.
+        """
+        table = model.__table__
+        batch_size = batch_size or self.batch_size
+        archived = 0
+
+        with self._lock:
+            while True:
+                rows = [
+                    dict(row) for row in db.session.execute(
+                        select(table).where(condition).order_by(table.c.id).limit(batch_size)
+                    ).mappings()
+                ]
+                if not rows:
+                    break
+
+                self._write_archive(table.name, expand(rows) if expand else rows)
+                db.session.execute(delete(table).where(table.c.id.in_([row['id'] for row in rows])))
+                if on_batch:
+                    on_batch(rows)
+                db.session.commit()
+                archived += len(rows)
+
+                if len(rows) < batch_size:
+                    break
+
+        if archived:
+            logger.info(f"Retenção: {archived} linha(s) de {table.name} arquivadas")
+        return archived
+
+    def _write_archive(self, table_name: str, rows: List[Dict]):
+        """Acrescenta as linhas aos arquivos do mês (um membro gzip por lote)."""
+        by_month: Dict[str, List[Dict]] = {}
+        for row in rows:
+            by_month.setdefault(row['created_at'].strftime('%Y-%m'), []).append(row)
+
+        for month, month_rows in by_month.items():
+            path = self._archive_path(table_name, month)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            payload = ''.join(json.dumps(self._serialize(row), ensure_ascii=False) + '\n' for row in month_rows)
+            with open(path, 'ab') as f:
+                f.write(gzip.compress(payload.encode('utf-8')))
+                f.flush()
+                os.fsync(f.fileno())
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def archive_months(self, table_name: str) -> List[str]:
+        """Meses (YYYY-MM) com arquivo, do mais recente para o mais antigo."""
+        if not self.archive_dir:
+            return []
+        table_dir = os.path.join(self.archive_dir, table_name)
+        if not os.path.isdir(table_dir):
+            return []
+        return sorted(
+            (name[:-len('.jsonl.gz')] for name in os.listdir(table_dir) if name.endswith('.jsonl.gz')),
+            reverse=True
+        )
+
+    def has_archive_since(self, table_name: str, start_date: Optional[datetime]) -> bool:
+        """Se algum arquivo mensal cobre o período a partir de start_date."""
+        months = self.archive_months(table_name)
+        if not months:
+            return False
+        return start_date is None or months[0] >= start_date.strftime('%Y-%m')
+
+    def query_archive(self, table_name: str, start_date: datetime = None,
+                      predicate: Callable[[Dict], bool] = None) -> List[Dict]:
+        """Todas as linhas arquivadas a partir de start_date (ver iter_archive)."""
+        return list(self.iter_archive(table_name, start_date, predicate))
+
+    def iter_archive(self, table_name: str, start_date: datetime = None,
+                     predicate: Callable[[Dict], bool] = None,
+                     before: Tuple[datetime, int] = None, offset: int = 0) -> Iterator[Dict]:
+        """
+        Linhas arquivadas a partir de start_date, mais recentes primeiro.
+
+        Lê um mês por vez e só quando o consumidor pede mais linhas: uma
+        página para de descomprimir assim que está cheia.
+
+        Args:
+            table_name: Tabela de origem ('audit_logs', 'notifications')
+            start_date: Limite inferior de created_at (None = todo o arquivo)
+            predicate: Filtro adicional aplicado a cada linha; com um atributo
+                `cache_key` as contagens por mês são reaproveitadas
+            before: Cursor (created_at, id): só linhas anteriores a ele; meses
+                posteriores nem são abertos
+            offset: Linhas a pular (meses com contagem conhecida são pulados
+                sem descomprimir)
+        """
+        before_month = before[0].strftime('%Y-%m') if before else None
+        for month in self._months_since(table_name, start_date):
+            if before_month and month > before_month:
+                continue
+            if offset and not (before_month and month == before_month):
+                known = self._cached_month_count(table_name, month, start_date, predicate)
+                if known is not None and known <= offset:
+                    offset -= known
+                    continue
+
+            month_rows = self._month_rows(table_name, month, start_date, predicate)
+            if before_month and month == before_month:
+                month_rows = [row for row in month_rows if (row['created_at'], row['id']) < before]
+            if offset >= len(month_rows):
+                offset -= len(month_rows)
+                continue
+            yield from month_rows[offset:]
+            offset = 0
+
+    def count_archive(self, table_name: str, start_date: datetime = None,
+                      predicate: Callable[[Dict], bool] = None) -> int:
+        """
+        Total de linhas arquivadas que passam pelos filtros.
+
+        Cada mês é contado em streaming (sem manter as linhas) e a contagem
+        fica em cache até o arquivo do mês mudar.
+        """
+        total = 0
+        for month in self._months_since(table_name, start_date):
+            count = self._cached_month_count(table_name, month, start_date, predicate)
+            if count is None:
+                count = sum(1 for row in self._iter_month(table_name, month)
+                            if self._matches(row, start_date, predicate))
+                self._store_month_count(table_name, month, start_date, predicate, count)
+            total += count
+        return total
+
+    def _months_since(self, table_name: str, start_date: Optional[datetime]) -> Iterator[str]:
+        start_month = start_date.strftime('%Y-%m') if start_date else None
+        for month in self.archive_months(table_name):
+            if start_month and month < start_month:
+                break
+            yield month
+
+    def _month_rows(self, table_name: str, month: str, start_date: Optional[datetime],
+                    predicate: Optional[Callable[[Dict], bool]]) -> List[Dict]:
+        """Linhas filtradas de um mês, ordenadas por (created_at, id) decrescente."""
+        month_rows = [row for row in self._iter_month(table_name, month)
+                      if self._matches(row, start_date, predicate)]
+        month_rows.sort(key=lambda row: (row['created_at'], row['id']), reverse=True)
+        self._store_month_count(table_name, month, start_date, predicate, len(month_rows))
+        return month_rows
+
+    @staticmethod
+    def _matches(row: Dict, start_date: Optional[datetime], predicate) -> bool:
+        return (start_date is None or row['created_at'] >= start_date) and (predicate is None or predicate(row))
+
+    def _count_key(self, table_name: str, month: str, start_date: Optional[datetime], predicate):
+        """Chave da contagem; None quando o filtro não é identificável."""
+        if predicate is not None and getattr(predicate, 'cache_key', None) is None:
+            return None
+        # start_date só muda a contagem do mês em que cai
+        start = start_date if start_date and start_date.strftime('%Y-%m') == month else None
+        return (table_name, month, start, getattr(predicate, 'cache_key', None))
+
+    def _file_signature(self, table_name: str, month: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._archive_path(table_name, month))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _cached_month_count(self, table_name: str, month: str, start_date, predicate) -> Optional[int]:
+        key = self._count_key(table_name, month, start_date, predicate)
+        if key is None:
+            return None
+        with self._counts_lock:
+            cached = self._month_counts.get(key)
+            if cached is None:
+                return None
+            self._month_counts.move_to_end(key)
+        signature, count = cached
+        return count if signature == self._file_signature(table_name, month) else None
+
+    def _store_month_count(self, table_name: str, month: str, start_date, predicate, count: int):
+        key = self._count_key(table_name, month, start_date, predicate)
+        signature = self._file_signature(table_name, month)
+        if key is None or signature is None:
+            return
+        with self._counts_lock:
+            self._month_counts[key] = (signature, count)
+            self._month_counts.move_to_end(key)
+            while len(self._month_counts) > COUNT_CACHE_SIZE:
+                self._month_counts.popitem(last=False)
+
+    def _iter_month(self, table_name: str, month: str) -> Iterator[Dict]:
+        seen = set()
+        with gzip.open(self._archive_path(table_name, month), 'rt', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                if row['id'] in seen:
+                    continue
+                seen.add(row['id'])
+                row['created_at'] = datetime.fromisoformat(row['created_at'])
+                yield row
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _archive_path(self, table_name: str, month: str) -> str:
+        return os.path.join(self.archive_dir, table_name, f"{month}.jsonl.gz")
+
+    @staticmethod
+    def _serialize(row: Dict) -> Dict:
+        serialized = {}
+        for key, value in row.items():
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, enum.Enum):
+                value = value.value
+            serialized[key] = value
+        return serialized
+
+
+# Instância global do serviço
+retention_service = RetentionService()
+
+
+def get_retention_service() -> RetentionService:
+    """Retorna a instância global do serviço de retenção."""
+    return retention_service
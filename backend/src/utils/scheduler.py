@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Agendador unificado de tarefas periódicas - Invictus Poker Team
+Um único processo (líder, eleito por file lock) executa os jobs, evitando
+que cada worker do gunicorn rode a mesma tarefa. Estado, histórico de
+execuções e métricas ficam em um SQLite compartilhado entre os workers.
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Execuções mantidas no histórico por job
+HISTORY_LIMIT = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    name TEXT PRIMARY KEY,
+    schedule TEXT,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    interval_seconds INTEGER,
+    next_run_at TEXT,
+    run_requested_at TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS job_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    duration_ms REAL,
+    status TEXT NOT NULL,
+    error TEXT,
+    pid INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_job_runs_job_id ON job_runs (job, id);
+CREATE TABLE IF NOT EXISTS scheduler_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class ScheduledJob:
+    """Definição de um job periódico (intervalo fixo ou horário diário)."""
+
+    def __init__(self,
+                 name: str,
+                 func: Callable[[], None],
+                 interval_seconds: int = None,
+                 daily_at: str = None,
+                 jitter_seconds: int = 0):
+        if not interval_seconds and not daily_at:
+            raise ValueError("Informe interval_seconds ou daily_at")
+
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.daily_at = daily_at
+        self.jitter_seconds = jitter_seconds
+        self.enabled = True
+        self.next_run: Optional[datetime] = None
+
+    @property
+    def schedule_description(self) -> str:
+        if self.daily_at:
+            return f"diário às {self.daily_at}"
+        return f"a cada {self.interval_seconds}s"
+
+    def compute_next_run(self, now: datetime) -> datetime:
+        """Próxima execução a partir de agora, com jitter aleatório."""
+        if self.daily_at:
+            hour, minute = (int(p) for p in self.daily_at.split(':'))
+            next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+        else:
+            next_run = now + timedelta(seconds=self.interval_seconds)
+
+        if self.jitter_seconds:
+            next_run += timedelta(seconds=random.uniform(0, self.jitter_seconds))
+        return next_run
+
+
+class SchedulerService:
+    """Agendador com eleição de líder, histórico e métricas por job."""
+
+    def __init__(self, app=None, tick_seconds: int = 15):
+        self.app = None
+        self.tick_seconds = tick_seconds
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.state_path = None
+        self.lock_path = None
+
+        self._jobs_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock_file = None
+        self.is_leader = False
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configura caminhos de estado e inicia o agendador no primeiro request do processo."""
+        self.app = app
+        state_dir = app.config.get('SCHEDULER_STATE_DIR') or os.environ.get('SCHEDULER_STATE_DIR') or app.instance_path
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_path = os.path.join(state_dir, 'scheduler_state.sqlite')
+        self.lock_path = os.path.join(state_dir, 'scheduler.lock')
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+        # Com preload_app=True o app é importado no master do gunicorn: a thread
+        # só pode ser criada depois do fork, então é iniciada sob demanda.
+        @app.before_request
+        def _ensure_scheduler_started():
+            if app.config.get('SCHEDULER_ENABLED', not app.testing):
+                self.ensure_started()
+
+    # ------------------------------------------------------------------
+    # Registro e controle de jobs
+    # ------------------------------------------------------------------
+
+    def add_job(self,
+                name: str,
+                func: Callable[[], None],
+                interval_seconds: int = None,
+                daily_at: str = None,
+                jitter_seconds: int = 0) -> ScheduledJob:
+        """
+        Registra (ou substitui) um job.
+
+        Args:
+            name: Identificador único do job
+            func: Função sem argumentos executada dentro do app context
+            interval_seconds: Intervalo entre execuções
+            daily_at: Horário diário 'HH:MM' (alternativa ao intervalo)
+            jitter_seconds: Atraso aleatório máximo somado a cada agendamento
+
+        Returns:
+            ScheduledJob registrado
+        """
+        job = ScheduledJob(name, func, interval_seconds=interval_seconds,
+                           daily_at=daily_at, jitter_seconds=jitter_seconds)
+        with self._jobs_lock:
+            self.jobs[name] = job
+        return job
+
+    def set_enabled(self, name: str, enabled: bool):
+        """Pausa/retoma um job em todos os workers."""
+        self._update_job_control(name, enabled=1 if enabled else 0)
+        if name in self.jobs:
+            self.jobs[name].enabled = enabled
+
+    def set_interval(self, name: str, interval_seconds: int):
+        """Altera o intervalo de um job em todos os workers."""
+        self._update_job_control(name, interval_seconds=interval_seconds, next_run_at=None)
+        if name in self.jobs:
+            self.jobs[name].interval_seconds = interval_seconds
+            self.jobs[name].next_run = None
+
+    def request_run(self, name: str) -> bool:
+        """Solicita execução imediata; o líder executa no próximo ciclo."""
+        if name not in self.jobs:
+            return False
+        self._update_job_control(name, run_requested_at=datetime.now().isoformat())
+        return True
+
+    def is_job_enabled(self, name: str) -> bool:
+        if self.state_path:
+            with self._connect() as conn:
+                row = conn.execute("SELECT enabled FROM jobs WHERE name = ?", (name,)).fetchone()
+            if row is not None:
+                return bool(row[0])
+        job = self.jobs.get(name)
+        return bool(job and job.enabled)
+
+    # ------------------------------------------------------------------
+    # Ciclo de execução
+    # ------------------------------------------------------------------
+
+    def ensure_started(self):
+        """Inicia a thread do agendador uma vez por processo (seguro após fork)."""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._jobs_lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self.is_leader = False
+            self._lock_file = None
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run_loop, name='scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._release_leadership()
+
+    def _run_loop(self):
+        logger.info(f"Agendador iniciado no processo {os.getpid()}")
+        while not self._stop_event.is_set():
+            try:
+                if self.is_leader or self._try_acquire_leadership():
+                    self._run_pending()
+            except Exception as e:
+                logger.error(f"Erro no ciclo do agendador: {str(e)}")
+            self._stop_event.wait(self.tick_seconds)
+
+    def _run_pending(self):
+        now = datetime.now()
+        controls = self._load_controls()
+
+        for job in list(self.jobs.values()):
+            control = controls.get(job.name)
+            if control:
+                job.enabled = bool(control['enabled'])
+                if control['interval_seconds'] and control['interval_seconds'] != job.interval_seconds:
+                    job.interval_seconds = control['interval_seconds']
+                    job.next_run = None
+
+            requested = bool(control and control['run_requested_at'])
+            changed = control is None or requested
+            if job.next_run is None:
+                job.next_run = job.compute_next_run(now)
+                changed = True
+
+            if requested or (job.enabled and job.next_run <= now):
+                self.run_job(job)
+                job.next_run = job.compute_next_run(datetime.now())
+                changed = True
+
+            if changed:
+                self._sync_job_state(job, clear_request=requested)
+
+    def run_job(self, job: ScheduledJob) -> Dict[str, any]:
+        """Executa um job no processo atual e registra duração e resultado."""
+        started_at = datetime.now()
+        start = time.perf_counter()
+        status, error = 'success', None
+
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    job.func()
+            else:
+                job.func()
+        except Exception as e:
+            status, error = 'failed', str(e)
+            logger.error(f"Job '{job.name}' falhou: {error}")
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        run = {
+            'job': job.name,
+            'started_at': started_at.isoformat(),
+            'finished_at': datetime.now().isoformat(),
+            'duration_ms': round(duration_ms, 2),
+            'status': status,
+            'error': error,
+            'pid': os.getpid(),
+        }
+        self._record_run(run)
+        logger.info(f"Job '{job.name}' executado em {duration_ms:.0f}ms ({status})")
+        return run
+
+    # ------------------------------------------------------------------
+    # Eleição de líder (file lock exclusivo, liberado se o processo morrer)
+    # ------------------------------------------------------------------
+
+    def _try_acquire_leadership(self) -> bool:
+        if not self.lock_path:
+            return False
+
+        lock_file = open(self.lock_path, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        self.is_leader = True
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scheduler_meta (key, value) VALUES ('leader', ?)",
+                (f"{os.getpid()}@{datetime.now().isoformat()}",)
+            )
+        logger.info(f"Processo {os.getpid()} eleito líder do agendador")
+        return True
+
+    def _release_leadership(self):
+        if self._lock_file:
+            try:
+                self._lock_file.close()
+            finally:
+                self._lock_file = None
+        self.is_leader = False
+
+    # ------------------------------------------------------------------
+    # Estado compartilhado
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _connect(self):
+        with self._state_lock:
+            conn = sqlite3.connect(self.state_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    def _load_controls(self) -> Dict[str, sqlite3.Row]:
+        with self._connect() as conn:
+            return {row['name']: row for row in conn.execute("SELECT * FROM jobs")}
+
+    def _update_job_control(self, name: str, **values):
+        if not self.state_path:
+            return
+        values['updated_at'] = datetime.now().isoformat()
+        assignments = ', '.join(f"{key} = ?" for key in values)
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO jobs (name) VALUES (?)", (name,))
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE name = ?", (*values.values(), name))
+
+    def _sync_job_state(self, job: ScheduledJob, clear_request: bool = False):
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO jobs (name, enabled) VALUES (?, ?)",
+                         (job.name, 1 if job.enabled else 0))
+            conn.execute(
+                "UPDATE jobs SET schedule = ?, next_run_at = ?"
+                + (", run_requested_at = NULL" if clear_request else "")
+                + " WHERE name = ?",
+                (job.schedule_description, job.next_run.isoformat() if job.next_run else None, job.name)
+            )
+
+    def _record_run(self, run: Dict[str, any]):
+        if not self.state_path:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO job_runs (job, started_at, finished_at, duration_ms, status, error, pid) "
+                "VALUES (:job, :started_at, :finished_at, :duration_ms, :status, :error, :pid)",
+                run
+            )
+            conn.execute(
+                "DELETE FROM job_runs WHERE job = ? AND id NOT IN "
+                "(SELECT id FROM job_runs WHERE job = ? ORDER BY id DESC LIMIT ?)",
+                (run['job'], run['job'], HISTORY_LIMIT)
+            )
+
+    # ------------------------------------------------------------------
+    # Consulta (API administrativa)
+    # ------------------------------------------------------------------
+
+    def get_status(self) -> Dict[str, any]:
+        """Jobs registrados com controle, métricas agregadas e líder atual."""
+        with self._connect() as conn:
+            controls = {row['name']: dict(row) for row in conn.execute("SELECT * FROM jobs")}
+            metrics = {
+                row['job']: dict(row) for row in conn.execute(
+                    "SELECT job, COUNT(*) AS runs, "
+                    "SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) AS failures, "
+                    "ROUND(AVG(duration_ms), 2) AS avg_duration_ms, "
+                    "MAX(duration_ms) AS max_duration_ms, "
+                    "MAX(started_at) AS last_run_at "
+                    "FROM job_runs GROUP BY job"
+                )
+            }
+            leader = conn.execute("SELECT value FROM scheduler_meta WHERE key = 'leader'").fetchone()
+
+        jobs = []
+        for name, job in sorted(self.jobs.items()):
+            control = controls.get(name, {})
+            jobs.append({
+                'name': name,
+                'schedule': job.schedule_description,
+                'enabled': bool(control.get('enabled', job.enabled)),
+                'next_run_at': control.get('next_run_at'),
+                'run_requested_at': control.get('run_requested_at'),
+                'metrics': metrics.get(name, {'runs': 0}),
+            })
+
+        return {
+            'leader': leader[0] if leader else None,
+            'this_process': {'pid': os.getpid(), 'is_leader': self.is_leader},
+            'jobs': jobs,
+        }
+
+    def get_history(self, name: str, limit: int = 20) -> List[Dict[str, any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM job_runs WHERE job = ? ORDER BY id DESC LIMIT ?",
+                (name, limit)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+
+# Instância global do agendador
+scheduler = SchedulerService()
+
+
+def get_scheduler() -> SchedulerService:
+    """Retorna a instância global do agendador."""
+    return scheduler
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Serialização em lote dos modelos com relacionamentos - Invictus Poker Team
+Cada to_dict() lê usuários, plataformas e contas relacionadas; em listas,
+isso vira uma consulta por linha. Aqui ficam declarados os relacionamentos
+de cada modelo para:
+- carregá-los junto com a consulta da lista (selectinload);
+- ou, para listas já carregadas, buscar as dimensões que faltam em lote
+  (uma consulta por tabela). Elas ficam no identity map da sessão do
+  request, e os to_dict() seguintes não vão mais ao banco.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import selectinload, RelationshipDirection
+
+from src.models.models import db, Transaction, ReloadRequest, WithdrawalRequest, BalanceHistory
+from src.utils.dimension_cache import MODEL_DIMENSIONS, get_dimension_cache
+
+# Relacionamentos lidos por to_dict() (caminhos aninhados separados por ponto)
+RELATIONSHIPS = {
+    Transaction: ('user', 'platform', 'creator'),
+    ReloadRequest: ('user', 'platform', 'approver'),
+    WithdrawalRequest: ('user', 'platform', 'approver'),
+    BalanceHistory: ('account.platform', 'changer'),
+}
+
+
+def eager_options(model) -> list:
+    """Opções selectinload para os relacionamentos declarados do modelo."""
+    options = []
+    for path in RELATIONSHIPS.get(model, ()):
+        current, option = model, None
+        for name in path.split('.'):
+            attribute = getattr(current, name)
+            option = selectinload(attribute) if option is None else option.selectinload(attribute)
+            current = attribute.property.mapper.class_
+        options.append(option)
+    return options
+
+
+def with_relationships(query, model=None):
+    """Aplica à query de lista o carregamento dos relacionamentos de to_dict()."""
+    model = model or query.column_descriptions[0]['entity']
+    return query.options(*eager_options(model))
+
+
+def serialize(rows: Iterable) -> List[Dict]:
+    """to_dict() de cada linha, com as dimensões buscadas em lote antes."""
+    rows = list(rows)
+    loaded = prefetch(rows)
+    try:
+        return [row.to_dict() for row in rows]
+    finally:
+        # Os objetos carregados ficam referenciados até aqui: o identity map
+        # guarda referências fracas e eles seriam recarregados um a um
+        del loaded
+
+
+def prefetch(rows: List) -> List:
+    """
+    Carrega em lote os relacionamentos many-to-one declarados que ainda não
+    estão carregados, agrupando por tabela de destino (ex.: user, creator e
+    approver viram uma única consulta em users).
+    
+    Returns:
+        Objetos carregados (manter a referência até serializar)
+    """
+    loaded = []
+    level = defaultdict(list)
+    for row in rows:
+        for path in RELATIONSHIPS.get(type(row), ()):
+            level[path].append(row)
+
+    while level:
+        loaded.extend(_load_missing(level))
+        # Próximo nível dos caminhos aninhados (ex.: account -> platform)
+        next_level = defaultdict(list)
+        for path, path_rows in level.items():
+            name, _, rest = path.partition('.')
+            if rest:
+                next_level[rest].extend(
+                    target for target in (getattr(row, name) for row in path_rows) if target is not None
+                )
+        level = next_level
+    return loaded
+
+
+def _load_missing(level: Dict[str, List]) -> List:
+    missing: Dict[type, Set] = defaultdict(set)
+    for path, path_rows in level.items():
+        name = path.partition('.')[0]
+        for row in path_rows:
+            state = inspect(row)
+            if name not in state.unloaded:
+                continue
+            relationship = state.mapper.relationships[name]
+            if relationship.direction is not RelationshipDirection.MANYTOONE or len(relationship.local_columns) != 1:
+                continue
+            local_column = next(iter(relationship.local_columns))
+            value = getattr(row, state.mapper.get_property_by_column(local_column).key)
+            if value is not None:
+                missing[relationship.mapper.class_].add(value)
+
+    loaded = []
+    for target, ids in missing.items():
+        if target in MODEL_DIMENSIONS:
+            # Dimensões vêm do cache, ligadas à sessão sem consulta
+            loaded.extend(get_dimension_cache().attach(MODEL_DIMENSIONS[target]).values())
+        mapper = inspect(target)
+        ids = [i for i in ids if mapper.identity_key_from_primary_key((i,)) not in db.session.identity_map]
+        if ids:
+            loaded.extend(db.session.query(target).filter(mapper.primary_key[0].in_(ids)).all())
+    return loaded
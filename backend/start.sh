@@ -29,21 +29,16 @@ if ! command -v gunicorn &> /dev/null; then
 fi
 
 echo "📦 Inicializando banco de dados..."
-cd src
-python -c "
-try:
-    from main import app
-    with app.app_context():
-        from models.models import db
-        db.create_all()
-        print('✅ Banco inicializado com sucesso')
-except Exception as e:
-    print(f'⚠️ Erro na inicialização do banco: {e}')
-    print('🔄 Continuando mesmo assim...')
-"
+# Bootstrap (migrations versionadas, dados iniciais, backup inicial) uma única
+# vez, fora do gunicorn; os workers só conferem a versão do schema
+if flask --app src.main bootstrap; then
+    echo "✅ Banco inicializado com sucesso"
+else
+    echo "❌ Erro na inicialização do banco; servidor não será iniciado"
+    exit 1
+fi
 
 echo "🌐 Iniciando servidor com Gunicorn..."
 echo "🔗 Servidor rodará na porta: $PORT"
 
-cd ..
 exec gunicorn -c gunicorn_config.py src.main:app
@@ -0,0 +1,68 @@
+"""
+Benchmarks das computações centrais (pytest-benchmark)
+
+Cada escala (padrão 10, 100 e 1000 jogadores; BENCHMARK_SCALES=10,100 para
+rodar menos) tem o próprio banco SQLite, populado uma vez pela simulação
+vetorizada com meses de BalanceHistory.
+
+Guardar a linha de base e comparar depois (falha se a mediana piorar 25%):
+  pytest tests/benchmarks --benchmark-autosave
+  pytest tests/benchmarks --benchmark-compare --benchmark-compare-fail=median:25%
+
+Os orçamentos de consultas são verificados mesmo com --benchmark-disable.
+"""
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+from src.main import create_app
+from src.models.models import db, User, UserRole
+from src.utils.init_data import create_initial_data
+from src.utils.data_simulation import simulate_population, insert_population
+
+SCALES = [int(n) for n in os.environ.get('BENCHMARK_SCALES', '10,100,1000').split(',') if n.strip()]
+HISTORY_DAYS = 120
+SEED = 2024
+
+
+@pytest.fixture(scope='package', params=SCALES, ids=lambda n: f'{n}_players')
+def dataset(request):
+    """App com banco próprio e N jogadores simulados"""
+    players = request.param
+    db_fd, db_path = tempfile.mkstemp(suffix='.sqlite')
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SECRET_KEY': 'benchmark-secret-key',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+
+    with app.app_context():
+        db.create_all()
+        create_initial_data()
+        population = simulate_population(players=players, days=HISTORY_DAYS, seed=SEED)
+        insert_population(population, username_prefix='bench')
+        db.session.commit()
+        admin = User.query.filter_by(role=UserRole.ADMIN).first()
+        player = User.query.filter_by(role=UserRole.PLAYER).order_by(User.id).first()
+        data = SimpleNamespace(app=app, players=players, admin_id=admin.id, player_id=player.id)
+        db.session.remove()
+
+        yield data
+
+        db.session.remove()
+        db.engine.dispose()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+@pytest.fixture
+def admin_client(dataset):
+    """Cliente de teste autenticado como admin no banco da escala"""
+    client = dataset.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = dataset.admin_id
+        sess['user_role'] = UserRole.ADMIN.value
+    return client
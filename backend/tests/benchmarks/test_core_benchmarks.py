@@ -0,0 +1,106 @@
+"""
+Benchmarks de planilha, dashboards, relatório mensal e serialização de usuários
+"""
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from src.models.models import db, User, UserRole
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('numpy')
+
+from src.routes.team_snapshots import calculate_team_data  # noqa: E402
+
+ROUNDS = 5
+
+# Orçamento de consultas SQL por chamada: fixo + por jogador.
+# Código com N+1 conhecido entra com custo por jogador; reduzir aqui quando otimizar.
+QUERY_BUDGETS = {
+    'spreadsheet': (11, 0),
+    'manager_dashboard': (12, 0),
+    'team_financials': (7, 0),
+    'team_data': (4, 0),
+    'monthly_detailed': (9, 0),
+    'user_serialization': (5, 0),
+    'bankroll_history': (4, 0),
+    'team_pnl_series': (3, 0),
+}
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_execute)
+
+
+def run_within_budget(benchmark, dataset, name, fn):
+    """Confere o orçamento de consultas em uma chamada aquecida e cronometra."""
+    fixed, per_player = QUERY_BUDGETS[name]
+    budget = fixed + per_player * dataset.players
+
+    with dataset.app.app_context():
+        fn()
+        db.session.remove()
+        with count_queries() as statements:
+            fn()
+        db.session.remove()
+
+        benchmark.extra_info.update({'players': dataset.players, 'queries': len(statements), 'budget': budget})
+        assert len(statements) <= budget, f'{name}: {len(statements)} consultas (orçamento {budget})'
+
+        benchmark.pedantic(fn, setup=db.session.remove, rounds=ROUNDS, warmup_rounds=0)
+
+
+def get_ok(client, path):
+    response = client.get(path, base_url='https://localhost')
+    assert response.status_code == 200, response.get_json()
+    return response
+
+
+class TestCoreBenchmarks:
+    """Tempo e consultas por escala de jogadores"""
+
+    def test_user_spreadsheet(self, benchmark, dataset, admin_client):
+        run_within_budget(benchmark, dataset, 'spreadsheet',
+                          lambda: get_ok(admin_client, f'/api/planilhas/user/{dataset.player_id}'))
+
+    def test_manager_dashboard(self, benchmark, dataset, admin_client):
+        run_within_budget(benchmark, dataset, 'manager_dashboard',
+                          lambda: get_ok(admin_client, '/api/dashboard/manager'))
+
+    def test_team_financials(self, benchmark, dataset, admin_client):
+        run_within_budget(benchmark, dataset, 'team_financials',
+                          lambda: get_ok(admin_client, '/api/dashboard/team-financials'))
+
+    def test_bankroll_history(self, benchmark, dataset, admin_client):
+        run_within_budget(benchmark, dataset, 'bankroll_history',
+                          lambda: get_ok(admin_client, f'/api/users/{dataset.player_id}/bankroll-history?days=90'))
+
+    def test_team_pnl_series(self, benchmark, dataset, admin_client):
+        run_within_budget(benchmark, dataset, 'team_pnl_series',
+                          lambda: get_ok(admin_client, '/api/dashboard/team-pnl-series?days=90'))
+
+    def test_calculate_team_data(self, benchmark, dataset):
+        run_within_budget(benchmark, dataset, 'team_data', calculate_team_data)
+
+    def test_monthly_detailed_report(self, benchmark, dataset, admin_client):
+        today = datetime.now()
+        run_within_budget(benchmark, dataset, 'monthly_detailed',
+                          lambda: get_ok(admin_client, f'/api/reports/monthly-detailed?month={today.month}&year={today.year}'))
+
+    def test_user_serialization(self, benchmark, dataset):
+        def serialize_players():
+            return [u.to_dict() for u in User.query.filter_by(role=UserRole.PLAYER).all()]
+
+        run_within_budget(benchmark, dataset, 'user_serialization', serialize_players)
@@ -4,7 +4,7 @@ Configuração de testes pytest para o sistema Invictus Poker Team
 import pytest
 import tempfile
 import os
-from src.main import app, db
+from src.main import create_app, db
 from src.models.models import User, Platform, Account, UserRole
 from src.utils.init_data import create_initial_data
 
@@ -15,7 +15,7 @@ def test_app():
     # Criar DB temporário
     db_fd, db_path = tempfile.mkstemp()
     
-    app.config.update({
+    app = create_app({
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
         'SECRET_KEY': 'test-secret-key',
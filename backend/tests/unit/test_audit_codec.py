@@ -0,0 +1,85 @@
+"""
+Testes da codificação compacta de audit_logs
+"""
+import json
+import uuid
+import pytest
+from sqlalchemy import insert
+from src.models.models import db, AuditLog, AuditUserAgent
+from src.utils import audit_codec
+from src.database.migrations.add_compact_audit_encoding import compact_existing_audit_logs
+
+
+@pytest.mark.unit
+class TestAuditPayload:
+    """Payload old/new"""
+
+    def test_only_changed_keys_are_kept(self):
+        payload = audit_codec.encode_payload(
+            {'id': 7, 'status': 'pending', 'amount': 10},
+            {'id': 7, 'status': 'approved', 'amount': 10, 'notes': 'ok'}
+        )
+
+        old_values, new_values = audit_codec.decode_payload(payload)
+        assert old_values == {'status': 'pending'}
+        assert new_values == {'status': 'approved', 'notes': 'ok'}
+
+    def test_large_payload_is_compressed_and_round_trips(self):
+        new_values = {'rows': [{'platform': 'PokerStars', 'balance': 100.5}] * 50}
+        payload = audit_codec.encode_payload(None, new_values)
+
+        assert payload[0] == audit_codec.FORMAT_ZLIB
+        assert len(payload) < len(json.dumps(new_values))
+        assert audit_codec.decode_payload(payload) == (None, new_values)
+
+    def test_empty_values_store_nothing(self):
+        assert audit_codec.encode_payload(None, {}) is None
+        assert audit_codec.decode_payload(None) == (None, None)
+
+
+@pytest.mark.unit
+class TestCompactAuditLog:
+    """AuditLog com dimensões internadas e leitura transparente"""
+
+    def test_user_agent_and_ip_are_interned(self, app_context):
+        agent = f'Mozilla/5.0 pytest-{uuid.uuid4().hex}'
+        logs = [
+            AuditLog(user_id=1, action='codec_test', entity_type='Codec', entity_id=i,
+                     new_values=json.dumps({'i': i}), ip_address='10.1.2.3', user_agent=agent)
+            for i in range(3)
+        ]
+        db.session.add_all(logs)
+        db.session.commit()
+
+        assert len({log.user_agent_id for log in logs}) == 1
+        assert AuditUserAgent.query.filter_by(value=agent).count() == 1
+
+        db.session.expire_all()
+        saved = AuditLog.query.filter_by(user_agent_id=logs[0].user_agent_id).order_by(AuditLog.id).all()
+        assert [json.loads(log.new_values)['i'] for log in saved] == [0, 1, 2]
+        assert saved[0].to_dict()['user_agent'] == agent
+        assert saved[0].to_dict()['ip_address'] == '10.1.2.3'
+        assert saved[0].old_values_text is None and saved[0].payload is not None
+
+    def test_legacy_rows_are_read_and_compacted(self, app_context):
+        agent = f'Legacy/{uuid.uuid4().hex}'
+        result = db.session.execute(insert(AuditLog.__table__).values(
+            user_id=1, action='legacy_row', entity_type='Codec', entity_id=0,
+            old_values=json.dumps({'status': 'pending'}), new_values=json.dumps({'status': 'approved'}),
+            ip_address='192.168.0.1', user_agent=agent
+        ))
+        db.session.commit()
+        log_id = result.inserted_primary_key[0]
+
+        legacy = db.session.get(AuditLog, log_id)
+        assert json.loads(legacy.new_values) == {'status': 'approved'}
+        assert legacy.user_agent == agent
+
+        assert compact_existing_audit_logs(batch_size=1) >= 1
+
+        db.session.expire_all()
+        compacted = db.session.get(AuditLog, log_id)
+        assert compacted.payload is not None and compacted.old_values_text is None
+        assert json.loads(compacted.old_values) == {'status': 'pending'}
+        assert compacted.user_agent == agent
+        assert compacted.ip_address == '192.168.0.1'
@@ -0,0 +1,118 @@
+"""
+Testes do sink de auditoria (gravação síncrona e write-behind)
+"""
+import uuid
+import pytest
+from src.models.models import db, AuditLog
+from src.routes.audit import audit_log_fields
+from src.utils.audit_sink import AuditSink
+
+
+@pytest.fixture
+def sink(test_app):
+    sink = AuditSink(max_queue_size=5, batch_size=3, flush_interval=0.05)
+    sink.init_app(test_app)
+    yield sink
+    sink.shutdown()
+
+
+def _fields(action):
+    return audit_log_fields(user_id=1, action=action, entity_type='SinkTest', entity_id=0,
+                            new_values={'k': 'v'})
+
+
+def _count(prefix):
+    return AuditLog.query.filter(AuditLog.action.like(f'{prefix}%')).count()
+
+
+@pytest.mark.unit
+class TestAuditSink:
+    """Modos sync/async, fila limitada e flush"""
+
+    def test_sync_mode_writes_immediately(self, sink, app_context):
+        prefix = f'sink_sync_{uuid.uuid4().hex[:6]}'
+        sink.set_mode('sync')
+
+        assert sink.submit(_fields(prefix))
+        assert _count(prefix) == 1
+        assert sink.get_stats()['sync_writes'] == 1
+
+    def test_async_mode_batches_and_flushes(self, sink, app_context):
+        prefix = f'sink_async_{uuid.uuid4().hex[:6]}'
+        sink.set_mode('async')
+
+        for i in range(4):
+            assert sink.submit(_fields(f'{prefix}_{i}'))
+        assert sink.flush(timeout=5)
+
+        db.session.expire_all()
+        assert _count(prefix) == 4
+        stats = sink.get_stats()
+        assert stats['written'] == 4
+        assert stats['queued'] == 0
+        assert stats['writer_alive']
+
+    def test_full_queue_falls_back_to_request_write(self, sink, app_context):
+        prefix = f'sink_full_{uuid.uuid4().hex[:6]}'
+        sink._mode = 'async'
+        sink._ensure_writer = lambda: None  # escritor parado: a fila enche
+
+        for i in range(7):
+            assert sink.submit(_fields(f'{prefix}_{i}'))
+
+        assert sink.get_stats()['overflow_writes'] == 2
+        assert _count(prefix) == 2
+
+        sink.shutdown()
+        db.session.expire_all()
+        assert _count(prefix) == 7
+
+    def test_writer_uses_its_own_engine(self, sink, app_context):
+        assert sink._writer_engine() is not db.engine
+        assert sink._writer_engine().url == db.engine.url
+
+    def test_failed_batch_is_retried_not_dropped(self, sink, app_context, monkeypatch):
+        monkeypatch.setattr('src.utils.audit_sink.RETRY_BACKOFF', 0)
+        prefix = f'sink_retry_{uuid.uuid4().hex[:6]}'
+        real_insert = sink._insert
+        calls = []
+
+        def flaky_insert(rows):
+            calls.append(len(rows))
+            if len(calls) <= 2:
+                raise RuntimeError('database is locked')
+            real_insert(rows)
+
+        sink._insert = flaky_insert
+        sink._mode = 'async'
+        sink._ensure_writer = lambda: None
+        for i in range(3):
+            sink.submit(_fields(f'{prefix}_{i}'))
+
+        assert sink.flush(timeout=5)
+        db.session.expire_all()
+        assert _count(prefix) == 3
+        assert sink.get_stats()['failed'] == 0
+
+    def test_bad_row_does_not_drop_the_batch(self, sink, app_context, monkeypatch):
+        monkeypatch.setattr('src.utils.audit_sink.RETRY_BACKOFF', 0)
+        prefix = f'sink_bad_{uuid.uuid4().hex[:6]}'
+        real_insert = sink._insert
+
+        def strict_insert(rows):
+            if any(row['action'].endswith('_bad') for row in rows):
+                raise ValueError('registro inválido')
+            real_insert(rows)
+
+        sink._insert = strict_insert
+        sink._mode = 'async'
+        sink._ensure_writer = lambda: None
+        for suffix in ('ok1', 'bad', 'ok2'):
+            sink.submit(_fields(f'{prefix}_{suffix}'))
+
+        assert sink.flush(timeout=5)
+        db.session.expire_all()
+        assert _count(prefix) == 2
+        stats = sink.get_stats()
+        assert stats['retried'] == 4
+        assert stats['failed'] == 1
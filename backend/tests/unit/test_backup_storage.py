@@ -0,0 +1,202 @@
+"""
+Testes do armazenamento de backups em blocos deduplicados
+"""
+import os
+import json
+import sqlite3
+import threading
+import pytest
+from src.utils.backup_storage import ChunkStore, ChunkIntegrityError
+from src.utils.backup_manager import BackupManager
+from src.utils.backup_catalog import BackupCatalog
+from src.utils.file_lock import file_lock
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """Banco SQLite com dados suficientes para ocupar vários blocos"""
+    db_path = tmp_path / 'live.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE balances (id INTEGER PRIMARY KEY, notes TEXT)")
+        conn.executemany(
+            "INSERT INTO balances (notes) VALUES (?)",
+            [(f"saldo {i} " * 20,) for i in range(3000)]
+        )
+    return str(db_path)
+
+
+@pytest.mark.unit
+class TestChunkStore:
+    """Testes do repositório de blocos"""
+
+    def test_roundtrip_restores_identical_file(self, tmp_path, sqlite_db):
+        store = ChunkStore(str(tmp_path / 'store'), chunk_size=4096)
+        manifest = store.store_file(sqlite_db, 'a.db')
+
+        restored = tmp_path / 'restored.db'
+        written = store.restore_to('a.db', str(restored))
+
+        assert written == manifest['logical_size'] == os.path.getsize(sqlite_db)
+        assert restored.read_bytes() == open(sqlite_db, 'rb').read()
+        assert manifest['physical_size'] < manifest['logical_size']
+
+    def test_identical_backups_share_chunks(self, tmp_path, sqlite_db):
+        store = ChunkStore(str(tmp_path / 'store'), chunk_size=4096)
+        first = store.store_file(sqlite_db, 'a.db')
+        second = store.store_file(sqlite_db, 'b.db')
+
+        assert first['physical_size'] > 0
+        assert second['physical_size'] == 0
+        assert store.physical_size() == first['physical_size']
+
+    def test_garbage_collection_keeps_live_chunks(self, tmp_path, sqlite_db):
+        store = ChunkStore(str(tmp_path / 'store'), chunk_size=4096)
+        store.store_file(sqlite_db, 'a.db')
+        with sqlite3.connect(sqlite_db) as conn:
+            conn.execute("UPDATE balances SET notes = 'alterado' WHERE id > 2900")
+        store.store_file(sqlite_db, 'b.db')
+
+        store.delete_manifest('a.db')
+        freed = store.collect_garbage(['b.db'])
+
+        assert freed > 0
+        assert b''.join(store.iter_chunks('b.db')) == open(sqlite_db, 'rb').read()
+
+    def test_garbage_collection_waits_for_store_in_another_process(self, tmp_path, sqlite_db):
+        store = ChunkStore(str(tmp_path / 'store'), chunk_size=4096)
+        other_process = ChunkStore(str(tmp_path / 'store'), chunk_size=4096)
+        manifest = store.store_file(sqlite_db, 'a.db')
+        store.delete_manifest('a.db')  # blocos órfãos, prestes a serem reaproveitados
+
+        # Outro processo (flock em outro descritor) deduplicou contra esses blocos
+        with file_lock(other_process.lock_path):
+            gc = threading.Thread(target=store.collect_garbage)
+            gc.start()
+            gc.join(0.3)
+            assert gc.is_alive()
+            other_process._write_manifest('b.db', dict(manifest, name='b.db'))
+        gc.join(5)
+
+        assert not gc.is_alive()
+        assert b''.join(store.iter_chunks('b.db')) == open(sqlite_db, 'rb').read()
+
+    def test_corrupted_chunk_is_detected(self, tmp_path, sqlite_db):
+        store = ChunkStore(str(tmp_path / 'store'), chunk_size=4096, codec='zlib')
+        manifest = store.store_file(sqlite_db, 'a.db')
+
+        digest = manifest['chunks'][0]
+        chunk_path = store._chunk_path(digest, 'zlib')
+        with open(chunk_path, 'wb') as f:
+            f.write(store._compress(b'lixo'))
+
+        with pytest.raises(ChunkIntegrityError):
+            list(store.iter_chunks('a.db'))
+
+
+@pytest.mark.unit
+class TestBackupManagerChunked:
+    """Integração do BackupManager com o repositório de blocos"""
+
+    def test_create_list_and_delete(self, tmp_path, sqlite_db):
+        manager = BackupManager(sqlite_db, backup_dir=str(tmp_path / 'backups'))
+        info = manager.create_backup("teste")
+
+        backups = manager.list_backups()
+        assert backups[0]['filename'] == info['filename']
+        assert backups[0]['logical_size'] == os.path.getsize(sqlite_db)
+        assert backups[0]['physical_size'] < backups[0]['logical_size']
+        assert manager.verify_backup(info['filename'])
+
+        assert manager.delete_backup(info['filename'])
+        assert manager.list_backups() == []
+        assert manager.store.physical_size() == 0
+
+    def test_restore_into_open_database(self, tmp_path, sqlite_db):
+        manager = BackupManager(sqlite_db, backup_dir=str(tmp_path / 'backups'))
+        info = manager.create_backup("antes da alteração")
+
+        live_conn = sqlite3.connect(sqlite_db)
+        live_conn.execute("PRAGMA journal_mode=WAL")
+        live_conn.execute("DELETE FROM balances")
+        live_conn.commit()
+
+        progress = []
+        assert manager.restore_backup(info['filename'], progress_callback=progress.append)
+
+        # A conexão já aberta enxerga o conteúdo restaurado
+        assert live_conn.execute("SELECT COUNT(*) FROM balances").fetchone()[0] == 3000
+        live_conn.close()
+
+        assert progress[-1]['status'] == 'completed'
+        assert any(p['status'] == 'copying' for p in progress)
+        assert manager.restore_progress['status'] == 'completed'
+
+    def test_restore_progress_is_shared_between_processes(self, tmp_path, sqlite_db):
+        # Dois managers no mesmo diretório simulam dois workers do gunicorn
+        backup_dir = str(tmp_path / 'backups')
+        restoring = BackupManager(sqlite_db, backup_dir=backup_dir)
+        other_worker = BackupManager(sqlite_db, backup_dir=backup_dir)
+        info = restoring.create_backup("compartilhado")
+        assert other_worker.restore_progress == {'status': 'idle'}
+
+        seen = []
+        assert restoring.restore_backup(
+            info['filename'], progress_callback=lambda p: seen.append(other_worker.restore_progress['status'])
+        )
+
+        assert 'copying' in seen
+        assert other_worker.restore_progress['status'] == 'completed'
+        assert other_worker.restore_progress['filename'] == info['filename']
+
+    def test_restore_running_in_another_process_is_not_started_twice(self, tmp_path, sqlite_db):
+        backup_dir = str(tmp_path / 'backups')
+        restoring = BackupManager(sqlite_db, backup_dir=backup_dir)
+        other_worker = BackupManager(sqlite_db, backup_dir=backup_dir)
+        info = restoring.create_backup("concorrente")
+
+        results = []
+        restoring.restore_backup(
+            info['filename'],
+            progress_callback=lambda p: results.append(other_worker.restore_backup(info['filename']))
+            if p['status'] == 'copying' and not results else None
+        )
+
+        assert results == [False]
+
+
+@pytest.mark.unit
+class TestBackupCatalog:
+    """Catálogo de metadados de backup"""
+
+    def test_concurrent_backups_keep_every_entry(self, tmp_path, sqlite_db):
+        manager = BackupManager(sqlite_db, backup_dir=str(tmp_path / 'backups'))
+
+        threads = [
+            threading.Thread(target=manager.create_backup, args=(f"concorrente {i}",))
+            for i in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        backups = manager.list_backups()
+        assert manager.count_backups() == 5
+        assert len({b['filename'] for b in backups}) == 5
+        assert [b['filename'] for b in manager.list_backups(limit=2, offset=1)] == \
+            [b['filename'] for b in backups[1:3]]
+
+    def test_legacy_metadata_is_imported_once(self, tmp_path):
+        metadata_file = tmp_path / 'backup_metadata.json'
+        metadata_file.write_text(json.dumps({'backups': [
+            {'filename': 'invictus_backup_20250820_162735.db', 'datetime': '2025-08-20T16:27:35',
+             'size': 4096, 'verified': True},
+            {'filename': 'invictus_backup_20250820_162735.db', 'datetime': '2025-08-20T16:27:35',
+             'size': 4096, 'verified': True},
+        ]}))
+
+        catalog = BackupCatalog(str(tmp_path / 'catalog.sqlite'), legacy_metadata_file=str(metadata_file))
+        catalog.remove('invictus_backup_20250820_162735.db')
+        catalog = BackupCatalog(str(tmp_path / 'catalog.sqlite'), legacy_metadata_file=str(metadata_file))
+
+        assert catalog.count() == 0
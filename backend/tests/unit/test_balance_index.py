@@ -0,0 +1,131 @@
+"""
+Testes do índice de fechamentos diários por conta (account_daily_balances)
+"""
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event, select
+from src.models.models import db, User, UserRole, Platform, Account, BalanceHistory, AccountDailyBalance
+from src.utils.balance_index import get_balance_index
+
+
+def daily_rows(account_id):
+    table = AccountDailyBalance.__table__
+    rows = db.session.execute(
+        select(table.c.day, table.c.closing_balance, table.c.net_change)
+        .where(table.c.account_id == account_id).order_by(table.c.day)
+    )
+    return [(day, float(closing), float(net_change)) for day, closing, net_change in rows]
+
+
+@pytest.mark.unit
+class TestBalanceIndex:
+    """Fechamentos mantidos no flush e recalculados a partir do histórico"""
+
+    @pytest.fixture
+    def account(self, app_context):
+        suffix = uuid.uuid4().hex[:8]
+        admin = User.query.filter_by(role=UserRole.ADMIN).first()
+        platform = Platform.query.filter_by(is_active=True).first()
+        player = User(username=f'bal_{suffix}', email=f'bal_{suffix}@test.com',
+                      full_name='Balance Index', role=UserRole.PLAYER)
+        player.set_password('player123')
+        db.session.add(player)
+        db.session.flush()
+        account = Account(user_id=player.id, platform_id=platform.id, account_name='idx', has_account=True,
+                          initial_balance=100, current_balance=100)
+        db.session.add(account)
+        db.session.flush()
+
+        yield account, admin
+        db.session.rollback()
+
+    @staticmethod
+    def add_changes(account, admin, changes):
+        for created_at, old_balance, new_balance in changes:
+            db.session.add(BalanceHistory(account_id=account.id, old_balance=old_balance, new_balance=new_balance,
+                                          change_reason='close_day', changed_by=admin.id, created_at=created_at))
+            db.session.flush()
+
+    def test_flush_keeps_latest_change_of_each_day(self, account):
+        account, admin = account
+        day1 = datetime(2025, 3, 10, 12, 0)
+        day2 = day1 + timedelta(days=2)
+        self.add_changes(account, admin, [
+            (day1, 100, 120),
+            (day1 + timedelta(hours=5), 120, 90),
+            (day2 + timedelta(hours=3), 95, 150),
+            (day2, 90, 95),  # inserido depois, mas anterior no dia: não troca o fechamento
+        ])
+
+        assert daily_rows(account.id) == [
+            (day1.date(), 90.0, -10.0),
+            (day2.date(), 150.0, 60.0),
+        ]
+
+        index = get_balance_index()
+        assert index.closing_balances([account.id], day1.date() + timedelta(days=1)) == {account.id: 90.0}
+        assert index.opening_balances([account.id], day1.date()) == {account.id: 100.0}
+        assert index.opening_balances([account.id], day2.date()) == {account.id: 90.0}
+        assert index.closing_balances([account.id], day1.date() - timedelta(days=1)) == {}
+        assert [row[1:3] for row in index.daily_closings([account.id], day1.date())] == [
+            (day1.date(), 90.0), (day2.date(), 150.0)
+        ]
+
+    def test_rebuild_matches_incremental_index(self, account):
+        account, admin = account
+        start = datetime(2025, 4, 1, 9, 0)
+        balance = 100
+        changes = []
+        for i in range(12):
+            new_balance = balance + (15 if i % 3 else -40)
+            changes.append((start + timedelta(hours=7 * i), balance, new_balance))
+            balance = new_balance
+        self.add_changes(account, admin, changes)
+        incremental = daily_rows(account.id)
+
+        rebuilt_days = get_balance_index().rebuild(db.session.connection(), [account.id])
+
+        assert rebuilt_days == len(incremental)
+        assert daily_rows(account.id) == incremental
+        assert incremental[-1][1] == balance
+
+    def test_forget_removes_account_rows(self, account):
+        account, admin = account
+        self.add_changes(account, admin, [(datetime(2025, 5, 1, 10, 0), 100, 110)])
+
+        get_balance_index().forget(db.session.connection(), [account.id])
+
+        assert daily_rows(account.id) == []
+
+    def test_record_upserts_without_update_then_insert(self, account):
+        account, admin = account
+        day = datetime(2025, 6, 2, 10, 0)
+        connection = db.session.connection()
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(connection, 'before_cursor_execute', listener)
+        try:
+            index = get_balance_index()
+            index.record(connection, [(account.id, day, 100, 130), (account.id, day + timedelta(days=1), 130, 120)])
+            # Outra transação já criou a linha do dia: o conflito vira UPDATE em vez de erro de chave
+            index.record(connection, [(account.id, day - timedelta(hours=1), 90, 100)])
+        finally:
+            event.remove(connection, 'before_cursor_execute', listener)
+
+        assert len(statements) == 2
+        assert all('ON CONFLICT' in statement for statement in statements)
+        assert daily_rows(account.id) == [
+            (day.date(), 130.0, 40.0),
+            ((day + timedelta(days=1)).date(), 120.0, -10.0),
+        ]
+
+    def test_postgresql_upsert_targets_primary_key(self):
+        from sqlalchemy.dialects import postgresql
+        from src.utils.balance_index import _upsert
+
+        class Connection:
+            dialect = postgresql.dialect()
+
+        sql = str(_upsert(Connection).compile(dialect=postgresql.dialect()))
+        assert 'ON CONFLICT (account_id, day) DO UPDATE' in sql
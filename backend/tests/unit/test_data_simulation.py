@@ -0,0 +1,77 @@
+"""
+Testes da simulação vetorizada de dados
+"""
+import uuid
+import pytest
+from src.models.models import db, User, UserRole, Account, BalanceHistory, ReloadRequest, Transaction, ReloadStatus
+
+np = pytest.importorskip('numpy')
+
+from src.utils.data_simulation import simulate_population, insert_population  # noqa: E402
+
+
+@pytest.mark.unit
+class TestVectorizedSimulation:
+    """Geração em arrays e gravação em lote"""
+
+    def test_same_seed_same_data(self):
+        first = simulate_population(players=30, days=120, seed=7)
+        second = simulate_population(players=30, days=120, seed=7)
+        other = simulate_population(players=30, days=120, seed=8)
+
+        assert np.array_equal(first.balances, second.balances)
+        assert np.array_equal(first.reload_amount, second.reload_amount)
+        assert not np.array_equal(first.balances, other.balances)
+
+    def test_population_shapes_and_rules(self):
+        population = simulate_population(players=200, days=200, seed=1)
+        kinds = np.array([population.profiles[i]['type'] for i in population.profile_index])
+
+        assert population.balances.shape == (200, 3, 200)
+        assert (population.balances >= 0).all()
+        # Jogadores novos: saldo parado e sem solicitações antes de entrar
+        new = np.nonzero(kinds == 'new')[0]
+        assert len(new) and (population.first_day[new] == 110).all()
+        assert np.allclose(population.balances[new, :, :110], population.initial_balance[new, :, None])
+        assert not population.reload_amount[new, :110].any()
+        # Saques só para perfis lucrativos
+        assert not population.withdrawal_amount[kinds != 'profitable'].any()
+
+    def test_insert_population_in_chunks(self, app_context):
+        population = simulate_population(players=12, days=60, seed=3)
+        prefix = f'simtest_{uuid.uuid4().hex[:6]}'
+        try:
+            counts = insert_population(population, chunk_size=50, history_every=7, username_prefix=prefix)
+
+            users = User.query.filter(User.username.like(f'{prefix}_%')).all()
+            user_ids = [u.id for u in users]
+            account_ids = [a.id for a in Account.query.filter(Account.user_id.in_(user_ids))]
+            approved = (population.reload_amount[:, :60 - 14] > 0).sum()
+
+            assert counts['users'] == len(users) == 12
+            assert counts['accounts'] == len(account_ids) == 12 * 4
+            assert counts['balance_history'] == BalanceHistory.query.filter(
+                BalanceHistory.account_id.in_(account_ids)).count()
+            assert counts['reload_requests'] == ReloadRequest.query.filter(
+                ReloadRequest.user_id.in_(user_ids)).count()
+            assert ReloadRequest.query.filter(ReloadRequest.user_id.in_(user_ids),
+                                              ReloadRequest.status == ReloadStatus.APPROVED).count() == approved
+            assert counts['transactions'] == Transaction.query.filter(Transaction.user_id.in_(user_ids)).count()
+        finally:
+            db.session.rollback()
+
+    @pytest.mark.parametrize('body', [
+        {'mode': 'vectorized', 'players': 5001, 'days': 30},
+        {'mode': 'vectorized', 'players': 10, 'days': 5 * 365 + 1},
+    ])
+    def test_simulation_endpoint_rejects_oversized_requests(self, client, app_context, body):
+        admin = User.query.filter(User.role == UserRole.ADMIN).first()
+        players_before = User.query.filter(User.role == UserRole.PLAYER).count()
+        with client.session_transaction(base_url='https://localhost') as session:
+            session['user_id'] = admin.id
+
+        response = client.post('/api/users/simulate-year-data', json=body, base_url='https://localhost')
+
+        assert response.status_code == 400
+        assert 'limitada' in response.get_json()['error']
+        assert User.query.filter(User.role == UserRole.PLAYER).count() == players_before
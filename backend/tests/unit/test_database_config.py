@@ -0,0 +1,49 @@
+"""
+Testes da configuração do banco SQLite para workers com threads
+"""
+import threading
+import pytest
+from sqlalchemy import create_engine, text
+from src.config.database import get_database_config
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    options = get_database_config()['SQLALCHEMY_ENGINE_OPTIONS']
+    engine = create_engine(f"sqlite:///{tmp_path / 'threads.db'}", **options)
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'))
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.unit
+class TestSqliteThreadIsolation:
+    """Cada thread de requisição tem a própria conexão e transação"""
+
+    def test_rollback_in_one_thread_keeps_other_thread_writes(self, engine):
+        written = threading.Event()
+        rolled_back = threading.Event()
+
+        def other_request():
+            with engine.connect() as conn:
+                conn.execute(text("INSERT INTO items (name) VALUES ('descartado')"))
+                written.set()
+                rolled_back.wait(5)
+                conn.rollback()
+
+        thread = threading.Thread(target=other_request)
+        thread.start()
+        assert written.wait(5)
+
+        # A transação pendente da outra thread não é visível nem compartilhada
+        with engine.connect() as conn:
+            assert conn.execute(text('SELECT COUNT(*) FROM items')).scalar() == 0
+        rolled_back.set()
+        thread.join(5)
+
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO items (name) VALUES ('mantido')"))
+        with engine.connect() as conn:
+            assert conn.execute(text('SELECT name FROM items')).scalars().all() == ['mantido']
@@ -0,0 +1,102 @@
+"""
+Testes do cache de dimensões (plataformas e retas)
+"""
+import uuid
+import pytest
+from contextlib import contextmanager
+from decimal import Decimal
+from types import SimpleNamespace
+from sqlalchemy import event, text
+from src.models.models import db, Platform, Reta
+from src.utils.dimension_cache import get_dimension_cache, normalize_luxon
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_execute)
+
+
+@pytest.fixture
+def cache(app_context):
+    cache = get_dimension_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.mark.unit
+class TestDimensionCache:
+    """Leitura, versionamento e invalidação"""
+
+    def test_reads_reuse_loaded_rows(self, cache):
+        cache.platforms()
+        db.session.commit()
+
+        with count_queries() as statements:
+            first = cache.platforms()
+            second = cache.platforms()
+            cache.spreadsheet_platforms()
+
+        # Apenas a leitura da versão, uma vez por transação
+        assert len(statements) == 1
+        assert 'dimension_versions' in statements[0]
+        assert [p.id for p in first] == [p.id for p in second]
+        assert all(p in db.session for p in first)
+
+    def test_orm_change_bumps_version(self, cache):
+        name = f'cache_{uuid.uuid4().hex[:8]}'
+        assert name not in [p.name for p in cache.platforms()]
+
+        db.session.add(Platform(name=name, display_name='Cache Test'))
+        db.session.commit()
+        assert name in [p.name for p in cache.platforms()]
+
+        platform = Platform.query.filter_by(name=name).first()
+        platform.is_active = False
+        db.session.commit()
+        assert name not in [p.name for p in cache.platforms()]
+        assert cache.platform(platform.id).is_active is False
+
+    def test_version_from_other_process_reloads(self, cache):
+        reta = Reta(name=f'Reta {uuid.uuid4().hex[:6]}', min_stake=Decimal('1'), max_stake=Decimal('5'))
+        db.session.add(reta)
+        db.session.commit()
+        assert cache.reta(reta.id).name == reta.name
+
+        # Outro worker alterou a reta e a versão direto no banco
+        db.session.execute(text("UPDATE retas SET name = 'Renomeada' WHERE id = :id"), {'id': reta.id})
+        db.session.execute(text("UPDATE dimension_versions SET version = version + 1 WHERE name = 'retas'"))
+        db.session.commit()
+        db.session.expire_all()
+
+        assert cache.reta(reta.id).name == 'Renomeada'
+
+    def test_invalidate_after_bulk_delete(self, cache):
+        platform = Platform(name=f'bulk_{uuid.uuid4().hex[:8]}', display_name='Bulk')
+        db.session.add(platform)
+        db.session.commit()
+        platform_id = platform.id
+        assert cache.platform(platform_id) is not None
+
+        Platform.query.filter_by(id=platform_id).delete(synchronize_session=False)
+        cache.invalidate('platforms')
+        db.session.commit()
+
+        assert cache.platform(platform_id) is None
+
+    def test_normalize_luxon_keeps_only_luxonpay(self):
+        platforms = [SimpleNamespace(name=n) for n in ('luxon', 'pokerstars', 'luxonpay', 'LuxonCash', 'ggpoker')]
+        assert [p.name for p in normalize_luxon(platforms)] == ['pokerstars', 'ggpoker', 'luxonpay']
+
+        without_main = [SimpleNamespace(name=n) for n in ('luxon_a', 'luxon_b')]
+        assert normalize_luxon(without_main) == without_main
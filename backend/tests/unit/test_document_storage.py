@@ -0,0 +1,110 @@
+"""
+Testes do armazenamento de documentos endereçado por conteúdo
+"""
+import io
+import os
+import hashlib
+import threading
+import pytest
+from src.utils.document_storage import DocumentStorage, DocumentTooLargeError
+from src.utils.file_lock import file_lock
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return DocumentStorage(str(tmp_path / 'uploads'))
+
+
+RECEIPT = b'%PDF-1.4 comprovante de reload ' * 4096
+
+
+@pytest.mark.unit
+class TestDocumentStore:
+    """Gravação em blocos com hash e deduplicação"""
+
+    def test_same_content_is_stored_once(self, storage):
+        first = storage.store(io.BytesIO(RECEIPT), max_size=len(RECEIPT))
+        second = storage.store(io.BytesIO(RECEIPT), max_size=len(RECEIPT))
+
+        assert first.sha256 == hashlib.sha256(RECEIPT).hexdigest()
+        assert first.size == len(RECEIPT)
+        assert first.path == second.path
+        assert not first.deduplicated and second.deduplicated
+        assert storage.content_hash(first.path) == first.sha256
+        assert os.listdir(os.path.join(storage.root, 'tmp')) == []
+
+    def test_oversized_upload_leaves_nothing_behind(self, storage):
+        with pytest.raises(DocumentTooLargeError):
+            storage.store(io.BytesIO(RECEIPT), max_size=1024)
+
+        assert os.listdir(os.path.join(storage.root, 'tmp')) == []
+        assert not os.path.exists(os.path.join(storage.root, 'objects'))
+
+    def test_release_waits_for_upload_referencing_the_blob(self, storage):
+        blob = storage.store(io.BytesIO(RECEIPT), max_size=len(RECEIPT))
+        references = set()  # documentos que apontam para o arquivo
+        released = []
+
+        # Outro processo (flock em outro descritor) deduplicou e ainda grava o documento
+        with file_lock(storage.lock_path):
+            release = threading.Thread(
+                target=lambda: released.append(storage.release(blob.path, lambda: blob.path in references))
+            )
+            release.start()
+            release.join(0.3)
+            assert release.is_alive()
+            references.add(blob.path)
+        release.join(5)
+
+        assert released == [False]
+        assert os.path.exists(blob.path)
+
+        references.clear()
+        assert storage.release(blob.path, lambda: blob.path in references)
+        assert not os.path.exists(blob.path)
+
+    def test_failed_reference_removes_new_blob_only(self, storage):
+        def fail(blob):
+            raise RuntimeError('commit falhou')
+
+        with pytest.raises(RuntimeError):
+            storage.store(io.BytesIO(RECEIPT), max_size=len(RECEIPT), reference=fail)
+        assert not os.path.exists(storage.object_path(hashlib.sha256(RECEIPT).hexdigest()))
+
+        blob = storage.store(io.BytesIO(RECEIPT), max_size=len(RECEIPT))
+        with pytest.raises(RuntimeError):
+            storage.store(io.BytesIO(RECEIPT), max_size=len(RECEIPT), reference=fail)
+        assert os.path.exists(blob.path)
+
+
+@pytest.mark.unit
+class TestDocumentDownload:
+    """Range, ETag e X-Accel-Redirect"""
+
+    def test_range_and_conditional_requests(self, test_app, storage):
+        blob = storage.store(io.BytesIO(RECEIPT), max_size=len(RECEIPT))
+
+        with test_app.test_request_context(headers={'Range': 'bytes=0-9'}):
+            response = storage.send(blob.path, 'comprovante.pdf', 'application/pdf')
+            response.direct_passthrough = False
+            assert response.status_code == 206
+            assert response.get_data() == RECEIPT[:10]
+            assert response.headers['ETag'] == f'"{blob.sha256}"'
+            response.close()
+
+        with test_app.test_request_context(headers={'If-None-Match': f'"{blob.sha256}"'}):
+            response = storage.send(blob.path, 'comprovante.pdf', 'application/pdf')
+            assert response.status_code == 304
+            response.close()
+
+    def test_x_accel_redirect_hands_file_to_nginx(self, test_app, storage):
+        blob = storage.store(io.BytesIO(RECEIPT), max_size=len(RECEIPT))
+        storage.sendfile = 'x-accel'
+
+        with test_app.test_request_context():
+            response = storage.send(blob.path, 'comprovante.pdf', 'application/pdf')
+
+        assert response.headers['X-Accel-Redirect'] == \
+            f'/protected-documents/objects/{blob.sha256[:2]}/{blob.sha256}'
+        assert 'comprovante.pdf' in response.headers['Content-Disposition']
+        assert response.get_data() == b''
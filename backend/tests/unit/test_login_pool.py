@@ -0,0 +1,60 @@
+"""
+Testes da verificação de login em pool de processos
+"""
+import pytest
+from werkzeug.security import generate_password_hash
+from src.utils.login_pool import LoginVerifier, LoginPoolSaturatedError
+
+try:
+    import pyotp
+except Exception:
+    pyotp = None
+
+
+@pytest.fixture
+def verifier(test_app):
+    verifier = LoginVerifier(workers=1, max_pending=1)
+    verifier.init_app(test_app)
+    yield verifier
+    verifier.shutdown()
+
+
+@pytest.fixture(scope='module')
+def password_hash():
+    return generate_password_hash('senha-correta')
+
+
+@pytest.mark.unit
+class TestLoginVerifier:
+    """Modos inline/pool, TOTP, fila limitada e métricas"""
+
+    def test_inline_mode_verifies_and_records_cost(self, verifier, password_hash):
+        assert verifier.mode == 'inline'
+
+        assert verifier.verify(password_hash, 'senha-correta') == (True, None)
+        assert verifier.verify(password_hash, 'senha-errada') == (False, None)
+
+        stats = verifier.get_stats()
+        assert stats['verified'] == 2 and stats['inline'] == 2
+        assert stats['hash_ms']['p50'] > 0
+        assert not stats['pool_started']
+
+    @pytest.mark.skipif(pyotp is None, reason='pyotp não instalado')
+    def test_pool_mode_checks_password_and_totp(self, verifier, password_hash):
+        verifier.set_mode('pool')
+        secret = pyotp.random_base32()
+
+        assert verifier.verify(password_hash, 'senha-correta', secret, pyotp.TOTP(secret).now()) == (True, True)
+        assert verifier.verify(password_hash, 'senha-correta', secret, '000000x') == (True, False)
+        assert verifier.get_stats()['pool_started']
+
+    def test_saturated_pool_rejects_immediately(self, verifier, password_hash):
+        verifier.set_mode('pool')
+        verifier._slots.acquire()
+        try:
+            with pytest.raises(LoginPoolSaturatedError):
+                verifier.verify(password_hash, 'senha-correta')
+        finally:
+            verifier._slots.release()
+
+        assert verifier.get_stats()['rejected'] == 1
@@ -0,0 +1,129 @@
+"""
+Testes do migrador SQLite → PostgreSQL (destino SQLite, escrita por executemany)
+"""
+import os
+import tempfile
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from src.models.models import db
+from migrate_to_postgresql import (
+    copy_rows, dependency_levels, migrate_data, missing_dependents, normalize_value, row_digest
+)
+
+TABLES = ['platforms', 'retas', 'dimension_versions']
+
+
+@pytest.fixture
+def databases():
+    paths = []
+    engines = []
+    for _ in range(2):
+        fd, path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        engine = create_engine(f'sqlite:///{path}')
+        db.metadata.create_all(engine, tables=[db.metadata.tables[name] for name in TABLES])
+        paths.append(path)
+        engines.append(engine)
+
+    with engines[0].begin() as conn:
+        conn.execute(db.metadata.tables['platforms'].insert(), [
+            {'id': i, 'name': f'plat_{i}', 'display_name': '' if i == 3 else f'Plataforma {i}',
+             'is_active': i % 2 == 0, 'created_at': datetime(2025, 1, i, 12, 30)}
+            for i in range(1, 8)
+        ])
+        conn.execute(db.metadata.tables['retas'].insert(), [
+            {'id': 1, 'name': 'Reta 0', 'min_stake': Decimal('0.10'), 'max_stake': Decimal('2.50'), 'description': None},
+            {'id': 2, 'name': 'Reta 1', 'min_stake': Decimal('2.5'), 'max_stake': Decimal('10'), 'description': 'x'},
+        ])
+        conn.execute(db.metadata.tables['dimension_versions'].insert(), [
+            {'name': 'platforms', 'version': 3}, {'name': 'retas', 'version': 1},
+        ])
+
+    yield paths, engines
+
+    for engine, path in zip(engines, paths):
+        engine.dispose()
+        os.unlink(path)
+
+
+@pytest.mark.unit
+class TestMigrateToPostgresql:
+    """Carga em lotes, ordem por FK e verificação"""
+
+    def test_migrates_in_batches_and_verifies(self, databases):
+        (source_path, target_path), (_, target) = databases
+
+        results = migrate_data(sqlite_path=source_path, database_url=f'sqlite:///{target_path}',
+                               batch_size=2, jobs=2, backup=False)
+
+        assert {r.name: r.rows for r in results} == {'dimension_versions': 2, 'platforms': 7, 'retas': 2}
+        assert all(r.verified and not r.error for r in results)
+        with target.connect() as conn:
+            assert conn.execute(text("SELECT display_name FROM platforms WHERE id = 3")).scalar() == ''
+
+    def test_verify_only_detects_divergence(self, databases):
+        (source_path, target_path), (_, target) = databases
+        url = f'sqlite:///{target_path}'
+        migrate_data(sqlite_path=source_path, database_url=url, backup=False, verify=False)
+
+        with target.begin() as conn:
+            conn.execute(text("UPDATE retas SET max_stake = 11 WHERE id = 2"))
+
+        results = {r.name: r for r in migrate_data(sqlite_path=source_path, database_url=url, migrate=False)}
+        assert results['retas'].verified is False
+        assert results['retas'].source_count == results['retas'].target_count
+        assert results['platforms'].verified is True
+
+    def test_dependency_levels_follow_foreign_keys(self):
+        levels = [[t.name for t in level] for level in dependency_levels(db.metadata.sorted_tables)]
+        position = {name: i for i, level in enumerate(levels) for name in level}
+
+        assert position['accounts'] > position['users']
+        assert position['accounts'] > position['platforms']
+        assert position['balance_history'] > position['accounts']
+        assert position['platforms'] == 0
+
+    def test_checksum_normalizes_equivalent_values(self):
+        assert normalize_value(Decimal('2.50')) == normalize_value(Decimal('2.5000000000')) == '2.5'
+        assert normalize_value(Decimal('0.00')) == '0'
+        assert row_digest([1, True, None]) != row_digest([1, True, ''])
+
+    def test_copy_writes_null_as_marker(self):
+        copied = {}
+
+        class Cursor:
+            def copy_expert(self, statement, buffer):
+                copied['statement'] = statement
+                copied['csv'] = buffer.read()
+
+            def close(self):
+                pass
+
+        class Connection:
+            dialect = postgresql.dialect()
+            connection = type('DBAPIConnection', (), {'cursor': lambda self: Cursor()})()
+
+        users = db.metadata.tables['users']
+        rows = [(1, 'a"b', None, True), (2, '', datetime(2025, 1, 2, 3, 4), None), (3, '\\N', None, False)]
+        assert copy_rows(Connection, users, ['id', 'full_name', 'last_login', 'is_active'], rows) == 3
+
+        assert copied['statement'].endswith("FROM STDIN WITH (FORMAT csv, NULL '\\N')")
+        assert copied['csv'].splitlines() == [
+            '"1","a""b",\\N,"True"',
+            '"2","","2025-01-02 03:04:00",\\N',
+            '"3","\\N",\\N,"False"',
+        ]
+
+    def test_table_subset_must_include_dependents(self, databases, tmp_path):
+        (source_path, _), _ = databases
+        target = create_engine(f'sqlite:///{tmp_path / "full.sqlite"}')
+        db.metadata.create_all(target)
+        target.dispose()
+
+        assert missing_dependents(db.metadata, ['transactions']) == []
+        with pytest.raises(ValueError, match='accounts'):
+            migrate_data(sqlite_path=source_path, database_url=f'sqlite:///{tmp_path / "full.sqlite"}',
+                         backup=False, tables=['platforms'])
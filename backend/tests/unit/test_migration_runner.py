@@ -0,0 +1,98 @@
+"""
+Testes do executor de migrations versionadas
+"""
+import uuid
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, event, inspect, text
+from src.database.migrations.runner import Migration, MigrationRunner, MIGRATIONS, get_migration_runner
+from src.main import check_schema_version
+from src.models.models import db
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / f'migrations_{uuid.uuid4().hex[:8]}.db'}")
+    yield engine
+    engine.dispose()
+
+
+def applied_versions(engine):
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text('SELECT version FROM schema_migrations ORDER BY version'))]
+
+
+@pytest.mark.unit
+class TestMigrationRunner:
+    """Versão registrada por passo e startup que só lê a versão"""
+
+    def test_fresh_database_upgrades_to_head(self, engine, app_context):
+        runner = get_migration_runner()
+
+        results = runner.upgrade(engine, log=lambda message: None)
+
+        assert [r.version for r in results] == [m.version for m in MIGRATIONS]
+        assert applied_versions(engine) == [m.version for m in MIGRATIONS]
+        assert all(r.duration_ms >= 0 for r in results)
+        columns = {c['name'] for c in inspect(engine).get_columns('accounts')}
+        assert 'team_withdrawal_credits' in columns
+        assert runner.pending(engine) == []
+
+        statements = []
+        event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        assert runner.upgrade(engine) == []
+        assert len(statements) == 1 and 'schema_migrations' in statements[0]
+
+    def test_legacy_database_records_all_steps(self, engine, app_context):
+        # Banco anterior ao controle de versões: tabelas já existem, sem schema_migrations
+        with engine.begin() as conn:
+            conn.execute(text('CREATE TABLE accounts (id INTEGER PRIMARY KEY, team_withdrawal_credits DECIMAL(10, 2))'))
+        runner = get_migration_runner()
+        assert runner.current_version(engine) == 0
+
+        runner.upgrade(engine, log=lambda message: None)
+
+        assert runner.current_version(engine) == runner.head
+        assert [s['applied_at'] is not None for s in runner.status(engine)] == [True] * len(MIGRATIONS)
+
+    def test_failed_step_is_not_recorded(self, engine, app_context):
+        calls = []
+
+        def broken(engine):
+            calls.append('broken')
+            raise RuntimeError('falhou')
+
+        runner = MigrationRunner([
+            Migration(1, 'ok', lambda engine: calls.append('ok')),
+            Migration(2, 'broken', broken),
+        ])
+
+        with pytest.raises(RuntimeError):
+            runner.upgrade(engine, log=lambda message: None)
+
+        assert applied_versions(engine) == [1]
+        assert runner.current_version(engine) == 1
+        with pytest.raises(RuntimeError):
+            runner.upgrade(engine, log=lambda message: None)
+        assert calls == ['ok', 'broken', 'broken']
+
+    def test_outdated_schema_marks_app_unavailable(self, tmp_path):
+        def make_app():
+            app = Flask('schema_check')
+            app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'schema_check.db'}"
+            db.init_app(app)
+            return app
+
+        outdated = make_app()
+        assert check_schema_version(outdated) is False
+        response = outdated.test_client().get('/api/audit/logs')
+        assert response.status_code == 503
+        assert 'bootstrap' in response.get_json()['error']
+
+        with outdated.app_context():
+            get_migration_runner().upgrade(db.engine, log=lambda message: None)
+            db.engine.dispose()
+
+        current = make_app()
+        assert check_schema_version(current) is True
+        assert current.test_client().get('/api/audit/logs').status_code == 404
@@ -0,0 +1,199 @@
+"""
+Testes do NotificationService - varredura de pendências em lote
+"""
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from src.models.models import db, User, UserRole, Platform, Account, ReloadRequest, ReloadStatus
+from src.models.notifications import (
+    Notification, NotificationCategory, UserNotificationSettings, UserNotificationCounter
+)
+from src.utils.notification_service import NotificationService, INCOMPLETE_DATA_TITLE
+
+
+def _make_player(label):
+    suffix = uuid.uuid4().hex[:8]
+    player = User(
+        username=f'{label}_{suffix}',
+        email=f'{label}_{suffix}@example.com',
+        full_name=f'Jogador {label}',
+        role=UserRole.PLAYER,
+        is_active=True
+    )
+    player.set_password('senha123')
+    db.session.add(player)
+    db.session.flush()
+    return player
+
+
+def _incomplete_notifications(user_id):
+    return Notification.query.filter_by(user_id=user_id, title=INCOMPLETE_DATA_TITLE).all()
+
+
+@pytest.fixture
+def sweep_players(app_context):
+    """Jogador com pendências, jogador em dia e jogador com alertas desativados"""
+    platform = Platform.query.first()
+
+    pending = _make_player('pendente')
+    db.session.add(Account(user_id=pending.id, platform_id=platform.id, account_name='pendente',
+                           has_account=True, current_balance=0))
+    db.session.add(ReloadRequest(user_id=pending.id, platform_id=platform.id, amount=50,
+                                 status=ReloadStatus.PENDING,
+                                 created_at=datetime.utcnow() - timedelta(days=5)))
+
+    ok = _make_player('em_dia')
+    db.session.add(Account(user_id=ok.id, platform_id=platform.id, account_name='em_dia',
+                           has_account=True, current_balance=100))
+
+    muted = _make_player('silenciado')
+    db.session.add(Account(user_id=muted.id, platform_id=platform.id, account_name='silenciado',
+                           has_account=False, current_balance=0))
+    db.session.add(UserNotificationSettings(user_id=muted.id, player_alerts_enabled=False))
+
+    db.session.commit()
+    return pending, ok, muted
+
+
+@pytest.mark.unit
+class TestNotifyIncompleteData:
+    """Varredura diária de dados incompletos"""
+
+    def test_sweep_creates_one_notification_per_player_with_issues(self, sweep_players):
+        pending, ok, muted = sweep_players
+
+        NotificationService.notify_incomplete_data()
+
+        notifications = _incomplete_notifications(pending.id)
+        assert len(notifications) == 1
+        assert '1 conta(s) com dados incompletos' in notifications[0].message
+        assert '1 reload(s) pendente(s)' in notifications[0].message
+        assert notifications[0].category == NotificationCategory.PLAYER_ALERT
+        assert notifications[0].expires_at is not None
+        assert _incomplete_notifications(ok.id) == []
+        assert _incomplete_notifications(muted.id) == []
+
+    def test_sweep_skips_players_with_unread_warning(self, sweep_players):
+        pending, _, _ = sweep_players
+
+        NotificationService.notify_incomplete_data()
+        NotificationService.notify_incomplete_data()
+        assert len(_incomplete_notifications(pending.id)) == 1
+
+        NotificationService.mark_all_as_read(pending.id)
+        NotificationService.notify_incomplete_data()
+        assert len(_incomplete_notifications(pending.id)) == 2
+
+
+def _stats_from_scratch(user_id):
+    NotificationService.invalidate_counters([user_id])
+    db.session.commit()
+    return NotificationService.get_notification_stats(user_id)
+
+
+@pytest.mark.unit
+class TestNotificationCounters:
+    """Contadores desnormalizados de notificações"""
+
+    def test_counters_follow_create_read_and_delete(self, app_context):
+        player = _make_player('contador')
+        db.session.commit()
+
+        assert NotificationService.get_notification_stats(player.id) == {'total': 0, 'unread': 0, 'urgent': 0}
+        assert db.session.get(UserNotificationCounter, player.id) is not None
+
+        urgent = NotificationService.create_notification(player.id, 'Urgente', 'msg', is_urgent=True)
+        normal = NotificationService.create_notification(player.id, 'Normal', 'msg')
+        assert NotificationService.get_notification_stats(player.id) == {'total': 2, 'unread': 2, 'urgent': 1}
+
+        NotificationService.mark_as_read(urgent.id, player.id)
+        assert NotificationService.get_notification_stats(player.id) == {'total': 2, 'unread': 1, 'urgent': 0}
+
+        NotificationService.delete_notification(normal.id, player.id)
+        stats = NotificationService.get_notification_stats(player.id)
+        assert stats == {'total': 1, 'unread': 0, 'urgent': 0}
+        assert stats == _stats_from_scratch(player.id)
+
+    def test_expired_notification_triggers_recount(self, app_context):
+        player = _make_player('expira')
+        db.session.commit()
+        NotificationService.get_notification_stats(player.id)
+
+        notification = NotificationService.create_notification(player.id, 'Temporária', 'msg', expires_hours=1)
+        NotificationService.create_notification(player.id, 'Fixa', 'msg')
+        assert NotificationService.get_notification_stats(player.id)['total'] == 2
+
+        counter = db.session.get(UserNotificationCounter, player.id)
+        assert counter.next_expires_at == notification.expires_at
+        assert not counter.is_fresh(notification.expires_at + timedelta(seconds=1))
+
+        # Simula a passagem do tempo até o vencimento
+        notification.expires_at = counter.next_expires_at = datetime.utcnow() - timedelta(minutes=1)
+        db.session.commit()
+        assert NotificationService.get_notification_stats(player.id) == {'total': 1, 'unread': 1, 'urgent': 0}
+
+    def test_list_with_stats_matches_separate_queries(self, app_context):
+        player = _make_player('lista')
+        db.session.commit()
+        NotificationService.get_notification_stats(player.id)
+        for i in range(3):
+            NotificationService.create_notification(player.id, f'Aviso {i}', 'msg', is_urgent=(i == 0))
+        NotificationService.mark_all_as_read(player.id)
+        NotificationService.create_notification(player.id, 'Novo', 'msg')
+
+        notifications, stats = NotificationService.get_user_notifications_with_stats(player.id)
+
+        assert len(notifications) == 4
+        assert stats == {'total': 4, 'unread': 1, 'urgent': 0}
+        assert stats == _stats_from_scratch(player.id)
+
+
+@pytest.mark.unit
+class TestCreateNotificationsBulk:
+    """Fan-out de notificações em lote"""
+
+    def test_bulk_respects_settings_and_pushes_sse(self, app_context):
+        from src.routes.sse import SSEConnection, add_connection, remove_connection
+        from src.models.notifications import NotificationType
+
+        enabled = _make_player('lote_ok')
+        urgent_only = _make_player('lote_urgente')
+        muted = _make_player('lote_mudo')
+        db.session.add(UserNotificationSettings(user_id=urgent_only.id, urgent_only=True))
+        db.session.add(UserNotificationSettings(user_id=muted.id, reload_requests_enabled=False))
+        db.session.commit()
+        NotificationService.get_notification_stats(enabled.id)
+
+        connection = SSEConnection(enabled.id)
+        add_connection(enabled.id, connection)
+        try:
+            created = NotificationService.create_notifications_bulk(
+                user_ids=[enabled.id, urgent_only.id, muted.id, 999999],
+                title='Lote', message='msg',
+                notification_type=NotificationType.WARNING,
+                category=NotificationCategory.RELOAD_REQUEST,
+                expires_hours=1
+            )
+            event = connection.get_next(timeout=0.1)
+        finally:
+            remove_connection(enabled.id, connection)
+
+        assert created == 1
+        assert Notification.query.filter_by(title='Lote', user_id=enabled.id).count() == 1
+        assert Notification.query.filter(
+            Notification.title == 'Lote', Notification.user_id.in_([urgent_only.id, muted.id])
+        ).count() == 0
+        assert NotificationService.get_notification_stats(enabled.id) == {'total': 1, 'unread': 1, 'urgent': 0}
+        assert event is not None and 'new_notification' in event
+
+    def test_bulk_urgent_reaches_urgent_only_users(self, app_context):
+        urgent_only = _make_player('lote_urgente2')
+        db.session.add(UserNotificationSettings(user_id=urgent_only.id, urgent_only=True))
+        db.session.commit()
+
+        created = NotificationService.create_notifications_bulk(
+            user_ids=[urgent_only.id], title='Lote urgente', message='msg', is_urgent=True
+        )
+
+        assert created == 1
+        assert NotificationService.create_notifications_bulk(user_ids=[], title='x', message='y') == 0
@@ -0,0 +1,85 @@
+"""
+Testes de paginação - modo OFFSET e modo cursor (keyset)
+"""
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from src.models.models import db, AuditLog
+from src.utils.pagination import (
+    paginate_query, encode_cursor, decode_cursor, count_query, clear_count_cache, InvalidCursorError
+)
+
+
+@pytest.fixture
+def audit_rows(app_context):
+    """Sete logs com marca própria, dois deles com o mesmo created_at"""
+    action = f'pagination_{uuid.uuid4().hex[:8]}'
+    base = datetime(2025, 6, 1, 12, 0, 0)
+    offsets = [0, 1, 2, 2, 3, 4, 5]
+    logs = [AuditLog(user_id=1, action=action, entity_type='Pagination', entity_id=i,
+                     created_at=base + timedelta(minutes=minutes))
+            for i, minutes in enumerate(offsets)]
+    db.session.add_all(logs)
+    db.session.commit()
+    return AuditLog.query.filter_by(action=action).order_by(AuditLog.created_at.desc())
+
+
+def _keyset_page(test_app, query, cursor='', per_page=3):
+    with test_app.test_request_context(f'/?cursor={cursor}&per_page={per_page}'):
+        return paginate_query(query, keyset=(AuditLog.created_at, AuditLog.id), count='cached')
+
+
+@pytest.mark.unit
+class TestCursorPagination:
+    """Paginação por cursor"""
+
+    def test_cursor_round_trip(self):
+        moment = datetime(2025, 1, 2, 3, 4, 5, 678)
+        assert decode_cursor(encode_cursor(moment, 42)) == (moment, 42)
+
+    def test_invalid_cursor_is_rejected(self):
+        with pytest.raises(InvalidCursorError):
+            decode_cursor('nao-e-um-cursor')
+
+    def test_pages_cover_all_rows_without_overlap(self, test_app, audit_rows):
+        expected = [log.id for log in audit_rows.order_by(None)
+                    .order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).all()]
+
+        seen, cursor, pages = [], '', 0
+        while True:
+            result = _keyset_page(test_app, audit_rows, cursor)
+            seen.extend(log.id for log in result['items'])
+            pages += 1
+            assert result['pagination']['total'] == 7
+            if not result['pagination']['has_next']:
+                assert result['pagination']['next_cursor'] is None
+                break
+            cursor = result['pagination']['next_cursor']
+
+        assert pages == 3
+        assert seen == expected
+
+    def test_offset_mode_is_kept_without_cursor(self, test_app, audit_rows):
+        with test_app.test_request_context('/?page=3&per_page=3'):
+            result = paginate_query(audit_rows, keyset=(AuditLog.created_at, AuditLog.id))
+
+        assert len(result['items']) == 1
+        assert result['pagination']['pages'] == 3
+        assert result['pagination']['has_next'] is False
+
+
+@pytest.mark.unit
+class TestCountModes:
+    """Total exato, em cache ou omitido"""
+
+    def test_cached_count_is_reused(self, audit_rows):
+        clear_count_cache()
+        assert count_query(audit_rows, 'cached') == 7
+
+        log = audit_rows.first()
+        db.session.add(AuditLog(user_id=1, action=log.action, entity_type='Pagination', entity_id=99))
+        db.session.commit()
+
+        assert count_query(audit_rows, 'cached') == 7
+        assert count_query(audit_rows, 'exact') == 8
+        assert count_query(audit_rows, 'none') is None
@@ -0,0 +1,135 @@
+"""
+Testes do motor de P&L único (planilha, snapshots e relatórios)
+"""
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from src.models.models import (
+    db, User, UserRole, Platform, Account, ReloadRequest, ReloadStatus,
+    WithdrawalRequest, WithdrawalStatus
+)
+from src.services.pnl import PnLService, PlayerPnL, AccountFigures
+from src.routes.team_snapshots import calculate_team_data
+
+
+def figures(platform_name, initial, current, has_account=True, **manual):
+    return AccountFigures(id=0, user_id=1, platform_id=0, platform_name=platform_name, has_account=has_account,
+                          initial_balance=initial, current_balance=current, **manual)
+
+
+@pytest.mark.unit
+class TestPnLRules:
+    """Regra do time calculada em uma passada"""
+
+    def test_luxon_initial_plus_approved_reloads(self):
+        pnl = PlayerPnL(user_id=1, approved_reloads=50.0, accounts=[
+            figures('luxonpay', 100.0, 20.0),
+            figures('ggpoker', 50.0, 100.0),
+            figures('pokerstars', 30.0, 25.0),
+            figures('partypoker', 40.0, 999.0, has_account=False),
+        ]).compute()
+
+        assert pnl.total_investment == 150.0
+        assert pnl.total_current == 145.0
+        assert pnl.total_pnl == -5.0
+        assert pnl.accounts_pnl == 45.0  # Luxon e conta inexistente fora
+        assert pnl.reload_total == 50.0
+        assert pnl.active_accounts == 3
+
+    def test_manual_values_take_precedence(self):
+        manual_investment = PlayerPnL(user_id=1, approved_reloads=500.0, accounts=[
+            figures('luxon', 100.0, 100.0, manual_team_investment=300.0, investment_notes='acordo'),
+            figures('ggpoker', 50.0, 250.0),
+        ]).compute()
+        assert manual_investment.is_manual_investment
+        assert manual_investment.total_investment == 300.0  # reloads aprovados ignorados
+        assert manual_investment.manual_investment_notes == 'acordo'
+
+        manual_reload = PlayerPnL(user_id=1, approved_reloads=500.0, accounts=[
+            figures('luxon', 100.0, 100.0, manual_reload_amount=20.0),
+            figures('ggpoker', 50.0, 250.0, manual_reload_amount=10.0, reload_notes='ajuste'),
+        ]).compute()
+        assert manual_reload.total_investment == 130.0
+        assert manual_reload.reload_total == 30.0
+        assert manual_reload.manual_reload_notes == 'ajuste'
+
+    def test_without_luxon_uses_sum_of_initials(self):
+        pnl = PlayerPnL(user_id=1, accounts=[
+            figures('ggpoker', 50.0, 60.0),
+            figures('pokerstars', 30.0, 30.0),
+        ]).compute()
+
+        assert pnl.total_investment == 80.0
+        assert pnl.total_pnl == 10.0
+
+
+@pytest.mark.unit
+class TestPnLService:
+    """Carga em lote e concordância entre os chamadores"""
+
+    @pytest.fixture
+    def team(self, app_context):
+        suffix = uuid.uuid4().hex[:8]
+        luxon = Platform.query.filter(Platform.name.ilike('%luxon%')).first()
+        poker = Platform(name=f'site_{suffix}', display_name='Site', is_active=True)
+        db.session.add(poker)
+        admin = User.query.filter_by(role=UserRole.ADMIN).first()
+        now = datetime.utcnow()
+
+        players = []
+        for i in range(3):
+            player = User(username=f'pnl_{suffix}_{i}', email=f'pnl_{suffix}_{i}@test.com',
+                          full_name=f'PnL {i}', role=UserRole.PLAYER)
+            player.set_password('player123')
+            db.session.add(player)
+            db.session.flush()
+            db.session.add_all([
+                Account(user_id=player.id, platform_id=luxon.id, account_name='lux', has_account=True,
+                        initial_balance=100, current_balance=10 * i),
+                Account(user_id=player.id, platform_id=poker.id, account_name='site', has_account=True,
+                        initial_balance=50, current_balance=80 + 100 * i),
+                ReloadRequest(user_id=player.id, platform_id=poker.id, amount=40, status=ReloadStatus.APPROVED,
+                              approved_by=admin.id, approved_at=now - timedelta(days=40)),
+                ReloadRequest(user_id=player.id, platform_id=poker.id, amount=25, status=ReloadStatus.APPROVED,
+                              approved_by=admin.id, approved_at=now - timedelta(days=2)),
+                WithdrawalRequest(user_id=player.id, platform_id=poker.id, amount=15,
+                                  status=WithdrawalStatus.COMPLETED, approved_by=admin.id,
+                                  approved_at=now - timedelta(days=1)),
+            ])
+            players.append(player)
+        db.session.flush()
+
+        yield players, now
+        db.session.rollback()
+
+    def test_bulk_load_matches_single_player(self, team):
+        players, now = team
+        ids = [p.id for p in players]
+
+        loaded = PnLService.load(ids, now - timedelta(days=30), now + timedelta(days=1))
+
+        assert list(loaded) == ids
+        for player in players:
+            pnl = loaded[player.id]
+            accounts = Account.query.filter_by(user_id=player.id, is_active=True).all()
+            single = PnLService.for_player(player.id, accounts=accounts)
+            assert pnl.total_investment == single.total_investment == 165.0  # Luxon 100 + reloads 65
+            assert pnl.total_pnl == single.total_pnl
+            assert pnl.period_reloads == 25.0
+            assert pnl.period_withdrawals == 15.0
+            assert pnl.approved_reloads == 65.0
+
+    def test_snapshot_totals_are_sum_of_player_figures(self, team):
+        players, _ = team
+        everyone = db.session.query(User.id).filter_by(role=UserRole.PLAYER, is_active=True)
+        expected = PnLService.load([row.id for row in everyone])
+
+        data = calculate_team_data()
+
+        with_accounts = [p for p in expected.values() if p.accounts]
+        assert data['total_pnl'] == pytest.approx(sum(p.total_pnl for p in with_accounts))
+        assert data['total_investment'] == pytest.approx(sum(p.total_investment for p in with_accounts))
+        assert data['active_players'] == len(with_accounts)
+        # Saldo 80 + 110i contra investimento 165 (Luxon 100 + reloads 65)
+        team_pnl = [expected[p.id].total_pnl for p in players]
+        assert team_pnl == [-85.0, 25.0, 135.0]
@@ -0,0 +1,35 @@
+"""
+Testes da migration de índices compostos e parciais
+"""
+import pytest
+from sqlalchemy import inspect, text
+from src.models.models import db
+from src.database.migrations.add_query_indexes import add_query_indexes, QUERY_INDEXES
+
+
+def index_names(table):
+    return {index['name'] for index in inspect(db.engine).get_indexes(table)}
+
+
+@pytest.mark.unit
+class TestQueryIndexes:
+    """Criação idempotente dos índices declarados nos modelos"""
+
+    def test_declared_indexes_exist_after_create_all(self, app_context):
+        for table, names in QUERY_INDEXES.items():
+            assert set(names) <= index_names(table)
+
+        assert add_query_indexes(db.engine) == []
+
+    def test_recreates_missing_indexes_once(self, app_context):
+        with db.engine.begin() as conn:
+            conn.execute(text('DROP INDEX ix_reload_requests_pending'))
+            conn.execute(text('DROP INDEX ix_balance_history_account_created'))
+
+        created = add_query_indexes(db.engine)
+
+        assert sorted(created) == ['ix_balance_history_account_created', 'ix_reload_requests_pending']
+        assert add_query_indexes(db.engine) == []
+        pending = [i for i in inspect(db.engine).get_indexes('reload_requests') if i['name'] == 'ix_reload_requests_pending']
+        assert pending[0]['column_names'] == ['created_at']
+        assert "status = 'PENDING'" in str(pending[0]['dialect_options']['sqlite_where'])
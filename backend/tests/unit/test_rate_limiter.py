@@ -0,0 +1,65 @@
+"""
+Testes do bloqueio progressivo e dos stores de tentativas falhadas
+"""
+import pytest
+from src.middleware.attempt_store import MemoryAttemptStore, SQLiteAttemptStore
+from src.middleware.rate_limiter import RateLimiter
+
+
+@pytest.mark.unit
+class TestMemoryAttemptStore:
+    """Janela deslizante em memória"""
+
+    def test_attempts_expire_with_the_window(self):
+        store = MemoryAttemptStore(window_seconds=600, bucket_seconds=60)
+
+        start = 60 * 16_000
+        for minute in range(3):
+            store.record('10.0.0.1', now=start + minute * 60)
+
+        assert store.count('10.0.0.1', now=start + 180) == 3
+        assert store.count('10.0.0.1', now=start + 600) == 2
+        assert store.count('10.0.0.1', now=start + 2000) == 0
+        assert len(store) == 0
+
+    def test_keys_are_bounded_and_stale_keys_evicted(self):
+        store = MemoryAttemptStore(window_seconds=600, bucket_seconds=60, max_keys=3)
+
+        for i in range(5):
+            store.record(f'10.0.0.{i}', now=1_000_000)
+        assert len(store) == 3
+        assert store.count('10.0.0.0', now=1_000_000) == 0
+
+        store.record('10.0.1.1', now=1_000_000 + 3600)
+        assert len(store) == 1
+
+
+@pytest.mark.unit
+class TestSQLiteAttemptStore:
+    """Store compartilhado entre workers"""
+
+    def test_counts_are_shared_between_instances(self, tmp_path):
+        path = str(tmp_path / 'rate_limit.sqlite')
+        worker_a, worker_b = SQLiteAttemptStore(path), SQLiteAttemptStore(path)
+
+        worker_a.record('10.0.0.9')
+        worker_b.record('10.0.0.9')
+        assert worker_a.count('10.0.0.9') == 2
+
+        worker_b.clear('10.0.0.9')
+        assert worker_a.count('10.0.0.9') == 0
+
+    def test_progressive_delay_uses_shared_store(self, tmp_path):
+        path = str(tmp_path / 'rate_limit.sqlite')
+        limiter_a, limiter_b = RateLimiter(), RateLimiter()
+        limiter_a.attempt_store = SQLiteAttemptStore(path)
+        limiter_b.attempt_store = SQLiteAttemptStore(path)
+
+        for _ in range(4):
+            limiter_a.record_failed_attempt('10.0.0.7')
+        for _ in range(2):
+            limiter_b.record_failed_attempt('10.0.0.7')
+
+        assert limiter_b.get_delay_for_ip('10.0.0.7') == 30
+        limiter_b.clear_failed_attempts('10.0.0.7')
+        assert limiter_a.get_delay_for_ip('10.0.0.7') == 0
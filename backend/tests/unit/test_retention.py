@@ -0,0 +1,172 @@
+"""
+Testes de retenção - arquivamento mensal de auditoria e notificações
+"""
+import os
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from itertools import islice
+from src.models.models import db, User, UserRole, AuditLog
+from src.models.notifications import Notification, NotificationCategory
+from src.utils.retention import RetentionService
+from src.routes.audit import _paginate_with_archive, _paginate_with_cursor, _archive_predicate
+
+
+@pytest.fixture
+def retention(tmp_path):
+    service = RetentionService()
+    service.archive_dir = str(tmp_path / 'archive')
+    return service
+
+
+@pytest.fixture
+def history_user(app_context):
+    suffix = uuid.uuid4().hex[:8]
+    user = User(username=f'historico_{suffix}', email=f'historico_{suffix}@example.com',
+                full_name='Usuário Histórico', role=UserRole.ADMIN, is_active=True)
+    user.set_password('senha123')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _add_audit_logs(user, ages_in_days, action='retention_test'):
+    now = datetime.utcnow()
+    for i, age in enumerate(ages_in_days):
+        db.session.add(AuditLog(user_id=user.id, action=f'{action}_{i}', entity_type='Retention',
+                                entity_id=i, new_values='{"i": %d}' % i, ip_address='127.0.0.1',
+                                user_agent='pytest', created_at=now - timedelta(days=age)))
+    db.session.commit()
+
+
+@pytest.mark.unit
+class TestRetentionArchive:
+    """Arquivamento em lotes para arquivos mensais comprimidos"""
+
+    def test_audit_logs_are_archived_in_batches_and_removed(self, retention, history_user):
+        _add_audit_logs(history_user, [1, 2, 40, 41, 75, 76, 77])
+
+        archived = retention.archive_audit_logs(days=30, batch_size=2)
+
+        assert archived >= 5
+        remaining = AuditLog.query.filter_by(user_id=history_user.id).count()
+        assert remaining == 2
+        assert len(retention.archive_months('audit_logs')) >= 2
+        for month in retention.archive_months('audit_logs'):
+            assert os.path.exists(retention._archive_path('audit_logs', month))
+
+        rows = [row for row in retention.query_archive('audit_logs')
+                if row['user_id'] == history_user.id]
+        assert len(rows) == 5
+        assert [row['created_at'] for row in rows] == sorted((row['created_at'] for row in rows), reverse=True)
+        assert rows[0]['new_values'] == '{"i": 2}'
+
+    def test_archive_reads_ignore_duplicated_batches(self, retention, history_user):
+        _add_audit_logs(history_user, [50])
+        log = AuditLog.query.filter_by(user_id=history_user.id).one()
+        row = {column.name: getattr(log, column.key) for column in AuditLog.__table__.columns}
+
+        # Lote gravado duas vezes (queda entre arquivo e DELETE)
+        retention._write_archive('audit_logs', AuditLog.expand_rows([row]))
+        retention.archive_audit_logs(days=30)
+
+        rows = [r for r in retention.query_archive('audit_logs') if r['user_id'] == history_user.id]
+        assert len(rows) == 1
+
+    def test_only_read_or_expired_notifications_are_archived(self, retention, history_user):
+        old = datetime.utcnow() - timedelta(days=60)
+        for is_read in (True, False):
+            db.session.add(Notification(user_id=history_user.id, title=f'antiga lida={is_read}', message='msg',
+                                        category=NotificationCategory.SYSTEM_MESSAGE,
+                                        is_read=is_read, created_at=old))
+        db.session.commit()
+
+        assert retention.archive_notifications(days=30) >= 1
+
+        titles = [n.title for n in Notification.query.filter_by(user_id=history_user.id)]
+        assert titles == ['antiga lida=False']
+        archived = retention.query_archive('notifications', predicate=lambda r: r['user_id'] == history_user.id)
+        assert [row['title'] for row in archived] == ['antiga lida=True']
+        assert archived[0]['category'] == NotificationCategory.SYSTEM_MESSAGE.value
+
+
+@pytest.mark.unit
+class TestAuditLogsWithArchive:
+    """Listagem de /api/audit/logs atravessando o arquivo"""
+
+    def test_pages_continue_from_hot_table_into_archive(self, retention, history_user):
+        _add_audit_logs(history_user, [1, 2, 3, 40, 41], action='pagina')
+        retention.archive_audit_logs(days=30)
+
+        start_date = datetime.utcnow() - timedelta(days=90)
+        query = AuditLog.query.filter(AuditLog.user_id == history_user.id,
+                                      AuditLog.created_at >= start_date).order_by(AuditLog.created_at.desc())
+        predicate = _archive_predicate(user_id_filter=history_user.id)
+
+        first = _paginate_with_archive(query, retention, start_date, 1, 2, predicate)
+        second = _paginate_with_archive(query, retention, start_date, 2, 2, predicate)
+        third = _paginate_with_archive(query, retention, start_date, 3, 2, predicate)
+
+        assert first['pagination']['total'] == 5
+        assert first['pagination']['pages'] == 3
+        assert [log.get('archived', False) for log in first['logs']] == [False, False]
+        assert [log.get('archived', False) for log in second['logs']] == [False, True]
+        assert [log['action'] for log in third['logs']] == ['pagina_4']
+        assert third['logs'][0]['user_name'] == 'Usuário Histórico'
+        assert not third['pagination']['has_next']
+
+    def test_cursor_continues_from_hot_table_into_archive(self, retention, history_user):
+        _add_audit_logs(history_user, [1, 2, 3, 40, 41], action='cursor')
+        retention.archive_audit_logs(days=30)
+
+        start_date = datetime.utcnow() - timedelta(days=90)
+        query = AuditLog.query.filter(AuditLog.user_id == history_user.id,
+                                      AuditLog.created_at >= start_date).order_by(AuditLog.created_at.desc())
+        predicate = _archive_predicate(user_id_filter=history_user.id)
+
+        actions, cursor = [], None
+        for _ in range(3):
+            page = _paginate_with_cursor(query, retention, start_date, cursor, 2, predicate)
+            actions.extend(log['action'] for log in page['logs'])
+            assert page['pagination']['total'] == 5
+            cursor = page['pagination']['next_cursor']
+            if not page['pagination']['has_next']:
+                break
+
+        assert actions == [f'cursor_{i}' for i in range(5)]
+        assert cursor is None
+
+    def test_archive_pages_stop_early_and_reuse_month_counts(self, retention, history_user):
+        _add_audit_logs(history_user, [40, 75, 110, 145], action='streaming')
+        retention.archive_audit_logs(days=30)
+        predicate = _archive_predicate(user_id_filter=history_user.id)
+        months_read = []
+        iter_month = retention._iter_month
+
+        def spy(table_name, month):
+            months_read.append(month)
+            return iter_month(table_name, month)
+
+        retention._iter_month = spy
+        newest = retention.archive_months('audit_logs')[0]
+
+        first = next(retention.iter_archive('audit_logs', predicate=predicate))
+        assert first['action'] == 'streaming_0'
+        assert months_read == [newest]
+
+        assert retention.count_archive('audit_logs', predicate=predicate) == 4
+        months_read.clear()
+        assert retention.count_archive('audit_logs', predicate=predicate) == 4
+        assert months_read == []
+
+        # Com as contagens conhecidas, o offset pula meses sem descomprimi-los
+        last = list(retention.iter_archive('audit_logs', predicate=predicate, offset=3))
+        assert [row['action'] for row in last] == ['streaming_3']
+        assert months_read == [retention.archive_months('audit_logs')[-1]]
+
+        # A partir do cursor, só o mês dele e o seguinte são abertos
+        months_read.clear()
+        position = (first['created_at'], first['id'])
+        following = list(islice(retention.iter_archive('audit_logs', predicate=predicate, before=position), 1))
+        assert following[0]['action'] == 'streaming_1'
+        assert months_read == retention.archive_months('audit_logs')[:2]
@@ -0,0 +1,75 @@
+"""
+Testes do agendador unificado (eleição de líder, histórico e controle de jobs)
+"""
+import pytest
+from flask import Flask
+from src.utils.scheduler import SchedulerService
+
+
+@pytest.fixture
+def state_app(tmp_path):
+    """App mínima cujo instance_path guarda o estado do agendador"""
+    app = Flask(__name__, instance_path=str(tmp_path))
+    app.config['SCHEDULER_ENABLED'] = False
+    return app
+
+
+@pytest.mark.unit
+class TestSchedulerService:
+    """Testes do SchedulerService"""
+
+    def test_only_one_process_becomes_leader(self, state_app):
+        first = SchedulerService(state_app)
+        second = SchedulerService(state_app)
+
+        assert first._try_acquire_leadership()
+        assert not second._try_acquire_leadership()
+
+        first.stop()
+        assert second._try_acquire_leadership()
+        second.stop()
+
+    def test_requested_run_is_executed_by_leader_and_recorded(self, state_app):
+        calls = []
+        leader = SchedulerService(state_app)
+        follower = SchedulerService(state_app)
+        for scheduler in (leader, follower):
+            scheduler.add_job('sweep', lambda: calls.append(1), daily_at='03:00')
+
+        leader._run_pending()
+        assert calls == []
+
+        assert follower.request_run('sweep')
+        leader._run_pending()
+        assert calls == [1]
+
+        status = follower.get_status()
+        job = status['jobs'][0]
+        assert job['run_requested_at'] is None
+        assert job['metrics']['runs'] == 1
+        assert job['metrics']['failures'] == 0
+        assert follower.get_history('sweep')[0]['status'] == 'success'
+
+    def test_failed_job_and_pause_are_shared(self, state_app):
+        leader = SchedulerService(state_app)
+        follower = SchedulerService(state_app)
+
+        def boom():
+            raise RuntimeError("falhou")
+
+        for scheduler in (leader, follower):
+            scheduler.add_job('boom', boom, interval_seconds=1)
+
+        follower.set_enabled('boom', False)
+        leader.jobs['boom'].next_run = None
+        leader._run_pending()
+        leader.jobs['boom'].next_run = leader.jobs['boom'].next_run.replace(year=2000)
+        leader._run_pending()
+        assert leader.get_history('boom') == []
+        assert not follower.is_job_enabled('boom')
+
+        follower.set_enabled('boom', True)
+        leader._run_pending()
+        run = leader.get_history('boom')[0]
+        assert run['status'] == 'failed'
+        assert run['error'] == 'falhou'
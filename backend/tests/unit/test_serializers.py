@@ -0,0 +1,77 @@
+"""
+Testes da serialização em lote (sem uma consulta por linha)
+"""
+import uuid
+import pytest
+from contextlib import contextmanager
+from decimal import Decimal
+from sqlalchemy import event
+from src.models.models import db, User, UserRole, Platform, Transaction, TransactionType
+from src.utils.serializers import with_relationships, serialize
+from src.utils.dimension_cache import get_dimension_cache
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_execute)
+
+
+@pytest.fixture
+def transactions(app_context):
+    """Oito transações de usuários e criadores distintos"""
+    suffix = uuid.uuid4().hex[:8]
+    platform = Platform.query.first()
+    users = []
+    for i in range(8):
+        user = User(username=f'serial_{suffix}_{i}', email=f'serial_{suffix}_{i}@example.com',
+                    full_name=f'Jogador {i}', role=UserRole.PLAYER, is_active=True)
+        user.set_password('senha123')
+        users.append(user)
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all([
+        Transaction(user_id=user.id, platform_id=platform.id, transaction_type=TransactionType.RELOAD,
+                    amount=Decimal('10.00'), description=f'serial_{suffix}', created_by=users[-1 - i].id)
+        for i, user in enumerate(users)
+    ])
+    db.session.commit()
+    db.session.expunge_all()
+    return Transaction.query.filter_by(description=f'serial_{suffix}').order_by(Transaction.id)
+
+
+@pytest.mark.unit
+class TestSerializers:
+    """Carregamento dos relacionamentos de to_dict()"""
+
+    def test_list_query_loads_relationships_up_front(self, transactions):
+        with count_queries() as statements:
+            rows = with_relationships(transactions).all()
+            data = [row.to_dict() for row in rows]
+
+        assert len(data) == 8
+        assert data[0]['user_name'] == 'Jogador 0' and data[0]['creator_name'] == 'Jogador 7'
+        # lista + users (user) + platforms + users (creator)
+        assert len(statements) <= 4
+
+    def test_serialize_batches_missing_dimensions(self, transactions):
+        get_dimension_cache().platforms()  # cache de plataformas já carregado
+        rows = transactions.all()
+
+        with count_queries() as statements:
+            data = serialize(rows)
+
+        assert [row['user_name'] for row in data] == [f'Jogador {i}' for i in range(8)]
+        # uma consulta para users (user + creator); as plataformas vêm do cache
+        assert len([s for s in statements if 'FROM users' in s]) == 1
+        assert not any('FROM platforms' in s for s in statements)
+        assert len(statements) <= 2